@@ -1,42 +1,42 @@
 """
-Context processor to make user profile image available in all templates.
+Context processors: the user's profile image and the approval inbox badges.
 """
-from django.db.models import Q
+from django.utils.functional import SimpleLazyObject
+
+from .identity import get_user_employee, get_user_identity
+from .inbox import pending_counts, queues_for
 
 
 def user_profile_image(request):
     """Add user's employee profile image to context."""
     profile_image = None
-    employee = None
-    
+
     if request.user.is_authenticated:
         try:
-            from master.models import Employee
-            
-            # Try to find employee linked to user
-            employee = Employee.objects.filter(
-                Q(personal_email=request.user.email) | 
-                Q(office_email=request.user.email) |
-                Q(staff_id=request.user.username)
-            ).first()
-            
-            # Also check if user has a profile with employee_code
-            if not employee:
-                try:
-                    profile = request.user.profile
-                    if profile.employee_code:
-                        employee = Employee.objects.filter(staff_id=profile.employee_code).first()
-                except:
-                    pass
-            
-            # Get profile image if employee exists
-            if employee and employee.profile_image:
-                profile_image = employee.profile_image.url
-        except:
+            profile_image = get_user_identity(request)['profile_image']
+        except Exception:
             pass
-    
+
     return {
-        'user_employee': employee,
+        # Only hits the database if a template actually uses it
+        'user_employee': SimpleLazyObject(lambda: get_user_employee(request)),
         'user_profile_image': profile_image,
     }
 
+
+def _inbox_badges(user) -> dict:
+    counts = pending_counts(queues_for(user))
+    badges = {key.replace('-', '_'): count for key, count in counts.items()}
+    badges['total'] = sum(counts.values())
+    return badges
+
+
+def inbox_badges(request):
+    """
+    Pending approvals per queue for the sidebar/header badges, e.g.
+    inbox_pending.total, inbox_pending.tada_hr. The counts come from the
+    cached counters (accounts.inbox) and are only read if a template uses them.
+    """
+    if not request.user.is_authenticated:
+        return {}
+    return {'inbox_pending': SimpleLazyObject(lambda: _inbox_badges(request.user))}
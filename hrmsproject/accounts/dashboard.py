@@ -0,0 +1,131 @@
+"""
+Per-employee leave and permission statistics for the dashboard.
+
+All figures for a month come from two aggregate queries (one per entry
+table) using conditional Sum/Count, plus one lookup of the employee's leave
+balances (entry.leave_ledger), and the result is cached per employee
+and month for DASHBOARD_STATS_TIMEOUT seconds. Saving or deleting a leave
+or permission entry drops the cached month for that employee
+(see accounts.signals).
+"""
+from datetime import date
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+
+DASHBOARD_STATS_TIMEOUT = 120
+
+# Permissions allowed per month, and leave days for leave types without a tracked balance
+MONTHLY_PERMISSION_LIMIT = 4
+MONTHLY_LEAVE_LIMIT = 3.0
+
+# Dashboard card -> keyword matched against LeaveType.leave_type / short_name
+LEAVE_CARDS = {
+    'casual': ('casual', 'cl'),
+    'earned': ('earned', 'el'),
+    'sick': ('sick', 'sl'),
+}
+
+LEAVE_APPLIED_STATUSES = ['pending', 'staff_approved']
+LEAVE_TAKEN_STATUS = 'hr_approved'
+
+
+def _month_bounds(day: date) -> tuple[date, date]:
+    month_start = day.replace(day=1)
+    if month_start.month == 12:
+        next_month = month_start.replace(year=month_start.year + 1, month=1)
+    else:
+        next_month = month_start.replace(month=month_start.month + 1)
+    return month_start, next_month
+
+
+def dashboard_stats_cache_key(employee_id, day: date) -> str:
+    return f'accounts:dashboard:{employee_id}:{day:%Y-%m}'
+
+
+def invalidate_dashboard_stats(employee_id, day: date):
+    cache.delete(dashboard_stats_cache_key(employee_id, day))
+
+
+def _leave_card_for(leave_type_name: str, short_name: str) -> str | None:
+    name = (leave_type_name or '').lower()
+    short = (short_name or '').lower()
+    for card, (keyword, short_code) in LEAVE_CARDS.items():
+        if name.startswith(keyword) or short == short_code:
+            return card
+    return None
+
+
+def _permission_stats(employee_id, month_start, next_month) -> dict:
+    from entry.models import PermissionEntry
+
+    counts = PermissionEntry.objects.filter(
+        employee_id=employee_id,
+        permission_date__gte=month_start,
+        permission_date__lt=next_month,
+    ).aggregate(
+        total=Count('id'),
+        taken=Count('id', filter=Q(status=PermissionEntry.STATUS_APPROVED)),
+        request=Count('id', filter=Q(status=PermissionEntry.STATUS_PENDING)),
+    )
+    counts['available'] = max(0, MONTHLY_PERMISSION_LIMIT - counts['taken'])
+    return counts
+
+
+def _leave_stats(employee_id, month_start, next_month) -> dict:
+    from entry.models import LeaveBalance, LeaveEntry
+
+    leave_data = {
+        card: {'applied': 0.0, 'taken': 0.0, 'available': MONTHLY_LEAVE_LIMIT}
+        for card in LEAVE_CARDS
+    }
+    rows = (
+        LeaveEntry.objects.filter(
+            employee_id=employee_id,
+            from_date__gte=month_start,
+            from_date__lt=next_month,
+            leave_type__isnull=False,
+        )
+        .order_by()
+        .values('leave_type_id', 'leave_type__leave_type', 'leave_type__short_name')
+        .annotate(
+            applied=Sum('leave_days', filter=Q(approval_status__in=LEAVE_APPLIED_STATUSES)),
+            taken=Sum('leave_days', filter=Q(approval_status=LEAVE_TAKEN_STATUS)),
+        )
+    )
+    for row in rows:
+        card = _leave_card_for(row['leave_type__leave_type'], row['leave_type__short_name'])
+        if not card:
+            continue
+        leave_data[card]['applied'] += float(row['applied'] or 0)
+        leave_data[card]['taken'] += float(row['taken'] or 0)
+
+    for values in leave_data.values():
+        values['available'] = max(0, MONTHLY_LEAVE_LIMIT - values['taken'])
+
+    # Leave types with a monthly accrual show the ledger balance instead of the flat limit
+    balances = {}
+    tracked = LeaveBalance.objects.filter(
+        employee_id=employee_id, leave_type__monthly_accrual__isnull=False,
+    ).values_list('leave_type__leave_type', 'leave_type__short_name', 'balance')
+    for leave_type_name, short_name, balance in tracked:
+        card = _leave_card_for(leave_type_name, short_name)
+        if card:
+            balances[card] = balances.get(card, 0.0) + float(balance)
+    for card, balance in balances.items():
+        leave_data[card]['available'] = max(0, balance)
+    return leave_data
+
+
+def get_dashboard_stats(employee_id, day: date) -> dict:
+    """Return {'permission_data', 'leave_data'} for an employee's month, cached briefly."""
+    key = dashboard_stats_cache_key(employee_id, day)
+    stats = cache.get(key)
+    if stats is None:
+        month_start, next_month = _month_bounds(day)
+        stats = {
+            'permission_data': _permission_stats(employee_id, month_start, next_month),
+            'leave_data': _leave_stats(employee_id, month_start, next_month),
+        }
+        cache.set(key, stats, DASHBOARD_STATS_TIMEOUT)
+    return stats
@@ -0,0 +1,120 @@
+"""
+Resolve the Employee record that belongs to a logged-in user.
+
+Matching a User to an Employee means an OR lookup across personal_email,
+office_email and staff_id (plus the optional Profile.employee_code), so the
+result is resolved once and kept in the user's session. Every later request
+reads it back from the session without touching the Employee table.
+
+Cached identities are invalidated by bumping a generation counter from the
+post_save/post_delete signals on Employee, User and Profile (see
+accounts.signals). The session entry also expires after
+IDENTITY_SESSION_TTL seconds so that workers which do not share a cache
+backend still pick up changes.
+"""
+import time
+
+from django.core.cache import cache
+from django.db.models import Q
+
+IDENTITY_SESSION_KEY = '_user_identity'
+IDENTITY_SESSION_TTL = 300
+IDENTITY_GENERATION_KEY = 'accounts:identity:generation'
+
+
+def get_identity_generation() -> int:
+    """Return the current identity generation, initialising it if needed."""
+    generation = cache.get(IDENTITY_GENERATION_KEY)
+    if generation is None:
+        cache.add(IDENTITY_GENERATION_KEY, 1, None)
+        generation = cache.get(IDENTITY_GENERATION_KEY, 1)
+    return generation
+
+
+def invalidate_identities():
+    """Force every cached user -> employee mapping to be resolved again."""
+    try:
+        cache.incr(IDENTITY_GENERATION_KEY)
+    except ValueError:
+        cache.set(IDENTITY_GENERATION_KEY, 1, None)
+
+
+def find_employee_for_user(user):
+    """Look up the Employee linked to a user (by employee code, email or staff ID)."""
+    from master.models import Employee
+    from .models import Profile
+
+    employee_code = Profile.objects.filter(user=user).values_list('employee_code', flat=True).first()
+    if employee_code:
+        employee = Employee.objects.filter(staff_id=employee_code).first()
+        if employee:
+            return employee
+
+    lookup = Q(staff_id=user.username)
+    if user.email:
+        lookup |= Q(personal_email=user.email) | Q(office_email=user.email)
+    return Employee.objects.filter(lookup).first()
+
+
+def _resolve_identity(request):
+    employee = find_employee_for_user(request.user)
+    identity = {
+        'employee_id': employee.pk if employee else None,
+        'profile_image': employee.profile_image.url if employee and employee.profile_image else None,
+    }
+    request._cached_employee = employee
+    return identity
+
+
+def get_user_identity(request) -> dict:
+    """
+    Return {'employee_id', 'profile_image'} for the current user.
+
+    The value is memoised on the request and stored in the session, so the
+    Employee lookup runs at most once per user per generation.
+    """
+    if hasattr(request, '_cached_identity'):
+        return request._cached_identity
+
+    identity = {'employee_id': None, 'profile_image': None}
+    if request.user.is_authenticated:
+        generation = get_identity_generation()
+        stored = request.session.get(IDENTITY_SESSION_KEY)
+        if (
+            stored
+            and stored.get('user_id') == request.user.pk
+            and stored.get('generation') == generation
+            and time.time() - stored.get('resolved_at', 0) < IDENTITY_SESSION_TTL
+        ):
+            identity = {
+                'employee_id': stored.get('employee_id'),
+                'profile_image': stored.get('profile_image'),
+            }
+        else:
+            identity = _resolve_identity(request)
+            request.session[IDENTITY_SESSION_KEY] = {
+                **identity,
+                'user_id': request.user.pk,
+                'generation': generation,
+                'resolved_at': time.time(),
+            }
+
+    request._cached_identity = identity
+    return identity
+
+
+def get_user_employee(request):
+    """Return the Employee for the current user (or None), fetched once per request."""
+    if hasattr(request, '_cached_employee'):
+        return request._cached_employee
+
+    employee_id = get_user_identity(request)['employee_id']
+    if hasattr(request, '_cached_employee'):
+        return request._cached_employee
+
+    employee = None
+    if employee_id:
+        from master.models import Employee
+        employee = Employee.objects.filter(pk=employee_id).first()
+    request._cached_employee = employee
+    return employee
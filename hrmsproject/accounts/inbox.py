@@ -0,0 +1,242 @@
+"""
+Approval inbox: the pending items of every approval queue in one list.
+
+Each InboxQueue says which rows of an entry table wait in it (e.g. TADA
+entries approved by the head and not yet by HR). The inbox page reads
+one UNION ALL of those queues (pending_items()), ordered by submission
+time. Every branch is an equality/IN on status columns plus an ORDER BY
+created_at, which the (status, created_at) indexes on the entry tables
+serve.
+
+Per-queue pending counts live in the cache and are kept current
+incrementally, not recounted:
+- accounts.signals notes the queues an entry sat in before a save and
+  moves the counters by the difference after it (and on delete);
+- approval.bulk does the same for its queryset writes
+  (pending_snapshot() / record_pending_changes()).
+Counters are adjusted on transaction commit, so a rolled-back save
+leaves them alone. A missing counter is counted once and then cached;
+PENDING_COUNT_TIMEOUT bounds any drift from writes that bypass both
+paths (raw SQL, shell updates). With a per-process cache backend
+(LocMemCache) each worker only sees its own writes, so counters are
+then kept for LOCAL_PENDING_COUNT_TIMEOUT instead.
+"""
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import CharField, Q, Value
+from django.utils.functional import cached_property
+
+from entry.models import CompOffEntry, LeaveEntry, PermissionEntry, TADAEntry, TravelEntry
+
+PENDING_COUNT_KEY = 'accounts:inbox:pending:{queue}'
+PENDING_COUNT_TIMEOUT = 24 * 60 * 60
+LOCAL_PENDING_COUNT_TIMEOUT = 300
+INBOX_PER_PAGE = 20
+
+
+@dataclass(frozen=True)
+class InboxQueue:
+    key: str
+    label: str
+    model: type
+    permission: str
+    url_name: str
+    date_field: str
+    pending: tuple  # ((field, statuses), ...): all must hold for an entry to wait in the queue
+
+    @property
+    def status_fields(self) -> tuple:
+        return tuple(name for name, _ in self.pending)
+
+    def pending_q(self) -> Q:
+        return Q(**{f'{name}__in': statuses for name, statuses in self.pending})
+
+    def holds(self, values) -> bool:
+        """Whether an entry with these status values ({field: value}) waits in the queue."""
+        return all(values[name] in statuses for name, statuses in self.pending)
+
+
+# Keys match approval.bulk.APPROVAL_QUEUES
+INBOX_QUEUES = {
+    queue.key: queue for queue in (
+        InboxQueue(
+            'leave', 'Leave', LeaveEntry, 'approval.view_leaveapproval', 'approval:leave_approval_list',
+            'from_date', (('approval_status', (LeaveEntry.APPROVAL_PENDING, LeaveEntry.APPROVAL_STAFF_APPROVED)),),
+        ),
+        InboxQueue(
+            'permission', 'Permission', PermissionEntry, 'approval.view_permissionapproval',
+            'approval:permission_approval_list', 'permission_date',
+            (('status', (PermissionEntry.STATUS_PENDING,)),),
+        ),
+        InboxQueue(
+            'hr', 'Comp-off', CompOffEntry, 'approval.view_hrcompoffapproval', 'approval:hr_comp_off_approval',
+            'work_date', (('head_approval_status', (CompOffEntry.APPROVAL_PENDING,)),),
+        ),
+        InboxQueue(
+            'tada-head', 'TADA (head)', TADAEntry, 'approval.view_tadaapproval', 'approval:tada_head_approval_list',
+            'expense_date', (('head_approval_status', (TADAEntry.APPROVAL_PENDING,)),),
+        ),
+        InboxQueue(
+            'tada-hr', 'TADA (HR)', TADAEntry, 'approval.view_tadaapproval', 'approval:tada_hr_approval_list',
+            'expense_date', (
+                ('head_approval_status', (TADAEntry.APPROVAL_APPROVED,)),
+                ('hr_approval_status', (TADAEntry.APPROVAL_PENDING,)),
+            ),
+        ),
+        InboxQueue(
+            'travel-hr', 'Travel', TravelEntry, 'approval.view_travelapproval', 'approval:travel_hr_approval_list',
+            'departure_date', (('approval_status', (TravelEntry.APPROVAL_PENDING,)),),
+        ),
+    )
+}
+
+
+def _model_queues(model) -> list:
+    return [queue for queue in INBOX_QUEUES.values() if queue.model is model]
+
+
+def status_fields(model) -> set:
+    return {name for queue in _model_queues(model) for name in queue.status_fields}
+
+
+def queues_for(user) -> list:
+    """The queues user may review."""
+    return [queue for queue in INBOX_QUEUES.values() if user.has_perm(queue.permission)]
+
+
+# ---- counters ---------------------------------------------------------------
+
+def _count_key(queue_key: str) -> str:
+    return PENDING_COUNT_KEY.format(queue=queue_key)
+
+
+def _count_timeout() -> int:
+    backend = settings.CACHES[DEFAULT_CACHE_ALIAS]['BACKEND']
+    return LOCAL_PENDING_COUNT_TIMEOUT if backend.endswith('.LocMemCache') else PENDING_COUNT_TIMEOUT
+
+
+def pending_counts(queues) -> dict:
+    """{queue key: pending items} from the cache; a missing counter is counted once."""
+    cached = cache.get_many([_count_key(queue.key) for queue in queues])
+    counts = {}
+    for queue in queues:
+        count = cached.get(_count_key(queue.key))
+        if count is None:
+            count = queue.model.objects.filter(queue.pending_q()).count()
+            cache.add(_count_key(queue.key), count, _count_timeout())
+        counts[queue.key] = count
+    return counts
+
+
+def _adjust_counts(deltas: dict) -> None:
+    def apply():
+        for queue_key, delta in deltas.items():
+            try:
+                if delta > 0:
+                    cache.incr(_count_key(queue_key), delta)
+                elif delta < 0:
+                    cache.decr(_count_key(queue_key), -delta)
+            except ValueError:
+                pass  # not cached: counted on the next read
+    if any(deltas.values()):
+        transaction.on_commit(apply)
+
+
+def pending_queues(model, values) -> set:
+    """Keys of the queues an entry with these status values ({field: value}) waits in."""
+    return {queue.key for queue in _model_queues(model) if queue.holds(values)}
+
+
+def entry_status(entry) -> dict:
+    return {name: getattr(entry, name) for name in status_fields(type(entry))}
+
+
+def stored_pending_queues(entry) -> set:
+    """The queues entry waits in according to the database (before an update is saved)."""
+    if entry.pk is None:
+        return set()
+    values = type(entry).objects.filter(pk=entry.pk).values(*status_fields(type(entry))).first()
+    return pending_queues(type(entry), values) if values else set()
+
+
+def record_pending_change(before: set, after: set) -> None:
+    """Move the counters of one entry that went from the queues in before to those in after."""
+    _adjust_counts({
+        **{queue_key: 1 for queue_key in after - before},
+        **{queue_key: -1 for queue_key in before - after},
+    })
+
+
+def pending_snapshot(entries) -> dict:
+    """{pk: queue keys} of entries, for record_pending_changes() after a queryset write."""
+    return {entry.pk: pending_queues(type(entry), entry_status(entry)) for entry in entries}
+
+
+def record_pending_changes(entries, before: dict) -> None:
+    """Counter updates for entries whose (in-memory) statuses changed since pending_snapshot()."""
+    deltas = {}
+    for entry in entries:
+        after = pending_queues(type(entry), entry_status(entry))
+        for queue_key in after - before[entry.pk]:
+            deltas[queue_key] = deltas.get(queue_key, 0) + 1
+        for queue_key in before[entry.pk] - after:
+            deltas[queue_key] = deltas.get(queue_key, 0) - 1
+    _adjust_counts(deltas)
+
+
+# ---- inbox listing ----------------------------------------------------------
+
+@dataclass
+class InboxItem:
+    queue: InboxQueue
+    entry: object
+    submitted_at: object
+
+    @property
+    def date(self):
+        return getattr(self.entry, self.queue.date_field)
+
+
+class InboxPaginator(Paginator):
+    """Paginator whose total comes from the pending counters instead of a COUNT over the union."""
+
+    def __init__(self, object_list, per_page, total: int):
+        super().__init__(object_list, per_page)
+        self.total = total
+
+    @cached_property
+    def count(self):
+        return self.total
+
+
+def pending_items(queues, newest_first: bool = False):
+    """(queue key, pk, created_at) of every pending row of queues as one UNION ALL, oldest first."""
+    branches = [
+        queue.model.objects.filter(queue.pending_q())
+        .annotate(queue=Value(queue.key, output_field=CharField()))
+        .values_list('queue', 'id', 'created_at')
+        .order_by()
+        for queue in queues
+    ]
+    direction = '-' if newest_first else ''
+    return branches[0].union(*branches[1:], all=True).order_by(f'{direction}created_at', f'{direction}id')
+
+
+def load_items(rows) -> list:
+    """InboxItems for a page of pending_items() rows: one query per queue on the page."""
+    by_queue = {}
+    for queue_key, pk, _ in rows:
+        by_queue.setdefault(queue_key, []).append(pk)
+    entries = {
+        queue_key: INBOX_QUEUES[queue_key].model.objects.select_related('employee', 'site').in_bulk(pks)
+        for queue_key, pks in by_queue.items()
+    }
+    return [
+        InboxItem(INBOX_QUEUES[queue_key], entries[queue_key][pk], created_at)
+        for queue_key, pk, created_at in rows
+        if pk in entries[queue_key]
+    ]
@@ -1,7 +1,13 @@
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
+from entry.models import CompOffEntry, LeaveEntry, PermissionEntry, TADAEntry, TravelEntry
+from master.models import Employee
+
+from . import inbox
+from .dashboard import invalidate_dashboard_stats
+from .identity import invalidate_identities
 from .models import Profile
 
 
@@ -14,5 +20,72 @@ def create_or_update_profile(sender, instance, created, **kwargs):
         Profile.objects.get_or_create(user=instance)
 
 
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_user_identity(sender, instance, **kwargs):
+    """Drop cached user -> employee mappings when a user's email/username changes."""
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_identities()
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def invalidate_employee_identity(sender, instance, **kwargs):
+    """Drop cached user -> employee mappings when an employee or profile changes."""
+    invalidate_identities()
+
+
+@receiver(post_save, sender=LeaveEntry)
+@receiver(post_delete, sender=LeaveEntry)
+def invalidate_leave_dashboard_stats(sender, instance, **kwargs):
+    """Refresh the employee's dashboard figures for the month of the leave."""
+    if instance.from_date:
+        invalidate_dashboard_stats(instance.employee_id, instance.from_date)
+
+
+@receiver(post_save, sender=PermissionEntry)
+@receiver(post_delete, sender=PermissionEntry)
+def invalidate_permission_dashboard_stats(sender, instance, **kwargs):
+    """Refresh the employee's dashboard figures for the month of the permission."""
+    if instance.permission_date:
+        invalidate_dashboard_stats(instance.employee_id, instance.permission_date)
+
+
+def _touches_status(sender, update_fields) -> bool:
+    return update_fields is None or bool(set(update_fields) & inbox.status_fields(sender))
+
+
+@receiver(pre_save, sender=CompOffEntry)
+@receiver(pre_save, sender=LeaveEntry)
+@receiver(pre_save, sender=PermissionEntry)
+@receiver(pre_save, sender=TADAEntry)
+@receiver(pre_save, sender=TravelEntry)
+def remember_pending_queues(sender, instance, update_fields=None, **kwargs):
+    """Note the inbox queues the entry sat in before this save (see accounts.inbox)."""
+    if _touches_status(sender, update_fields):
+        instance._inbox_previous = inbox.stored_pending_queues(instance)
+
+
+@receiver(post_save, sender=CompOffEntry)
+@receiver(post_save, sender=LeaveEntry)
+@receiver(post_save, sender=PermissionEntry)
+@receiver(post_save, sender=TADAEntry)
+@receiver(post_save, sender=TravelEntry)
+def update_pending_counts(sender, instance, update_fields=None, **kwargs):
+    if _touches_status(sender, update_fields):
+        inbox.record_pending_change(
+            getattr(instance, '_inbox_previous', set()),
+            inbox.pending_queues(sender, inbox.entry_status(instance)),
+        )
 
 
+@receiver(post_delete, sender=CompOffEntry)
+@receiver(post_delete, sender=LeaveEntry)
+@receiver(post_delete, sender=PermissionEntry)
+@receiver(post_delete, sender=TADAEntry)
+@receiver(post_delete, sender=TravelEntry)
+def drop_pending_counts(sender, instance, **kwargs):
+    inbox.record_pending_change(inbox.pending_queues(sender, inbox.entry_status(instance)), set())
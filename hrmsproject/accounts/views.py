@@ -4,10 +4,12 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import AuthenticationForm, UserCreationForm
 from django.core.exceptions import ValidationError
 from django.core.validators import validate_email
-from django.db.models import Q
 from django.shortcuts import redirect, render
 
+from .dashboard import get_dashboard_stats
 from .forms import ProfileForm
+from .identity import get_user_employee
+from .inbox import INBOX_PER_PAGE, InboxPaginator, load_items, pending_counts, pending_items, queues_for
 from .models import Profile
 
 
@@ -23,10 +25,7 @@ def home(request):
 def dashboard(request):
     """Dashboard for authenticated users with dynamic data."""
     from django.utils import timezone
-    from datetime import datetime, timedelta
-    from django.db.models import Q, Sum, Count
     from master.models import Employee
-    from entry.models import PermissionEntry, LeaveEntry
     
     today = timezone.now().date()
     current_month = today.month
@@ -34,47 +33,15 @@ def dashboard(request):
     current_month_name = today.strftime('%B')
     
     # Get employee linked to user (if exists)
-    employee = None
-    try:
-        # Try to find employee by email or username
-        employee = Employee.objects.filter(
-            Q(personal_email=request.user.email) | 
-            Q(office_email=request.user.email) |
-            Q(staff_id=request.user.username)
-        ).first()
-        
-        # Also check if user has a profile with employee_code
-        try:
-            profile = request.user.profile
-            if profile.employee_code:
-                employee = Employee.objects.filter(staff_id=profile.employee_code).first() or employee
-        except:
-            pass
-    except:
-        pass
+    employee = get_user_employee(request)
     
-    # Permission Details (Current Month)
+    # Permission and Leave Details (Current Month)
     permission_data = {
         'total': 0,
         'taken': 0,
         'available': 0,
         'request': 0,
     }
-    
-    if employee:
-        # Get permission entries for current month
-        permission_entries = PermissionEntry.objects.filter(
-            employee=employee,
-            permission_date__year=current_year,
-            permission_date__month=current_month
-        )
-        permission_data['total'] = permission_entries.count()
-        permission_data['taken'] = permission_entries.filter(status='approved').count()
-        permission_data['request'] = permission_entries.filter(status='pending').count()
-        # Assuming 4 permissions per month as default, adjust as needed
-        permission_data['available'] = max(0, 4 - permission_data['taken'])
-    
-    # Leave Details (Current Month)
     leave_data = {
         'casual': {'applied': 0.0, 'taken': 0.0, 'available': 3.0},
         'earned': {'applied': 0.0, 'taken': 0.0, 'available': 3.0},
@@ -82,30 +49,9 @@ def dashboard(request):
     }
     
     if employee:
-        # Get leave entries for current month
-        leave_entries = LeaveEntry.objects.filter(
-            employee=employee,
-            from_date__year=current_year,
-            from_date__month=current_month
-        )
-        
-        # Casual Leave
-        casual_leaves = leave_entries.filter(leave_type='casual-leave')
-        leave_data['casual']['applied'] = sum([float(leave.leave_days) for leave in casual_leaves.filter(approval_status__in=['pending', 'staff_approved'])])
-        leave_data['casual']['taken'] = sum([float(leave.leave_days) for leave in casual_leaves.filter(approval_status='hr_approved')])
-        leave_data['casual']['available'] = max(0, 3.0 - leave_data['casual']['taken'])
-        
-        # Earned Leave
-        earned_leaves = leave_entries.filter(leave_type='earned-leave')
-        leave_data['earned']['applied'] = sum([float(leave.leave_days) for leave in earned_leaves.filter(approval_status__in=['pending', 'staff_approved'])])
-        leave_data['earned']['taken'] = sum([float(leave.leave_days) for leave in earned_leaves.filter(approval_status='hr_approved')])
-        leave_data['earned']['available'] = max(0, 3.0 - leave_data['earned']['taken'])
-        
-        # Sick Leave
-        sick_leaves = leave_entries.filter(leave_type='Sick-leave')
-        leave_data['sick']['applied'] = sum([float(leave.leave_days) for leave in sick_leaves.filter(approval_status__in=['pending', 'staff_approved'])])
-        leave_data['sick']['taken'] = sum([float(leave.leave_days) for leave in sick_leaves.filter(approval_status='hr_approved')])
-        leave_data['sick']['available'] = max(0, 3.0 - leave_data['sick']['taken'])
+        stats = get_dashboard_stats(employee.pk, today)
+        permission_data = stats['permission_data']
+        leave_data = stats['leave_data']
     
     # Calendar Data - Get attendance for current month
     calendar_data = {}
@@ -217,23 +163,7 @@ def profile(request):
         form = ProfileForm(instance=profile_obj)
 
     # Get employee linked to user for profile image
-    employee = None
-    try:
-        from master.models import Employee
-        employee = Employee.objects.filter(
-            Q(personal_email=request.user.email) | 
-            Q(office_email=request.user.email) |
-            Q(staff_id=request.user.username)
-        ).first()
-        
-        if not employee:
-            try:
-                if profile_obj.employee_code:
-                    employee = Employee.objects.filter(staff_id=profile_obj.employee_code).first()
-            except:
-                pass
-    except:
-        pass
+    employee = get_user_employee(request)
     
     primary_group = request.user.groups.first()
     context = {
@@ -250,8 +180,33 @@ def profile(request):
 
 @login_required
 def inbox(request):
-    """Placeholder inbox view."""
-    return render(request, 'accounts/inbox.html')
+    """Pending approvals of every queue the user can review, oldest first (see accounts.inbox)."""
+    queues = queues_for(request.user)
+    counts = pending_counts(queues)
+    queue_filter = request.GET.get('queue', '').strip()
+    selected = [queue for queue in queues if queue.key == queue_filter] or queues
+    if len(selected) == len(queues):
+        queue_filter = ''
+    sort = 'newest' if request.GET.get('sort') == 'newest' else 'oldest'
+
+    rows = pending_items(selected, newest_first=sort == 'newest') if selected else []
+    paginator = InboxPaginator(rows, INBOX_PER_PAGE, sum(counts[queue.key] for queue in selected))
+    page_obj = paginator.get_page(request.GET.get('page'))
+    page_obj.object_list = load_items(page_obj.object_list)
+
+    query_params = request.GET.copy()
+    query_params.pop('page', None)
+    base_querystring = query_params.urlencode()
+    context = {
+        'queues': [(queue, counts[queue.key]) for queue in queues],
+        'total_pending': sum(counts.values()),
+        'queue_filter': queue_filter,
+        'sort': sort,
+        'page_obj': page_obj,
+        'items': page_obj.object_list,
+        'page_query_base': f'{base_querystring}&' if base_querystring else '',
+    }
+    return render(request, 'accounts/inbox.html', context)
 
 
 @login_required
@@ -0,0 +1,294 @@
+"""
+Bulk approve/reject for the approval queues.
+
+apply_bulk_decision() applies one decision (a status and an optional note)
+to many entries of a queue in one transaction, with a fixed number of
+queries whatever the number of entries:
+
+1. Load the entries and their approval rows.
+2. bulk_create the missing approval rows.
+3. Write the approval rows with bulk_update and the denormalised entry
+   fields with one queryset.update().
+
+Every requested id gets a BulkItemResult: updated, unchanged (already in
+that status), or skipped with the reason.
+
+Queryset writes skip model signals. The work those receivers do after a
+single save is therefore repeated here in bulk:
+- leave: the balance ledger and the effective schedule,
+- leave and permissions: the dashboard cache,
+- every queue: the cached list totals (master.list_query), the inbox
+  pending counters (accounts.inbox) and the search index
+  (master.search, e.g. CompOffEntry.head_approval_by). The apply
+  functions set the written values on the in-memory entries too, so
+  counters and index can be brought up to date from them.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.dashboard import invalidate_dashboard_stats
+from accounts.inbox import pending_snapshot, record_pending_changes
+from entry.leave_ledger import check_leave_balances, leave_snapshot, record_leave_changes
+from entry.models import CompOffEntry, LeaveEntry, PermissionEntry, TADAEntry, TravelEntry
+from entry.schedule import refresh_schedule
+from master import search
+from master.list_query import invalidate_list_counts
+
+from .models import HRCompOffApproval, LeaveApproval, PermissionApproval, TravelApproval
+
+BULK_APPROVAL_LIMIT = 1000
+
+APPROVAL_STATUSES = ('pending', 'approved', 'rejected')
+
+
+@dataclass
+class BulkItemResult:
+    id: int
+    ok: bool
+    message: str
+
+    def as_dict(self) -> dict:
+        return {'id': self.id, 'status': 1 if self.ok else 0, 'msg': self.message}
+
+
+@dataclass
+class BulkApprovalResult:
+    updated: int = 0
+    unchanged: int = 0
+    items: list = field(default_factory=list)
+
+    @property
+    def failed(self) -> int:
+        return sum(1 for item in self.items if not item.ok)
+
+
+@dataclass
+class Decision:
+    status: str
+    note: str
+    user: object
+    now: datetime
+
+    @property
+    def approver_name(self) -> str:
+        return self.user.get_full_name() or self.user.get_username()
+
+
+@dataclass
+class ApprovalQueue:
+    label: str
+    permission: str
+    model: type
+    apply: object  # apply(entries, decision, result) -> None
+
+
+def _approval_rows(approval_model, entry_field, entries) -> list:
+    """The approval rows of entries (locked), creating the missing ones in one bulk INSERT."""
+    lookup = {f'{entry_field}_id__in': [entry.pk for entry in entries]}
+    existing = set(approval_model.objects.filter(**lookup).values_list(f'{entry_field}_id', flat=True))
+    approval_model.objects.bulk_create([
+        approval_model(**{f'{entry_field}_id': entry.pk}) for entry in entries if entry.pk not in existing
+    ])
+    return list(approval_model.objects.select_for_update().filter(**lookup))
+
+
+def _record_decision(approval_model, entry_field, entries, decision) -> None:
+    """Write decision to the approval rows (approval_status/approved_by/...) of entries."""
+    approvals = _approval_rows(approval_model, entry_field, entries)
+    for approval in approvals:
+        approval.approval_status = decision.status
+        approval.approved_by = decision.user
+        approval.approval_note = decision.note
+        approval.approval_date = decision.now
+        approval.updated_at = decision.now
+    approval_model.objects.bulk_update(
+        approvals, ['approval_status', 'approved_by', 'approval_note', 'approval_date', 'updated_at'],
+    )
+
+
+def _changed(entries, result, current, target) -> list:
+    """Entries whose current(entry) is not target yet; the rest are reported unchanged."""
+    changed = []
+    for entry in entries:
+        if current(entry) == target:
+            result.unchanged += 1
+            result.items.append(BulkItemResult(entry.pk, True, 'Already in this status.'))
+        else:
+            changed.append(entry)
+    return changed
+
+
+def _updated(entries, result, message='Updated.') -> None:
+    result.updated += len(entries)
+    result.items.extend(BulkItemResult(entry.pk, True, message) for entry in entries)
+
+
+# ---- queues -----------------------------------------------------------------
+
+LEAVE_STATUS_MAP = {
+    'approved': LeaveEntry.APPROVAL_HR_APPROVED,
+    'rejected': LeaveEntry.APPROVAL_REJECTED,
+    'pending': LeaveEntry.APPROVAL_PENDING,
+}
+
+
+def _apply_leave(entries, decision, result):
+    target = LEAVE_STATUS_MAP[decision.status]
+    entries = _changed(entries, result, lambda entry: entry.approval_status, target)
+    if decision.status == 'approved':
+        errors = check_leave_balances(entries)
+        result.items.extend(BulkItemResult(pk, False, message) for pk, message in errors.items())
+        entries = [entry for entry in entries if entry.pk not in errors]
+    if not entries:
+        return
+
+    _record_decision(LeaveApproval, 'leave_entry', entries, decision)
+
+    previous = {entry.pk: leave_snapshot(entry) for entry in entries}
+    LeaveEntry.objects.filter(pk__in=previous).update(
+        approval_status=target, approved_by=decision.approver_name, approval_note=decision.note[:255],
+        updated_at=decision.now,
+    )
+    for entry in entries:
+        entry.approval_status = target
+    record_leave_changes((entry, previous[entry.pk]) for entry in entries)
+    refresh_schedule(
+        {entry.employee_id for entry in entries},
+        min(entry.from_date for entry in entries),
+        max(entry.to_date for entry in entries),
+    )
+    for employee_id, month in {(entry.employee_id, entry.from_date.replace(day=1)) for entry in entries}:
+        invalidate_dashboard_stats(employee_id, month)
+    _updated(entries, result)
+
+
+PERMISSION_STATUS_MAP = {
+    'approved': PermissionEntry.STATUS_APPROVED,
+    'rejected': PermissionEntry.STATUS_CANCELLED,
+    'pending': PermissionEntry.STATUS_PENDING,
+}
+
+
+def _apply_permission(entries, decision, result):
+    target = PERMISSION_STATUS_MAP[decision.status]
+    entries = _changed(entries, result, lambda entry: entry.status, target)
+    if not entries:
+        return
+    _record_decision(PermissionApproval, 'permission_entry', entries, decision)
+    PermissionEntry.objects.filter(pk__in=[entry.pk for entry in entries]).update(
+        status=target, updated_at=decision.now,
+    )
+    for entry in entries:
+        entry.status = target
+    for employee_id, month in {(entry.employee_id, entry.permission_date.replace(day=1)) for entry in entries}:
+        invalidate_dashboard_stats(employee_id, month)
+    _updated(entries, result)
+
+
+def _tada_level(level):
+    """TADA head/HR approval: the status, approver and date columns of that level on TADAEntry."""
+    def apply(entries, decision, result):
+        entries = _changed(entries, result, lambda entry: getattr(entry, f'{level}_approval_status'), decision.status)
+        if not entries:
+            return
+        TADAEntry.objects.filter(pk__in=[entry.pk for entry in entries]).update(**{
+            f'{level}_approval_status': decision.status,
+            f'{level}_approval_by': decision.approver_name,
+            f'{level}_approval_date': decision.now,
+            'updated_at': decision.now,
+        })
+        for entry in entries:
+            setattr(entry, f'{level}_approval_status', decision.status)
+        _updated(entries, result)
+    return apply
+
+
+TRAVEL_STATUS_MAP = {
+    'approved': TravelEntry.APPROVAL_APPROVED,
+    'rejected': TravelEntry.APPROVAL_REJECTED,
+    'pending': TravelEntry.APPROVAL_PENDING,
+}
+
+
+def _apply_travel(entries, decision, result):
+    target = TRAVEL_STATUS_MAP[decision.status]
+    entries = _changed(entries, result, lambda entry: entry.approval_status, target)
+    if not entries:
+        return
+    _record_decision(TravelApproval, 'travel_entry', entries, decision)
+    TravelEntry.objects.filter(pk__in=[entry.pk for entry in entries]).update(
+        approval_status=target, approved_by=decision.approver_name, approval_note=decision.note[:255],
+        updated_at=decision.now,
+    )
+    for entry in entries:
+        entry.approval_status = target
+    _updated(entries, result)
+
+
+def _apply_hr_comp_off(entries, decision, result):
+    entries = _changed(entries, result, lambda entry: entry.head_approval_status, decision.status)
+    if not entries:
+        return
+    approvals = _approval_rows(HRCompOffApproval, 'comp_off_entry', entries)
+    for approval in approvals:
+        approval.hr_approval_status = decision.status
+        approval.hr_approval_by = decision.user
+        approval.hr_approval_note = decision.note
+        approval.hr_approval_date = decision.now
+        approval.updated_at = decision.now
+    HRCompOffApproval.objects.bulk_update(
+        approvals,
+        ['hr_approval_status', 'hr_approval_by', 'hr_approval_note', 'hr_approval_date', 'updated_at'],
+    )
+    CompOffEntry.objects.filter(pk__in=[entry.pk for entry in entries]).update(
+        head_approval_status=decision.status, head_approval_by=decision.approver_name,
+        head_approval_note=decision.note[:255], updated_at=decision.now,
+    )
+    for entry in entries:
+        entry.head_approval_status = decision.status
+        entry.head_approval_by = decision.approver_name
+        entry.head_approval_note = decision.note[:255]
+    _updated(entries, result)
+
+
+APPROVAL_QUEUES = {
+    'leave': ApprovalQueue('Leave', 'approval.approve_leaveapproval', LeaveEntry, _apply_leave),
+    'permission': ApprovalQueue('Permission', 'approval.approve_permissionapproval', PermissionEntry, _apply_permission),
+    'tada-head': ApprovalQueue('TADA head', 'approval.approve_tadaapproval', TADAEntry, _tada_level('head')),
+    'tada-hr': ApprovalQueue('TADA HR', 'approval.approve_tadaapproval', TADAEntry, _tada_level('hr')),
+    'travel-hr': ApprovalQueue('Travel', 'approval.approve_travelapproval', TravelEntry, _apply_travel),
+    'hr': ApprovalQueue('HR comp-off', 'approval.approve_hrcompoffapproval', CompOffEntry, _apply_hr_comp_off),
+}
+
+
+def parse_ids(values) -> list[int]:
+    """Distinct integer ids from posted values (comma-separated or repeated), in order."""
+    ids = []
+    for value in values:
+        for part in str(value).split(','):
+            part = part.strip()
+            if part.isdigit() and int(part) not in ids:
+                ids.append(int(part))
+    return ids
+
+
+def apply_bulk_decision(queue: ApprovalQueue, ids, status: str, user, note: str = '') -> BulkApprovalResult:
+    """Set status on the queue's entries with these ids; see the module docstring."""
+    result = BulkApprovalResult()
+    decision = Decision(status=status, note=note, user=user, now=timezone.now())
+    with transaction.atomic():
+        entries = {entry.pk: entry for entry in queue.model.objects.select_for_update().filter(pk__in=ids)}
+        result.items.extend(BulkItemResult(pk, False, 'Entry not found.') for pk in ids if pk not in entries)
+        pending_before = pending_snapshot(entries.values())
+        queue.apply([entries[pk] for pk in ids if pk in entries], decision, result)
+        record_pending_changes(entries.values(), pending_before)
+        if search.is_indexed(queue.model):
+            search.index_objects(queue.model, entries.values())
+    if result.updated:
+        invalidate_list_counts(queue.model)
+    order = {pk: position for position, pk in enumerate(ids)}
+    result.items.sort(key=lambda item: order[item.id])
+    return result
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.13 on 2026-10-17 09:12
+
+import re
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+ENTRY_MARKER = re.compile(r'\n?entry_id:(\d+)\s*$')
+BATCH_SIZE = 1000
+
+
+def link_marked_approvals(apps, schema_editor):
+    """
+    Link approvals to their entry from the 'entry_id:<pk>' marker the
+    approval view used to append to approval_note, and drop the marker.
+    When an entry was decided several times the latest approval is linked;
+    the older ones stay as unlinked history.
+    """
+    PermissionApproval = apps.get_model('approval', 'PermissionApproval')
+    PermissionEntry = apps.get_model('entry', 'PermissionEntry')
+
+    latest = {}
+    marked = PermissionApproval.objects.filter(approval_note__contains='entry_id:').order_by('created_at', 'id')
+    for approval in marked.only('id', 'approval_note').iterator(chunk_size=BATCH_SIZE):
+        match = ENTRY_MARKER.search(approval.approval_note)
+        if match:
+            latest[int(match.group(1))] = approval
+
+    entry_ids = list(latest)
+    existing = set()
+    for start in range(0, len(entry_ids), BATCH_SIZE):
+        existing.update(PermissionEntry.objects.filter(
+            pk__in=entry_ids[start:start + BATCH_SIZE],
+        ).values_list('pk', flat=True))
+
+    linked = []
+    for entry_id, approval in latest.items():
+        if entry_id in existing:
+            approval.permission_entry_id = entry_id
+            approval.approval_note = ENTRY_MARKER.sub('', approval.approval_note)
+            linked.append(approval)
+    PermissionApproval.objects.bulk_update(linked, ['permission_entry', 'approval_note'], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entry', '0021_leave_ledger'),
+        ('approval', '0003_travelapproval_travel_entry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='permissionapproval',
+            name='permission_entry',
+            field=models.OneToOneField(blank=True, help_text='The Permission Entry being approved', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='permission_approval', to='entry.permissionentry'),
+        ),
+        migrations.RunPython(link_marked_approvals, migrations.RunPython.noop),
+    ]
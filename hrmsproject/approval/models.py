@@ -1,7 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 
-from entry.models import CompOffEntry, LeaveEntry, TravelEntry
+from entry.models import CompOffEntry, LeaveEntry, PermissionEntry, TravelEntry
 from master.models import Employee
 
 User = get_user_model()
@@ -157,7 +157,7 @@ class LeaveApproval(models.Model):
 class PermissionApproval(models.Model):
     """
     Model for Permission Approvals.
-    Can be extended when PermissionEntry model is created.
+    Connected to PermissionEntry model.
     """
     APPROVAL_PENDING = 'pending'
     APPROVAL_APPROVED = 'approved'
@@ -168,6 +168,14 @@ class PermissionApproval(models.Model):
         (APPROVAL_REJECTED, 'Rejected'),
     ]
 
+    permission_entry = models.OneToOneField(
+        PermissionEntry,
+        on_delete=models.CASCADE,
+        related_name='permission_approval',
+        help_text='The Permission Entry being approved',
+        null=True,
+        blank=True
+    )
     approval_status = models.CharField(
         max_length=20,
         choices=APPROVAL_CHOICES,
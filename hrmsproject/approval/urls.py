@@ -32,4 +32,7 @@ urlpatterns = [
     # ==================== Travel HR ====================
     path('travel-hr/', views.travel_hr_approval_list, name='travel_hr_approval_list'),
     path('travel-hr/<int:pk>/update/', views.travel_hr_approval_update, name='travel_hr_approval_update'),
+
+    # ==================== Bulk ====================
+    path('<slug:queue>/bulk-update/', views.bulk_approval_update, name='bulk_approval_update'),
 ]
@@ -1,68 +1,63 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import permission_required
-from django.core.paginator import Paginator
-from django.db.models import Q
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, JsonResponse
 from django.utils import timezone
 from django.views.decorators.http import require_POST
 
 from entry.models import CompOffEntry, LeaveEntry, PermissionEntry, TADAEntry, TravelEntry
+from entry.leave_ledger import check_leave_balance
+from master.employee_lookup import employee_choices
+from master.list_query import FILTER_DATE_FROM, FILTER_DATE_TO, FILTER_ID, ListFilter, ListSpec
 from master.models import Employee, Site
+from master.reference_data import get_reference_data
+from .bulk import APPROVAL_QUEUES, APPROVAL_STATUSES, BULK_APPROVAL_LIMIT, apply_bulk_decision, parse_ids
 from .models import HRCompOffApproval, LeaveApproval, PermissionApproval, TravelApproval
 
 
-# ==================== HR Approval ====================
-@permission_required('approval.view_hrcompoffapproval', raise_exception=True)
-def hr_comp_off_approval(request):
-    """Approval -> HR Comp-Off Approval list with filters & pagination."""
-    per_page = request.GET.get('per_page', '').strip() or '10'
-    search_query = request.GET.get('q', '').strip()
-    page_number = request.GET.get('page')
+def _approval_filters(status_field, date_field, to_date_field=None, status_choices=None) -> tuple:
+    """The from/to date, site, employee and status filters every approval list offers."""
+    return (
+        ListFilter('from_date', date_field, FILTER_DATE_FROM),
+        ListFilter('to_date', to_date_field or date_field, FILTER_DATE_TO),
+        ListFilter('site', 'site_id', FILTER_ID),
+        ListFilter('employee', 'employee_id', FILTER_ID),
+        ListFilter('status', status_field, choices=status_choices),
+    )
 
-    from_date = request.GET.get('from_date', '').strip()
-    to_date = request.GET.get('to_date', '').strip()
-    site_id = request.GET.get('site', '').strip()
-    employee_id = request.GET.get('employee', '').strip()
-    status = request.GET.get('status', '').strip()
 
-    try:
-        per_page_value = max(int(per_page), 1)
-    except ValueError:
-        per_page_value = 10
-
-    comp_off_entries = CompOffEntry.objects.select_related('employee', 'site')
-
-    if search_query:
-        comp_off_entries = comp_off_entries.filter(
-            Q(employee__staff_name__icontains=search_query)
-            | Q(employee__staff_id__icontains=search_query)
-            | Q(site__name__icontains=search_query)
-            | Q(head_approval_by__icontains=search_query)
-        )
+def _approval_list_context(listing, object_name) -> dict:
+    params = listing.params
+    return {
+        **listing.context(object_name),
+        'from_date': params['from_date'],
+        'to_date': params['to_date'],
+        'filter_site_id': params['site'],
+        'filter_employee_id': params['employee'],
+        'filter_status': params['status'],
+        'sites': get_reference_data('sites'),
+        'employees': employee_choices(params['employee']),
+    }
 
-    if from_date:
-        comp_off_entries = comp_off_entries.filter(work_date__gte=from_date)
-    if to_date:
-        comp_off_entries = comp_off_entries.filter(work_date__lte=to_date)
-    if site_id:
-        comp_off_entries = comp_off_entries.filter(site_id=site_id)
-    if employee_id:
-        comp_off_entries = comp_off_entries.filter(employee_id=employee_id)
-    if status:
-        comp_off_entries = comp_off_entries.filter(head_approval_status=status)
 
-    comp_off_entries = comp_off_entries.order_by('-work_date', 'employee__staff_name')
+# ==================== HR Approval ====================
+HR_COMP_OFF_APPROVAL_LIST = ListSpec(
+    queryset=lambda: CompOffEntry.objects.select_related('employee', 'site'),
+    ordering=('-work_date', 'employee__staff_name'),
+    search_fields=('employee__staff_name', 'employee__staff_id', 'site__name', 'head_approval_by'),
+    filters=_approval_filters('head_approval_status', 'work_date'),
+    count_depends_on=(Employee, Site),
+)
 
-    paginator = Paginator(comp_off_entries, per_page_value)
-    page_obj = paginator.get_page(page_number)
 
-    query_params = request.GET.copy()
-    query_params.pop('page', None)
-    base_querystring = query_params.urlencode()
-    page_query_base = f'{base_querystring}&' if base_querystring else ''
+@permission_required('approval.view_hrcompoffapproval', raise_exception=True)
+def hr_comp_off_approval(request):
+    """Approval -> HR Comp-Off Approval list with filters & pagination."""
+    listing = HR_COMP_OFF_APPROVAL_LIST.run(request)
 
     # Get HR approvals for the entries
-    entry_ids = [entry.id for entry in page_obj]
+    entry_ids = [entry.id for entry in listing.page_obj]
     hr_approvals = {
         approval.comp_off_entry_id: approval
         for approval in HRCompOffApproval.objects.filter(
@@ -71,22 +66,8 @@ def hr_comp_off_approval(request):
     }
 
     context = {
-        'comp_off_entries': page_obj,
+        **_approval_list_context(listing, 'comp_off_entries'),
         'hr_approvals': hr_approvals,
-        'page_obj': page_obj,
-        'search_query': search_query,
-        'per_page': str(per_page_value),
-        'per_page_value': per_page_value,
-        'base_querystring': base_querystring,
-        'page_query_base': page_query_base,
-        'total_entries': paginator.count,
-        'from_date': from_date,
-        'to_date': to_date,
-        'filter_site_id': site_id,
-        'filter_employee_id': employee_id,
-        'filter_status': status,
-        'sites': Site.objects.order_by('name'),
-        'employees': Employee.objects.order_by('staff_name'),
         'approval_choices': HRCompOffApproval.APPROVAL_CHOICES,
     }
     return render(request, 'approval/hr_approval/list.html', context)
@@ -144,71 +125,21 @@ def daily_attendance_print(request):
 
 
 # ==================== Leave ====================
+LEAVE_APPROVAL_LIST = ListSpec(
+    queryset=lambda: LeaveEntry.objects.select_related('employee', 'site', 'leave_approval', 'leave_approval__approved_by'),
+    ordering=('-from_date', 'employee__staff_name'),
+    search_fields=('employee__staff_name', 'employee__staff_id', 'site__name', 'reason'),
+    filters=_approval_filters('approval_status', 'from_date', 'to_date'),
+    count_depends_on=(Employee, Site),
+)
+
+
 @permission_required('approval.view_leaveapproval', raise_exception=True)
 def leave_approval_list(request):
     """Approval -> Leave Approval list with filters & pagination."""
-    per_page = request.GET.get('per_page', '').strip() or '10'
-    search_query = request.GET.get('q', '').strip()
-    page_number = request.GET.get('page')
-
-    from_date = request.GET.get('from_date', '').strip()
-    to_date = request.GET.get('to_date', '').strip()
-    site_id = request.GET.get('site', '').strip()
-    employee_id = request.GET.get('employee', '').strip()
-    status = request.GET.get('status', '').strip()
-
-    try:
-        per_page_value = max(int(per_page), 1)
-    except ValueError:
-        per_page_value = 10
-
-    leave_entries = LeaveEntry.objects.select_related('employee', 'site', 'leave_approval', 'leave_approval__approved_by')
-
-    if search_query:
-        leave_entries = leave_entries.filter(
-            Q(employee__staff_name__icontains=search_query)
-            | Q(employee__staff_id__icontains=search_query)
-            | Q(site__name__icontains=search_query)
-            | Q(reason__icontains=search_query)
-        )
-
-    if from_date:
-        leave_entries = leave_entries.filter(from_date__gte=from_date)
-    if to_date:
-        leave_entries = leave_entries.filter(to_date__lte=to_date)
-    if site_id:
-        leave_entries = leave_entries.filter(site_id=site_id)
-    if employee_id:
-        leave_entries = leave_entries.filter(employee_id=employee_id)
-    if status:
-        leave_entries = leave_entries.filter(approval_status=status)
-
-    leave_entries = leave_entries.order_by('-from_date', 'employee__staff_name')
-
-    paginator = Paginator(leave_entries, per_page_value)
-    page_obj = paginator.get_page(page_number)
-
-    query_params = request.GET.copy()
-    query_params.pop('page', None)
-    base_querystring = query_params.urlencode()
-    page_query_base = f'{base_querystring}&' if base_querystring else ''
-
+    listing = LEAVE_APPROVAL_LIST.run(request)
     context = {
-        'leave_entries': page_obj,
-        'page_obj': page_obj,
-        'search_query': search_query,
-        'per_page': str(per_page_value),
-        'per_page_value': per_page_value,
-        'base_querystring': base_querystring,
-        'page_query_base': page_query_base,
-        'total_entries': paginator.count,
-        'from_date': from_date,
-        'to_date': to_date,
-        'filter_site_id': site_id,
-        'filter_employee_id': employee_id,
-        'filter_status': status,
-        'sites': Site.objects.order_by('name'),
-        'employees': Employee.objects.order_by('staff_name'),
+        **_approval_list_context(listing, 'leave_entries'),
         'approval_choices': LeaveApproval.APPROVAL_CHOICES,
         'leave_status_choices': LeaveEntry.APPROVAL_CHOICES,
     }
@@ -233,8 +164,11 @@ def leave_approval_update(request, pk):
     note = request.POST.get('note', '').strip()
 
     valid_statuses = {choice[0] for choice in LeaveApproval.APPROVAL_CHOICES}
+    balance_error = check_leave_balance(leave_entry) if new_status == 'approved' else None
     if new_status not in valid_statuses:
         messages.error(request, 'Invalid approval status.')
+    elif balance_error:
+        messages.error(request, balance_error)
     else:
         # Update leave approval model
         leave_approval.approval_status = new_status
@@ -268,80 +202,28 @@ def leave_approval_update(request, pk):
 
 
 # ==================== Permission ====================
+PERMISSION_APPROVAL_LIST = ListSpec(
+    queryset=lambda: PermissionEntry.objects.select_related(
+        'employee', 'site', 'permission_approval', 'permission_approval__approved_by',
+    ),
+    ordering=('-permission_date', 'employee__staff_name'),
+    search_fields=('employee__staff_name', 'employee__staff_id', 'site__name', 'reason'),
+    # Map PermissionApproval status to PermissionEntry status
+    filters=_approval_filters('status', 'permission_date', status_choices={
+        'pending': PermissionEntry.STATUS_PENDING,
+        'approved': PermissionEntry.STATUS_APPROVED,
+        'rejected': PermissionEntry.STATUS_CANCELLED,
+    }),
+    count_depends_on=(Employee, Site),
+)
+
+
 @permission_required('approval.view_permissionapproval', raise_exception=True)
 def permission_approval_list(request):
     """Approval -> Permission Approval list with filters & pagination."""
-    per_page = request.GET.get('per_page', '').strip() or '10'
-    search_query = request.GET.get('q', '').strip()
-    page_number = request.GET.get('page')
-
-    from_date = request.GET.get('from_date', '').strip()
-    to_date = request.GET.get('to_date', '').strip()
-    site_id = request.GET.get('site', '').strip()
-    employee_id = request.GET.get('employee', '').strip()
-    status = request.GET.get('status', '').strip()
-
-    try:
-        per_page_value = max(int(per_page), 1)
-    except ValueError:
-        per_page_value = 10
-
-    permission_entries = PermissionEntry.objects.select_related('employee', 'site')
-
-    if search_query:
-        permission_entries = permission_entries.filter(
-            Q(employee__staff_name__icontains=search_query)
-            | Q(employee__staff_id__icontains=search_query)
-            | Q(site__name__icontains=search_query)
-            | Q(reason__icontains=search_query)
-        )
-
-    if from_date:
-        permission_entries = permission_entries.filter(permission_date__gte=from_date)
-    if to_date:
-        permission_entries = permission_entries.filter(permission_date__lte=to_date)
-    if site_id:
-        permission_entries = permission_entries.filter(site_id=site_id)
-    if employee_id:
-        permission_entries = permission_entries.filter(employee_id=employee_id)
-    if status:
-        # Map PermissionApproval status to PermissionEntry status
-        status_mapping = {
-            'pending': PermissionEntry.STATUS_PENDING,
-            'approved': PermissionEntry.STATUS_APPROVED,
-            'rejected': PermissionEntry.STATUS_CANCELLED,
-        }
-        mapped_status = status_mapping.get(status)
-        if mapped_status:
-            permission_entries = permission_entries.filter(status=mapped_status)
-
-    permission_entries = permission_entries.order_by('-permission_date', 'employee__staff_name')
-
-    paginator = Paginator(permission_entries, per_page_value)
-    page_obj = paginator.get_page(page_number)
-
-    query_params = request.GET.copy()
-    query_params.pop('page', None)
-    base_querystring = query_params.urlencode()
-    page_query_base = f'{base_querystring}&' if base_querystring else ''
-
-
+    listing = PERMISSION_APPROVAL_LIST.run(request)
     context = {
-        'permission_entries': page_obj,
-        'page_obj': page_obj,
-        'search_query': search_query,
-        'per_page': str(per_page_value),
-        'per_page_value': per_page_value,
-        'base_querystring': base_querystring,
-        'page_query_base': page_query_base,
-        'total_entries': paginator.count,
-        'from_date': from_date,
-        'to_date': to_date,
-        'filter_site_id': site_id,
-        'filter_employee_id': employee_id,
-        'filter_status': status,
-        'sites': Site.objects.order_by('name'),
-        'employees': Employee.objects.order_by('staff_name'),
+        **_approval_list_context(listing, 'permission_entries'),
         'approval_choices': PermissionApproval.APPROVAL_CHOICES,
         'permission_status_choices': PermissionEntry.STATUS_CHOICES,
     }
@@ -352,12 +234,16 @@ def permission_approval_list(request):
 @require_POST
 def permission_approval_update(request, pk):
     """
-    Update permission approval status.
-    Since PermissionApproval doesn't have permission_entry field yet,
-    we update PermissionEntry status directly for now.
+    Update permission approval status using the PermissionApproval model.
+    Also updates the PermissionEntry status.
     """
     permission_entry = get_object_or_404(PermissionEntry, pk=pk)
-    
+
+    # Get or create permission approval record
+    permission_approval, created = PermissionApproval.objects.get_or_create(
+        permission_entry=permission_entry
+    )
+
     new_status = request.POST.get('status', '').strip()
     note = request.POST.get('note', '').strip()
 
@@ -365,31 +251,24 @@ def permission_approval_update(request, pk):
     if new_status not in valid_statuses:
         messages.error(request, 'Invalid approval status.')
     else:
+        # Update permission approval model
+        permission_approval.approval_status = new_status
+        permission_approval.approved_by = request.user
+        permission_approval.approval_note = note
+        permission_approval.approval_date = timezone.now()
+        permission_approval.save()
+
         # Map approval status to PermissionEntry status
         status_mapping = {
             'approved': PermissionEntry.STATUS_APPROVED,
             'rejected': PermissionEntry.STATUS_CANCELLED,
             'pending': PermissionEntry.STATUS_PENDING,
         }
-        
+
         # Update PermissionEntry status
         permission_entry.status = status_mapping.get(new_status, PermissionEntry.STATUS_PENDING)
         permission_entry.save()
-        
-        # Create PermissionApproval record for tracking
-        # TODO: Add permission_entry OneToOneField to PermissionApproval model
-        permission_approval = PermissionApproval.objects.create()
-        permission_approval.approval_status = new_status
-        permission_approval.approved_by = request.user
-        # Store entry ID in approval_note for reliable matching in get_approver_name
-        entry_id_marker = f'entry_id:{permission_entry.pk}'
-        if note:
-            permission_approval.approval_note = f'{note}\n{entry_id_marker}'
-        else:
-            permission_approval.approval_note = entry_id_marker
-        permission_approval.approval_date = timezone.now()
-        permission_approval.save()
-        
+
         messages.success(request, 'Permission approval status updated successfully.')
 
     # Redirect back to the referring page if available, otherwise to the list view
@@ -405,72 +284,21 @@ def tada_approval_list(request):
     """Approval -> TADA Approval list."""
     return render(request, 'approval/tada_approval/list.html')
 
+TADA_HEAD_APPROVAL_LIST = ListSpec(
+    queryset=lambda: TADAEntry.objects.select_related('employee', 'site'),
+    ordering=('-expense_date', '-entry_date', 'employee__staff_name'),
+    search_fields=('employee__staff_name', 'employee__staff_id', 'site__name', 'entry_no', 'batch_no'),
+    filters=_approval_filters('head_approval_status', 'expense_date'),
+    count_depends_on=(Employee, Site),
+)
+
+
 @permission_required('approval.view_tadaapproval', raise_exception=True)
 def tada_head_approval_list(request):
     """Approval -> TADA Head Approval list with filters & pagination."""
-    per_page = request.GET.get('per_page', '').strip() or '10'
-    search_query = request.GET.get('q', '').strip()
-    page_number = request.GET.get('page')
-
-    from_date = request.GET.get('from_date', '').strip()
-    to_date = request.GET.get('to_date', '').strip()
-    site_id = request.GET.get('site', '').strip()
-    employee_id = request.GET.get('employee', '').strip()
-    status = request.GET.get('status', '').strip()
-
-    try:
-        per_page_value = max(int(per_page), 1)
-    except ValueError:
-        per_page_value = 10
-
-    tada_entries = TADAEntry.objects.select_related('employee', 'site')
-
-    if search_query:
-        tada_entries = tada_entries.filter(
-            Q(employee__staff_name__icontains=search_query)
-            | Q(employee__staff_id__icontains=search_query)
-            | Q(site__name__icontains=search_query)
-            | Q(entry_no__icontains=search_query)
-            | Q(batch_no__icontains=search_query)
-        )
-
-    if from_date:
-        tada_entries = tada_entries.filter(expense_date__gte=from_date)
-    if to_date:
-        tada_entries = tada_entries.filter(expense_date__lte=to_date)
-    if site_id:
-        tada_entries = tada_entries.filter(site_id=site_id)
-    if employee_id:
-        tada_entries = tada_entries.filter(employee_id=employee_id)
-    if status:
-        tada_entries = tada_entries.filter(head_approval_status=status)
-
-    tada_entries = tada_entries.order_by('-expense_date', '-entry_date', 'employee__staff_name')
-
-    paginator = Paginator(tada_entries, per_page_value)
-    page_obj = paginator.get_page(page_number)
-
-    query_params = request.GET.copy()
-    query_params.pop('page', None)
-    base_querystring = query_params.urlencode()
-    page_query_base = f'{base_querystring}&' if base_querystring else ''
-
+    listing = TADA_HEAD_APPROVAL_LIST.run(request)
     context = {
-        'tada_entries': page_obj,
-        'page_obj': page_obj,
-        'search_query': search_query,
-        'per_page': str(per_page_value),
-        'per_page_value': per_page_value,
-        'base_querystring': base_querystring,
-        'page_query_base': page_query_base,
-        'total_entries': paginator.count,
-        'from_date': from_date,
-        'to_date': to_date,
-        'filter_site_id': site_id,
-        'filter_employee_id': employee_id,
-        'filter_status': status,
-        'sites': Site.objects.order_by('name'),
-        'employees': Employee.objects.order_by('staff_name'),
+        **_approval_list_context(listing, 'tada_entries'),
         'approval_choices': TADAEntry.APPROVAL_CHOICES,
     }
     return render(request, 'approval/tadaHead_approval/list.html', context)
@@ -541,75 +369,24 @@ def tada_head_approval_amount_update(request, pk):
         return JsonResponse({'success': False, 'error': 'Invalid amount format'}, status=400)
 
 
-@permission_required('approval.view_tadaapproval', raise_exception=True)
-def tada_hr_approval_list(request):
-    """Approval -> TADA HR Approval list with filters & pagination."""
-    per_page = request.GET.get('per_page', '').strip() or '10'
-    search_query = request.GET.get('q', '').strip()
-    page_number = request.GET.get('page')
-
-    from_date = request.GET.get('from_date', '').strip()
-    to_date = request.GET.get('to_date', '').strip()
-    site_id = request.GET.get('site', '').strip()
-    employee_id = request.GET.get('employee', '').strip()
-    status = request.GET.get('status', '').strip()
-
-    try:
-        per_page_value = max(int(per_page), 1)
-    except ValueError:
-        per_page_value = 10
-
+TADA_HR_APPROVAL_LIST = ListSpec(
     # Only show entries that have been approved by head
-    tada_entries = TADAEntry.objects.select_related('employee', 'site').filter(
+    queryset=lambda: TADAEntry.objects.select_related('employee', 'site').filter(
         head_approval_status=TADAEntry.APPROVAL_APPROVED
-    )
+    ),
+    ordering=('-expense_date', '-entry_date', 'employee__staff_name'),
+    search_fields=('employee__staff_name', 'employee__staff_id', 'site__name', 'entry_no', 'batch_no'),
+    filters=_approval_filters('hr_approval_status', 'expense_date'),
+    count_depends_on=(Employee, Site),
+)
 
-    if search_query:
-        tada_entries = tada_entries.filter(
-            Q(employee__staff_name__icontains=search_query)
-            | Q(employee__staff_id__icontains=search_query)
-            | Q(site__name__icontains=search_query)
-            | Q(entry_no__icontains=search_query)
-            | Q(batch_no__icontains=search_query)
-        )
-
-    if from_date:
-        tada_entries = tada_entries.filter(expense_date__gte=from_date)
-    if to_date:
-        tada_entries = tada_entries.filter(expense_date__lte=to_date)
-    if site_id:
-        tada_entries = tada_entries.filter(site_id=site_id)
-    if employee_id:
-        tada_entries = tada_entries.filter(employee_id=employee_id)
-    if status:
-        tada_entries = tada_entries.filter(hr_approval_status=status)
-
-    tada_entries = tada_entries.order_by('-expense_date', '-entry_date', 'employee__staff_name')
-
-    paginator = Paginator(tada_entries, per_page_value)
-    page_obj = paginator.get_page(page_number)
-
-    query_params = request.GET.copy()
-    query_params.pop('page', None)
-    base_querystring = query_params.urlencode()
-    page_query_base = f'{base_querystring}&' if base_querystring else ''
 
+@permission_required('approval.view_tadaapproval', raise_exception=True)
+def tada_hr_approval_list(request):
+    """Approval -> TADA HR Approval list with filters & pagination."""
+    listing = TADA_HR_APPROVAL_LIST.run(request)
     context = {
-        'tada_entries': page_obj,
-        'page_obj': page_obj,
-        'search_query': search_query,
-        'per_page': str(per_page_value),
-        'per_page_value': per_page_value,
-        'base_querystring': base_querystring,
-        'page_query_base': page_query_base,
-        'total_entries': paginator.count,
-        'from_date': from_date,
-        'to_date': to_date,
-        'filter_site_id': site_id,
-        'filter_employee_id': employee_id,
-        'filter_status': status,
-        'sites': Site.objects.order_by('name'),
-        'employees': Employee.objects.order_by('staff_name'),
+        **_approval_list_context(listing, 'tada_entries'),
         'approval_choices': TADAEntry.APPROVAL_CHOICES,
     }
     return render(request, 'approval/tadaHr_approval/list.html', context)
@@ -653,80 +430,28 @@ def tada_hr_print(request):
 
 
 # ==================== Travel HR ====================
+TRAVEL_HR_APPROVAL_LIST = ListSpec(
+    queryset=lambda: TravelEntry.objects.select_related('employee', 'site'),
+    ordering=('-departure_date', 'employee__staff_name'),
+    search_fields=(
+        'employee__staff_name', 'employee__staff_id', 'site__name',
+        'from_location', 'to_location', 'purpose_of_visit',
+    ),
+    filters=_approval_filters('approval_status', 'departure_date', status_choices={
+        'pending': TravelEntry.APPROVAL_PENDING,
+        'approved': TravelEntry.APPROVAL_APPROVED,
+        'rejected': TravelEntry.APPROVAL_REJECTED,
+    }),
+    count_depends_on=(Employee, Site),
+)
+
+
 @permission_required('approval.view_travelapproval', raise_exception=True)
 def travel_hr_approval_list(request):
     """Approval -> Travel HR Approval list with filters & pagination."""
-    per_page = request.GET.get('per_page', '').strip() or '10'
-    search_query = request.GET.get('q', '').strip()
-    page_number = request.GET.get('page')
-
-    from_date = request.GET.get('from_date', '').strip()
-    to_date = request.GET.get('to_date', '').strip()
-    site_id = request.GET.get('site', '').strip()
-    employee_id = request.GET.get('employee', '').strip()
-    status = request.GET.get('status', '').strip()
-
-    try:
-        per_page_value = max(int(per_page), 1)
-    except ValueError:
-        per_page_value = 10
-
-    travel_entries = TravelEntry.objects.select_related('employee', 'site')
-
-    if search_query:
-        travel_entries = travel_entries.filter(
-            Q(employee__staff_name__icontains=search_query)
-            | Q(employee__staff_id__icontains=search_query)
-            | Q(site__name__icontains=search_query)
-            | Q(from_location__icontains=search_query)
-            | Q(to_location__icontains=search_query)
-            | Q(purpose_of_visit__icontains=search_query)
-        )
-
-    if from_date:
-        travel_entries = travel_entries.filter(departure_date__gte=from_date)
-    if to_date:
-        travel_entries = travel_entries.filter(departure_date__lte=to_date)
-    if site_id:
-        travel_entries = travel_entries.filter(site_id=site_id)
-    if employee_id:
-        travel_entries = travel_entries.filter(employee_id=employee_id)
-    if status:
-        status_mapping = {
-            'pending': TravelEntry.APPROVAL_PENDING,
-            'approved': TravelEntry.APPROVAL_APPROVED,
-            'rejected': TravelEntry.APPROVAL_REJECTED,
-        }
-        mapped_status = status_mapping.get(status)
-        if mapped_status:
-            travel_entries = travel_entries.filter(approval_status=mapped_status)
-
-    travel_entries = travel_entries.order_by('-departure_date', 'employee__staff_name')
-
-    paginator = Paginator(travel_entries, per_page_value)
-    page_obj = paginator.get_page(page_number)
-
-    query_params = request.GET.copy()
-    query_params.pop('page', None)
-    base_querystring = query_params.urlencode()
-    page_query_base = f'{base_querystring}&' if base_querystring else ''
-
+    listing = TRAVEL_HR_APPROVAL_LIST.run(request)
     context = {
-        'travel_entries': page_obj,
-        'page_obj': page_obj,
-        'search_query': search_query,
-        'per_page': str(per_page_value),
-        'per_page_value': per_page_value,
-        'base_querystring': base_querystring,
-        'page_query_base': page_query_base,
-        'total_entries': paginator.count,
-        'from_date': from_date,
-        'to_date': to_date,
-        'filter_site_id': site_id,
-        'filter_employee_id': employee_id,
-        'filter_status': status,
-        'sites': Site.objects.order_by('name'),
-        'employees': Employee.objects.order_by('staff_name'),
+        **_approval_list_context(listing, 'travel_entries'),
         'approval_choices': TravelApproval.APPROVAL_CHOICES,
         'travel_status_choices': TravelEntry.APPROVAL_CHOICES,
     }
@@ -783,3 +508,41 @@ def travel_hr_approval_update(request, pk):
     if referer:
         return redirect(referer)
     return redirect('approval:travel_hr_approval_list')
+
+
+# ==================== Bulk Approval ====================
+@require_POST
+def bulk_approval_update(request, queue):
+    """
+    Approve, reject or reset many entries of one queue in a single request.
+    Expects ids[] (or a comma-separated ids), status and an optional note;
+    answers with a result per id.
+    """
+    approval_queue = APPROVAL_QUEUES.get(queue)
+    if approval_queue is None:
+        raise Http404('Unknown approval queue.')
+    if not request.user.has_perm(approval_queue.permission):
+        raise PermissionDenied
+
+    ids = parse_ids(request.POST.getlist('ids[]') or request.POST.getlist('ids'))
+    new_status = request.POST.get('status', '').strip()
+    note = request.POST.get('note', '').strip()
+
+    if new_status not in APPROVAL_STATUSES:
+        return JsonResponse({'status': 0, 'msg': 'Invalid approval status.'}, status=400)
+    if not ids:
+        return JsonResponse({'status': 0, 'msg': 'Select at least one entry.'}, status=400)
+    if len(ids) > BULK_APPROVAL_LIMIT:
+        return JsonResponse(
+            {'status': 0, 'msg': f'At most {BULK_APPROVAL_LIMIT} entries can be updated at once.'}, status=400,
+        )
+
+    result = apply_bulk_decision(approval_queue, ids, new_status, request.user, note)
+    return JsonResponse({
+        'status': 1 if not result.failed else 0,
+        'msg': f'{approval_queue.label}: {result.updated} updated, {result.unchanged} unchanged, {result.failed} failed.',
+        'updated': result.updated,
+        'unchanged': result.unchanged,
+        'failed': result.failed,
+        'results': [item.as_dict() for item in result.items],
+    })
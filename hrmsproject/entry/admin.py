@@ -1,7 +1,10 @@
 from django.contrib import admin
 from django.contrib.auth.models import Permission
 
-from .models import CompOffEntry, SiteEntry, PermissionEntry, LeaveEntry, TravelEntry, ManualEntry
+from .models import (
+    CompOffEntry, SiteEntry, PermissionEntry, LeaveEntry, TravelEntry, ManualEntry, LeaveLedgerEntry, LeaveBalance,
+)
+from .leave_ledger import post_ledger_entry
 
 
 @admin.register(CompOffEntry)
@@ -153,7 +156,7 @@ class ManualEntryAdmin(admin.ModelAdmin):
         'attendance_type',
         'worked_hours_display',
     )
-    list_filter = ('attendance_type', 'salary_type', 'shift', 'attendance_date')
+    list_filter = ('attendance_type', 'source', 'salary_type', 'shift', 'attendance_date')
     search_fields = (
         'employee__staff_name',
         'employee__staff_id',
@@ -163,3 +166,35 @@ class ManualEntryAdmin(admin.ModelAdmin):
     autocomplete_fields = ('employee', 'site')
     date_hierarchy = 'attendance_date'
     readonly_fields = ('created_at', 'updated_at', 'worked_hours_display')
+
+
+@admin.register(LeaveLedgerEntry)
+class LeaveLedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ('effective_date', 'employee', 'leave_type', 'kind', 'days', 'leave_entry', 'note')
+    list_filter = ('kind', 'leave_type', 'effective_date')
+    search_fields = ('employee__staff_name', 'employee__staff_id', 'note')
+    autocomplete_fields = ('employee',)
+    date_hierarchy = 'effective_date'
+    readonly_fields = ('leave_entry', 'accrual_month', 'created_at')
+
+    def save_model(self, request, obj, form, change):
+        # Adjustments go through the ledger so the running balance follows
+        entry = post_ledger_entry(obj.employee_id, obj.leave_type_id, obj.kind, obj.days, obj.effective_date, note=obj.note)
+        obj.pk, obj.created_at = entry.pk, entry.created_at
+
+    def has_change_permission(self, request, obj=None):
+        # Ledger rows are immutable; corrections are new adjustment rows
+        return False
+
+
+@admin.register(LeaveBalance)
+class LeaveBalanceAdmin(admin.ModelAdmin):
+    list_display = ('employee', 'leave_type', 'accrued', 'consumed', 'balance', 'updated_at')
+    list_filter = ('leave_type',)
+    search_fields = ('employee__staff_name', 'employee__staff_id')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
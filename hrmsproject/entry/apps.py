@@ -5,3 +5,6 @@ class EntryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'entry'  # Python import path
     label = 'entry'  # Database app label (for migrations)
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,121 @@
+"""
+Batched manual attendance writes.
+
+save_manual_attendance() records one attendance row per employee for a
+(date, site) in a fixed number of queries regardless of how many employees
+are posted: one to validate the employee ids, one to load the existing
+ManualEntry rows for the date and site, then bulk_create for new rows and
+bulk_update for rows whose values changed, all in one transaction.
+
+The split into create/update is done here rather than with
+bulk_create(update_conflicts=True) because MySQL does not accept the
+unique_fields that other backends require for it.
+
+Every row written here becomes source=manual, including biometric rows
+HR saves over, so later punch imports leave the correction alone.
+"""
+from dataclasses import dataclass
+from datetime import date, time
+
+from django.db import transaction
+from django.utils import timezone
+
+from master.list_query import invalidate_list_counts
+from master.models import Employee
+
+from .models import ManualEntry
+
+ATTENDANCE_BATCH_SIZE = 500
+ATTENDANCE_FIELDS = (
+    'salary_type_id', 'shift_id', 'shift_in_time', 'shift_out_time', 'attendance_type', 'remarks', 'source',
+)
+
+
+@dataclass
+class AttendanceRow:
+    """The posted attendance of one employee."""
+    employee_id: int
+    shift_in_time: time = None
+    shift_out_time: time = None
+    attendance_type: str = ManualEntry.ATTENDANCE_TYPE_PRESENT
+    remarks: str = ''
+
+
+@dataclass
+class AttendanceSaveResult:
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    skipped: int = 0
+
+    @property
+    def saved(self) -> int:
+        return self.created + self.updated + self.unchanged
+
+
+def save_manual_attendance(attendance_date: date, site_id, salary_type_id, shift_id, rows) -> AttendanceSaveResult:
+    """
+    Create or update the ManualEntry of every row for attendance_date at
+    site_id. Rows for unknown employees are skipped; when an employee is
+    posted twice the last row wins.
+    """
+    result = AttendanceSaveResult()
+    rows_by_employee = {}
+    for row in rows:
+        try:
+            employee_id = int(row.employee_id)
+        except (TypeError, ValueError):
+            result.skipped += 1
+            continue
+        rows_by_employee[employee_id] = row
+    if not rows_by_employee:
+        return result
+
+    known_ids = set(Employee.objects.filter(pk__in=rows_by_employee).values_list('pk', flat=True))
+    result.skipped += len(rows_by_employee) - len(known_ids)
+
+    with transaction.atomic():
+        existing = {
+            entry.employee_id: entry
+            for entry in ManualEntry.objects.select_for_update().filter(
+                attendance_date=attendance_date, site_id=site_id, employee_id__in=known_ids,
+            )
+        }
+        to_create = []
+        to_update = []
+        now = timezone.now()
+        for employee_id in known_ids:
+            row = rows_by_employee[employee_id]
+            values = {
+                'salary_type_id': int(salary_type_id) if salary_type_id else None,
+                'shift_id': int(shift_id) if shift_id else None,
+                'shift_in_time': row.shift_in_time,
+                'shift_out_time': row.shift_out_time,
+                'attendance_type': row.attendance_type,
+                'remarks': row.remarks,
+                'source': ManualEntry.SOURCE_MANUAL,
+            }
+            entry = existing.get(employee_id)
+            if entry is None:
+                to_create.append(ManualEntry(
+                    attendance_date=attendance_date, employee_id=employee_id, site_id=site_id, **values,
+                ))
+            elif any(getattr(entry, name) != value for name, value in values.items()):
+                for name, value in values.items():
+                    setattr(entry, name, value)
+                entry.updated_at = now
+                to_update.append(entry)
+            else:
+                result.unchanged += 1
+
+        if to_create:
+            ManualEntry.objects.bulk_create(to_create, batch_size=ATTENDANCE_BATCH_SIZE)
+        if to_update:
+            ManualEntry.objects.bulk_update(
+                to_update, ATTENDANCE_FIELDS + ('updated_at',), batch_size=ATTENDANCE_BATCH_SIZE,
+            )
+        if to_create or to_update:
+            invalidate_list_counts(ManualEntry)
+        result.created = len(to_create)
+        result.updated = len(to_update)
+    return result
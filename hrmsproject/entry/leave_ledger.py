@@ -0,0 +1,309 @@
+"""
+Leave balance ledger.
+
+Every change to an employee's leave balance is a LeaveLedgerEntry row:
+- monthly accruals (LeaveType.monthly_accrual days, credited by
+  accrue_leave),
+- the consumption of an HR-approved leave,
+- the reversal of that consumption when the leave is rejected, edited or
+  deleted,
+- manual adjustments (opening balances, corrections).
+
+LeaveBalance keeps the running totals per (employee, leave type), updated
+with F() increments in the same transaction as the ledger row. Reading a
+balance is therefore a single unique-key lookup, and approvals check it
+without summing history.
+
+The handlers in entry.signals call record_leave_change() from
+LeaveEntry post_save/post_delete. They compare the consumption the entry
+had before the save with the one it has now, so only real state changes
+(approval, rejection, a change of days, type or employee) write to the
+ledger.
+
+Leave types without a monthly accrual are not tracked against a balance.
+Their consumption is still recorded, but approvals are not limited.
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from master.models import Employee, LeaveType
+from master.reference_data import get_reference_data
+
+from .models import LeaveBalance, LeaveEntry, LeaveLedgerEntry
+
+LEDGER_BATCH_SIZE = 1000
+LEDGER_CONSUMED_STATUS = LeaveEntry.APPROVAL_HR_APPROVED
+
+
+@dataclass
+class LeaveAccrualResult:
+    credited: int = 0
+    skipped: int = 0
+
+
+def _consumption(employee_id, leave_type_id, leave_days, approval_status):
+    """(employee_id, leave_type_id, days) a leave in this state takes from the balance, or None."""
+    if approval_status != LEDGER_CONSUMED_STATUS or not leave_type_id or not employee_id:
+        return None
+    days = Decimal(leave_days or 0)
+    return (employee_id, int(leave_type_id), days) if days > 0 else None
+
+
+def _apply_to_balance(employee_id, leave_type_id, accrued=Decimal('0'), consumed=Decimal('0')) -> None:
+    """Add to the running totals, creating the balance row on first use."""
+    changes = {
+        'accrued': F('accrued') + accrued,
+        'consumed': F('consumed') + consumed,
+        'balance': F('balance') + accrued - consumed,
+        'updated_at': timezone.now(),
+    }
+    balances = LeaveBalance.objects.filter(employee_id=employee_id, leave_type_id=leave_type_id)
+    if balances.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            LeaveBalance.objects.create(
+                employee_id=employee_id, leave_type_id=leave_type_id,
+                accrued=accrued, consumed=consumed, balance=accrued - consumed,
+            )
+    except IntegrityError:
+        # Created concurrently: fall back to the increment
+        balances.update(**changes)
+
+
+def post_ledger_entry(employee_id, leave_type_id, kind, days, effective_date, leave_entry_id=None, note='') -> LeaveLedgerEntry:
+    """Write one ledger row and apply it to the balance (days: + credit, - debit)."""
+    days = Decimal(days)
+    with transaction.atomic():
+        entry = LeaveLedgerEntry.objects.create(
+            employee_id=employee_id, leave_type_id=leave_type_id, kind=kind, days=days,
+            effective_date=effective_date, leave_entry_id=leave_entry_id, note=note[:255],
+        )
+        if kind in (LeaveLedgerEntry.KIND_CONSUMPTION, LeaveLedgerEntry.KIND_REVERSAL):
+            _apply_to_balance(employee_id, leave_type_id, consumed=-days)
+        else:
+            _apply_to_balance(employee_id, leave_type_id, accrued=days)
+    return entry
+
+
+def leave_snapshot(values) -> tuple:
+    """The (employee_id, leave_type_id, leave_days, approval_status) of a LeaveEntry or a values() row."""
+    if isinstance(values, dict):
+        return values['employee_id'], values['leave_type_id'], values['leave_days'], values['approval_status']
+    return values.employee_id, values.leave_type_id, values.leave_days, values.approval_status
+
+
+def _effective_date(leave_entry) -> date:
+    return date.fromisoformat(leave_entry.from_date) if isinstance(leave_entry.from_date, str) else leave_entry.from_date
+
+
+def _change_rows(leave_entry, previous, deleted: bool) -> list[LeaveLedgerEntry]:
+    """The reversal/consumption rows (unsaved) for one leave entry change."""
+    old = _consumption(*previous) if previous else None
+    new = None if deleted else _consumption(*leave_snapshot(leave_entry))
+    if old == new:
+        return []
+    effective_date = _effective_date(leave_entry)
+    entry_id = None if deleted else leave_entry.pk
+    rows = []
+    if old:
+        rows.append(LeaveLedgerEntry(
+            employee_id=old[0], leave_type_id=old[1], kind=LeaveLedgerEntry.KIND_REVERSAL, days=old[2],
+            effective_date=effective_date, leave_entry_id=entry_id,
+            note=f'Leave entry #{leave_entry.pk} {"deleted" if deleted else "changed"}',
+        ))
+    if new:
+        rows.append(LeaveLedgerEntry(
+            employee_id=new[0], leave_type_id=new[1], kind=LeaveLedgerEntry.KIND_CONSUMPTION, days=-new[2],
+            effective_date=effective_date, leave_entry_id=entry_id, note=f'Leave entry #{leave_entry.pk} approved',
+        ))
+    return rows
+
+
+def record_leave_change(leave_entry, previous=None, deleted: bool = False) -> None:
+    """
+    Post the ledger rows for a leave entry that went from the previous
+    snapshot (see leave_snapshot; None for a new entry) to its current state.
+    """
+    rows = _change_rows(leave_entry, previous, deleted)
+    if not rows:
+        return
+    with transaction.atomic():
+        for row in rows:
+            post_ledger_entry(
+                row.employee_id, row.leave_type_id, row.kind, row.days, row.effective_date,
+                row.leave_entry_id, row.note,
+            )
+
+
+def record_leave_changes(changes) -> int:
+    """
+    Bulk form of record_leave_change for (leave_entry, previous) pairs updated
+    with queryset writes (which skip the LeaveEntry signals): one bulk INSERT
+    of ledger rows and one balance increment per employee and leave type.
+    Returns the number of ledger rows written.
+    """
+    rows = [row for leave_entry, previous in changes for row in _change_rows(leave_entry, previous, False)]
+    if not rows:
+        return 0
+    consumed = {}
+    for row in rows:
+        key = (row.employee_id, row.leave_type_id)
+        consumed[key] = consumed.get(key, Decimal('0')) - row.days
+    with transaction.atomic():
+        LeaveLedgerEntry.objects.bulk_create(rows, batch_size=LEDGER_BATCH_SIZE)
+        for (employee_id, leave_type_id), days in consumed.items():
+            if days:
+                _apply_to_balance(employee_id, leave_type_id, consumed=days)
+    return len(rows)
+
+
+def get_balance(employee_id, leave_type_id) -> Decimal:
+    """Current balance of an employee for a leave type (0 when nothing was posted)."""
+    balance = LeaveBalance.objects.filter(
+        employee_id=employee_id, leave_type_id=leave_type_id,
+    ).values_list('balance', flat=True).first()
+    return balance if balance is not None else Decimal('0')
+
+
+def check_leave_balance(leave_entry) -> str | None:
+    """An error message if approving leave_entry would overdraw the balance, else None."""
+    return check_leave_balances([leave_entry]).get(leave_entry.pk)
+
+
+def check_leave_balances(leave_entries) -> dict:
+    """
+    {leave_entry.pk: error} for the entries whose approval would overdraw
+    the balance, approving them in order (several leaves of one employee
+    draw on the same balance). One query for all the balances involved.
+    """
+    tracked = {
+        leave_type.id for leave_type in get_reference_data('leave_types') if leave_type.monthly_accrual is not None
+    }
+    pending = [
+        leave_entry for leave_entry in leave_entries
+        if leave_entry.approval_status != LEDGER_CONSUMED_STATUS and leave_entry.leave_type_id in tracked
+    ]
+    if not pending:
+        return {}
+    balances = {
+        (employee_id, leave_type_id): balance
+        for employee_id, leave_type_id, balance in LeaveBalance.objects.filter(
+            employee_id__in={leave_entry.employee_id for leave_entry in pending},
+            leave_type_id__in={leave_entry.leave_type_id for leave_entry in pending},
+        ).values_list('employee_id', 'leave_type_id', 'balance')
+    }
+    errors = {}
+    for leave_entry in pending:
+        key = (leave_entry.employee_id, leave_entry.leave_type_id)
+        available = balances.get(key, Decimal('0'))
+        if leave_entry.leave_days > available:
+            errors[leave_entry.pk] = (
+                f'Insufficient leave balance: {leave_entry.leave_days} day(s) requested, {available} available.'
+            )
+        else:
+            balances[key] = available - leave_entry.leave_days
+    return errors
+
+
+def accrue_leave(month: date, employee_ids=None) -> LeaveAccrualResult:
+    """
+    Credit every accruing leave type's monthly_accrual to every employee who
+    has joined by the end of month. Months already credited are skipped, so
+    the batch can be re-run safely.
+    """
+    result = LeaveAccrualResult()
+    month = month.replace(day=1)
+    month_end = (month + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    leave_types = {
+        leave_type_id: accrual
+        for leave_type_id, accrual in LeaveType.objects.filter(monthly_accrual__gt=0).values_list('id', 'monthly_accrual')
+    }
+    if not leave_types:
+        return result
+    employees = Employee.objects.filter(date_of_join__lte=month_end)
+    if employee_ids is not None:
+        employees = employees.filter(pk__in=employee_ids)
+    employee_ids = list(employees.values_list('id', flat=True))
+
+    with transaction.atomic():
+        credited = set(LeaveLedgerEntry.objects.filter(
+            accrual_month=month, leave_type_id__in=leave_types, employee_id__in=employee_ids,
+        ).values_list('employee_id', 'leave_type_id'))
+        rows = [
+            LeaveLedgerEntry(
+                employee_id=employee_id, leave_type_id=leave_type_id, kind=LeaveLedgerEntry.KIND_ACCRUAL,
+                days=accrual, effective_date=month, accrual_month=month, note=f'Accrual {month:%b %Y}',
+            )
+            for employee_id in employee_ids
+            for leave_type_id, accrual in leave_types.items()
+            if (employee_id, leave_type_id) not in credited
+        ]
+        result.skipped = len(credited)
+        if not rows:
+            return result
+        LeaveLedgerEntry.objects.bulk_create(rows, batch_size=LEDGER_BATCH_SIZE)
+        result.credited = len(rows)
+
+        # Apply the credits to the running balances in bulk
+        credits = {(row.employee_id, row.leave_type_id): row.days for row in rows}
+        balances = {
+            (balance.employee_id, balance.leave_type_id): balance
+            for balance in LeaveBalance.objects.select_for_update().filter(
+                leave_type_id__in=leave_types, employee_id__in=employee_ids,
+            )
+        }
+        now = timezone.now()
+        to_update = []
+        to_create = []
+        for (employee_id, leave_type_id), days in credits.items():
+            balance = balances.get((employee_id, leave_type_id))
+            if balance is None:
+                to_create.append(LeaveBalance(
+                    employee_id=employee_id, leave_type_id=leave_type_id, accrued=days, balance=days,
+                ))
+            else:
+                balance.accrued += days
+                balance.balance += days
+                balance.updated_at = now
+                to_update.append(balance)
+        LeaveBalance.objects.bulk_update(to_update, ['accrued', 'balance', 'updated_at'], batch_size=LEDGER_BATCH_SIZE)
+        LeaveBalance.objects.bulk_create(to_create, batch_size=LEDGER_BATCH_SIZE)
+    return result
+
+
+def rebuild_balances(employee_ids=None) -> int:
+    """Recompute LeaveBalance from the ledger (after imports or manual fixes); returns rows written."""
+    ledger = LeaveLedgerEntry.objects.all()
+    if employee_ids is not None:
+        ledger = ledger.filter(employee_id__in=employee_ids)
+    consumed_kinds = (LeaveLedgerEntry.KIND_CONSUMPTION, LeaveLedgerEntry.KIND_REVERSAL)
+    totals = {}
+    for employee_id, leave_type_id, kind, days in ledger.order_by().values(
+        'employee_id', 'leave_type_id', 'kind',
+    ).annotate(days=Sum('days')).values_list('employee_id', 'leave_type_id', 'kind', 'days'):
+        accrued, consumed = totals.get((employee_id, leave_type_id), (Decimal('0'), Decimal('0')))
+        if kind in consumed_kinds:
+            consumed -= days
+        else:
+            accrued += days
+        totals[(employee_id, leave_type_id)] = (accrued, consumed)
+
+    with transaction.atomic():
+        balances = LeaveBalance.objects.select_for_update()
+        if employee_ids is not None:
+            balances = balances.filter(employee_id__in=employee_ids)
+        balances.delete()
+        LeaveBalance.objects.bulk_create([
+            LeaveBalance(
+                employee_id=employee_id, leave_type_id=leave_type_id,
+                accrued=accrued, consumed=consumed, balance=accrued - consumed,
+            )
+            for (employee_id, leave_type_id), (accrued, consumed) in totals.items()
+        ], batch_size=LEDGER_BATCH_SIZE)
+    return len(totals)
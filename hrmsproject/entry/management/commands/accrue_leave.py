@@ -0,0 +1,42 @@
+"""
+Django management command to credit the monthly leave accrual.
+
+Usage:
+    python manage.py accrue_leave                  # current month
+    python manage.py accrue_leave --month 2026-03
+    python manage.py accrue_leave --rebuild        # recompute balances from the ledger
+
+Safe to re-run: employees already credited for the month are skipped.
+"""
+from datetime import date, datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from entry.leave_ledger import accrue_leave, rebuild_balances
+
+
+class Command(BaseCommand):
+    help = 'Credit LeaveType.monthly_accrual to every employee for a month'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', default='', help='Month to credit as YYYY-MM (default: current month)')
+        parser.add_argument('--rebuild', action='store_true', help='Recompute every balance from the ledger instead')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            rows = rebuild_balances()
+            self.stdout.write(self.style.SUCCESS(f'{rows} leave balance(s) rebuilt from the ledger.'))
+            return
+
+        if options['month']:
+            try:
+                month = datetime.strptime(options['month'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError('Month must be in YYYY-MM format.')
+        else:
+            month = date.today().replace(day=1)
+
+        result = accrue_leave(month)
+        self.stdout.write(self.style.SUCCESS(
+            f'{month:%b %Y}: {result.credited} accrual(s) credited, {result.skipped} already credited.'
+        ))
@@ -0,0 +1,75 @@
+"""
+Django management command to import biometric punch logs into attendance.
+
+Usage:
+    python manage.py import_punches 1_attlog.dat --source gate-1
+    python manage.py import_punches punches_march.csv --site 3 --dry-run
+    python manage.py import_punches 1_attlog.dat --source gate-1 --full
+"""
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from entry.punches import import_punches
+from master.reference_data import get_reference_data
+
+
+class Command(BaseCommand):
+    help = 'Import a biometric device export (.csv or ZKTeco-style .dat) into daily attendance'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to the .csv / .dat / .txt export')
+        parser.add_argument('--source', default='', help='Device or export name for the watermark (default: file name)')
+        parser.add_argument('--site', default='', help='Site id or name for days without a scheduled site')
+        parser.add_argument('--full', action='store_true', help='Ignore the watermark and re-read every punch')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without saving')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f'File not found: {path}')
+
+        site_id = None
+        if options['site']:
+            site = next((
+                site for site in get_reference_data('sites')
+                if str(site.id) == options['site'] or site.name.strip().lower() == options['site'].strip().lower()
+            ), None)
+            if site is None:
+                raise CommandError(f"Unknown site: {options['site']}")
+            site_id = site.id
+
+        with path.open('rb') as file_obj:
+            try:
+                result = import_punches(
+                    file_obj,
+                    path.name,
+                    source=options['source'],
+                    default_site_id=site_id,
+                    full=options['full'],
+                    dry_run=options['dry_run'],
+                )
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        for error in result.errors:
+            self.stdout.write(self.style.ERROR(f"Line {error['row']}: {error['message']}"))
+        if result.unknown_ids:
+            sample = ', '.join(sorted(result.unknown_ids)[:20])
+            self.stdout.write(self.style.WARNING(
+                f'{len(result.unknown_ids)} unknown biometric id(s) ({result.unknown_rows} punches): {sample}'
+            ))
+        if result.unassigned:
+            self.stdout.write(self.style.WARNING(
+                f'{result.unassigned} day(s) skipped: no scheduled site; pass --site to use a default.'
+            ))
+
+        summary = (
+            f'{result.rows_read} row(s) read, {result.punches} new punch(es), {result.skipped} before the watermark, '
+            f'{result.duplicates} duplicate(s). Attendance: {result.created} created, {result.updated} updated, '
+            f'{result.unchanged} unchanged, {result.removed} merged, {result.manual_kept} manual entries kept.'
+        )
+        if result.dry_run:
+            self.stdout.write(self.style.WARNING(f'Dry run: {summary} Nothing was saved.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,51 @@
+"""
+Django management command to rebuild the materialised effective schedule.
+
+Usage:
+    python manage.py refresh_effective_schedule --from 2025-01-01 --to 2025-12-31
+    python manage.py refresh_effective_schedule --from 2025-04-01 --to 2025-04-30 --employee 12 --employee 15
+"""
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from entry.schedule import refresh_schedule
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the effective schedule (employee x day) from rosters, leaves, holidays and shifts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='from_date', required=True, help='First date (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='to_date', required=True, help='Last date (YYYY-MM-DD)')
+        parser.add_argument(
+            '--employee',
+            dest='employee_ids',
+            type=int,
+            action='append',
+            help='Employee id to refresh (repeatable; default: everyone)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            from_date = date.fromisoformat(options['from_date'])
+            to_date = date.fromisoformat(options['to_date'])
+        except ValueError:
+            raise CommandError('Dates must be in YYYY-MM-DD format.')
+        if to_date < from_date:
+            raise CommandError('--to cannot be before --from.')
+
+        created = updated = removed = 0
+        # One month at a time keeps memory flat on large ranges
+        start = from_date
+        while start <= to_date:
+            end = min(to_date, (start.replace(day=1) + timedelta(days=32)).replace(day=1) - timedelta(days=1))
+            result = refresh_schedule(options['employee_ids'], start, end)
+            created += result.created
+            updated += result.updated
+            removed += result.removed
+            start = end + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Effective schedule refreshed: {created} created, {updated} updated, {removed} removed.'
+        ))
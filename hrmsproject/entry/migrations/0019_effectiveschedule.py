@@ -0,0 +1,42 @@
+# Generated by Django 4.2.13 on 2026-10-17 02:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0023_employee_staff_name_index'),
+        ('entry', '0018_remove_old_salary_type_column'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EffectiveSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('shift_name', models.CharField(blank=True, max_length=100)),
+                ('start_time', models.TimeField(blank=True, null=True)),
+                ('end_time', models.TimeField(blank=True, null=True)),
+                ('is_day_off', models.BooleanField(default=False)),
+                ('is_holiday', models.BooleanField(default=False)),
+                ('holiday_type', models.CharField(blank=True, max_length=120)),
+                ('is_leave', models.BooleanField(default=False)),
+                ('leave_duration_type', models.CharField(blank=True, max_length=20)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='effective_schedule', to='master.employee')),
+                ('leave_type', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='master.leavetype')),
+                ('shift', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='effective_schedule', to='master.shift')),
+                ('site', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='effective_schedule', to='master.site')),
+            ],
+            options={
+                'verbose_name': 'Effective Schedule',
+                'verbose_name_plural': 'Effective Schedule',
+                'ordering': ['date', 'employee_id'],
+                'indexes': [models.Index(fields=['date', 'site'], name='entry_effsched_date_site_idx')],
+                'unique_together': {('employee', 'date')},
+            },
+        ),
+    ]
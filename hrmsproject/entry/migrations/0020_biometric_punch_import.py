@@ -0,0 +1,33 @@
+# Generated by Django 4.2.13 on 2026-10-17 02:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entry', '0019_effectiveschedule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BiometricWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=120, unique=True)),
+                ('last_punch_date', models.DateField()),
+                ('last_punch_time', models.TimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Biometric Watermark',
+                'verbose_name_plural': 'Biometric Watermarks',
+                'ordering': ['source'],
+            },
+        ),
+        migrations.AddField(
+            model_name='manualentry',
+            name='source',
+            field=models.CharField(choices=[('manual', 'Manual'), ('biometric', 'Biometric')], default='manual', help_text='Biometric rows are maintained by the punch import', max_length=20),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 4.2.13 on 2026-10-17 02:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_consumption(apps, schema_editor):
+    """Record already HR-approved leave as consumption (no opening balances are assumed)."""
+    LeaveEntry = apps.get_model('entry', 'LeaveEntry')
+    LeaveLedgerEntry = apps.get_model('entry', 'LeaveLedgerEntry')
+    LeaveBalance = apps.get_model('entry', 'LeaveBalance')
+
+    totals = {}
+    rows = []
+    approved = LeaveEntry.objects.filter(
+        approval_status='hr_approved', leave_type__isnull=False, leave_days__gt=0,
+    ).values_list('id', 'employee_id', 'leave_type_id', 'leave_days', 'from_date')
+    for entry_id, employee_id, leave_type_id, leave_days, from_date in approved.iterator():
+        rows.append(LeaveLedgerEntry(
+            employee_id=employee_id, leave_type_id=leave_type_id, kind='consumption', days=-leave_days,
+            effective_date=from_date, leave_entry_id=entry_id, note=f'Leave entry #{entry_id} approved',
+        ))
+        key = (employee_id, leave_type_id)
+        totals[key] = totals.get(key, 0) + leave_days
+    LeaveLedgerEntry.objects.bulk_create(rows, batch_size=1000)
+    LeaveBalance.objects.bulk_create([
+        LeaveBalance(employee_id=employee_id, leave_type_id=leave_type_id, consumed=days, balance=-days)
+        for (employee_id, leave_type_id), days in totals.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0025_leavetype_monthly_accrual'),
+        ('entry', '0020_biometric_punch_import'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('accrual', 'Accrual'), ('consumption', 'Consumption'), ('reversal', 'Reversal'), ('adjustment', 'Adjustment')], max_length=20)),
+                ('days', models.DecimalField(decimal_places=2, max_digits=6)),
+                ('effective_date', models.DateField()),
+                ('accrual_month', models.DateField(blank=True, help_text='First day of the credited month (accruals only)', null=True)),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_ledger', to='master.employee')),
+                ('leave_entry', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='entry.leaveentry')),
+                ('leave_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='master.leavetype')),
+            ],
+            options={
+                'verbose_name': 'Leave Ledger Entry',
+                'verbose_name_plural': 'Leave Ledger',
+                'ordering': ['-effective_date', '-id'],
+                'indexes': [models.Index(fields=['employee', 'leave_type', 'effective_date'], name='entry_leaveledger_emp_idx')],
+                'unique_together': {('employee', 'leave_type', 'accrual_month')},
+            },
+        ),
+        migrations.CreateModel(
+            name='LeaveBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('accrued', models.DecimalField(decimal_places=2, default=0, max_digits=8)),
+                ('consumed', models.DecimalField(decimal_places=2, default=0, max_digits=8)),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=8)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_balances', to='master.employee')),
+                ('leave_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balances', to='master.leavetype')),
+            ],
+            options={
+                'verbose_name': 'Leave Balance',
+                'verbose_name_plural': 'Leave Balances',
+                'ordering': ['employee_id', 'leave_type_id'],
+                'unique_together': {('employee', 'leave_type')},
+            },
+        ),
+        migrations.RunPython(backfill_consumption, migrations.RunPython.noop),
+    ]
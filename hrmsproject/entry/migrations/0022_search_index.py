@@ -0,0 +1,44 @@
+from django.db import migrations
+
+# Columns indexed per entry model (see the search.register() calls in entry.signals)
+INDEXED_FIELDS = {
+    'compoffentry': ('head_approval_by',),
+    'leaveentry': ('reason',),
+    'permissionentry': ('reason',),
+    'tadaentry': ('entry_no', 'batch_no'),
+    'travelentry': ('from_location', 'to_location', 'purpose_of_visit'),
+}
+
+
+def text_grams(text):
+    """1-3 character substrings, as master.search.text_grams at the time of this migration."""
+    text = str(text or '').lower()
+    return {text[start:start + size] for size in (1, 2, 3) for start in range(len(text) - size + 1)}
+
+
+def index_entries(apps, schema_editor):
+    SearchGram = apps.get_model('master', 'SearchGram')
+    for model_name, fields in INDEXED_FIELDS.items():
+        model = apps.get_model('entry', model_name)
+        rows = []
+        for pk, *values in model.objects.values_list('id', *fields).iterator():
+            rows.extend(
+                SearchGram(model_label=f'entry.{model_name}', object_id=pk, gram=gram)
+                for gram in set().union(*(text_grams(value) for value in values))
+            )
+            if len(rows) >= 5000:
+                SearchGram.objects.bulk_create(rows, ignore_conflicts=True)
+                rows = []
+        SearchGram.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entry', '0021_leave_ledger'),
+        ('master', '0027_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.13 on 2026-10-17 03:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entry', '0022_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='compoffentry',
+            index=models.Index(fields=['head_approval_status', 'created_at'], name='entry_compoff_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaveentry',
+            index=models.Index(fields=['approval_status', 'created_at'], name='entry_leave_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='permissionentry',
+            index=models.Index(fields=['status', 'created_at'], name='entry_permission_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tadaentry',
+            index=models.Index(fields=['head_approval_status', 'created_at'], name='entry_tada_head_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tadaentry',
+            index=models.Index(fields=['hr_approval_status', 'head_approval_status', 'created_at'], name='entry_tada_hr_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='travelentry',
+            index=models.Index(fields=['approval_status', 'created_at'], name='entry_travel_pending_idx'),
+        ),
+    ]
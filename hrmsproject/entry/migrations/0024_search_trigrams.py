@@ -0,0 +1,25 @@
+from django.db import migrations
+from django.db.models.functions import Length
+
+# Entry models whose indexed columns are all free text (see the search.register() calls in entry.signals)
+TEXT_INDEXED_MODELS = ('compoffentry', 'leaveentry', 'permissionentry', 'travelentry')
+
+
+def keep_trigrams(apps, schema_editor):
+    """Free-text columns are indexed by trigrams only; drop their 1-2 character grams."""
+    SearchGram = apps.get_model('master', 'SearchGram')
+    SearchGram.objects.filter(
+        model_label__in=[f'entry.{model_name}' for model_name in TEXT_INDEXED_MODELS],
+    ).annotate(size=Length('gram')).filter(size__lt=3).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entry', '0023_approval_inbox_indexes'),
+        ('master', '0028_search_trigrams'),
+    ]
+
+    operations = [
+        migrations.RunPython(keep_trigrams, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,14 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
 
-from django.db import models
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
 
+from master.holidays import is_working_day, working_days
 from master.models import Employee, Site, ExpenseType, SubExpense, Shift, SalaryType, LeaveType
+from master.reference_data import get_reference_data
+from master.sequences import NumberFormat, allocate
 
 
 class CompOffEntry(models.Model):
@@ -61,6 +66,10 @@ class CompOffEntry(models.Model):
         ordering = ['-work_date', 'employee__staff_name']
         verbose_name = 'Comp-Off Entry'
         verbose_name_plural = 'Comp-Off Entries'
+        # Pending items by age for the approval inbox (accounts.inbox)
+        indexes = [
+            models.Index(fields=['head_approval_status', 'created_at'], name='entry_compoff_pending_idx'),
+        ]
 
     def __str__(self):
         return f'{self.employee} - {self.work_date}'
@@ -175,6 +184,9 @@ class PermissionEntry(models.Model):
         ordering = ['-permission_date', 'employee__staff_name']
         verbose_name = 'Permission Entry'
         verbose_name_plural = 'Permission Entries'
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='entry_permission_pending_idx'),
+        ]
 
     def __str__(self):
         return f'{self.employee} - {self.permission_date} ({self.status})'
@@ -186,66 +198,19 @@ class PermissionEntry(models.Model):
         return ''
     
     def get_approver_name(self):
-        """Get the name of the person who approved/rejected this entry."""
+        """
+        Get the name of the person who approved/rejected this entry.
+        List views select_related('permission_approval__approved_by') so
+        this costs no query per row.
+        """
+        if self.status == self.STATUS_PENDING:
+            return None
         try:
-            from approval.models import PermissionApproval
-            from django.utils import timezone
-            from datetime import timedelta
-            
-            # Map PermissionEntry status to PermissionApproval status
-            status_mapping = {
-                'approved': 'approved',
-                'cancelled': 'rejected',
-            }
-            approval_status = status_mapping.get(self.status)
-            
-            if approval_status:
-                # Try to match by checking if approval_note contains this entry's ID
-                # The approval view stores entry ID in approval_note as a workaround
-                approval = PermissionApproval.objects.filter(
-                    approval_status=approval_status,
-                    approved_by__isnull=False,
-                    approval_note__contains=f'entry_id:{self.pk}'
-                ).select_related('approved_by').order_by('-created_at').first()
-                
-                # If not found by entry ID, try to match by approval_date (more accurate than created_at)
-                if not approval:
-                    time_window_start = self.updated_at - timedelta(minutes=15)
-                    time_window_end = self.updated_at + timedelta(minutes=5)
-                    approval = PermissionApproval.objects.filter(
-                        approval_status=approval_status,
-                        approved_by__isnull=False,
-                        approval_date__isnull=False,
-                        approval_date__gte=time_window_start,
-                        approval_date__lte=time_window_end
-                    ).select_related('approved_by').order_by('-approval_date').first()
-                
-                # If no match found by approval_date, try matching by created_at
-                if not approval:
-                    time_window_start = self.updated_at - timedelta(minutes=15)
-                    time_window_end = self.updated_at + timedelta(minutes=5)
-                    approval = PermissionApproval.objects.filter(
-                        approval_status=approval_status,
-                        approved_by__isnull=False,
-                        created_at__gte=time_window_start,
-                        created_at__lte=time_window_end
-                    ).select_related('approved_by').order_by('-created_at').first()
-                
-                # Last fallback: get the most recent approval with matching status
-                # This is less reliable but better than showing nothing
-                if not approval:
-                    approval = PermissionApproval.objects.filter(
-                        approval_status=approval_status,
-                        approved_by__isnull=False
-                    ).select_related('approved_by').order_by('-approval_date', '-created_at').first()
-                
-                if approval and approval.approved_by:
-                    return approval.approved_by.get_full_name() or approval.approved_by.username
-        except Exception as e:
-            # Log the exception for debugging (optional)
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Error getting approver name for PermissionEntry {self.pk}: {str(e)}")
+            approved_by = self.permission_approval.approved_by
+        except ObjectDoesNotExist:
+            return None
+        if approved_by:
+            return approved_by.get_full_name() or approved_by.username
         return None
 
 
@@ -318,31 +283,65 @@ class LeaveEntry(models.Model):
         ordering = ['-from_date', 'employee__staff_name']
         verbose_name = 'Leave Entry'
         verbose_name_plural = 'Leave Entries'
+        indexes = [
+            models.Index(fields=['approval_status', 'created_at'], name='entry_leave_pending_idx'),
+        ]
 
     def __str__(self):
         return f'{self.employee} - {self.from_date} to {self.to_date} ({self.get_leave_type_display()})'
 
+    # The fields leave_days is counted from
+    LEAVE_DAY_FIELDS = ('from_date', 'to_date', 'site_id', 'leave_duration_type')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._counted_from = instance._leave_day_values()
+        return instance
+
+    def _leave_day_values(self):
+        """The LEAVE_DAY_FIELDS values as loaded (None if any is deferred)."""
+        if any(name not in self.__dict__ for name in self.LEAVE_DAY_FIELDS):
+            return None
+        return tuple(self.__dict__[name] for name in self.LEAVE_DAY_FIELDS)
+
+    def _leave_days_stale(self) -> bool:
+        """
+        Whether leave_days has to be counted: on create, or when the dates,
+        site or duration changed. Existing leave_days values are kept, so
+        approving or editing the note of a leave never moves its days.
+        """
+        if self._state.adding or self.pk is None:
+            return True
+        counted_from = getattr(self, '_counted_from', None)
+        if counted_from is None:
+            counted_from = type(self).objects.filter(pk=self.pk).values_list(*self.LEAVE_DAY_FIELDS).first()
+        return counted_from != tuple(getattr(self, name) for name in self.LEAVE_DAY_FIELDS)
+
     def save(self, *args, **kwargs):
-        # Calculate leave days based on from_date, to_date, and duration_type
+        # Calculate leave days from the working days (weekly offs and site holidays excluded)
         if self.from_date and self.to_date:
             if self.to_date < self.from_date:
                 raise ValueError("To date cannot be before from date")
-            
-            days_diff = (self.to_date - self.from_date).days + 1
-            
-            # Adjust based on duration type
-            if self.leave_duration_type == self.DURATION_FULL_DAY:
-                self.leave_days = days_diff
-            elif self.leave_duration_type in [self.DURATION_FORENOON, self.DURATION_AFTERNOON]:
-                # Half day calculation
-                if days_diff == 1:
-                    self.leave_days = 0.50
-                else:
-                    # Multiple days: full days + half day
-                    self.leave_days = (days_diff - 1) + 0.50
-            else:
-                self.leave_days = days_diff
+            if self._leave_days_stale():
+                site_name = next((site.name for site in get_reference_data('sites') if site.id == self.site_id), '')
+                self.leave_days = self.count_leave_days(
+                    site_name, self.from_date, self.to_date, self.leave_duration_type,
+                )
         super().save(*args, **kwargs)
+        self._counted_from = self._leave_day_values()
+
+    @classmethod
+    def count_leave_days(cls, site_name, from_date, to_date, duration_type) -> Decimal:
+        """Working days at the site between the dates; a half-day leave counts its last day as 0.50."""
+        days = Decimal(working_days(site_name, from_date, to_date))
+        if (
+            days
+            and duration_type in (cls.DURATION_FORENOON, cls.DURATION_AFTERNOON)
+            and is_working_day(site_name, to_date)
+        ):
+            days -= Decimal('0.50')
+        return days
 
     @property
     def leave_dates_display(self) -> str:
@@ -439,38 +438,30 @@ class TADAEntry(models.Model):
         ordering = ['-expense_date', '-entry_date', 'employee__staff_name']
         verbose_name = 'TADA Entry'
         verbose_name_plural = 'TADA Entries'
+        indexes = [
+            models.Index(fields=['head_approval_status', 'created_at'], name='entry_tada_head_pending_idx'),
+            models.Index(fields=['hr_approval_status', 'head_approval_status', 'created_at'], name='entry_tada_hr_pending_idx'),
+        ]
 
     def __str__(self):
         return f'{self.employee} - {self.expense_date} (Entry: {self.entry_no or "N/A"})'
 
     def save(self, *args, **kwargs):
         if not self.entry_no:
-            # Generate entry number: TADA-YYYYMMDD-XXX
-            today = datetime.now().date()
-            prefix = f'TADA-{today.strftime("%Y%m%d")}'
-            last_entry = TADAEntry.objects.filter(entry_no__startswith=prefix).order_by('-entry_no').first()
-            if last_entry and last_entry.entry_no:
-                try:
-                    last_num = int(last_entry.entry_no.split('-')[-1])
-                    new_num = last_num + 1
-                except (ValueError, IndexError):
-                    new_num = 1
-            else:
-                new_num = 1
-            self.entry_no = f'{prefix}-{new_num:03d}'
-        
-        # Calculate total amount from sub items only if entry has a primary key
-        # (can't access related objects before saving)
-        if self.pk:
-            self.total_amount = sum(item.amount for item in self.sub_items.all())
-        else:
-            # For new entries, total_amount will be calculated after sub_items are created
-            # Set to 0 initially if not already set
-            if not hasattr(self, '_total_amount_set'):
-                self.total_amount = 0
-        
+            with transaction.atomic():
+                self.entry_no = self.allocate_entry_numbers()[0]
+                super().save(*args, **kwargs)
+            return
+        # total_amount is maintained by entry.tada.save_claim when the lines change
         super().save(*args, **kwargs)
 
+    @classmethod
+    def allocate_entry_numbers(cls, count: int = 1, day: date = None) -> list[str]:
+        """Reserve count entry numbers (TADA-YYYYMMDD-NNN, numbered per day) for new entries."""
+        day = day or datetime.now().date()
+        number_format = NumberFormat(f'TADA-{day:%Y%m%d}', 3)
+        return allocate(number_format, count, seed_from=(cls.objects.all(), 'entry_no'))
+
     @property
     def head_approval_badge_class(self) -> str:
         mapping = {
@@ -567,21 +558,18 @@ class TADAEntrySubItem(models.Model):
     def __str__(self):
         return f'{self.tada_entry.entry_no} - {self.expense_type.name} - {self.amount}'
 
+    @staticmethod
+    def meter_distance(start_meter, end_meter) -> Decimal:
+        """Kilometres between two odometer readings, allowing for a meter rollover."""
+        start, end = Decimal(str(start_meter)), Decimal(str(end_meter))
+        return end - start if end >= start else (Decimal('999999') - start) + end
+
     def save(self, *args, **kwargs):
         # Calculate total kilometer if start and end meter are provided
         if self.start_meter is not None and self.end_meter is not None:
             try:
-                # Convert to Decimal if they're strings
-                from decimal import Decimal
-                start = Decimal(str(self.start_meter)) if not isinstance(self.start_meter, Decimal) else self.start_meter
-                end = Decimal(str(self.end_meter)) if not isinstance(self.end_meter, Decimal) else self.end_meter
-                
-                if end >= start:
-                    self.total_kilometer = end - start
-                else:
-                    # Handle meter rollover
-                    self.total_kilometer = (Decimal('999999') - start) + end
-            except (ValueError, TypeError):
+                self.total_kilometer = self.meter_distance(self.start_meter, self.end_meter)
+            except (ValueError, TypeError, InvalidOperation):
                 # If conversion fails, leave total_kilometer as is
                 pass
         super().save(*args, **kwargs)
@@ -705,6 +693,9 @@ class TravelEntry(models.Model):
         ordering = ['-departure_date', '-entry_date', 'employee__staff_name']
         verbose_name = 'Travel Requisition Entry'
         verbose_name_plural = 'Travel Requisition Entries'
+        indexes = [
+            models.Index(fields=['approval_status', 'created_at'], name='entry_travel_pending_idx'),
+        ]
 
     def __str__(self):
         return f'{self.employee} - {self.from_location} to {self.to_location} ({self.departure_date})'
@@ -749,6 +740,12 @@ class ManualEntry(models.Model):
         (ATTENDANCE_TYPE_HALF_DAY, 'Half Day'),
         (ATTENDANCE_TYPE_LEAVE, 'Leave'),
     ]
+    SOURCE_MANUAL = 'manual'
+    SOURCE_BIOMETRIC = 'biometric'
+    SOURCE_CHOICES = [
+        (SOURCE_MANUAL, 'Manual'),
+        (SOURCE_BIOMETRIC, 'Biometric'),
+    ]
 
     attendance_date = models.DateField()
     employee = models.ForeignKey(
@@ -785,6 +782,12 @@ class ManualEntry(models.Model):
         default=ATTENDANCE_TYPE_PRESENT,
     )
     remarks = models.TextField(blank=True, help_text='Additional remarks or notes')
+    source = models.CharField(
+        max_length=20,
+        choices=SOURCE_CHOICES,
+        default=SOURCE_MANUAL,
+        help_text='Biometric rows are maintained by the punch import',
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -821,4 +824,171 @@ class ManualEntry(models.Model):
             parts.append(f'{hours} hr{"s" if hours != 1 else ""}')
         if minutes:
             parts.append(f'{minutes} min{"s" if minutes != 1 else ""}')
-        return ' '.join(parts) or '0 mins'
\ No newline at end of file
+        return ' '.join(parts) or '0 mins'
+
+class LeaveLedgerEntry(models.Model):
+    """
+    One movement of an employee's leave balance for a leave type: a monthly
+    accrual, the consumption of an approved leave, the reversal of a
+    consumption, or a manual adjustment. Days are signed (+ credit,
+    - debit). Written by entry.leave_ledger only.
+    """
+    KIND_ACCRUAL = 'accrual'
+    KIND_CONSUMPTION = 'consumption'
+    KIND_REVERSAL = 'reversal'
+    KIND_ADJUSTMENT = 'adjustment'
+    KIND_CHOICES = [
+        (KIND_ACCRUAL, 'Accrual'),
+        (KIND_CONSUMPTION, 'Consumption'),
+        (KIND_REVERSAL, 'Reversal'),
+        (KIND_ADJUSTMENT, 'Adjustment'),
+    ]
+
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name='leave_ledger',
+    )
+    leave_type = models.ForeignKey(
+        LeaveType,
+        on_delete=models.CASCADE,
+        related_name='ledger_entries',
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    days = models.DecimalField(max_digits=6, decimal_places=2)
+    effective_date = models.DateField()
+    accrual_month = models.DateField(
+        null=True,
+        blank=True,
+        help_text='First day of the credited month (accruals only)',
+    )
+    leave_entry = models.ForeignKey(
+        LeaveEntry,
+        on_delete=models.SET_NULL,
+        related_name='ledger_entries',
+        null=True,
+        blank=True,
+    )
+    note = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-effective_date', '-id']
+        verbose_name = 'Leave Ledger Entry'
+        verbose_name_plural = 'Leave Ledger'
+        # NULL accrual_month values never collide, so only accruals are unique per month
+        unique_together = [('employee', 'leave_type', 'accrual_month')]
+        indexes = [
+            models.Index(fields=['employee', 'leave_type', 'effective_date'], name='entry_leaveledger_emp_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.employee_id} - {self.leave_type_id} {self.kind} {self.days}'
+
+
+class LeaveBalance(models.Model):
+    """Running totals of LeaveLedgerEntry per employee and leave type (balance = accrued - consumed)."""
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name='leave_balances',
+    )
+    leave_type = models.ForeignKey(
+        LeaveType,
+        on_delete=models.CASCADE,
+        related_name='balances',
+    )
+    accrued = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    consumed = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    balance = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['employee_id', 'leave_type_id']
+        verbose_name = 'Leave Balance'
+        verbose_name_plural = 'Leave Balances'
+        unique_together = [('employee', 'leave_type')]
+
+    def __str__(self):
+        return f'{self.employee_id} - {self.leave_type_id}: {self.balance}'
+
+
+class BiometricWatermark(models.Model):
+    """
+    Newest punch imported from each biometric source (a device or export
+    name). Punches at or before it are skipped when the source is imported
+    again; see entry.punches.
+    """
+    source = models.CharField(max_length=120, unique=True)
+    last_punch_date = models.DateField()
+    last_punch_time = models.TimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['source']
+        verbose_name = 'Biometric Watermark'
+        verbose_name_plural = 'Biometric Watermarks'
+
+    def __str__(self):
+        return f'{self.source} - {self.last_punch_date} {self.last_punch_time}'
+
+
+class EffectiveSchedule(models.Model):
+    """
+    What each employee is scheduled to do on each day: the winning roster
+    shift (with its Shift times), day off, site holiday and approved leave.
+    Maintained by entry.schedule; do not edit rows by hand.
+    """
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name='effective_schedule',
+    )
+    date = models.DateField()
+    site = models.ForeignKey(
+        Site,
+        on_delete=models.SET_NULL,
+        related_name='effective_schedule',
+        null=True,
+        blank=True,
+    )
+    shift = models.ForeignKey(
+        Shift,
+        on_delete=models.SET_NULL,
+        related_name='effective_schedule',
+        null=True,
+        blank=True,
+    )
+    shift_name = models.CharField(max_length=100, blank=True)
+    start_time = models.TimeField(null=True, blank=True)
+    end_time = models.TimeField(null=True, blank=True)
+    is_day_off = models.BooleanField(default=False)
+    is_holiday = models.BooleanField(default=False)
+    holiday_type = models.CharField(max_length=120, blank=True)
+    is_leave = models.BooleanField(default=False)
+    leave_type = models.ForeignKey(
+        LeaveType,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        null=True,
+        blank=True,
+    )
+    leave_duration_type = models.CharField(max_length=20, blank=True)
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['date', 'employee_id']
+        verbose_name = 'Effective Schedule'
+        verbose_name_plural = 'Effective Schedule'
+        unique_together = [('employee', 'date')]
+        indexes = [
+            models.Index(fields=['date', 'site'], name='entry_effsched_date_site_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.employee_id} - {self.date} ({self.shift_name or "OFF"})'
+
+    @property
+    def is_working_day(self) -> bool:
+        full_day_leave = self.is_leave and self.leave_duration_type == LeaveEntry.DURATION_FULL_DAY
+        return bool(self.shift_name) and not (self.is_day_off or self.is_holiday or full_day_leave)
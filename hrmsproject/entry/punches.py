@@ -0,0 +1,381 @@
+"""
+Biometric punch-log ingestion into daily attendance (ManualEntry).
+
+Device exports are read as a stream, either as a CSV file with a header row
+or as a ZKTeco-style attendance log (.dat / .txt). In the log, each line is
+"<user id> <YYYY-MM-DD HH:MM:SS> <verify> <state> ...", separated by tabs
+or spaces. Each punch is mapped to an employee through an in-memory
+Employee.biometric_id index. It is kept per employee as one packed integer
+(seconds since 0001-01-01, an "already imported" flag and the in/out
+state) in an array, so a multi-million-row month stays small in memory.
+
+Each employee's punches are then sorted, de-duplicated (punches within
+PUNCH_DEDUPE_SECONDS of the previous one) and grouped into sessions. A
+session runs from its first punch for at most PUNCH_MAX_SHIFT_HOURS, so a
+night shift's out-punch after midnight closes the session that started the
+day before. The session is stored on its start date with the in and out
+times; ManualEntry.worked_duration adds the day back when out <= in.
+Sessions are written per batch of employees with one query for existing
+rows, one for the effective schedule (site and shift of the day), then
+bulk_create / bulk_update / delete, each batch in its own transaction.
+
+Rows typed or edited by HR (source=manual) are never touched. Biometric rows already
+in the period are fed back in as in/out punches before grouping, so an
+import that only carries the newer punches merges with what was imported
+before. That makes re-imports idempotent. A BiometricWatermark per source
+records the newest punch imported, and older punches are skipped without
+grouping or writing, so re-importing a cumulative device export is cheap.
+"""
+import csv
+import io
+from array import array
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from master.list_query import invalidate_list_counts
+from master.models import Employee
+
+from .models import BiometricWatermark, EffectiveSchedule, ManualEntry
+
+PUNCH_EMPLOYEE_BATCH = 500
+PUNCH_WRITE_BATCH = 1000
+PUNCH_DEDUPE_SECONDS = 60
+PUNCH_MAX_SHIFT_HOURS = 20
+PUNCH_MIN_REST_HOURS = 4
+PUNCH_MAX_ERRORS = 100
+
+PUNCH_STATE_UNKNOWN = 0
+PUNCH_STATE_IN = 1
+PUNCH_STATE_OUT = 2
+_PUNCH_EXISTING = 4  # punch rebuilt from an already imported ManualEntry
+
+# Device state codes and labels (ZKTeco: 0 check-in, 1 check-out, 2 break-out,
+# 3 break-in, 4 overtime-in, 5 overtime-out)
+PUNCH_STATE_VALUES = {
+    '0': PUNCH_STATE_IN, '3': PUNCH_STATE_IN, '4': PUNCH_STATE_IN,
+    '1': PUNCH_STATE_OUT, '2': PUNCH_STATE_OUT, '5': PUNCH_STATE_OUT,
+    'i': PUNCH_STATE_IN, 'in': PUNCH_STATE_IN, 'checkin': PUNCH_STATE_IN, 'check_in': PUNCH_STATE_IN,
+    'o': PUNCH_STATE_OUT, 'out': PUNCH_STATE_OUT, 'checkout': PUNCH_STATE_OUT, 'check_out': PUNCH_STATE_OUT,
+}
+
+# Accepted CSV header spellings
+PUNCH_CSV_ALIASES = {
+    'biometric_id': ('biometric_id', 'user_id', 'userid', 'emp_code', 'employee_code', 'enroll_no', 'ac_no', 'badge_number'),
+    'timestamp': ('timestamp', 'punch_time', 'datetime', 'date_time', 'check_time', 'checktime', 'log_time'),
+    'date': ('date', 'punch_date', 'log_date'),
+    'time': ('time', 'log_time_of_day'),
+    'state': ('state', 'punch_state', 'status', 'check_type', 'checktype', 'in_out', 'punch_type'),
+}
+PUNCH_TIMESTAMP_FORMATS = ('%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d-%m-%Y %H:%M:%S', '%d-%m-%Y %H:%M')
+
+_DAY_SECONDS = 86400
+
+
+@dataclass
+class PunchImportResult:
+    rows_read: int = 0
+    punches: int = 0
+    skipped: int = 0
+    duplicates: int = 0
+    unknown_rows: int = 0
+    invalid_rows: int = 0
+    sessions: int = 0
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    manual_kept: int = 0
+    unassigned: int = 0
+    dry_run: bool = False
+    unknown_ids: set = field(default_factory=set)
+    errors: list = field(default_factory=list)
+
+
+def normalise_biometric_id(value) -> str:
+    """Device user ids drop leading zeros, so "0012" and "12" are the same person."""
+    key = str(value or '').strip()
+    if key.isdigit():
+        key = key.lstrip('0') or '0'
+    return key
+
+
+def biometric_index() -> dict:
+    """{normalised biometric_id: employee id} for every employee with a biometric id."""
+    return {
+        normalise_biometric_id(biometric_id): employee_id
+        for biometric_id, employee_id in Employee.objects.exclude(biometric_id='').values_list(
+            'biometric_id', 'id',
+        ).iterator()
+    }
+
+
+def parse_timestamp(text: str):
+    """A punch timestamp as a naive device-local datetime, or None."""
+    text = (text or '').strip()
+    try:
+        return datetime.fromisoformat(text).replace(tzinfo=None)
+    except ValueError:
+        pass
+    for fmt in PUNCH_TIMESTAMP_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_state(text) -> int:
+    return PUNCH_STATE_VALUES.get(str(text or '').strip().lower().replace('-', '_').replace(' ', ''), PUNCH_STATE_UNKNOWN)
+
+
+def _iter_dat_rows(text):
+    for line_number, line in enumerate(text, 1):
+        parts = line.split('\t') if '\t' in line else line.split()
+        if not parts or not parts[0].strip():
+            continue
+        if '\t' in line:
+            stamp, state = parts[1] if len(parts) > 1 else '', parts[3] if len(parts) > 3 else ''
+        else:
+            # Space separated: id, date, time, verify, state
+            stamp, state = ' '.join(parts[1:3]), parts[4] if len(parts) > 4 else ''
+        yield line_number, parts[0], parse_timestamp(stamp), _parse_state(state)
+
+
+def _iter_csv_rows(text):
+    reader = csv.reader(text)
+    headers = [str(header or '').strip().lower().replace(' ', '_').replace('-', '_') for header in next(reader, [])]
+    columns = {}
+    for name, aliases in PUNCH_CSV_ALIASES.items():
+        columns[name] = next((headers.index(alias) for alias in aliases if alias in headers), None)
+    if columns['biometric_id'] is None or (columns['timestamp'] is None and columns['date'] is None):
+        raise ValueError('The CSV file needs a biometric_id column and a timestamp (or date and time) column.')
+
+    def cell(values, name):
+        index = columns[name]
+        return values[index] if index is not None and index < len(values) else ''
+
+    for line_number, values in enumerate(reader, 2):
+        if not any(value.strip() for value in values):
+            continue
+        if columns['timestamp'] is not None:
+            stamp = cell(values, 'timestamp')
+        else:
+            stamp = f"{cell(values, 'date').strip()} {cell(values, 'time').strip()}"
+        yield line_number, cell(values, 'biometric_id'), parse_timestamp(stamp), _parse_state(cell(values, 'state'))
+
+
+def iter_punch_rows(file_obj, filename: str):
+    """Yield (line number, biometric id, datetime or None, state) for each punch in a device export."""
+    text = io.TextIOWrapper(file_obj, encoding='utf-8-sig', errors='replace', newline='')
+    if filename.lower().endswith('.csv'):
+        return _iter_csv_rows(text)
+    if filename.lower().endswith(('.dat', '.txt')):
+        return _iter_dat_rows(text)
+    raise ValueError('Unsupported file type. Upload a .csv or a device .dat / .txt log.')
+
+
+def _to_seconds(value: datetime) -> int:
+    return value.toordinal() * _DAY_SECONDS + value.hour * 3600 + value.minute * 60 + value.second
+
+
+def _to_date(seconds: int) -> date:
+    return date.fromordinal(seconds // _DAY_SECONDS)
+
+
+def _to_time(seconds: int) -> time:
+    seconds %= _DAY_SECONDS
+    return time(seconds // 3600, seconds % 3600 // 60, seconds % 60)
+
+
+def build_sessions(punches, result: PunchImportResult = None) -> list[tuple[int, int]]:
+    """
+    Group one employee's packed punches into [(start seconds, end seconds)],
+    at most one per start date. Duplicate punches are dropped (and counted on
+    result unless they were rebuilt from existing rows).
+    """
+    max_shift = PUNCH_MAX_SHIFT_HOURS * 3600
+    min_rest = PUNCH_MIN_REST_HOURS * 3600
+    sessions = []
+    last = None
+    for value in sorted(punches):
+        seconds, state = value >> 3, value & 3
+        if last is not None and seconds - last < PUNCH_DEDUPE_SECONDS:
+            if result is not None and not value & _PUNCH_EXISTING:
+                result.duplicates += 1
+            continue
+        last = seconds
+        current = sessions[-1] if sessions else None
+        if (current is None or seconds - current[0] > max_shift
+                or (state == PUNCH_STATE_IN and current[2] and seconds - current[1] >= min_rest)):
+            current = [seconds, seconds, False]
+            sessions.append(current)
+        else:
+            current[1] = seconds
+        if state == PUNCH_STATE_OUT:
+            current[2] = True
+
+    by_day = {}
+    for start, end, _ in sessions:
+        day = start // _DAY_SECONDS
+        if day in by_day:
+            by_day[day] = (by_day[day][0], max(by_day[day][1], end))
+        else:
+            by_day[day] = (start, end)
+    return list(by_day.values())
+
+
+def _existing_punches(entry) -> list[int]:
+    """An imported ManualEntry as packed in/out punches."""
+    start = entry.attendance_date.toordinal() * _DAY_SECONDS
+    start += entry.shift_in_time.hour * 3600 + entry.shift_in_time.minute * 60 + entry.shift_in_time.second
+    punches = [start << 3 | _PUNCH_EXISTING | PUNCH_STATE_IN]
+    if entry.shift_out_time:
+        worked = entry.worked_duration
+        punches.append((start + int(worked.total_seconds())) << 3 | _PUNCH_EXISTING | PUNCH_STATE_OUT)
+    return punches
+
+
+def _save_batch(batch: dict, default_site_id, result: PunchImportResult) -> None:
+    """Turn one batch of {employee_id: packed punches} into ManualEntry rows."""
+    low = min(min(values) for values in batch.values()) >> 3
+    high = max(max(values) for values in batch.values()) >> 3
+    first_date = _to_date(low) - timedelta(days=1)
+    last_date = _to_date(high) + timedelta(days=1)
+
+    with transaction.atomic():
+        imported = {}
+        manual_days = set()
+        for entry in ManualEntry.objects.select_for_update().filter(
+            employee_id__in=batch.keys(), attendance_date__range=(first_date, last_date),
+        ):
+            key = (entry.employee_id, entry.attendance_date)
+            if entry.source != ManualEntry.SOURCE_BIOMETRIC:
+                manual_days.add(key)
+            elif entry.shift_in_time:
+                imported[key] = entry
+                batch[entry.employee_id].extend(_existing_punches(entry))
+
+        schedule = {
+            (employee_id, day): (site_id, shift_id)
+            for employee_id, day, site_id, shift_id in EffectiveSchedule.objects.filter(
+                employee_id__in=batch.keys(), date__range=(first_date, last_date),
+            ).values_list('employee_id', 'date', 'site_id', 'shift_id')
+        }
+
+        to_create = []
+        to_update = []
+        now = timezone.now()
+        for employee_id, punches in batch.items():
+            for start, end in build_sessions(punches, result):
+                day = _to_date(start)
+                key = (employee_id, day)
+                result.sessions += 1
+                if key in manual_days:
+                    result.manual_kept += 1
+                    continue
+                entry = imported.pop(key, None)
+                site_id, shift_id = schedule.get(key, (None, None))
+                site_id = site_id or (entry.site_id if entry else None) or default_site_id
+                if not site_id:
+                    result.unassigned += 1
+                    continue
+                values = {
+                    'site_id': int(site_id),
+                    'shift_id': shift_id or (entry.shift_id if entry else None),
+                    'shift_in_time': _to_time(start),
+                    'shift_out_time': _to_time(end) if end != start else None,
+                }
+                if entry is None:
+                    to_create.append(ManualEntry(
+                        attendance_date=day, employee_id=employee_id, source=ManualEntry.SOURCE_BIOMETRIC,
+                        attendance_type=ManualEntry.ATTENDANCE_TYPE_PRESENT, **values,
+                    ))
+                elif any(getattr(entry, name) != value for name, value in values.items()):
+                    for name, value in values.items():
+                        setattr(entry, name, value)
+                    entry.updated_at = now
+                    to_update.append(entry)
+                else:
+                    result.unchanged += 1
+
+        # Imported rows whose punches were absorbed into a neighbouring session
+        stale_ids = [entry.pk for entry in imported.values()]
+        for start in range(0, len(stale_ids), PUNCH_WRITE_BATCH):
+            result.removed += ManualEntry.objects.filter(pk__in=stale_ids[start:start + PUNCH_WRITE_BATCH]).delete()[0]
+        if to_update:
+            ManualEntry.objects.bulk_update(
+                to_update, ['site_id', 'shift_id', 'shift_in_time', 'shift_out_time', 'updated_at'],
+                batch_size=PUNCH_WRITE_BATCH,
+            )
+        if to_create:
+            ManualEntry.objects.bulk_create(to_create, batch_size=PUNCH_WRITE_BATCH)
+        if to_create or to_update:
+            invalidate_list_counts(ManualEntry)
+        result.created += len(to_create)
+        result.updated += len(to_update)
+        if result.dry_run:
+            transaction.set_rollback(True)
+
+
+def import_punches(file_obj, filename: str, source: str = '', default_site_id=None,
+                   full: bool = False, dry_run: bool = False) -> PunchImportResult:
+    """
+    Import a device punch export into daily attendance.
+
+    source names the device or export for the watermark (default: the file
+    name); full ignores the watermark and re-reads every punch.
+    default_site_id is used on days the employee has no scheduled site.
+    errors is a list of {'row', 'message'} dicts.
+    """
+    result = PunchImportResult(dry_run=dry_run)
+    source = (source or filename).strip()[:BiometricWatermark._meta.get_field('source').max_length]
+    index = biometric_index()
+    watermark = None if full else BiometricWatermark.objects.filter(source=source).first()
+    cutoff = _to_seconds(datetime.combine(watermark.last_punch_date, watermark.last_punch_time)) if watermark else None
+
+    punches = {}
+    newest = None
+    for line_number, biometric_id, stamp, state in iter_punch_rows(file_obj, filename):
+        result.rows_read += 1
+        if stamp is None:
+            result.invalid_rows += 1
+            if len(result.errors) < PUNCH_MAX_ERRORS:
+                result.errors.append({'row': line_number, 'message': 'Invalid or missing punch time.'})
+            continue
+        employee_id = index.get(normalise_biometric_id(biometric_id))
+        if employee_id is None:
+            result.unknown_rows += 1
+            result.unknown_ids.add(biometric_id.strip())
+            continue
+        seconds = _to_seconds(stamp)
+        if cutoff is not None and seconds <= cutoff:
+            result.skipped += 1
+            continue
+        values = punches.get(employee_id)
+        if values is None:
+            values = punches[employee_id] = array('q')
+        values.append(seconds << 3 | state)
+        if newest is None or seconds > newest:
+            newest = seconds
+        result.punches += 1
+
+    employee_ids = sorted(punches)
+    for start in range(0, len(employee_ids), PUNCH_EMPLOYEE_BATCH):
+        batch = {employee_id: punches.pop(employee_id) for employee_id in employee_ids[start:start + PUNCH_EMPLOYEE_BATCH]}
+        _save_batch(batch, default_site_id, result)
+
+    if newest is not None and not dry_run:
+        with transaction.atomic():
+            current = BiometricWatermark.objects.select_for_update().filter(source=source).first()
+            if current is None:
+                BiometricWatermark.objects.create(
+                    source=source, last_punch_date=_to_date(newest), last_punch_time=_to_time(newest),
+                )
+            elif _to_seconds(datetime.combine(current.last_punch_date, current.last_punch_time)) < newest:
+                current.last_punch_date = _to_date(newest)
+                current.last_punch_time = _to_time(newest)
+                current.save(update_fields=['last_punch_date', 'last_punch_time', 'updated_at'])
+    return result
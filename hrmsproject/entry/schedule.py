@@ -0,0 +1,178 @@
+"""
+Materialised effective schedule (EffectiveSchedule).
+
+There is one row per (employee, date) that has a roster assignment or an
+HR-approved leave. It answers "what was this employee supposed to work on
+this day" with a single indexed lookup instead of reconciling rosters,
+leaves, holidays and shifts at read time:
+
+- Roster: where rosters overlap, a week roster beats a month roster and then
+  the most recently updated assignment wins. A free-text shift name is
+  linked to the Shift master by name when the assignment has no shift.
+- Holiday: Holiday.site_name (comma-separated site names) is matched
+  against the row's site.
+- Leave: an HR-approved leave entry covering the day.
+
+refresh_schedule() rebuilds the rows for some employees over a date range
+and writes only the difference. The handlers in entry.signals call it
+whenever rosters, leaves, holidays or shifts change. The
+refresh_effective_schedule command rebuilds a whole range, e.g. after
+importing data or editing assignments in the admin.
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from master.holidays import holidays_by_date
+from master.models import ShiftRoster, ShiftRosterAssignment
+from master.reference_data import get_reference_data
+
+from .models import EffectiveSchedule, LeaveEntry
+
+SCHEDULE_BATCH_SIZE = 1000
+SCHEDULE_FIELDS = (
+    'site_id', 'shift_id', 'shift_name', 'start_time', 'end_time', 'is_day_off',
+    'is_holiday', 'holiday_type', 'is_leave', 'leave_type_id', 'leave_duration_type',
+)
+SCHEDULE_LEAVE_STATUS = LeaveEntry.APPROVAL_HR_APPROVED
+
+
+@dataclass
+class ScheduleRefreshResult:
+    created: int = 0
+    updated: int = 0
+    removed: int = 0
+
+
+def _winning_assignments(employee_ids, from_date: date, to_date: date) -> dict:
+    """{(employee_id, date): assignment values} after resolving overlapping rosters."""
+    assignments = ShiftRosterAssignment.objects.filter(date__range=(from_date, to_date))
+    if employee_ids is not None:
+        assignments = assignments.filter(employee_id__in=employee_ids)
+    best = {}
+    for row in assignments.values(
+        'id', 'employee_id', 'date', 'shift_id', 'shift_name', 'site_id', 'is_day_off', 'updated_at',
+        'roster__roster_type',
+    ):
+        rank = (row['roster__roster_type'] == ShiftRoster.ROSTER_TYPE_WEEK, row['updated_at'], row['id'])
+        key = (row['employee_id'], row['date'])
+        if key not in best or rank > best[key][0]:
+            best[key] = (rank, row)
+    return {key: row for key, (_, row) in best.items()}
+
+
+def _approved_leaves(employee_ids, from_date: date, to_date: date) -> dict:
+    """{(employee_id, date): leave values} for HR-approved leave in the range."""
+    entries = LeaveEntry.objects.filter(
+        approval_status=SCHEDULE_LEAVE_STATUS, from_date__lte=to_date, to_date__gte=from_date,
+    )
+    if employee_ids is not None:
+        entries = entries.filter(employee_id__in=employee_ids)
+    leaves = {}
+    for row in entries.order_by('from_date', 'id').values(
+        'employee_id', 'from_date', 'to_date', 'site_id', 'leave_type_id', 'leave_duration_type',
+    ):
+        day = max(row['from_date'], from_date)
+        while day <= min(row['to_date'], to_date):
+            leaves.setdefault((row['employee_id'], day), row)
+            day += timedelta(days=1)
+    return leaves
+
+
+def build_schedule(employee_ids, from_date: date, to_date: date) -> dict:
+    """{(employee_id, date): {field: value}} for SCHEDULE_FIELDS, computed from the sources."""
+    assignments = _winning_assignments(employee_ids, from_date, to_date)
+    leaves = _approved_leaves(employee_ids, from_date, to_date)
+    holidays = holidays_by_date(from_date, to_date)
+    site_names = {site.id: site.name.strip().lower() for site in get_reference_data('sites')}
+    shifts = {shift.id: shift for shift in get_reference_data('shifts')}
+    shift_ids = {shift.name.strip().upper(): shift.id for shift in shifts.values()}
+
+    rows = {}
+    for key in assignments.keys() | leaves.keys():
+        assignment = assignments.get(key) or {}
+        leave = leaves.get(key) or {}
+        site_id = assignment.get('site_id') or leave.get('site_id')
+        shift_name = assignment.get('shift_name') or ''
+        shift_id = assignment.get('shift_id') or shift_ids.get(shift_name.strip().upper())
+        shift = shifts.get(shift_id)
+        holiday_type = holidays.get(key[1], {}).get(site_names.get(site_id))
+        rows[key] = {
+            'site_id': site_id,
+            'shift_id': shift_id,
+            'shift_name': shift_name,
+            'start_time': shift.start_time if shift else None,
+            'end_time': shift.end_time if shift else None,
+            'is_day_off': bool(assignment.get('is_day_off')),
+            'is_holiday': holiday_type is not None,
+            'holiday_type': holiday_type or '',
+            'is_leave': bool(leave),
+            'leave_type_id': leave.get('leave_type_id'),
+            'leave_duration_type': leave.get('leave_duration_type') or '',
+        }
+    return rows
+
+
+def refresh_schedule(employee_ids=None, from_date: date = None, to_date: date = None) -> ScheduleRefreshResult:
+    """
+    Rebuild the effective schedule of employee_ids (None = everyone) between
+    from_date and to_date, writing only rows that changed.
+    """
+    result = ScheduleRefreshResult()
+    if employee_ids is not None:
+        employee_ids = set(employee_ids)
+        if not employee_ids:
+            return result
+    if from_date is None or to_date is None or to_date < from_date:
+        return result
+
+    with transaction.atomic():
+        rows = build_schedule(employee_ids, from_date, to_date)
+        existing = EffectiveSchedule.objects.filter(date__range=(from_date, to_date))
+        if employee_ids is not None:
+            existing = existing.filter(employee_id__in=employee_ids)
+
+        to_update = []
+        stale_ids = []
+        now = timezone.now()
+        for schedule in existing:
+            values = rows.pop((schedule.employee_id, schedule.date), None)
+            if values is None:
+                stale_ids.append(schedule.pk)
+            elif any(getattr(schedule, name) != value for name, value in values.items()):
+                for name, value in values.items():
+                    setattr(schedule, name, value)
+                schedule.refreshed_at = now
+                to_update.append(schedule)
+
+        for start in range(0, len(stale_ids), SCHEDULE_BATCH_SIZE):
+            result.removed += EffectiveSchedule.objects.filter(
+                pk__in=stale_ids[start:start + SCHEDULE_BATCH_SIZE]
+            ).delete()[0]
+        if to_update:
+            EffectiveSchedule.objects.bulk_update(to_update, SCHEDULE_FIELDS + ('refreshed_at',), batch_size=SCHEDULE_BATCH_SIZE)
+        if rows:
+            EffectiveSchedule.objects.bulk_create(
+                [EffectiveSchedule(employee_id=employee_id, date=day, **values) for (employee_id, day), values in rows.items()],
+                batch_size=SCHEDULE_BATCH_SIZE,
+            )
+        result.created = len(rows)
+        result.updated = len(to_update)
+    return result
+
+
+def refresh_shift_times(shift) -> int:
+    """Copy a Shift's times onto the schedule rows that use it (linked or by name)."""
+    return EffectiveSchedule.objects.filter(
+        Q(shift_id=shift.pk) | Q(shift__isnull=True, shift_name__iexact=shift.name)
+    ).update(shift_id=shift.pk, start_time=shift.start_time, end_time=shift.end_time)
+
+
+def clear_shift_times(shift_name: str) -> int:
+    """Drop the times of schedule rows whose shift was deleted."""
+    return EffectiveSchedule.objects.filter(shift__isnull=True, shift_name__iexact=shift_name).update(
+        start_time=None, end_time=None,
+    )
@@ -0,0 +1,107 @@
+from datetime import date
+
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from master import search
+from master.models import Holiday, Shift, ShiftRoster
+from master.roster import roster_assignments_changed
+
+from .leave_ledger import leave_snapshot, record_leave_change
+from .models import CompOffEntry, LeaveEntry, PermissionEntry, TADAEntry, TravelEntry
+from .schedule import clear_shift_times, refresh_schedule, refresh_shift_times
+
+# Columns the entry/approval list searches match on; master.signals keeps their index current
+search.register(CompOffEntry, ('head_approval_by',))
+search.register(LeaveEntry, ('reason',))
+search.register(PermissionEntry, ('reason',))
+search.register(TADAEntry, (), identifier_fields=('entry_no', 'batch_no'))
+search.register(TravelEntry, ('from_location', 'to_location', 'purpose_of_visit'))
+
+
+def _as_date(value):
+    """Model date fields can still hold the posted 'YYYY-MM-DD' string right after save()."""
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+@receiver(roster_assignments_changed)
+def refresh_schedule_for_roster_cells(sender, employee_ids, from_date, to_date, **kwargs):
+    """Re-resolve the effective schedule for roster cells written in bulk."""
+    refresh_schedule(employee_ids, from_date, to_date)
+
+
+@receiver(pre_delete, sender=ShiftRoster)
+def remember_roster_scope(sender, instance, **kwargs):
+    """Note who and which days a roster covered before its assignments cascade away."""
+    dates = instance.assignments.values_list('date', flat=True)
+    instance._schedule_scope = (
+        set(instance.assignments.values_list('employee_id', flat=True)),
+        min(dates, default=None),
+        max(dates, default=None),
+    )
+
+
+@receiver(post_delete, sender=ShiftRoster)
+def refresh_schedule_for_deleted_roster(sender, instance, **kwargs):
+    employee_ids, from_date, to_date = getattr(instance, '_schedule_scope', (set(), None, None))
+    refresh_schedule(employee_ids, from_date, to_date)
+
+
+@receiver(pre_save, sender=LeaveEntry)
+@receiver(pre_save, sender=Holiday)
+def remember_previous_dates(sender, instance, **kwargs):
+    """Keep the dates a leave/holiday had before an edit so the old days are refreshed too."""
+    instance._schedule_previous = None
+    instance._ledger_previous = None
+    if instance.pk:
+        if sender is LeaveEntry:
+            previous = sender.objects.filter(pk=instance.pk).values(
+                'employee_id', 'from_date', 'to_date', 'leave_type_id', 'leave_days', 'approval_status',
+            ).first()
+            if previous:
+                instance._schedule_previous = (previous['employee_id'], previous['from_date'], previous['to_date'])
+                instance._ledger_previous = leave_snapshot(previous)
+        else:
+            instance._schedule_previous = sender.objects.filter(pk=instance.pk).values_list('date', flat=True).first()
+
+
+@receiver(post_save, sender=LeaveEntry)
+@receiver(post_delete, sender=LeaveEntry)
+def refresh_schedule_for_leave(sender, instance, **kwargs):
+    previous = getattr(instance, '_schedule_previous', None)
+    current = (instance.employee_id, _as_date(instance.from_date), _as_date(instance.to_date))
+    if previous and previous != current:
+        refresh_schedule([previous[0]], previous[1], previous[2])
+    refresh_schedule([current[0]], current[1], current[2])
+
+
+@receiver(post_save, sender=LeaveEntry)
+def record_leave_in_ledger(sender, instance, created, **kwargs):
+    """Post consumption/reversal rows when an entry enters or leaves HR approval."""
+    record_leave_change(instance, None if created else getattr(instance, '_ledger_previous', None))
+
+
+@receiver(post_delete, sender=LeaveEntry)
+def reverse_deleted_leave(sender, instance, **kwargs):
+    record_leave_change(instance, leave_snapshot(instance), deleted=True)
+
+
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+def refresh_schedule_for_holiday(sender, instance, **kwargs):
+    """A holiday can affect every employee on its date."""
+    previous = getattr(instance, '_schedule_previous', None)
+    holiday_date = _as_date(instance.date)
+    if previous and previous != holiday_date:
+        refresh_schedule(None, previous, previous)
+    refresh_schedule(None, holiday_date, holiday_date)
+
+
+@receiver(post_save, sender=Shift)
+def refresh_schedule_shift_times(sender, instance, **kwargs):
+    refresh_shift_times(instance)
+
+
+@receiver(post_delete, sender=Shift)
+def clear_schedule_shift_times(sender, instance, **kwargs):
+    clear_shift_times(instance.name)
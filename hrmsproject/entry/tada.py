@@ -0,0 +1,219 @@
+"""
+TADA claim writes.
+
+A claim is a TADAEntry header plus its TADAEntrySubItem lines. The posted
+lines are parsed once into ClaimLine rows, resolving expense and
+sub-expense names from the cached reference data (only ids missing from
+it, e.g. a type deactivated after the claim was filed, cost a query).
+
+save_claim() writes the header and, only when the lines differ from the
+stored ones, replaces them with a single bulk_create and recomputes
+TADAEntry.total_amount with one UPDATE ... SELECT SUM() in the database.
+Saving a claim for any other reason (approvals, printing) no longer
+touches the lines at all.
+"""
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from master.models import ExpenseType, SubExpense
+from master.reference_data import get_reference_data
+
+from .models import TADAEntry, TADAEntrySubItem
+
+CLAIM_LINE_FIELDS = (
+    'expense_type_id', 'sub_expense_type_id', 'from_location', 'to_location',
+    'start_meter', 'end_meter', 'total_kilometer', 'amount', 'description',
+)
+
+
+@dataclass
+class ClaimLine:
+    """One posted expense line of a claim."""
+    expense_type_id: int
+    amount: Decimal
+    sub_expense_type_id: int = None
+    from_location: str = ''
+    to_location: str = ''
+    start_meter: Decimal = None
+    end_meter: Decimal = None
+    total_kilometer: Decimal = None
+    description: str = ''
+    expense_type_name: str = field(default='', compare=False)
+    sub_expense_type_name: str = field(default='', compare=False)
+
+    def __post_init__(self):
+        if self.start_meter is not None and self.end_meter is not None:
+            self.total_kilometer = TADAEntrySubItem.meter_distance(self.start_meter, self.end_meter)
+
+    def key(self) -> tuple:
+        return tuple(getattr(self, name) for name in CLAIM_LINE_FIELDS)
+
+    def as_json(self) -> dict:
+        """The line as the create/edit templates restore it."""
+        return {
+            'expense_type_id': str(self.expense_type_id),
+            'expense_type_name': self.expense_type_name,
+            'sub_expense_type_id': str(self.sub_expense_type_id or ''),
+            'sub_expense_type_name': self.sub_expense_type_name,
+            'from_location': self.from_location,
+            'to_location': self.to_location,
+            'start_meter': str(self.start_meter) if self.start_meter is not None else '',
+            'end_meter': str(self.end_meter) if self.end_meter is not None else '',
+            'total_kilometer': str(self.total_kilometer) if self.total_kilometer is not None else '',
+            'amount': str(self.amount),
+            'description': self.description,
+        }
+
+
+def _decimal_or_none(value):
+    try:
+        return Decimal(str(value)) if value else None
+    except (ValueError, InvalidOperation):
+        return None
+
+
+def _name_maps(expense_type_ids, sub_expense_type_ids) -> tuple[dict, dict]:
+    """{id: name} for expense types and {id: (name, expense_type_id)} for sub-expenses."""
+    expense_names = {expense.id: expense.name for expense in get_reference_data('expense_types')}
+    sub_expenses = {sub.id: (sub.name, sub.expense_type_id) for sub in get_reference_data('sub_expense_types')}
+    missing = set(expense_type_ids) - expense_names.keys()
+    if missing:
+        expense_names.update(ExpenseType.objects.filter(pk__in=missing).values_list('id', 'name'))
+    missing = set(sub_expense_type_ids) - sub_expenses.keys()
+    if missing:
+        sub_expenses.update(
+            (pk, (name, expense_type_id))
+            for pk, name, expense_type_id in SubExpense.objects.filter(pk__in=missing).values_list('id', 'name', 'expense_type_id')
+        )
+    return expense_names, sub_expenses
+
+
+def parse_claim_lines(post) -> tuple[list[ClaimLine], list[str]]:
+    """
+    Read the sub_items_*[] arrays of a create/edit POST into ClaimLine rows.
+    Rows without an expense type or amount are ignored; invalid rows are
+    reported as 'Item n: ...' errors.
+    """
+    columns = {
+        name: post.getlist(f'sub_items_{name}[]')
+        for name in (
+            'expense_type', 'sub_expense_type', 'from_location', 'to_location',
+            'start_meter', 'end_meter', 'total_kilometer', 'amount', 'description',
+        )
+    }
+
+    def column(name, i):
+        values = columns[name]
+        return values[i].strip() if i < len(values) else ''
+
+    posted = []
+    for i in range(len(columns['expense_type'])):
+        expense_type, amount = column('expense_type', i), column('amount', i)
+        if expense_type and amount:
+            posted.append((i, expense_type, amount))
+
+    def as_id(value):
+        return int(value) if value.isdigit() else None
+
+    expense_names, sub_expenses = _name_maps(
+        {as_id(expense_type) for _, expense_type, _ in posted} - {None},
+        {as_id(column('sub_expense_type', i)) for i, _, _ in posted} - {None},
+    )
+
+    lines, errors = [], []
+    for i, expense_type, amount in posted:
+        expense_type_id = as_id(expense_type)
+        if expense_type_id not in expense_names:
+            errors.append(f'Item {i+1}: Unknown expense type.')
+            continue
+        try:
+            amount = Decimal(amount)
+        except InvalidOperation:
+            errors.append(f'Item {i+1}: Invalid amount format.')
+            continue
+        if not amount.is_finite() or amount <= 0:
+            errors.append(f'Item {i+1}: Amount must be greater than 0.')
+            continue
+        sub_expense_type_id = as_id(column('sub_expense_type', i))
+        sub_name, sub_expense_parent = sub_expenses.get(sub_expense_type_id, ('', None))
+        if sub_expense_type_id is not None and sub_expense_parent != expense_type_id:
+            errors.append(f'Item {i+1}: Sub expense does not belong to the expense type.')
+            continue
+        lines.append(ClaimLine(
+            expense_type_id=expense_type_id,
+            amount=amount,
+            sub_expense_type_id=sub_expense_type_id,
+            from_location=column('from_location', i),
+            to_location=column('to_location', i),
+            start_meter=_decimal_or_none(column('start_meter', i)),
+            end_meter=_decimal_or_none(column('end_meter', i)),
+            total_kilometer=_decimal_or_none(column('total_kilometer', i)),
+            description=column('description', i),
+            expense_type_name=expense_names[expense_type_id],
+            sub_expense_type_name=sub_name,
+        ))
+    return lines, errors
+
+
+def claim_lines(tada_entry) -> list[ClaimLine]:
+    """The stored lines of a claim (uses a prefetched sub_items cache when present)."""
+    items = list(tada_entry.sub_items.all())
+    expense_names, sub_expenses = _name_maps(
+        {item.expense_type_id for item in items},
+        {item.sub_expense_type_id for item in items} - {None},
+    )
+    return [
+        ClaimLine(
+            expense_type_id=item.expense_type_id,
+            amount=item.amount,
+            sub_expense_type_id=item.sub_expense_type_id,
+            from_location=item.from_location,
+            to_location=item.to_location,
+            start_meter=item.start_meter,
+            end_meter=item.end_meter,
+            total_kilometer=item.total_kilometer,
+            description=item.description,
+            expense_type_name=expense_names.get(item.expense_type_id, ''),
+            sub_expense_type_name=sub_expenses.get(item.sub_expense_type_id, ('', None))[0],
+        )
+        for item in items
+    ]
+
+
+def refresh_claim_totals(tada_entry_ids) -> None:
+    """Recompute total_amount from the lines in the database, one UPDATE for all ids."""
+    line_total = TADAEntrySubItem.objects.filter(
+        tada_entry_id=OuterRef('pk'),
+    ).order_by().values('tada_entry_id').annotate(total=Sum('amount')).values('total')
+    TADAEntry.objects.filter(pk__in=tada_entry_ids).update(total_amount=Coalesce(
+        Subquery(line_total, output_field=DecimalField(max_digits=10, decimal_places=2)),
+        Value(Decimal('0')),
+        output_field=DecimalField(max_digits=10, decimal_places=2),
+    ))
+
+
+def save_claim(tada_entry, lines: list[ClaimLine]) -> bool:
+    """
+    Save the claim header and its lines. The stored lines are replaced (one
+    DELETE, one bulk INSERT, one total UPDATE) only when they differ from
+    lines; returns whether they did.
+    """
+    with transaction.atomic():
+        is_new = tada_entry.pk is None
+        tada_entry.save()
+        if not is_new and [line.key() for line in claim_lines(tada_entry)] == [line.key() for line in lines]:
+            return False
+        if not is_new:
+            tada_entry.sub_items.all().delete()
+            getattr(tada_entry, '_prefetched_objects_cache', {}).pop('sub_items', None)
+        TADAEntrySubItem.objects.bulk_create([
+            TADAEntrySubItem(tada_entry=tada_entry, **{name: getattr(line, name) for name in CLAIM_LINE_FIELDS})
+            for line in lines
+        ])
+        refresh_claim_totals([tada_entry.pk])
+    tada_entry.total_amount = sum((line.amount for line in lines), Decimal('0'))
+    return True
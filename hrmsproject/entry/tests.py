@@ -1,3 +1,71 @@
+import io
+from datetime import date, time
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
+
+from master.models import Company, Employee, SalaryType, Shift, Site
+
+from .attendance import AttendanceRow, save_manual_attendance
+from .models import ManualEntry
+from .punches import import_punches
+
+PUNCH_LOG = b'7\t2025-03-03 07:55:00\t1\t0\n7\t2025-03-03 18:05:00\t1\t1\n'
+
+
+class HREditedPunchRowTests(TestCase):
+    """Rows HR corrects after an import are kept by later imports."""
+
+    @classmethod
+    def setUpTestData(cls):
+        company = Company.objects.create(
+            company_group='Group', address='-', billing_name='Billing', billing_address='-',
+            mobile_no='0', gstin_no='GSTIN-1',
+        )
+        cls.site = Site.objects.create(name='Plant A')
+        cls.shift = Shift.objects.create(name='DAY SHIFT', start_time=time(8), end_time=time(17))
+        cls.salary_type = SalaryType.objects.create(name='Monthly')
+        cls.employee = Employee.objects.create(
+            staff_name='Asha', staff_id='E-7', biometric_id='7', gender=Employee.GENDER_FEMALE,
+            date_of_birth=date(1990, 1, 1), date_of_join=date(2020, 1, 1), designation='Operator',
+            department='Production', work_location='Plant A', company=company,
+        )
+
+    def import_log(self):
+        return import_punches(io.BytesIO(PUNCH_LOG), 'device.dat', default_site_id=self.site.id, full=True)
+
+    def imported_entry(self):
+        self.import_log()
+        entry = ManualEntry.objects.get(employee=self.employee, attendance_date=date(2025, 3, 3))
+        self.assertEqual(entry.source, ManualEntry.SOURCE_BIOMETRIC)
+        self.assertEqual((entry.shift_in_time, entry.shift_out_time), (time(7, 55), time(18, 5)))
+        return entry
+
+    def assert_correction_kept(self, entry):
+        result = self.import_log()
+        self.assertEqual((result.updated, result.removed, result.manual_kept), (0, 0, 1))
+        entry.refresh_from_db()
+        self.assertEqual(entry.source, ManualEntry.SOURCE_MANUAL)
+        self.assertEqual(entry.shift_out_time, time(16))
+
+    def test_edit_view_keeps_correction(self):
+        entry = self.imported_entry()
+        self.client.force_login(get_user_model().objects.create_superuser('hr', 'hr@example.com', 'pw'))
+        response = self.client.post(reverse('entry:manual_entry_edit', args=[entry.pk]), {
+            'attendance_date': '2025-03-03', 'employee': self.employee.id, 'site': self.site.id,
+            'salary_type': self.salary_type.id, 'shift': self.shift.id,
+            'shift_in_time': '07:55', 'shift_out_time': '16:00',
+            'attendance_type': ManualEntry.ATTENDANCE_TYPE_PRESENT, 'remarks': 'Left early',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assert_correction_kept(entry)
 
-# Create your tests here.
+    def test_batch_save_keeps_correction(self):
+        entry = self.imported_entry()
+        result = save_manual_attendance(
+            date(2025, 3, 3), self.site.id, self.salary_type.id, self.shift.id,
+            [AttendanceRow(self.employee.id, time(7, 55), time(16))],
+        )
+        self.assertEqual(result.updated, 1)
+        self.assert_correction_kept(entry)
@@ -17,6 +17,7 @@ urlpatterns = [
     path('leave/edit/<int:pk>/', views.leave_entry_edit, name='leave_entry_edit'),
     path('leave/delete/<int:pk>/', views.leave_entry_delete, name='leave_entry_delete'),
     path('leave/print/', views.leave_entry_print, name='leave_entry_print'),
+    path('leave/days/', views.leave_days_preview, name='leave_days_preview'),
 
     # Entry -> Manual
     path('manual/create/', views.manual_entry_create, name='manual_entry_create'),
@@ -24,6 +25,7 @@ urlpatterns = [
     path('manual/edit/<int:pk>/', views.manual_entry_edit, name='manual_entry_edit'),
     path('manual/delete/<int:pk>/', views.manual_entry_delete, name='manual_entry_delete'),
     path('manual/print/', views.manual_entry_print, name='manual_entry_print'),
+    path('manual/punch-import/', views.manual_punch_import, name='manual_punch_import'),
 
     # Entry -> Permission
     path('permission/create/', views.permission_entry_create, name='permission_entry_create'),
@@ -1,24 +1,27 @@
  # entry/views.py
 import json
-from decimal import Decimal, InvalidOperation
 from datetime import datetime, timedelta
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, permission_required
-from django.core.paginator import Paginator
-from django.db.models import Q
+from django.http import JsonResponse
 
-from master.models import Employee, Site, ExpenseType, SubExpense
-from .models import CompOffEntry, SiteEntry, PermissionEntry, LeaveEntry, TADAEntry, TADAEntrySubItem
+from master.models import Employee, Site, Shift, SalaryType, LeaveType
+from master.employee_lookup import employee_choices
+from master.list_query import FILTER_DATE_FROM, FILTER_DATE_TO, FILTER_ID, ListFilter, ListSpec, date_range
+from master.reference_data import get_reference_data
+from .attendance import AttendanceRow, save_manual_attendance
+from .punches import import_punches
+from .tada import claim_lines, parse_claim_lines, save_claim
+from .models import CompOffEntry, SiteEntry, PermissionEntry, LeaveEntry, TADAEntry, ManualEntry, TravelEntry
 
 # ------------------------
 # ENTRY -> COMP OFF
 # ------------------------
 @permission_required('entry.add_compoffentry', raise_exception=True)
 def comp_off_create(request):
-    employees = Employee.objects.order_by('staff_name')
-    sites = Site.objects.order_by('name')
+    sites = get_reference_data('sites')
 
     values = {
         'work_date': '',
@@ -94,7 +97,7 @@ def comp_off_create(request):
             return redirect('entry:comp_off_list')
 
     context = {
-        'employees': employees,
+        'employees': employee_choices(values['employee']),
         'sites': sites,
         'values': values,
         'errors': errors,
@@ -103,53 +106,24 @@ def comp_off_create(request):
     return render(request, 'entry/comp_entry/create.html', context)
 
 
-@permission_required('entry.view_compoffentry', raise_exception=True)
-def comp_off_list(request):
-    per_page = request.GET.get('per_page', '').strip() or '10'
-    search_query = request.GET.get('q', '').strip()
-    page_number = request.GET.get('page')
+COMP_OFF_LIST = ListSpec(
+    queryset=lambda: CompOffEntry.objects.select_related('employee', 'site'),
+    ordering=('-work_date', 'employee__staff_name'),
+    search_fields=('employee__staff_name', 'employee__staff_id', 'site__name', 'head_approval_by'),
+    count_depends_on=(Employee, Site),
+)
 
-    try:
-        per_page_value = max(int(per_page), 1)
-    except ValueError:
-        per_page_value = 10
-
-    comp_off_entries = CompOffEntry.objects.select_related('employee', 'site')
-    if search_query:
-        comp_off_entries = comp_off_entries.filter(
-            Q(employee__staff_name__icontains=search_query)
-            | Q(employee__staff_id__icontains=search_query)
-            | Q(site__name__icontains=search_query)
-            | Q(head_approval_by__icontains=search_query)
-        )
-
-    comp_off_entries = comp_off_entries.order_by('-work_date', 'employee__staff_name')
-    paginator = Paginator(comp_off_entries, per_page_value)
-    page_obj = paginator.get_page(page_number)
-
-    query_params = request.GET.copy()
-    query_params.pop('page', None)
-    base_querystring = query_params.urlencode()
-    page_query_base = f'{base_querystring}&' if base_querystring else ''
 
-    context = {
-        'comp_off_entries': page_obj,
-        'page_obj': page_obj,
-        'search_query': search_query,
-        'per_page': str(per_page_value),
-        'per_page_value': per_page_value,
-        'base_querystring': base_querystring,
-        'page_query_base': page_query_base,
-        'total_entries': paginator.count,
-    }
+@permission_required('entry.view_compoffentry', raise_exception=True)
+def comp_off_list(request):
+    context = COMP_OFF_LIST.run(request).context('comp_off_entries')
     return render(request, 'entry/comp_entry/list.html', context)
 
 
 @permission_required('entry.change_compoffentry', raise_exception=True)
 def comp_off_edit(request, pk):
     comp_off_entry = get_object_or_404(CompOffEntry, pk=pk)
-    employees = Employee.objects.order_by('staff_name')
-    sites = Site.objects.order_by('name')
+    sites = get_reference_data('sites')
 
     values = {
         'work_date': comp_off_entry.work_date.strftime('%Y-%m-%d') if comp_off_entry.work_date else '',
@@ -225,7 +199,7 @@ def comp_off_edit(request, pk):
 
     context = {
         'comp_off_entry': comp_off_entry,
-        'employees': employees,
+        'employees': employee_choices(values['employee']),
         'sites': sites,
         'values': values,
         'errors': errors,
@@ -253,8 +227,8 @@ def comp_off_delete(request, pk):
 # ------------------------
 @permission_required('entry.add_leaveentry', raise_exception=True)
 def leave_entry_create(request):
-    employees = Employee.objects.order_by('staff_name')
-    sites = Site.objects.order_by('name')
+    sites = get_reference_data('sites')
+    leave_types = get_reference_data('leave_types')
 
     values = {
         'from_date': '',
@@ -315,7 +289,7 @@ def leave_entry_create(request):
         # Validate leave_type - must be provided and valid
         if not values['leave_type'] or not values['leave_type'].strip():
             errors['leave_type'] = 'Leave type is required.'
-        elif values['leave_type'] not in dict(LeaveEntry.LEAVE_TYPE_CHOICES):
+        elif not any(str(leave_type.id) == values['leave_type'] for leave_type in leave_types):
             errors['leave_type'] = 'Invalid leave type selected.'
 
         if not values['reason']:
@@ -324,18 +298,12 @@ def leave_entry_create(request):
         if not values['leave_duration_type']:
             values['leave_duration_type'] = LeaveEntry.DURATION_FULL_DAY
 
-        # Calculate leave days
+        # Calculate leave days (working days at the site)
         if from_date_obj and to_date_obj and not errors:
-            days_diff = (to_date_obj - from_date_obj).days + 1
-            if values['leave_duration_type'] == LeaveEntry.DURATION_FULL_DAY:
-                calculated_days = days_diff
-            elif values['leave_duration_type'] in [LeaveEntry.DURATION_FORENOON, LeaveEntry.DURATION_AFTERNOON]:
-                if days_diff == 1:
-                    calculated_days = 0.50
-                else:
-                    calculated_days = (days_diff - 1) + 0.50
-            else:
-                calculated_days = days_diff
+            site_name = next((site.name for site in sites if str(site.id) == values['site']), '')
+            calculated_days = LeaveEntry.count_leave_days(
+                site_name, from_date_obj, to_date_obj, values['leave_duration_type'],
+            )
 
         if not errors:
             # leave_type_id is required - validation ensures it exists
@@ -352,7 +320,7 @@ def leave_entry_create(request):
             return redirect('entry:leave_entry_list')
 
     context = {
-        'employees': employees,
+        'employees': employee_choices(values['employee']),
         'sites': sites,
         'values': values,
         'errors': errors,
@@ -364,77 +332,32 @@ def leave_entry_create(request):
     return render(request, 'entry/leave_entry/create.html', context)
 
 
-@permission_required('entry.view_leaveentry', raise_exception=True)
-def leave_entry_list(request):
-    per_page = request.GET.get('per_page', '').strip() or '10'
-    search_query = request.GET.get('q', '').strip()
-    page_number = request.GET.get('page')
-    filter_site = request.GET.get('site', '').strip()
-    filter_employee = request.GET.get('employee', '').strip()
-    filter_from_date = request.GET.get('from_date', '').strip()
-    filter_to_date = request.GET.get('to_date', '').strip()
+LEAVE_ENTRY_LIST = ListSpec(
+    queryset=lambda: LeaveEntry.objects.select_related('employee', 'site'),
+    ordering=('-from_date', 'employee__staff_name'),
+    search_fields=('employee__staff_name', 'employee__staff_id', 'site__name', 'reason'),
+    filters=(
+        ListFilter('site', 'site_id', FILTER_ID),
+        ListFilter('employee', 'employee_id', FILTER_ID),
+        ListFilter('from_date', 'from_date', FILTER_DATE_FROM),
+        ListFilter('to_date', 'to_date', FILTER_DATE_TO),
+    ),
+    count_depends_on=(Employee, Site),
+)
 
-    try:
-        per_page_value = max(int(per_page), 1)
-    except ValueError:
-        per_page_value = 10
-
-    # Fetch employees and sites for filter dropdowns
-    employees = Employee.objects.order_by('staff_name')
-    sites = Site.objects.order_by('name')
-
-    leave_entries = LeaveEntry.objects.select_related('employee', 'site')
-    
-    # Apply filters
-    if filter_site:
-        leave_entries = leave_entries.filter(site_id=filter_site)
-    if filter_employee:
-        leave_entries = leave_entries.filter(employee_id=filter_employee)
-    if filter_from_date:
-        try:
-            from_date_obj = datetime.strptime(filter_from_date, '%Y-%m-%d').date()
-            leave_entries = leave_entries.filter(from_date__gte=from_date_obj)
-        except ValueError:
-            pass
-    if filter_to_date:
-        try:
-            to_date_obj = datetime.strptime(filter_to_date, '%Y-%m-%d').date()
-            leave_entries = leave_entries.filter(to_date__lte=to_date_obj)
-        except ValueError:
-            pass
-    
-    if search_query:
-        leave_entries = leave_entries.filter(
-            Q(employee__staff_name__icontains=search_query)
-            | Q(employee__staff_id__icontains=search_query)
-            | Q(site__name__icontains=search_query)
-            | Q(reason__icontains=search_query)
-        )
-
-    leave_entries = leave_entries.order_by('-from_date', 'employee__staff_name')
-    paginator = Paginator(leave_entries, per_page_value)
-    page_obj = paginator.get_page(page_number)
-
-    query_params = request.GET.copy()
-    query_params.pop('page', None)
-    base_querystring = query_params.urlencode()
-    page_query_base = f'{base_querystring}&' if base_querystring else ''
 
+@permission_required('entry.view_leaveentry', raise_exception=True)
+def leave_entry_list(request):
+    listing = LEAVE_ENTRY_LIST.run(request)
+    params = listing.params
     context = {
-        'leave_entries': page_obj,
-        'page_obj': page_obj,
-        'search_query': search_query,
-        'per_page': str(per_page_value),
-        'per_page_value': per_page_value,
-        'base_querystring': base_querystring,
-        'page_query_base': page_query_base,
-        'total_entries': paginator.count,
-        'employees': employees,
-        'sites': sites,
-        'filter_site': filter_site,
-        'filter_employee': filter_employee,
-        'filter_from_date': filter_from_date,
-        'filter_to_date': filter_to_date,
+        **listing.context('leave_entries'),
+        'employees': employee_choices(params['employee']),
+        'sites': get_reference_data('sites'),
+        'filter_site': params['site'],
+        'filter_employee': params['employee'],
+        'filter_from_date': params['from_date'],
+        'filter_to_date': params['to_date'],
     }
     return render(request, 'entry/leave_entry/list.html', context)
 
@@ -442,8 +365,8 @@ def leave_entry_list(request):
 @permission_required('entry.change_leaveentry', raise_exception=True)
 def leave_entry_edit(request, pk):
     leave_entry = get_object_or_404(LeaveEntry, pk=pk)
-    employees = Employee.objects.order_by('staff_name')
-    sites = Site.objects.order_by('name')
+    sites = get_reference_data('sites')
+    leave_types = get_reference_data('leave_types')
 
     values = {
         'from_date': leave_entry.from_date.strftime('%Y-%m-%d') if leave_entry.from_date else '',
@@ -512,18 +435,12 @@ def leave_entry_edit(request, pk):
         if not values['leave_duration_type']:
             values['leave_duration_type'] = LeaveEntry.DURATION_FULL_DAY
 
-        # Calculate leave days
+        # Calculate leave days (working days at the site)
         if from_date_obj and to_date_obj and not errors:
-            days_diff = (to_date_obj - from_date_obj).days + 1
-            if values['leave_duration_type'] == LeaveEntry.DURATION_FULL_DAY:
-                calculated_days = days_diff
-            elif values['leave_duration_type'] in [LeaveEntry.DURATION_FORENOON, LeaveEntry.DURATION_AFTERNOON]:
-                if days_diff == 1:
-                    calculated_days = 0.50
-                else:
-                    calculated_days = (days_diff - 1) + 0.50
-            else:
-                calculated_days = days_diff
+            site_name = next((site.name for site in sites if str(site.id) == values['site']), '')
+            calculated_days = LeaveEntry.count_leave_days(
+                site_name, from_date_obj, to_date_obj, values['leave_duration_type'],
+            )
 
         if not errors:
             leave_entry.from_date = from_date_obj
@@ -541,7 +458,7 @@ def leave_entry_edit(request, pk):
 
     context = {
         'leave_entry': leave_entry,
-        'employees': employees,
+        'employees': employee_choices(values['employee']),
         'sites': sites,
         'values': values,
         'errors': errors,
@@ -572,6 +489,24 @@ def leave_entry_print(request):
     return render(request, 'entry/leave_entry/print.html')
 
 
+@permission_required('entry.view_leaveentry', raise_exception=True)
+def leave_days_preview(request):
+    """API endpoint for the leave forms: leave days (working days at the site) for the chosen dates."""
+    try:
+        from_date = datetime.strptime(request.GET.get('from_date', ''), '%Y-%m-%d').date()
+        to_date = datetime.strptime(request.GET.get('to_date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return JsonResponse({'status': 0, 'msg': 'Invalid date format.'}, status=400)
+    if to_date < from_date:
+        return JsonResponse({'status': 0, 'msg': 'To date cannot be before from date.'}, status=400)
+    site_id = request.GET.get('site', '').strip()
+    site_name = next((site.name for site in get_reference_data('sites') if str(site.id) == site_id), '')
+    days = LeaveEntry.count_leave_days(
+        site_name, from_date, to_date, request.GET.get('leave_duration_type', LeaveEntry.DURATION_FULL_DAY),
+    )
+    return JsonResponse({'status': 1, 'leave_days': f'{days:.2f}'})
+
+
 # ------------------------
 # ENTRY -> MANUAL ATTENDANCE
 # ------------------------
@@ -579,11 +514,11 @@ def leave_entry_print(request):
 def manual_entry_create(request):
     """Create manual attendance entries for employees."""
     employees = Employee.objects.order_by('staff_name')
-    sites = Site.objects.order_by('name')
+    sites = get_reference_data('sites')
 
     # Get masters data
-    shifts = Shift.objects.order_by('name')
-    salary_types = SalaryType.objects.filter(is_active=True).order_by('name')
+    shifts = get_reference_data('shifts')
+    salary_types = get_reference_data('salary_types')
 
     # Get all employees (no filtering needed - user selects from full list)
     filtered_employees = employees
@@ -615,37 +550,29 @@ def manual_entry_create(request):
 
         if not site_id:
             errors['site'] = 'Site selection is required.'
-        elif not Site.objects.filter(pk=site_id).exists():
+        elif not any(str(site.id) == site_id for site in sites):
             errors['site'] = 'Selected site does not exist.'
 
         if not salary_type_id:
             errors['salary_type'] = 'Salary type is required.'
-        elif not SalaryType.objects.filter(pk=salary_type_id, is_active=True).exists():
+        elif not any(str(salary_type.id) == salary_type_id for salary_type in salary_types):
             errors['salary_type'] = 'Invalid salary type selected.'
 
         if not shift_id:
             errors['shift'] = 'Shift is required.'
-        elif not Shift.objects.filter(pk=shift_id).exists():
+        elif not any(str(shift.id) == shift_id for shift in shifts):
             errors['shift'] = 'Invalid shift selected.'
 
         if not selected_employees:
             errors['employees'] = 'At least one employee must be selected.'
 
-        # Process each employee
-        if not errors and attendance_date_str and site_id:
-            attendance_date = datetime.strptime(attendance_date_str, '%Y-%m-%d').date()
-            created_count = 0
-            updated_count = 0
-
+        # Save all employees in one batch
+        if not errors:
+            rows = []
             for emp_id in selected_employees:
-                if not Employee.objects.filter(pk=emp_id).exists():
-                    continue
-
                 # Get shift times for this employee (from POST data)
                 shift_in_time_str = request.POST.get(f'shift_in_time_{emp_id}', '').strip()
                 shift_out_time_str = request.POST.get(f'shift_out_time_{emp_id}', '').strip()
-                emp_attendance_type = request.POST.get(f'attendance_type_{emp_id}', attendance_type).strip()
-                remarks = request.POST.get(f'remarks_{emp_id}', '').strip()
 
                 shift_in_time = None
                 shift_out_time = None
@@ -662,40 +589,23 @@ def manual_entry_create(request):
                     except ValueError:
                         pass
 
-                # Check if entry already exists
-                manual_entry, created = ManualEntry.objects.get_or_create(
-                    attendance_date=attendance_date,
+                rows.append(AttendanceRow(
                     employee_id=emp_id,
-                    site_id=site_id,
-                    defaults={
-                        'salary_type_id': salary_type_id,
-                        'shift_id': shift_id,
-                        'shift_in_time': shift_in_time,
-                        'shift_out_time': shift_out_time,
-                        'attendance_type': emp_attendance_type,
-                        'remarks': remarks,
-                    }
-                )
-
-                if not created:
-                    # Update existing entry
-                    manual_entry.salary_type_id = salary_type_id
-                    manual_entry.shift_id = shift_id
-                    manual_entry.shift_in_time = shift_in_time
-                    manual_entry.shift_out_time = shift_out_time
-                    manual_entry.attendance_type = emp_attendance_type
-                    manual_entry.remarks = remarks
-                    manual_entry.save()
-                    updated_count += 1
-                else:
-                    created_count += 1
-
-            if created_count > 0 or updated_count > 0:
+                    shift_in_time=shift_in_time,
+                    shift_out_time=shift_out_time,
+                    attendance_type=request.POST.get(f'attendance_type_{emp_id}', attendance_type).strip(),
+                    remarks=request.POST.get(f'remarks_{emp_id}', '').strip(),
+                ))
+
+            result = save_manual_attendance(attendance_date, site_id, salary_type_id, shift_id, rows)
+            if result.saved:
                 messages.success(
                     request,
-                    f'Manual attendance entries saved successfully. Created: {created_count}, Updated: {updated_count}.'
+                    f'Manual attendance entries saved successfully. Created: {result.created}, '
+                    f'Updated: {result.updated}, Unchanged: {result.unchanged}.'
                 )
                 return redirect('entry:manual_entry_list')
+            errors['employees'] = 'None of the selected employees exist.'
 
     context = {
         'employees': filtered_employees,
@@ -709,81 +619,92 @@ def manual_entry_create(request):
     return render(request, 'entry/manual_entry/create.html', context)
 
 
-@permission_required('entry.view_manualentry', raise_exception=True)
-def manual_entry_list(request):
-    """List all manual attendance entries with filters."""
-    manual_entries = ManualEntry.objects.select_related('employee', 'site', 'salary_type', 'shift').order_by('-attendance_date', 'employee__staff_name')
+@permission_required('entry.add_manualentry', raise_exception=True)
+def manual_punch_import(request):
+    """Import a biometric device export (.csv or .dat punch log) into manual attendance."""
+    sites = get_reference_data('sites')
+    result = None
+    values = {'source': '', 'site': '', 'full': False, 'dry_run': True}
 
-    # Filtering
-    from_date = request.GET.get('from_date', '').strip()
-    to_date = request.GET.get('to_date', '').strip()
-    site_id = request.GET.get('site', '').strip()
-    salary_type_id = request.GET.get('salary_type', '').strip()
-    shift_id = request.GET.get('shift', '').strip()
-
-    if from_date:
-        try:
-            from_date_obj = datetime.strptime(from_date, '%Y-%m-%d').date()
-            manual_entries = manual_entries.filter(attendance_date__gte=from_date_obj)
-        except ValueError:
-            pass
-
-    if to_date:
-        try:
-            to_date_obj = datetime.strptime(to_date, '%Y-%m-%d').date()
-            manual_entries = manual_entries.filter(attendance_date__lte=to_date_obj)
-        except ValueError:
-            pass
-
-    if site_id:
-        manual_entries = manual_entries.filter(site_id=site_id)
-
-    if salary_type_id:
-        manual_entries = manual_entries.filter(salary_type_id=salary_type_id)
-
-    if shift_id:
-        manual_entries = manual_entries.filter(shift_id=shift_id)
-
-    # Search
-    search_query = request.GET.get('search', '').strip()
-    if search_query:
-        manual_entries = manual_entries.filter(
-            Q(employee__staff_name__icontains=search_query) |
-            Q(employee__staff_id__icontains=search_query) |
-            Q(site__name__icontains=search_query)
-        )
-
-    # Pagination
-    per_page = request.GET.get('per_page', '10').strip()
-    try:
-        per_page_value = max(int(per_page), 1)
-    except ValueError:
-        per_page_value = 10
+    if request.method == 'POST':
+        upload = request.FILES.get('punch_file')
+        values = {
+            'source': request.POST.get('source', '').strip(),
+            'site': request.POST.get('site', '').strip(),
+            'full': request.POST.get('full') == 'on',
+            'dry_run': request.POST.get('dry_run') == 'on',
+        }
+        if not upload:
+            messages.error(request, 'Please choose a .csv or .dat punch file to import.')
+        elif values['site'] and not any(str(site.id) == values['site'] for site in sites):
+            messages.error(request, 'Selected site does not exist.')
+        else:
+            try:
+                result = import_punches(
+                    upload,
+                    upload.name,
+                    source=values['source'],
+                    default_site_id=values['site'] or None,
+                    full=values['full'],
+                    dry_run=values['dry_run'],
+                )
+            except ValueError as e:
+                messages.error(request, str(e))
+            else:
+                summary = (
+                    f'{result.punches} new punch(es): {result.created} created, {result.updated} updated, '
+                    f'{result.unchanged} unchanged.'
+                )
+                if result.dry_run:
+                    messages.info(request, f'Dry run: {summary} Nothing was saved.')
+                else:
+                    messages.success(request, f'Punches imported. {summary}')
 
-    paginator = Paginator(manual_entries, per_page_value)
-    page_number = request.GET.get('page', 1)
-    page_obj = paginator.get_page(page_number)
+    context = {
+        'sites': sites,
+        'values': values,
+        'result': result,
+        'unknown_ids': sorted(result.unknown_ids)[:50] if result else [],
+    }
+    return render(request, 'entry/manual_entry/punch_import.html', context)
+
+
+MANUAL_ENTRY_LIST = ListSpec(
+    queryset=lambda: ManualEntry.objects.select_related('employee', 'site', 'salary_type', 'shift'),
+    ordering=('-attendance_date', 'employee__staff_name'),
+    search_fields=('employee__staff_name', 'employee__staff_id', 'site__name'),
+    search_param='search',
+    filters=(
+        *date_range('attendance_date'),
+        ListFilter('site', 'site_id', FILTER_ID),
+        ListFilter('salary_type', 'salary_type_id', FILTER_ID),
+        ListFilter('shift', 'shift_id', FILTER_ID),
+    ),
+    columns=(
+        'attendance_date', 'attendance_type', 'shift_in_time', 'shift_out_time',
+        'employee__staff_id', 'employee__staff_name', 'site__name', 'salary_type__name', 'shift__name',
+    ),
+    count_depends_on=(Employee, Site),
+)
 
-    query_params = request.GET.copy()
-    query_params.pop('page', None)
-    page_query_base = query_params.urlencode()
 
+@permission_required('entry.view_manualentry', raise_exception=True)
+def manual_entry_list(request):
+    """List all manual attendance entries with filters."""
+    listing = MANUAL_ENTRY_LIST.run(request)
+    params = listing.params
     context = {
-        'manual_entries': page_obj,
-        'page_obj': page_obj,
-        'from_date': from_date,
-        'to_date': to_date,
-        'filter_site_id': site_id,
-        'filter_salary_type': salary_type_id,
-        'filter_shift': shift_id,
-        'filter_shift_type': shift_id,  # Keep for backward compatibility in template
-        'search_query': search_query,
-        'per_page': str(per_page_value),
-        'page_query_base': page_query_base,
-        'total_entries': paginator.count,
-        'sites': Site.objects.order_by('name'),
-        'salary_types': SalaryType.objects.filter(is_active=True).order_by('name'),
-        'shifts': Shift.objects.order_by('name'),
+        **listing.context('manual_entries'),
+        'page_query_base': listing.base_querystring,
+        'from_date': params['from_date'],
+        'to_date': params['to_date'],
+        'filter_site_id': params['site'],
+        'filter_salary_type': params['salary_type'],
+        'filter_shift': params['shift'],
+        'filter_shift_type': params['shift'],  # Keep for backward compatibility in template
+        'sites': get_reference_data('sites'),
+        'salary_types': get_reference_data('salary_types'),
+        'shifts': get_reference_data('shifts'),
     }
     return render(request, 'entry/manual_entry/list.html', context)
 
@@ -792,11 +713,10 @@ def manual_entry_list(request):
 def manual_entry_edit(request, pk):
     """Edit a manual attendance entry."""
     manual_entry = get_object_or_404(ManualEntry, pk=pk)
-    employees = Employee.objects.order_by('staff_name')
-    sites = Site.objects.order_by('name')
+    sites = get_reference_data('sites')
 
-    shifts = Shift.objects.order_by('name')
-    salary_types = SalaryType.objects.filter(is_active=True).order_by('name')
+    shifts = get_reference_data('shifts')
+    salary_types = get_reference_data('salary_types')
 
     values = {
         'attendance_date': manual_entry.attendance_date.strftime('%Y-%m-%d') if manual_entry.attendance_date else '',
@@ -876,13 +796,15 @@ def manual_entry_edit(request, pk):
             manual_entry.shift_out_time = shift_out_time
             manual_entry.attendance_type = values['attendance_type']
             manual_entry.remarks = values['remarks']
+            # An HR correction of an imported row must survive later imports
+            manual_entry.source = ManualEntry.SOURCE_MANUAL
             manual_entry.save()
 
             messages.success(request, 'Manual attendance entry updated successfully.')
             return redirect('entry:manual_entry_list')
 
     context = {
-        'employees': employees,
+        'employees': employee_choices(values['employee']),
         'sites': sites,
         'values': values,
         'errors': errors,
@@ -920,8 +842,7 @@ def manual_entry_print(request):
 # ------------------------
 @permission_required('entry.add_permissionentry', raise_exception=True)
 def permission_entry_create(request):
-    employees = Employee.objects.order_by('staff_name')
-    sites = Site.objects.order_by('name')
+    sites = get_reference_data('sites')
 
     values = {
         'permission_date': '',
@@ -1002,7 +923,7 @@ def permission_entry_create(request):
             return redirect('entry:permission_entry_list')
 
     context = {
-        'employees': employees,
+        'employees': employee_choices(values['employee']),
         'sites': sites,
         'values': values,
         'errors': errors,
@@ -1011,82 +932,36 @@ def permission_entry_create(request):
     return render(request, 'entry/permission_entry/create.html', context)
 
 
-@permission_required('entry.view_permissionentry', raise_exception=True)
-def permission_entry_list(request):
-    per_page = request.GET.get('per_page', '').strip() or '10'
-    search_query = request.GET.get('q', '').strip()
-    page_number = request.GET.get('page')
-    filter_site = request.GET.get('site', '').strip()
-    filter_employee = request.GET.get('employee', '').strip()
-    filter_from_date = request.GET.get('from_date', '').strip()
-    filter_to_date = request.GET.get('to_date', '').strip()
-    filter_status = request.GET.get('status', '').strip()
+PERMISSION_ENTRY_LIST = ListSpec(
+    queryset=lambda: PermissionEntry.objects.select_related(
+        'employee', 'site', 'permission_approval', 'permission_approval__approved_by',
+    ),
+    ordering=('-permission_date', 'employee__staff_name'),
+    search_fields=('employee__staff_name', 'employee__staff_id', 'site__name', 'reason'),
+    filters=(
+        ListFilter('site', 'site_id', FILTER_ID),
+        ListFilter('employee', 'employee_id', FILTER_ID),
+        *date_range('permission_date'),
+        ListFilter('status', 'status'),
+    ),
+    count_depends_on=(Employee, Site),
+)
 
-    try:
-        per_page_value = max(int(per_page), 1)
-    except ValueError:
-        per_page_value = 10
-
-    # Fetch employees and sites for filter dropdowns
-    employees = Employee.objects.order_by('staff_name')
-    sites = Site.objects.order_by('name')
-
-    permission_entries = PermissionEntry.objects.select_related('employee', 'site')
-    
-    # Apply filters
-    if filter_site:
-        permission_entries = permission_entries.filter(site_id=filter_site)
-    if filter_employee:
-        permission_entries = permission_entries.filter(employee_id=filter_employee)
-    if filter_from_date:
-        try:
-            from_date_obj = datetime.strptime(filter_from_date, '%Y-%m-%d').date()
-            permission_entries = permission_entries.filter(permission_date__gte=from_date_obj)
-        except ValueError:
-            pass
-    if filter_to_date:
-        try:
-            to_date_obj = datetime.strptime(filter_to_date, '%Y-%m-%d').date()
-            permission_entries = permission_entries.filter(permission_date__lte=to_date_obj)
-        except ValueError:
-            pass
-    if filter_status:
-        permission_entries = permission_entries.filter(status=filter_status)
-    
-    if search_query:
-        permission_entries = permission_entries.filter(
-            Q(employee__staff_name__icontains=search_query)
-            | Q(employee__staff_id__icontains=search_query)
-            | Q(site__name__icontains=search_query)
-            | Q(reason__icontains=search_query)
-        )
-
-    permission_entries = permission_entries.order_by('-permission_date', 'employee__staff_name')
-    paginator = Paginator(permission_entries, per_page_value)
-    page_obj = paginator.get_page(page_number)
-
-    query_params = request.GET.copy()
-    query_params.pop('page', None)
-    base_querystring = query_params.urlencode()
-    page_query_base = f'{base_querystring}&' if base_querystring else ''
 
+@permission_required('entry.view_permissionentry', raise_exception=True)
+def permission_entry_list(request):
+    listing = PERMISSION_ENTRY_LIST.run(request)
+    params = listing.params
     context = {
-        'permission_entries': page_obj,
-        'page_obj': page_obj,
-        'search_query': search_query,
-        'per_page': str(per_page_value),
-        'per_page_value': per_page_value,
-        'base_querystring': base_querystring,
-        'page_query_base': page_query_base,
-        'total_entries': paginator.count,
+        **listing.context('permission_entries'),
         'status_choices': PermissionEntry.STATUS_CHOICES,
-        'employees': employees,
-        'sites': sites,
-        'filter_site': filter_site,
-        'filter_employee': filter_employee,
-        'filter_from_date': filter_from_date,
-        'filter_to_date': filter_to_date,
-        'filter_status': filter_status,
+        'employees': employee_choices(params['employee']),
+        'sites': get_reference_data('sites'),
+        'filter_site': params['site'],
+        'filter_employee': params['employee'],
+        'filter_from_date': params['from_date'],
+        'filter_to_date': params['to_date'],
+        'filter_status': params['status'],
     }
     return render(request, 'entry/permission_entry/list.html', context)
 
@@ -1094,8 +969,7 @@ def permission_entry_list(request):
 @permission_required('entry.change_permissionentry', raise_exception=True)
 def permission_entry_edit(request, pk):
     permission_entry = get_object_or_404(PermissionEntry, pk=pk)
-    employees = Employee.objects.order_by('staff_name')
-    sites = Site.objects.order_by('name')
+    sites = get_reference_data('sites')
 
     values = {
         'permission_date': permission_entry.permission_date.strftime('%Y-%m-%d') if permission_entry.permission_date else '',
@@ -1178,7 +1052,7 @@ def permission_entry_edit(request, pk):
 
     context = {
         'permission_entry': permission_entry,
-        'employees': employees,
+        'employees': employee_choices(values['employee']),
         'sites': sites,
         'values': values,
         'errors': errors,
@@ -1209,52 +1083,23 @@ def permission_entry_print(request):
 # ------------------------
 # ENTRY -> SITE
 # ------------------------
-@permission_required('entry.view_siteentry', raise_exception=True)
-def site_entry_list(request):
-    per_page = request.GET.get('per_page', '').strip() or '10'
-    search_query = request.GET.get('q', '').strip()
-    page_number = request.GET.get('page')
+SITE_ENTRY_LIST = ListSpec(
+    queryset=lambda: SiteEntry.objects.all(),
+    ordering=('-transfer_date', 'employee_name'),
+    search_fields=('employee_name', 'from_site', 'to_site', 'description'),
+)
 
-    try:
-        per_page_value = max(int(per_page), 1)
-    except ValueError:
-        per_page_value = 10
-
-    site_entries = SiteEntry.objects.all()
-    if search_query:
-        site_entries = site_entries.filter(
-            Q(employee_name__icontains=search_query)
-            | Q(from_site__icontains=search_query)
-            | Q(to_site__icontains=search_query)
-            | Q(description__icontains=search_query)
-        )
-
-    site_entries = site_entries.order_by('-transfer_date', 'employee_name')
-    paginator = Paginator(site_entries, per_page_value)
-    page_obj = paginator.get_page(page_number)
-
-    query_params = request.GET.copy()
-    query_params.pop('page', None)
-    base_querystring = query_params.urlencode()
-    page_query_base = f'{base_querystring}&' if base_querystring else ''
 
-    context = {
-        'site_entries': page_obj,
-        'page_obj': page_obj,
-        'search_query': search_query,
-        'per_page': str(per_page_value),
-        'per_page_value': per_page_value,
-        'base_querystring': base_querystring,
-        'page_query_base': page_query_base,
-        'total_entries': paginator.count,
-    }
+@permission_required('entry.view_siteentry', raise_exception=True)
+def site_entry_list(request):
+    context = SITE_ENTRY_LIST.run(request).context('site_entries')
     return render(request, 'entry/site_entry/list.html', context)
 
 
 @permission_required('entry.add_siteentry', raise_exception=True)
 def site_entry_create(request):
     employees = Employee.objects.order_by('staff_name')
-    sites = Site.objects.order_by('name')
+    sites = get_reference_data('sites')
     
     values = {
         'transfer_date': '',
@@ -1318,7 +1163,7 @@ def site_entry_create(request):
 def site_entry_edit(request, pk):
     site_entry = get_object_or_404(SiteEntry, pk=pk)
     employees = Employee.objects.order_by('staff_name')
-    sites = Site.objects.order_by('name')
+    sites = get_reference_data('sites')
     
     values = {
         'transfer_date': site_entry.transfer_date.strftime('%Y-%m-%d') if site_entry.transfer_date else '',
@@ -1395,79 +1240,40 @@ def site_entry_delete(request, pk):
 # ------------------------
 # ENTRY -> TADA
 # ------------------------
-@permission_required('entry.view_tadaentry', raise_exception=True)
-def tada_entry_list(request):
-    per_page = request.GET.get('per_page', '').strip() or '10'
-    search_query = request.GET.get('q', '').strip()
-    page_number = request.GET.get('page')
-    filter_site = request.GET.get('site', '').strip()
-    filter_employee = request.GET.get('employee', '').strip()
-    filter_from_date = request.GET.get('from_date', '').strip()
-    filter_to_date = request.GET.get('to_date', '').strip()
+TADA_ENTRY_LIST = ListSpec(
+    queryset=lambda: TADAEntry.objects.select_related('employee', 'site').prefetch_related('sub_items'),
+    ordering=('-expense_date', '-entry_date', 'employee__staff_name'),
+    search_fields=('entry_no', 'batch_no', 'employee__staff_name', 'employee__staff_id', 'site__name'),
+    filters=(
+        ListFilter('site', 'site_id', FILTER_ID),
+        ListFilter('employee', 'employee_id', FILTER_ID),
+        *date_range('expense_date'),
+    ),
+    count_depends_on=(Employee, Site),
+)
 
-    try:
-        per_page_value = max(int(per_page), 1)
-    except ValueError:
-        per_page_value = 10
-
-    # Fetch employees and sites for filter dropdowns
-    employees = Employee.objects.order_by('staff_name')
-    sites = Site.objects.order_by('name')
-
-    tada_entries = TADAEntry.objects.select_related('employee', 'site').prefetch_related('sub_items')
-
-    # Apply filters
-    if filter_site:
-        tada_entries = tada_entries.filter(site_id=filter_site)
-    if filter_employee:
-        tada_entries = tada_entries.filter(employee_id=filter_employee)
-    if filter_from_date:
-        try:
-            from_date_obj = datetime.strptime(filter_from_date, '%Y-%m-%d').date()
-            tada_entries = tada_entries.filter(expense_date__gte=from_date_obj)
-        except ValueError:
-            pass
-    if filter_to_date:
-        try:
-            to_date_obj = datetime.strptime(filter_to_date, '%Y-%m-%d').date()
-            tada_entries = tada_entries.filter(expense_date__lte=to_date_obj)
-        except ValueError:
-            pass
-
-    # Apply search
-    if search_query:
-        tada_entries = tada_entries.filter(
-            Q(entry_no__icontains=search_query)
-            | Q(batch_no__icontains=search_query)
-            | Q(employee__staff_name__icontains=search_query)
-            | Q(employee__staff_id__icontains=search_query)
-            | Q(site__name__icontains=search_query)
-        )
-
-    # Pagination
-    paginator = Paginator(tada_entries, per_page_value)
-    page_obj = paginator.get_page(page_number)
 
+@permission_required('entry.view_tadaentry', raise_exception=True)
+def tada_entry_list(request):
+    listing = TADA_ENTRY_LIST.run(request)
+    params = listing.params
     context = {
-        'tada_entries': page_obj,
-        'employees': employees,
-        'sites': sites,
-        'per_page': per_page,
-        'search_query': search_query,
-        'filter_site': filter_site,
-        'filter_employee': filter_employee,
-        'filter_from_date': filter_from_date,
-        'filter_to_date': filter_to_date,
+        **listing.context('tada_entries'),
+        'employees': employee_choices(params['employee']),
+        'sites': get_reference_data('sites'),
+        'filter_site': params['site'],
+        'filter_employee': params['employee'],
+        'filter_from_date': params['from_date'],
+        'filter_to_date': params['to_date'],
     }
     return render(request, 'entry/tada_entry/list.html', context)
 
 
 @permission_required('entry.add_tadaentry', raise_exception=True)
 def tada_entry_create(request):
-    employees = Employee.objects.order_by('staff_name')
-    sites = Site.objects.order_by('name')
-    expense_types = ExpenseType.objects.filter(is_active=True).order_by('name')
-    sub_expense_types = SubExpense.objects.filter(status=SubExpense.STATUS_ACTIVE).select_related('expense_type').order_by('expense_type__name', 'name')
+    sites = get_reference_data('sites')
+    expense_types = get_reference_data('expense_types')
+    sub_expense_types = get_reference_data('sub_expense_types')
 
     values = {
         'expense_date': '',
@@ -1477,6 +1283,7 @@ def tada_entry_create(request):
     }
     errors = {}
     selected_employee = None
+    lines = []
 
     if request.method == 'POST':
         values['expense_date'] = request.POST.get('expense_date', '').strip()
@@ -1506,135 +1313,27 @@ def tada_entry_create(request):
         elif not Site.objects.filter(pk=values['site']).exists():
             errors['site'] = 'Selected site does not exist.'
 
-        # Process sub items
-        sub_items_data = []
-        sub_item_errors = []
-        restored_sub_items = []  # For restoring items if validation fails
-        
-        # Get sub items from form (assuming they're sent as arrays)
-        expense_types_post = request.POST.getlist('sub_items_expense_type[]')
-        sub_expense_types_post = request.POST.getlist('sub_items_sub_expense_type[]')
-        from_locations_post = request.POST.getlist('sub_items_from_location[]')
-        to_locations_post = request.POST.getlist('sub_items_to_location[]')
-        start_meters_post = request.POST.getlist('sub_items_start_meter[]')
-        end_meters_post = request.POST.getlist('sub_items_end_meter[]')
-        total_kilometers_post = request.POST.getlist('sub_items_total_kilometer[]')
-        amounts_post = request.POST.getlist('sub_items_amount[]')
-        descriptions_post = request.POST.getlist('sub_items_description[]')
-
-        if not expense_types_post:
+        lines, sub_item_errors = parse_claim_lines(request.POST)
+        if not lines and not sub_item_errors:
             errors['sub_items'] = 'At least one expense item is required.'
-
-        # Collect sub items data (for both validation and restoration)
-        for i in range(len(expense_types_post)):
-            if not expense_types_post[i] or not amounts_post[i]:
-                continue
-            
-            try:
-                amount = float(amounts_post[i])
-                if amount <= 0:
-                    sub_item_errors.append(f'Item {i+1}: Amount must be greater than 0.')
-                    continue
-            except ValueError:
-                sub_item_errors.append(f'Item {i+1}: Invalid amount format.')
-                continue
-
-            # Convert numeric fields to Decimal
-            start_meter = None
-            if i < len(start_meters_post) and start_meters_post[i]:
-                try:
-                    start_meter = Decimal(str(start_meters_post[i]))
-                except (ValueError, InvalidOperation):
-                    start_meter = None
-            
-            end_meter = None
-            if i < len(end_meters_post) and end_meters_post[i]:
-                try:
-                    end_meter = Decimal(str(end_meters_post[i]))
-                except (ValueError, InvalidOperation):
-                    end_meter = None
-            
-            total_kilometer = None
-            if i < len(total_kilometers_post) and total_kilometers_post[i]:
-                try:
-                    total_kilometer = Decimal(str(total_kilometers_post[i]))
-                except (ValueError, InvalidOperation):
-                    total_kilometer = None
-            
-            item_data = {
-                'expense_type_id': expense_types_post[i],
-                'sub_expense_type_id': sub_expense_types_post[i] if i < len(sub_expense_types_post) and sub_expense_types_post[i] else None,
-                'from_location': from_locations_post[i] if i < len(from_locations_post) else '',
-                'to_location': to_locations_post[i] if i < len(to_locations_post) else '',
-                'start_meter': start_meter,
-                'end_meter': end_meter,
-                'total_kilometer': total_kilometer,
-                'amount': Decimal(str(amount)),
-                'description': descriptions_post[i] if i < len(descriptions_post) else '',
-            }
-            
-            # Get expense type name for display
-            try:
-                expense_type_obj = ExpenseType.objects.get(pk=expense_types_post[i])
-                item_data['expense_type_name'] = expense_type_obj.name
-            except ExpenseType.DoesNotExist:
-                item_data['expense_type_name'] = 'Unknown'
-            
-            # Get sub expense type name if exists
-            if item_data['sub_expense_type_id']:
-                try:
-                    sub_expense_type_obj = SubExpense.objects.get(pk=item_data['sub_expense_type_id'])
-                    item_data['sub_expense_type_name'] = sub_expense_type_obj.name
-                except SubExpense.DoesNotExist:
-                    item_data['sub_expense_type_name'] = ''
-            else:
-                item_data['sub_expense_type_name'] = ''
-            
-            sub_items_data.append(item_data)
-            restored_sub_items.append(item_data)
-
-        if sub_item_errors:
+        elif sub_item_errors:
             errors['sub_items'] = '; '.join(sub_item_errors)
 
-        if not errors and sub_items_data:
-                # Create TADA entry (without calculating total_amount yet)
-                tada_entry = TADAEntry.objects.create(
-                    expense_date=expense_date_obj,
-                    batch_no=values['batch_no'],
-                    employee_id=values['employee'],
-                    site_id=values['site'],
-                    total_amount=0,  # Set to 0 initially
-                )
-
-                # Create sub items
-                total_amount = Decimal('0')
-                for item_data in sub_items_data:
-                    TADAEntrySubItem.objects.create(
-                        tada_entry=tada_entry,
-                        expense_type_id=item_data['expense_type_id'],
-                        sub_expense_type_id=item_data['sub_expense_type_id'],
-                        from_location=item_data['from_location'],
-                        to_location=item_data['to_location'],
-                        start_meter=item_data['start_meter'],
-                        end_meter=item_data['end_meter'],
-                        total_kilometer=item_data['total_kilometer'],
-                        amount=item_data['amount'],
-                        description=item_data['description'],
-                    )
-                    total_amount += item_data['amount']
-
-                # Update total amount after all sub items are created
-                tada_entry.total_amount = total_amount
-                tada_entry.save()
-
-                messages.success(request, 'TADA entry created successfully.')
-                return redirect('entry:tada_entry_list')
+        if not errors:
+            save_claim(TADAEntry(
+                expense_date=expense_date_obj,
+                batch_no=values['batch_no'],
+                employee_id=values['employee'],
+                site_id=values['site'],
+            ), lines)
+            messages.success(request, 'TADA entry created successfully.')
+            return redirect('entry:tada_entry_list')
 
     # Serialize restored sub items for JavaScript
-    restored_sub_items_json = json.dumps(restored_sub_items if request.method == 'POST' and errors else [])
+    restored_sub_items_json = json.dumps([line.as_json() for line in lines] if request.method == 'POST' and errors else [])
     
     context = {
-        'employees': employees,
+        'employees': employee_choices(values['employee']),
         'sites': sites,
         'expense_types': expense_types,
         'sub_expense_types': sub_expense_types,
@@ -1649,10 +1348,9 @@ def tada_entry_create(request):
 @permission_required('entry.change_tadaentry', raise_exception=True)
 def tada_entry_edit(request, pk):
     tada_entry = get_object_or_404(TADAEntry.objects.prefetch_related('sub_items'), pk=pk)
-    employees = Employee.objects.order_by('staff_name')
-    sites = Site.objects.order_by('name')
-    expense_types = ExpenseType.objects.filter(is_active=True).order_by('name')
-    sub_expense_types = SubExpense.objects.filter(status=SubExpense.STATUS_ACTIVE).select_related('expense_type').order_by('expense_type__name', 'name')
+    sites = get_reference_data('sites')
+    expense_types = get_reference_data('expense_types')
+    sub_expense_types = get_reference_data('sub_expense_types')
 
     values = {
         'expense_date': tada_entry.expense_date.strftime('%Y-%m-%d') if tada_entry.expense_date else '',
@@ -1662,17 +1360,7 @@ def tada_entry_edit(request, pk):
     }
     errors = {}
     selected_employee = tada_entry.employee
-    
-    # Initialize POST variables (will be populated in POST request)
-    expense_types_post = []
-    sub_expense_types_post = []
-    from_locations_post = []
-    to_locations_post = []
-    start_meters_post = []
-    end_meters_post = []
-    total_kilometers_post = []
-    amounts_post = []
-    descriptions_post = []
+    lines = []
 
     if request.method == 'POST':
         values['expense_date'] = request.POST.get('expense_date', '').strip()
@@ -1702,163 +1390,29 @@ def tada_entry_edit(request, pk):
         elif not Site.objects.filter(pk=values['site']).exists():
             errors['site'] = 'Selected site does not exist.'
 
-        # Process sub items
-        sub_items_data = []
-        sub_item_errors = []
-        
-        expense_types_post = request.POST.getlist('sub_items_expense_type[]')
-        sub_expense_types_post = request.POST.getlist('sub_items_sub_expense_type[]')
-        from_locations_post = request.POST.getlist('sub_items_from_location[]')
-        to_locations_post = request.POST.getlist('sub_items_to_location[]')
-        start_meters_post = request.POST.getlist('sub_items_start_meter[]')
-        end_meters_post = request.POST.getlist('sub_items_end_meter[]')
-        total_kilometers_post = request.POST.getlist('sub_items_total_kilometer[]')
-        amounts_post = request.POST.getlist('sub_items_amount[]')
-        descriptions_post = request.POST.getlist('sub_items_description[]')
-
-        if not expense_types_post:
+        lines, sub_item_errors = parse_claim_lines(request.POST)
+        if not lines and not sub_item_errors:
             errors['sub_items'] = 'At least one expense item is required.'
+        elif sub_item_errors:
+            errors['sub_items'] = '; '.join(sub_item_errors)
 
         if not errors:
-            for i in range(len(expense_types_post)):
-                if not expense_types_post[i] or not amounts_post[i]:
-                    continue
-                
-                try:
-                    amount = Decimal(str(amounts_post[i]))
-                    if amount <= 0:
-                        sub_item_errors.append(f'Item {i+1}: Amount must be greater than 0.')
-                        continue
-                except (ValueError, InvalidOperation):
-                    sub_item_errors.append(f'Item {i+1}: Invalid amount format.')
-                    continue
-
-                # Convert numeric fields to Decimal
-                start_meter = None
-                if i < len(start_meters_post) and start_meters_post[i]:
-                    try:
-                        start_meter = Decimal(str(start_meters_post[i]))
-                    except (ValueError, InvalidOperation):
-                        start_meter = None
-                
-                end_meter = None
-                if i < len(end_meters_post) and end_meters_post[i]:
-                    try:
-                        end_meter = Decimal(str(end_meters_post[i]))
-                    except (ValueError, InvalidOperation):
-                        end_meter = None
-                
-                total_kilometer = None
-                if i < len(total_kilometers_post) and total_kilometers_post[i]:
-                    try:
-                        total_kilometer = Decimal(str(total_kilometers_post[i]))
-                    except (ValueError, InvalidOperation):
-                        total_kilometer = None
-
-                sub_items_data.append({
-                    'expense_type_id': expense_types_post[i],
-                    'sub_expense_type_id': sub_expense_types_post[i] if i < len(sub_expense_types_post) and sub_expense_types_post[i] else None,
-                    'from_location': from_locations_post[i] if i < len(from_locations_post) else '',
-                    'to_location': to_locations_post[i] if i < len(to_locations_post) else '',
-                    'start_meter': start_meter,
-                    'end_meter': end_meter,
-                    'total_kilometer': total_kilometer,
-                    'amount': amount,
-                    'description': descriptions_post[i] if i < len(descriptions_post) else '',
-                })
-
-            if sub_item_errors:
-                errors['sub_items'] = '; '.join(sub_item_errors)
-
-            if not errors and sub_items_data:
-                # Update TADA entry
-                tada_entry.expense_date = expense_date_obj
-                tada_entry.batch_no = values['batch_no']
-                tada_entry.employee_id = values['employee']
-                tada_entry.site_id = values['site']
-                tada_entry.save()
-
-                # Delete existing sub items and create new ones
-                tada_entry.sub_items.all().delete()
-                total_amount = Decimal('0')
-                for item_data in sub_items_data:
-                    TADAEntrySubItem.objects.create(
-                        tada_entry=tada_entry,
-                        expense_type_id=item_data['expense_type_id'],
-                        sub_expense_type_id=item_data['sub_expense_type_id'],
-                        from_location=item_data['from_location'],
-                        to_location=item_data['to_location'],
-                        start_meter=item_data['start_meter'],
-                        end_meter=item_data['end_meter'],
-                        total_kilometer=item_data['total_kilometer'],
-                        amount=item_data['amount'],
-                        description=item_data['description'],
-                    )
-                    total_amount += item_data['amount']
-
-                # Update total amount after all sub items are created
-                tada_entry.total_amount = total_amount
-                tada_entry.save()
-
-                messages.success(request, 'TADA entry updated successfully.')
-                return redirect('entry:tada_entry_list')
-
-    # Prepare existing sub_items for template (for initial load)
-    existing_sub_items = []
-    if tada_entry and tada_entry.pk:
-        for sub_item in tada_entry.sub_items.all():
-            existing_sub_items.append({
-                'expense_type_id': str(sub_item.expense_type_id),
-                'expense_type_name': sub_item.expense_type.name if sub_item.expense_type else '',
-                'sub_expense_type_id': str(sub_item.sub_expense_type_id) if sub_item.sub_expense_type_id else '',
-                'sub_expense_type_name': sub_item.sub_expense_type.name if sub_item.sub_expense_type else '',
-                'from_location': sub_item.from_location or '',
-                'to_location': sub_item.to_location or '',
-                'start_meter': str(sub_item.start_meter) if sub_item.start_meter else '',
-                'end_meter': str(sub_item.end_meter) if sub_item.end_meter else '',
-                'total_kilometer': str(sub_item.total_kilometer) if sub_item.total_kilometer else '',
-                'amount': str(sub_item.amount),
-                'description': sub_item.description or '',
-            })
-    
-    # Serialize sub items for JavaScript (existing items or restored items on validation failure)
-    restored_sub_items = []
-    if request.method == 'POST' and errors:
-        # On validation failure, restore from POST data
-        for i in range(len(expense_types_post)):
-            if not expense_types_post[i] or not amounts_post[i]:
-                continue
-            try:
-                expense_type = ExpenseType.objects.get(pk=expense_types_post[i])
-                sub_expense_type = None
-                if i < len(sub_expense_types_post) and sub_expense_types_post[i]:
-                    try:
-                        sub_expense_type = SubExpense.objects.get(pk=sub_expense_types_post[i])
-                    except SubExpense.DoesNotExist:
-                        pass
-                
-                restored_sub_items.append({
-                    'expense_type_id': expense_types_post[i],
-                    'expense_type_name': expense_type.name,
-                    'sub_expense_type_id': sub_expense_types_post[i] if i < len(sub_expense_types_post) and sub_expense_types_post[i] else '',
-                    'sub_expense_type_name': sub_expense_type.name if sub_expense_type else '',
-                    'from_location': from_locations_post[i] if i < len(from_locations_post) else '',
-                    'to_location': to_locations_post[i] if i < len(to_locations_post) else '',
-                    'start_meter': start_meters_post[i] if i < len(start_meters_post) and start_meters_post[i] else '',
-                    'end_meter': end_meters_post[i] if i < len(end_meters_post) and end_meters_post[i] else '',
-                    'total_kilometer': total_kilometers_post[i] if i < len(total_kilometers_post) and total_kilometers_post[i] else '',
-                    'amount': amounts_post[i],
-                    'description': descriptions_post[i] if i < len(descriptions_post) else '',
-                })
-            except ExpenseType.DoesNotExist:
-                continue
-    
-    # Use restored items if validation failed, otherwise use existing items
-    sub_items_json = json.dumps(restored_sub_items if restored_sub_items else existing_sub_items)
-    
+            tada_entry.expense_date = expense_date_obj
+            tada_entry.batch_no = values['batch_no']
+            tada_entry.employee_id = values['employee']
+            tada_entry.site_id = values['site']
+            save_claim(tada_entry, lines)
+            messages.success(request, 'TADA entry updated successfully.')
+            return redirect('entry:tada_entry_list')
+
+    # Existing lines on first load, the posted ones again when validation failed
+    if not (request.method == 'POST' and errors):
+        lines = claim_lines(tada_entry)
+    sub_items_json = json.dumps([line.as_json() for line in lines])
+
     context = {
         'tada_entry': tada_entry,
-        'employees': employees,
+        'employees': employee_choices(values['employee']),
         'sites': sites,
         'expense_types': expense_types,
         'sub_expense_types': sub_expense_types,
@@ -1891,8 +1445,7 @@ def tada_entry_delete(request, pk):
 # ------------------------
 @permission_required('entry.add_travelentry', raise_exception=True)
 def travel_entry_create(request):
-    employees = Employee.objects.order_by('staff_name')
-    sites = Site.objects.order_by('name')
+    sites = get_reference_data('sites')
 
     values = {
         'employee': '',
@@ -2049,7 +1602,7 @@ def travel_entry_create(request):
             return redirect('entry:travel_entry_list')
 
     context = {
-        'employees': employees,
+        'employees': employee_choices(values['employee']),
         'sites': sites,
         'values': values,
         'errors': errors,
@@ -2063,49 +1616,24 @@ def travel_entry_create(request):
     return render(request, 'entry/travel_entry/create.html', context)
 
 
-@permission_required('entry.view_travelentry', raise_exception=True)
-def travel_entry_list(request):
-    travel_entries = TravelEntry.objects.select_related('employee', 'site').order_by('-departure_date', '-entry_date')
+TRAVEL_ENTRY_LIST = ListSpec(
+    queryset=lambda: TravelEntry.objects.select_related('employee', 'site'),
+    ordering=('-departure_date', '-entry_date'),
+    search_fields=('employee__staff_name', 'from_location', 'to_location', 'purpose_of_visit'),
+    search_param='search',
+    filters=date_range('departure_date'),
+    count_depends_on=(Employee,),
+)
 
-    # Filtering
-    from_date = request.GET.get('from_date', '')
-    to_date = request.GET.get('to_date', '')
-    
-    if from_date:
-        try:
-            from_date_obj = datetime.strptime(from_date, '%Y-%m-%d').date()
-            travel_entries = travel_entries.filter(departure_date__gte=from_date_obj)
-        except ValueError:
-            pass
-
-    if to_date:
-        try:
-            to_date_obj = datetime.strptime(to_date, '%Y-%m-%d').date()
-            travel_entries = travel_entries.filter(departure_date__lte=to_date_obj)
-        except ValueError:
-            pass
-
-    # Search
-    search_query = request.GET.get('search', '')
-    if search_query:
-        travel_entries = travel_entries.filter(
-            Q(employee__staff_name__icontains=search_query) |
-            Q(from_location__icontains=search_query) |
-            Q(to_location__icontains=search_query) |
-            Q(purpose_of_visit__icontains=search_query)
-        )
-
-    # Pagination
-    paginator = Paginator(travel_entries, 10)
-    page_number = request.GET.get('page', 1)
-    page_obj = paginator.get_page(page_number)
 
+@permission_required('entry.view_travelentry', raise_exception=True)
+def travel_entry_list(request):
+    listing = TRAVEL_ENTRY_LIST.run(request)
     context = {
-        'travel_entries': page_obj,
-        'from_date': from_date,
-        'to_date': to_date,
-        'search_query': search_query,
-        'page_query_base': request.GET.urlencode().replace(f'&page={page_number}', '').replace(f'page={page_number}&', '').replace(f'page={page_number}', ''),
+        **listing.context('travel_entries'),
+        'page_query_base': listing.base_querystring,
+        'from_date': listing.params['from_date'],
+        'to_date': listing.params['to_date'],
     }
     return render(request, 'entry/travel_entry/list.html', context)
 
@@ -2122,8 +1650,7 @@ def travel_entry_view(request, pk):
 @permission_required('entry.change_travelentry', raise_exception=True)
 def travel_entry_edit(request, pk):
     travel_entry = get_object_or_404(TravelEntry, pk=pk)
-    employees = Employee.objects.order_by('staff_name')
-    sites = Site.objects.order_by('name')
+    sites = get_reference_data('sites')
 
     values = {
         'employee': str(travel_entry.employee_id) if travel_entry.employee_id else '',
@@ -2283,7 +1810,7 @@ def travel_entry_edit(request, pk):
             return redirect('entry:travel_entry_list')
 
     context = {
-        'employees': employees,
+        'employees': employee_choices(values['employee']),
         'sites': sites,
         'values': values,
         'errors': errors,
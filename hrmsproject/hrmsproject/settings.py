@@ -82,6 +82,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'accounts.context_processors.user_profile_image',
+                'accounts.context_processors.inbox_badges',
             ],
         },
     },
@@ -118,6 +119,19 @@ DATABASES = {
 # }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Use a shared backend (e.g. django.core.cache.backends.redis.RedisCache) in production
+# so that cache invalidation is visible to every gunicorn worker.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'hrms-default'),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -181,4 +195,9 @@ EMAIL_USE_SSL = os.getenv('EMAIL_USE_SSL', 'False') == 'True'  # For port 465
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '').strip()
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '').strip()
 # Use EMAIL_HOST_USER as DEFAULT_FROM_EMAIL if not specified
-DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', '').strip() or EMAIL_HOST_USER or 'noreply@ascenthrms.com'
\ No newline at end of file
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', '').strip() or EMAIL_HOST_USER or 'noreply@ascenthrms.com'
+# Working-day calendar: weekdays that are off at every site (Monday=0 ... Sunday=6)
+WEEKLY_OFF_DAYS = [int(day) for day in os.getenv('WEEKLY_OFF_DAYS', '6').split(',') if day.strip()]
+# Staff IDs issued when the Staff ID field is left blank: prefix + zero-padded number (EMP001)
+STAFF_ID_PREFIX = os.getenv('STAFF_ID_PREFIX', 'EMP').strip()
+STAFF_ID_DIGITS = int(os.getenv('STAFF_ID_DIGITS', '3'))
@@ -0,0 +1,225 @@
+"""
+Bulk employee import from .xlsx / .csv files.
+
+Rows are streamed from the file (openpyxl read_only mode or csv.DictReader),
+validated with the same rules as the Staff Details tab
+(master.views._validate_staff_details) and written with bulk_create in
+batches. Uniqueness of staff_id / aadhar_no / pan_no is checked against sets
+preloaded once from the database plus the values already seen in the file,
+so validation costs no per-row queries. Rows with a blank staff_id get one
+from the staff ID sequence, a block per batch (master.sequences).
+
+The whole import runs in one transaction: if any row fails validation,
+nothing is written unless skip_invalid is set. A dry run validates every row
+and returns the error report without writing.
+"""
+import csv
+import io
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime
+
+from django.db import transaction
+
+from .list_query import invalidate_list_counts
+from .models import Company, Employee
+from .search import index_objects
+from .sequences import allocate_staff_ids, claim_staff_ids
+
+IMPORT_BATCH_SIZE = 500
+
+# Column headers, in the order used by the downloadable template. They match the
+# field names posted by the Staff Details tab so the same validation applies.
+EMPLOYEE_IMPORT_COLUMNS = [
+    'staff_id', 'staff_name', 'gender', 'father_name', 'date_of_birth', 'doc_dob', 'age',
+    'marital_status', 'personal_contact', 'office_contact', 'personal_email', 'office_email',
+    'aadhar_no', 'pan_no', 'medical_claim', 'blood_group', 'qualification',
+    'pre_country', 'pre_state', 'pre_city', 'pre_building', 'pre_street', 'pre_area', 'pre_pincode',
+    'perm_country', 'perm_state', 'perm_city', 'perm_building', 'perm_street', 'perm_area', 'perm_pincode',
+    'date_of_join', 'designation', 'department', 'work_location', 'esi_no', 'pf_no', 'biometric_id',
+    'company_name', 'salary_category', 'premises_type', 'branch_ids', 'attendance_setting',
+    'reporting_officer',
+]
+
+# Friendlier header spellings accepted in uploaded files
+EMPLOYEE_IMPORT_ALIASES = {
+    'company': 'company_name',
+    'branch': 'branch_ids',
+    'document_dob': 'doc_dob',
+    'document_date_of_birth': 'doc_dob',
+    'dob': 'date_of_birth',
+    'doj': 'date_of_join',
+    'bio_metric_id': 'biometric_id',
+}
+for _part in ('country', 'state', 'city', 'building', 'street', 'area', 'pincode'):
+    EMPLOYEE_IMPORT_ALIASES[f'present_{_part}'] = f'pre_{_part}'
+    EMPLOYEE_IMPORT_ALIASES[f'permanent_{_part}'] = f'perm_{_part}'
+
+
+@dataclass
+class EmployeeImportResult:
+    total_rows: int = 0
+    valid_rows: int = 0
+    created: int = 0
+    dry_run: bool = False
+    errors: list = field(default_factory=list)
+
+    @property
+    def has_errors(self) -> bool:
+        return bool(self.errors)
+
+
+def _normalise_header(header) -> str:
+    key = str(header or '').strip().lower().replace(' ', '_').replace('-', '_').replace('.', '')
+    return EMPLOYEE_IMPORT_ALIASES.get(key, key)
+
+
+def _cell_to_text(value) -> str:
+    """Convert a spreadsheet cell into the string a form field would have posted."""
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        # Phone / Aadhar numbers typed into Excel come back as floats
+        return str(int(value))
+    return str(value).strip()
+
+
+def _iter_xlsx_rows(file_obj):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file_obj, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        headers = [_normalise_header(header) for header in next(rows, ())]
+        for values in rows:
+            if not any(value not in (None, '') for value in values):
+                continue
+            yield {header: _cell_to_text(value) for header, value in zip(headers, values) if header}
+    finally:
+        wb.close()
+
+
+def _iter_csv_rows(file_obj):
+    text = io.TextIOWrapper(file_obj, encoding='utf-8-sig', newline='')
+    reader = csv.reader(text)
+    headers = [_normalise_header(header) for header in next(reader, [])]
+    for values in reader:
+        if not any(value.strip() for value in values):
+            continue
+        yield {header: value.strip() for header, value in zip(headers, values) if header}
+
+
+def iter_employee_rows(file_obj, filename: str):
+    """Yield one dict per data row (keys are normalised column headers)."""
+    if filename.lower().endswith('.csv'):
+        return _iter_csv_rows(file_obj)
+    if filename.lower().endswith(('.xlsx', '.xlsm')):
+        return _iter_xlsx_rows(file_obj)
+    raise ValueError('Unsupported file type. Upload an .xlsx or .csv file.')
+
+
+def _company_lookup() -> tuple[dict, dict]:
+    """Return ({pk: Company}, {lowercase name / gstin / pk: pk}) for every company."""
+    companies = {}
+    keys = {}
+    for company in Company.objects.all():
+        companies[company.pk] = company
+        keys[str(company.pk)] = company.pk
+        for name in (company.billing_name, company.company_group, company.gstin_no):
+            if name:
+                keys.setdefault(name.strip().lower(), company.pk)
+    return companies, keys
+
+
+def _existing_values(field_name: str) -> set:
+    return set(
+        Employee.objects.exclude(**{field_name: ''}).values_list(field_name, flat=True).iterator()
+    )
+
+
+def _create_batch(employees, batch_size):
+    """bulk_create a batch, issuing staff IDs for rows that left them blank in one block."""
+    claim_staff_ids([employee.staff_id for employee in employees if employee.staff_id])
+    blank = [employee for employee in employees if not employee.staff_id]
+    for employee, staff_id in zip(blank, allocate_staff_ids(len(blank))):
+        employee.staff_id = staff_id
+    Employee.objects.bulk_create(employees, batch_size=batch_size)
+    # bulk_create skips post_save (and sets no pks on MySQL): index the batch by staff ID
+    index_objects(Employee, Employee.objects.filter(staff_id__in=[employee.staff_id for employee in employees]))
+
+
+def import_employees(file_obj, filename: str, dry_run: bool = False, skip_invalid: bool = False,
+                     batch_size: int = IMPORT_BATCH_SIZE) -> EmployeeImportResult:
+    """
+    Validate and import employees from an uploaded spreadsheet.
+
+    Returns an EmployeeImportResult; errors is a list of
+    {'row', 'staff_id', 'field', 'message'} dicts (row numbers match the file,
+    counting the header as row 1).
+    """
+    from .views import _validate_staff_details
+
+    result = EmployeeImportResult(dry_run=dry_run)
+    companies, company_keys = _company_lookup()
+    seen_staff_ids = _existing_values('staff_id')
+    seen_aadhar = _existing_values('aadhar_no')
+    seen_pan = _existing_values('pan_no')
+
+    pending = []
+    with transaction.atomic():
+        for row_number, row in enumerate(iter_employee_rows(file_obj, filename), 2):
+            result.total_rows += 1
+
+            company_value = row.get('company_name', '')
+            if company_value:
+                row['company_name'] = str(company_keys.get(company_value.strip().lower(), company_value))
+
+            errors, data = _validate_staff_details(
+                row, None, existing_staff_ids=seen_staff_ids, companies=companies,
+            )
+            if data['aadhar_no'] and data['aadhar_no'] in seen_aadhar and 'aadhar_no' not in errors:
+                errors['aadhar_no'] = 'Aadhar number already exists.'
+            if data['pan_no'] and data['pan_no'] in seen_pan and 'pan_no' not in errors:
+                errors['pan_no'] = 'PAN number already exists.'
+
+            if errors:
+                result.errors.extend(
+                    {'row': row_number, 'staff_id': row.get('staff_id', ''), 'field': key, 'message': message}
+                    for key, message in errors.items()
+                )
+                continue
+
+            # Reserve unique values so later rows in the same file are checked against them
+            if data['staff_id']:
+                seen_staff_ids.add(data['staff_id'])
+            seen_aadhar.add(data['aadhar_no'])
+            seen_pan.add(data['pan_no'])
+            result.valid_rows += 1
+
+            if dry_run:
+                continue
+            pending.append(Employee(unique_id=str(uuid.uuid4()), **data))
+            if len(pending) >= batch_size:
+                _create_batch(pending, batch_size)
+                result.created += len(pending)
+                pending = []
+
+        if pending:
+            _create_batch(pending, batch_size)
+            result.created += len(pending)
+
+        if result.errors and not skip_invalid:
+            # All-or-nothing: undo the batches written so far
+            transaction.set_rollback(True)
+            result.created = 0
+
+    if result.created:
+        # bulk_create skips post_save, so refresh cached user -> employee mappings and list totals here
+        from accounts.identity import invalidate_identities
+        invalidate_identities()
+        invalidate_list_counts(Employee)
+    return result
@@ -0,0 +1,43 @@
+"""
+Employee lookups for form dropdowns.
+
+Entry and approval forms used to render every employee as an <option>.
+They now render only the currently selected employee(s) via
+employee_choices() and load the rest on demand from the
+master:employee_autocomplete endpoint, which runs a capped prefix search on
+staff_name / staff_id (both indexed).
+"""
+from django.db.models import Q
+
+from .models import Employee
+
+EMPLOYEE_AUTOCOMPLETE_LIMIT = 20
+EMPLOYEE_AUTOCOMPLETE_MAX_LIMIT = 50
+EMPLOYEE_CHOICE_FIELDS = ('id', 'staff_name', 'staff_id')
+
+
+def employee_choices(*employee_ids):
+    """Return the selected employees a form has to render as <option>s."""
+    ids = {str(pk).strip() for pk in employee_ids if pk}
+    ids = [int(pk) for pk in ids if pk.isdigit()]
+    if not ids:
+        return Employee.objects.none()
+    return Employee.objects.filter(pk__in=ids).only(*EMPLOYEE_CHOICE_FIELDS).order_by('staff_name')
+
+
+def search_employees(term: str, limit: int = EMPLOYEE_AUTOCOMPLETE_LIMIT) -> list[dict]:
+    """Prefix-match employees by name or staff ID, returning at most `limit` rows."""
+    limit = max(1, min(limit, EMPLOYEE_AUTOCOMPLETE_MAX_LIMIT))
+    employees = Employee.objects.order_by('staff_name', 'id')
+    term = (term or '').strip()
+    if term:
+        employees = employees.filter(Q(staff_name__istartswith=term) | Q(staff_id__istartswith=term))
+    return [
+        {
+            'id': row['id'],
+            'staff_id': row['staff_id'],
+            'staff_name': row['staff_name'],
+            'text': f"{row['staff_name']} - {row['staff_id']}",
+        }
+        for row in employees.values(*EMPLOYEE_CHOICE_FIELDS)[:limit]
+    ]
@@ -0,0 +1,108 @@
+"""
+Diff-based sync of an employee's child collections (dependents, account,
+qualifications, experiences, assets).
+
+Submitted rows are matched to the existing rows first by their primary key
+(sent back by the form as e.g. dependents[0][dependent_id]) and then by a
+natural key. Matched rows are updated in place, unmatched submitted rows are
+created and existing rows that were not submitted are deleted, so each child
+table costs at most one bulk_create, one bulk_update and one DELETE. Primary
+keys and uploaded documents of unchanged rows are preserved.
+
+Callers are expected to run sync_child_rows inside transaction.atomic().
+"""
+from dataclasses import dataclass
+
+from django.core.files.base import File
+
+
+@dataclass
+class SyncResult:
+    created: int = 0
+    updated: int = 0
+    deleted: int = 0
+
+
+def parse_row_id(value):
+    """Return an int primary key from a posted id value ('', 'null', '12'), or None."""
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def sync_child_rows(model, employee, rows, key_fields=(), file_fields=(), before_create=None):
+    """
+    Make employee's rows of `model` match `rows`.
+
+    rows: list of dicts of model field values; an optional 'id' entry holds the
+    primary key of the row being edited. File fields are only overwritten when
+    a new file is supplied. before_create(objs) is called with the new rows
+    before they are bulk-inserted (bulk_create skips Model.save()).
+    """
+    existing = list(model.objects.filter(employee=employee))
+    by_id = {obj.pk: obj for obj in existing}
+    by_key = {}
+    for obj in existing:
+        by_key.setdefault(tuple(getattr(obj, name) for name in key_fields), []).append(obj)
+
+    def claim(obj):
+        by_id.pop(obj.pk, None)
+        bucket = by_key.get(tuple(getattr(obj, name) for name in key_fields), [])
+        if obj in bucket:
+            bucket.remove(obj)
+        return obj
+
+    to_create = []
+    to_update = []
+    update_fields = set()
+
+    for row in rows:
+        row = dict(row)
+        row_id = parse_row_id(row.pop('id', None))
+        uploads = {name: row.pop(name, None) for name in file_fields}
+
+        match = by_id.get(row_id) if row_id else None
+        if match is None and key_fields:
+            candidates = by_key.get(tuple(row.get(name) for name in key_fields))
+            match = candidates[0] if candidates else None
+        elif match is None and not key_fields and by_id:
+            # Single-row collections (e.g. OneToOne account info) reuse the existing row
+            match = next(iter(by_id.values()))
+
+        if match is None:
+            obj = model(employee=employee, **row)
+            for name, upload in uploads.items():
+                if upload:
+                    setattr(obj, name, upload)
+            to_create.append(obj)
+            continue
+
+        obj = claim(match)
+        changed = [name for name, value in row.items() if getattr(obj, name) != value]
+        for name in changed:
+            setattr(obj, name, row[name])
+        for name, upload in uploads.items():
+            if isinstance(upload, File):
+                # bulk_update does not run FileField.pre_save, so store the file now
+                getattr(obj, name).save(upload.name, upload, save=False)
+                changed.append(name)
+        if changed:
+            to_update.append(obj)
+            update_fields.update(changed)
+
+    stale_ids = list(by_id)
+    if stale_ids:
+        model.objects.filter(pk__in=stale_ids).delete()
+    if to_create:
+        if before_create:
+            before_create(to_create)
+        model.objects.bulk_create(to_create)
+    if to_update:
+        if any(field.name == 'updated_at' for field in model._meta.fields):
+            for obj in to_update:
+                obj.updated_at = model._meta.get_field('updated_at').pre_save(obj, add=False)
+            update_fields.add('updated_at')
+        model.objects.bulk_update(to_update, sorted(update_fields))
+
+    return SyncResult(created=len(to_create), updated=len(to_update), deleted=len(stale_ids))
@@ -0,0 +1,138 @@
+"""
+Site holidays and working-day arithmetic.
+
+Holiday.site_name holds the comma-separated names of the sites a holiday
+applies to (see holidays_create). It is normalised into HolidaySite rows
+(lower-cased site name + date, indexed) by sync_holiday_sites(), so site
+lookups are index range scans instead of LIKE scans.
+
+Working days are counted from an in-process HolidayCalendar per (site,
+year): a prefix sum over the year's days, where a day counts when it is
+neither a weekly off (settings.WEEKLY_OFF_DAYS) nor a holiday at the site.
+Counting the working days in any range is then two lookups per calendar
+year touched. Calendars are rebuilt lazily after any holiday change via a
+version counter in the shared cache, like master.reference_data, and
+are rebuilt anyway once older than HOLIDAY_CALENDAR_MAX_AGE seconds for
+workers that do not share a cache backend.
+"""
+import time
+from datetime import date, timedelta
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import HolidaySite
+
+HOLIDAY_CALENDAR_VERSION_KEY = 'master:holidays:calendar:version'
+HOLIDAY_CALENDAR_MAX_AGE = 300
+
+_calendars = {}
+_lock = Lock()
+
+
+def holiday_site_names(value: str) -> set[str]:
+    """The lower-cased site names stored in a Holiday.site_name value."""
+    return {name.strip().lower() for name in (value or '').split(',') if name.strip()}
+
+
+def _as_date(value):
+    """Model date fields can still hold the posted 'YYYY-MM-DD' string right after save()."""
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def sync_holiday_sites(holiday) -> None:
+    """Rewrite a holiday's HolidaySite rows from its site_name and date."""
+    HolidaySite.objects.filter(holiday=holiday).delete()
+    HolidaySite.objects.bulk_create([
+        HolidaySite(holiday=holiday, site_key=site_key, date=_as_date(holiday.date))
+        for site_key in holiday_site_names(holiday.site_name)
+    ])
+
+
+def site_holiday_dates(site_name: str, from_date: date, to_date: date) -> set[date]:
+    """Dates between from_date and to_date (inclusive) that are holidays at site_name."""
+    site_key = (site_name or '').strip().lower()
+    if not site_key:
+        return set()
+    return set(HolidaySite.objects.filter(
+        site_key=site_key, date__range=(from_date, to_date),
+    ).values_list('date', flat=True))
+
+
+def holidays_by_date(from_date: date, to_date: date) -> dict:
+    """{date: {lower-cased site name: holiday_type}} for every holiday between from_date and to_date."""
+    holidays = {}
+    for holiday_date, site_key, holiday_type in HolidaySite.objects.filter(
+        date__range=(from_date, to_date),
+    ).order_by('date', 'holiday_id').values_list('date', 'site_key', 'holiday__holiday_type'):
+        holidays.setdefault(holiday_date, {}).setdefault(site_key, holiday_type)
+    return holidays
+
+
+class HolidayCalendar:
+    """Working days of one site in one year, as a prefix sum over day-of-year."""
+
+    def __init__(self, year: int, holidays, weekly_off_days):
+        self.year = year
+        first = date(year, 1, 1)
+        days = (date(year + 1, 1, 1) - first).days
+        weekly_off_days = set(weekly_off_days)
+        self.prefix = [0] * (days + 1)
+        for offset in range(days):
+            day = first + timedelta(days=offset)
+            working = day.weekday() not in weekly_off_days and day not in holidays
+            self.prefix[offset + 1] = self.prefix[offset] + working
+
+    def count(self, from_date: date, to_date: date) -> int:
+        """Working days from from_date to to_date inclusive (both within this year)."""
+        start = from_date.timetuple().tm_yday - 1
+        end = to_date.timetuple().tm_yday
+        return self.prefix[end] - self.prefix[start]
+
+
+def _get_version() -> int:
+    version = cache.get(HOLIDAY_CALENDAR_VERSION_KEY)
+    if version is None:
+        cache.add(HOLIDAY_CALENDAR_VERSION_KEY, 1, None)
+        version = cache.get(HOLIDAY_CALENDAR_VERSION_KEY, 1)
+    return version
+
+
+def invalidate_holiday_calendars() -> None:
+    """Make every worker rebuild its calendars on next use (call after holiday changes)."""
+    try:
+        cache.incr(HOLIDAY_CALENDAR_VERSION_KEY)
+    except ValueError:
+        cache.set(HOLIDAY_CALENDAR_VERSION_KEY, 1, None)
+    with _lock:
+        _calendars.clear()
+
+
+def holiday_calendar(site_name: str, year: int) -> HolidayCalendar:
+    """The cached working-day calendar of site_name for year."""
+    key = ((site_name or '').strip().lower(), year)
+    version = _get_version()
+    cached = _calendars.get(key)
+    if cached is not None and cached[0] == version and time.monotonic() - cached[1] < HOLIDAY_CALENDAR_MAX_AGE:
+        return cached[2]
+    holidays = site_holiday_dates(key[0], date(year, 1, 1), date(year, 12, 31))
+    calendar = HolidayCalendar(year, holidays, settings.WEEKLY_OFF_DAYS)
+    with _lock:
+        _calendars[key] = (version, time.monotonic(), calendar)
+    return calendar
+
+
+def working_days(site_name: str, from_date: date, to_date: date) -> int:
+    """Working days at site_name from from_date to to_date inclusive (0 for an empty range)."""
+    total = 0
+    for year in range(from_date.year, to_date.year + 1):
+        start = max(from_date, date(year, 1, 1))
+        end = min(to_date, date(year, 12, 31))
+        if start <= end:
+            total += holiday_calendar(site_name, year).count(start, end)
+    return total
+
+
+def is_working_day(site_name: str, day: date) -> bool:
+    return working_days(site_name, day, day) == 1
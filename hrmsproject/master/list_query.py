@@ -0,0 +1,317 @@
+"""
+Declarative list pages.
+
+Every list view used to repeat the same code: per_page parsing, an
+icontains OR-search, date/site/employee/status filters, a Paginator and
+the querystring rebuild for the pagination links. A ListSpec now
+describes a list once and ListSpec.run(request) does that work:
+
+* Filters are compiled from typed ListFilter rows. Ids are validated as
+  integers and dates are parsed; values that fail are ignored instead of
+  raising a 500. A date range compiles to field >= from and
+  field < to + 1 day. That is a plain range on the column, so an index on
+  it can be used, and the same predicate works for DateField and
+  DateTimeField (no __date casts).
+* The free-text search goes through master.search.search_q(): index
+  lookups on the search gram table instead of icontains scans.
+* columns limits the SELECT to the fields the template shows
+  (QuerySet.only()). The ordering fields are always included.
+* The total for the pagination footer is cached per filter signature
+  (a hash of the compiled SQL). The cache is versioned per model:
+  post_save/post_delete on a listed model (see master.signals) bumps its
+  version, and so does invalidate_list_counts() after bulk writes.
+  Stale counts can otherwise last at most LIST_COUNT_TIMEOUT.
+* Pages are fetched by keyset ("seek") where possible. When page n is
+  rendered, the ordering values of its last row are cached, and page n+1
+  then reads "rows after that key" instead of OFFSET (n * per_page),
+  which the database would otherwise have to walk. Page links and
+  templates are unchanged; jumps to an arbitrary page fall back to
+  OFFSET. The ordering always ends in the primary key so the key is
+  unique.
+"""
+import hashlib
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta
+from functools import reduce
+from operator import or_
+from typing import Callable
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import DateTimeField, Q, QuerySet
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .search import search_q
+
+LIST_COUNT_TIMEOUT = 300
+LIST_COUNT_VERSION_KEY = 'master:list_count:{label}:version'
+DEFAULT_PER_PAGE = 10
+
+FILTER_EXACT = 'exact'
+FILTER_ID = 'id'
+FILTER_DATE_FROM = 'date_from'
+FILTER_DATE_TO = 'date_to'
+
+_counted_models = set()
+
+
+@dataclass(frozen=True)
+class ListFilter:
+    """
+    One GET parameter of a list page.
+
+    kind is FILTER_EXACT (the value as posted, optionally mapped through
+    choices), FILTER_ID (an integer id), or FILTER_DATE_FROM/FILTER_DATE_TO
+    (a YYYY-MM-DD date, compiled to an inclusive range on field).
+    choices, when given, maps posted values to stored ones; other values
+    are ignored.
+    """
+    param: str
+    field: str
+    kind: str = FILTER_EXACT
+    choices: dict = None
+
+    def compile(self, raw: str, model) -> Q | None:
+        if not raw:
+            return None
+        if self.kind == FILTER_ID:
+            return Q(**{self.field: int(raw)}) if raw.isdigit() else None
+        if self.kind in (FILTER_DATE_FROM, FILTER_DATE_TO):
+            try:
+                day = datetime.strptime(raw, '%Y-%m-%d').date()
+            except ValueError:
+                return None
+            if self.kind == FILTER_DATE_TO:
+                day += timedelta(days=1)
+            if isinstance(_model_field(model, self.field), DateTimeField):
+                day = timezone.make_aware(datetime.combine(day, time.min))
+            return Q(**{f'{self.field}__{"gte" if self.kind == FILTER_DATE_FROM else "lt"}': day})
+        if self.choices is not None:
+            if raw not in self.choices:
+                return None
+            raw = self.choices[raw]
+        return Q(**{self.field: raw})
+
+
+def date_range(field_name: str, from_param: str = 'from_date', to_param: str = 'to_date') -> tuple:
+    """The usual from_date/to_date pair of filters on one date field."""
+    return (
+        ListFilter(from_param, field_name, FILTER_DATE_FROM),
+        ListFilter(to_param, field_name, FILTER_DATE_TO),
+    )
+
+
+def _version_key(model) -> str:
+    return LIST_COUNT_VERSION_KEY.format(label=model._meta.label_lower)
+
+
+def _get_version(model) -> int:
+    key = _version_key(model)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, None)
+        version = cache.get(key, 1)
+    return version
+
+
+def is_list_counted(model) -> bool:
+    return model in _counted_models
+
+
+def invalidate_list_counts(model) -> None:
+    """Drop cached list totals and page keys built on model (call after bulk writes)."""
+    try:
+        cache.incr(_version_key(model))
+    except ValueError:
+        cache.set(_version_key(model), 1, None)
+
+
+def _value_at(obj, path: str):
+    """obj.a.b for 'a__b' (None when a relation on the way is empty)."""
+    for name in path.split('__'):
+        if obj is None:
+            return None
+        obj = getattr(obj, name)
+    return obj
+
+
+def _model_fields(model, path: str) -> list:
+    """The fields along a lookup path such as 'employee__staff_name'."""
+    fields = []
+    for name in path.split('__'):
+        model_field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+        fields.append(model_field)
+        model = model_field.related_model or model
+    return fields
+
+
+def _model_field(model, path: str):
+    return _model_fields(model, path)[-1]
+
+
+def _keyset_safe(model, ordering: tuple) -> bool:
+    """Whether no ordering column can be NULL (NULLs would fall outside the seek predicate)."""
+    return not any(
+        model_field.null for order in ordering for model_field in _model_fields(model, order.lstrip('-'))
+    )
+
+
+def _seek_after(ordering: tuple, key: tuple) -> Q:
+    """Rows after key in ordering: (a > x) | (a = x & b > y) | ... with < for descending fields."""
+    clauses, equal = [], {}
+    for order, value in zip(ordering, key):
+        name = order.lstrip('-')
+        clauses.append(Q(**equal, **{f'{name}__{"lt" if order.startswith("-") else "gt"}': value}))
+        equal[name] = value
+    return reduce(or_, clauses)
+
+
+class SeekPaginator(Paginator):
+    """Paginator with a cached count and keyset reads for the page after a rendered one."""
+
+    def __init__(self, object_list, per_page, cache_key: str, ordering: tuple, seek: bool = True):
+        super().__init__(object_list, per_page)
+        self.cache_key = cache_key
+        self.ordering = ordering
+        self.seek = seek
+
+    @cached_property
+    def count(self):
+        key = f'{self.cache_key}:count'
+        total = cache.get(key)
+        if total is None:
+            total = self.object_list.count()
+            cache.set(key, total, LIST_COUNT_TIMEOUT)
+        return total
+
+    def _page_key(self, number) -> str:
+        ordering = hashlib.md5(','.join(self.ordering).encode(), usedforsecurity=False).hexdigest()[:8]
+        return f'{self.cache_key}:{ordering}:{self.per_page}:after:{number}'
+
+    def page(self, number):
+        number = self.validate_number(number)
+        after = cache.get(self._page_key(number - 1)) if self.seek and number > 1 else None
+        if not self.count:
+            rows = []
+        elif after is not None:
+            first = self.ordering[0]
+            bound = Q(**{f'{first.lstrip("-")}__{"lte" if first.startswith("-") else "gte"}': after[0]})
+            rows = list(self.object_list.filter(bound, _seek_after(self.ordering, after))[:self.per_page])
+        else:
+            bottom = (number - 1) * self.per_page
+            rows = list(self.object_list[bottom:bottom + self.per_page])
+        if self.seek and rows and number < self.num_pages:
+            key = tuple(_value_at(rows[-1], order.lstrip('-')) for order in self.ordering)
+            if None not in key:
+                cache.set(self._page_key(number), key, LIST_COUNT_TIMEOUT)
+        return self._get_page(rows, number, self)
+
+
+@dataclass
+class ListPage:
+    """A rendered page of a ListSpec plus the request values the templates echo back."""
+    page_obj: object
+    search_query: str
+    per_page: int
+    params: dict
+    base_querystring: str
+    page_query_base: str
+
+    @property
+    def total(self) -> int:
+        return self.page_obj.paginator.count
+
+    def context(self, object_name: str, total_name: str = 'total_entries') -> dict:
+        return {
+            object_name: self.page_obj,
+            'page_obj': self.page_obj,
+            'search_query': self.search_query,
+            'per_page': str(self.per_page),
+            'per_page_value': self.per_page,
+            'base_querystring': self.base_querystring,
+            'page_query_base': self.page_query_base,
+            total_name: self.total,
+        }
+
+
+@dataclass
+class ListSpec:
+    """
+    A list page: the base queryset, its ordering, search fields and filters.
+
+    queryset is a callable returning the base queryset (select_related etc.),
+    so the spec can live at module level. search_param names the GET
+    parameter of the free-text search; count_depends_on lists models whose
+    changes also change the totals (e.g. Employee, when the search covers
+    employee names).
+    """
+    queryset: Callable[[], QuerySet]
+    ordering: tuple
+    search_fields: tuple = ()
+    filters: tuple = ()
+    columns: tuple = ()
+    search_param: str = 'q'
+    default_per_page: int = DEFAULT_PER_PAGE
+    count_depends_on: tuple = ()
+    model: type = field(init=False)
+    seek: bool = field(init=False)
+
+    def __post_init__(self):
+        self.model = self.queryset().model
+        pk_name = self.model._meta.pk.name
+        if not {order.lstrip('-') for order in self.ordering} & {'pk', pk_name}:
+            self.ordering = (*self.ordering, f'-{pk_name}' if self.ordering[0].startswith('-') else pk_name)
+        self.seek = _keyset_safe(self.model, self.ordering)
+        _counted_models.update((self.model, *self.count_depends_on))
+
+    def params(self, request) -> dict:
+        return {list_filter.param: request.GET.get(list_filter.param, '').strip() for list_filter in self.filters}
+
+    def filtered(self, request, queryset=None) -> QuerySet:
+        """The spec's queryset with the request's search and filters applied, unordered."""
+        queryset = self.queryset() if queryset is None else queryset
+        params = self.params(request)
+        conditions = [list_filter.compile(params[list_filter.param], self.model) for list_filter in self.filters]
+        search_query = request.GET.get(self.search_param, '').strip()
+        if search_query and self.search_fields:
+            conditions.append(search_q(self.model, self.search_fields, search_query))
+        conditions = [condition for condition in conditions if condition is not None]
+        return queryset.filter(*conditions) if conditions else queryset
+
+    def _cache_key(self, queryset) -> str:
+        versions = '.'.join(str(_get_version(model)) for model in (self.model, *self.count_depends_on))
+        sql, params = queryset.order_by().query.sql_with_params()
+        digest = hashlib.md5(f'{sql}|{params!r}|{versions}'.encode(), usedforsecurity=False).hexdigest()
+        return f'master:list_count:{self.model._meta.label_lower}:{digest}'
+
+    def run(self, request, queryset=None) -> ListPage:
+        """
+        Filter, order and paginate for request. queryset overrides the spec's
+        base queryset for views that narrow it further.
+        """
+        try:
+            per_page = max(int(request.GET.get('per_page', '').strip() or self.default_per_page), 1)
+        except ValueError:
+            per_page = self.default_per_page
+
+        rows = self.filtered(request, queryset)
+        cache_key = self._cache_key(rows)
+        rows = rows.order_by(*self.ordering)
+        if self.columns:
+            rows = rows.only(*self.columns, *(order.lstrip('-') for order in self.ordering))
+
+        paginator = SeekPaginator(rows, per_page, cache_key, self.ordering, self.seek)
+        page_obj = paginator.get_page(request.GET.get('page'))
+
+        query_params = request.GET.copy()
+        query_params.pop('page', None)
+        base_querystring = query_params.urlencode()
+        return ListPage(
+            page_obj=page_obj,
+            search_query=request.GET.get(self.search_param, '').strip(),
+            per_page=per_page,
+            params=self.params(request),
+            base_querystring=base_querystring,
+            page_query_base=f'{base_querystring}&' if base_querystring else '',
+        )
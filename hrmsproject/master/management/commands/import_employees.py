@@ -0,0 +1,66 @@
+"""
+Django management command to bulk import employees from an Excel/CSV file.
+
+Usage:
+    python manage.py import_employees staff.xlsx --dry-run
+    python manage.py import_employees staff.csv
+    python manage.py import_employees staff.xlsx --skip-invalid --batch-size 1000
+"""
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from master.employee_import import IMPORT_BATCH_SIZE, import_employees
+
+
+class Command(BaseCommand):
+    help = 'Bulk import employees (Staff Details) from an .xlsx or .csv file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to the .xlsx or .csv file')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate every row and report errors without saving anything',
+        )
+        parser.add_argument(
+            '--skip-invalid',
+            action='store_true',
+            help='Import the valid rows even if some rows fail validation',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help=f'Rows per bulk insert (default: {IMPORT_BATCH_SIZE})',
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f'File not found: {path}')
+
+        with path.open('rb') as file_obj:
+            try:
+                result = import_employees(
+                    file_obj,
+                    path.name,
+                    dry_run=options['dry_run'],
+                    skip_invalid=options['skip_invalid'],
+                    batch_size=max(options['batch_size'], 1),
+                )
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        for error in result.errors:
+            self.stdout.write(self.style.ERROR(
+                f"Row {error['row']} ({error['staff_id'] or '-'}): {error['field']} - {error['message']}"
+            ))
+
+        summary = f'{result.total_rows} row(s) read, {result.valid_rows} valid, {len(result.errors)} error(s).'
+        if result.dry_run:
+            self.stdout.write(self.style.WARNING(f'Dry run: {summary} Nothing was saved.'))
+        elif result.has_errors and not options['skip_invalid']:
+            self.stdout.write(self.style.ERROR(f'{summary} Nothing was saved; fix the errors or use --skip-invalid.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{summary} {result.created} employee(s) imported.'))
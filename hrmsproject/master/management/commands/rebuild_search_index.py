@@ -0,0 +1,34 @@
+"""
+Django management command to rebuild the free-text search index (master.search).
+
+Usage:
+    python manage.py rebuild_search_index
+    python manage.py rebuild_search_index --model entry.leaveentry --model master.employee
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from master import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the search gram index of every registered model (or the given ones)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            dest='labels',
+            action='append',
+            help='Model label to rebuild, e.g. entry.leaveentry (repeatable; default: all)',
+        )
+
+    def handle(self, *args, **options):
+        models = {model._meta.label_lower: model for model in search.registered_models()}
+        labels = [label.lower() for label in options['labels'] or models]
+        unknown = [label for label in labels if label not in models]
+        if unknown:
+            raise CommandError(f'Not indexed: {", ".join(unknown)}. Indexed models: {", ".join(sorted(models))}.')
+
+        for label in labels:
+            total = search.rebuild_index(models[label])
+            self.stdout.write(f'{label}: {total} rows indexed.')
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt.'))
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.13 on 2026-10-17 02:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0021_add_shift_roster_models'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='employee',
+            name='office_email',
+            field=models.EmailField(blank=True, db_index=True, max_length=254),
+        ),
+        migrations.AlterField(
+            model_name='employee',
+            name='personal_email',
+            field=models.EmailField(blank=True, db_index=True, max_length=254),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.13 on 2026-10-17 02:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0022_employee_email_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='employee',
+            name='staff_name',
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.13 on 2026-10-17 02:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def index_existing_holidays(apps, schema_editor):
+    Holiday = apps.get_model('master', 'Holiday')
+    HolidaySite = apps.get_model('master', 'HolidaySite')
+    links = []
+    for holiday_id, holiday_date, site_name in Holiday.objects.values_list('id', 'date', 'site_name').iterator():
+        site_keys = {name.strip().lower() for name in (site_name or '').split(',') if name.strip()}
+        links.extend(HolidaySite(holiday_id=holiday_id, site_key=key, date=holiday_date) for key in site_keys)
+    HolidaySite.objects.bulk_create(links, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0023_employee_staff_name_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HolidaySite',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('site_key', models.CharField(max_length=255)),
+                ('date', models.DateField()),
+                ('holiday', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='site_links', to='master.holiday')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['site_key', 'date'], name='master_holsite_site_date_idx'), models.Index(fields=['date'], name='master_holsite_date_idx')],
+                'unique_together': {('holiday', 'site_key')},
+            },
+        ),
+        migrations.RunPython(index_existing_holidays, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.13 on 2026-10-17 02:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0024_holidaysite'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leavetype',
+            name='monthly_accrual',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Days credited to every employee each month; blank = balance not tracked', max_digits=5, null=True),
+        ),
+    ]
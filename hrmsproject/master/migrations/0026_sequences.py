@@ -0,0 +1,42 @@
+# Generated by Django 4.2.13 on 2026-10-17 02:57
+
+from django.db import migrations, models
+
+
+def number_existing_assets(apps, schema_editor):
+    """Keep the AST- numbers already printed (derived from the primary key)."""
+    EmployeeAssetAssignment = apps.get_model('master', 'EmployeeAssetAssignment')
+    assignments = list(EmployeeAssetAssignment.objects.only('id'))
+    for assignment in assignments:
+        assignment.asset_id = f'AST-{assignment.id:07d}'
+    EmployeeAssetAssignment.objects.bulk_update(assignments, ['asset_id'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0025_leavetype_monthly_accrual'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('last_value', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Sequence',
+                'verbose_name_plural': 'Sequences',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='employeeassetassignment',
+            name='asset_id',
+            field=models.CharField(blank=True, editable=False, max_length=20, null=True, unique=True),
+        ),
+        migrations.RunPython(number_existing_assets, migrations.RunPython.noop),
+    ]
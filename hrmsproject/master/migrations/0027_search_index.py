@@ -0,0 +1,48 @@
+# Generated by Django 4.2.13 on 2026-10-17 03:11
+
+from django.db import migrations, models
+
+
+def text_grams(text):
+    """1-3 character substrings, as master.search.text_grams at the time of this migration."""
+    text = str(text or '').lower()
+    return {text[start:start + size] for size in (1, 2, 3) for start in range(len(text) - size + 1)}
+
+
+def index_employees(apps, schema_editor):
+    Employee = apps.get_model('master', 'Employee')
+    SearchGram = apps.get_model('master', 'SearchGram')
+    rows = []
+    for pk, staff_name, staff_id in Employee.objects.values_list('id', 'staff_name', 'staff_id').iterator():
+        rows.extend(
+            SearchGram(model_label='master.employee', object_id=pk, gram=gram)
+            for gram in text_grams(staff_name) | text_grams(staff_id)
+        )
+        if len(rows) >= 5000:
+            SearchGram.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+    SearchGram.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0026_sequences'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchGram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_label', models.CharField(max_length=100)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('gram', models.CharField(max_length=3)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['model_label', 'object_id'], name='master_searchgram_object_idx')],
+                'unique_together': {('model_label', 'gram', 'object_id')},
+            },
+        ),
+        migrations.RunPython(index_employees, migrations.RunPython.noop),
+    ]
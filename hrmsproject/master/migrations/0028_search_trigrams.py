@@ -0,0 +1,35 @@
+from django.db import migrations
+from django.db.models.functions import Length
+
+
+def short_grams(text):
+    """1-2 character substrings, as master.search.text_grams(text, 1) adds for identifiers."""
+    text = str(text or '').lower()
+    return {text[start:start + size] for size in (1, 2) for start in range(len(text) - size + 1)}
+
+
+def keep_trigrams_of_names(apps, schema_editor):
+    """Drop the 1-2 character grams of staff_name; staff_id keeps them."""
+    Employee = apps.get_model('master', 'Employee')
+    SearchGram = apps.get_model('master', 'SearchGram')
+    SearchGram.objects.filter(model_label='master.employee').annotate(size=Length('gram')).filter(size__lt=3).delete()
+    rows = []
+    for pk, staff_id in Employee.objects.values_list('id', 'staff_id').iterator():
+        rows.extend(
+            SearchGram(model_label='master.employee', object_id=pk, gram=gram) for gram in short_grams(staff_id)
+        )
+        if len(rows) >= 5000:
+            SearchGram.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+    SearchGram.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0027_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(keep_trigrams_of_names, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MaxValueValidator, MinValueValidator
 
 
@@ -105,6 +105,27 @@ class Holiday(models.Model):
         return f'{self.site_name} - {self.date}'
 
 
+class HolidaySite(models.Model):
+    """
+    One row per (site, holiday): the normalised, indexed form of the
+    comma-separated Holiday.site_name, kept in sync by master.signals.
+    site_key is the lower-cased site name.
+    """
+    holiday = models.ForeignKey(Holiday, on_delete=models.CASCADE, related_name='site_links')
+    site_key = models.CharField(max_length=255)
+    date = models.DateField()
+
+    class Meta:
+        unique_together = [('holiday', 'site_key')]
+        indexes = [
+            models.Index(fields=['site_key', 'date'], name='master_holsite_site_date_idx'),
+            models.Index(fields=['date'], name='master_holsite_date_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.site_key} - {self.date}'
+
+
 
 class Department(models.Model):
     STATUS_ACTIVE = 'Active'
@@ -180,6 +201,13 @@ class LeaveType(models.Model):
     leave_type = models.CharField(max_length=150, unique=True)
     short_name = models.CharField(max_length=50, unique=True)
     description = models.TextField(blank=True)
+    monthly_accrual = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text='Days credited to every employee each month; blank = balance not tracked',
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -329,7 +357,7 @@ class Employee(models.Model):
 
     id = models.BigAutoField(primary_key=True)
     unique_id = models.CharField(max_length=64, blank=True)
-    staff_name = models.CharField(max_length=255)
+    staff_name = models.CharField(max_length=255, db_index=True)
     staff_id = models.CharField(max_length=50, unique=True)
     gender = models.CharField(max_length=10, choices=GENDER_CHOICES)
     father_name = models.CharField(max_length=255, blank=True)
@@ -343,8 +371,8 @@ class Employee(models.Model):
     marital_status = models.CharField(max_length=12, choices=MARITAL_CHOICES, blank=True)
     personal_contact = models.CharField(max_length=15, blank=True)
     office_contact = models.CharField(max_length=15, blank=True)
-    personal_email = models.EmailField(blank=True)
-    office_email = models.EmailField(blank=True)
+    personal_email = models.EmailField(blank=True, db_index=True)
+    office_email = models.EmailField(blank=True, db_index=True)
     aadhar_no = models.CharField(max_length=14, blank=True)
     pan_no = models.CharField(max_length=10, blank=True)
     medical_claim = models.BooleanField(default=False)
@@ -509,6 +537,7 @@ class EmployeeAssetAssignment(models.Model):
     ]
 
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='asset_assignments')
+    asset_id = models.CharField(max_length=20, unique=True, null=True, blank=True, editable=False)
     asset_type = models.ForeignKey(AssetType, on_delete=models.PROTECT, related_name='assignments', null=True, blank=True)
     asset_name = models.CharField(max_length=255, blank=True, help_text='Legacy field - use asset_type instead')
     serial_no = models.CharField(max_length=255, blank=True)
@@ -532,6 +561,15 @@ class EmployeeAssetAssignment(models.Model):
     def __str__(self) -> str:
         asset_display = self.asset_type.name if self.asset_type else self.asset_name
         return f'{self.employee.staff_name} - {asset_display}'
+
+    def save(self, *args, **kwargs):
+        if not self.asset_id:
+            from .sequences import assign_asset_ids
+            with transaction.atomic():
+                assign_asset_ids([self])
+                super().save(*args, **kwargs)
+            return
+        super().save(*args, **kwargs)
     
     @property
     def asset_name_display(self):
@@ -620,3 +658,37 @@ class ShiftRosterAssignment(models.Model):
 
     def __str__(self) -> str:
         return f'{self.employee.staff_name} - {self.date} - {self.shift_name or "OFF"}'
+
+
+class Sequence(models.Model):
+    """Last number issued in one numbering scope (see master.sequences)."""
+    name = models.CharField(max_length=100, unique=True)
+    last_value = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = 'Sequence'
+        verbose_name_plural = 'Sequences'
+
+    def __str__(self) -> str:
+        return f'{self.name}: {self.last_value}'
+
+
+class SearchGram(models.Model):
+    """
+    One 1-3 character substring of a row's searchable text (master.search).
+    object_id is the pk of the row in model_label ('entry.leaveentry', ...).
+    """
+    model_label = models.CharField(max_length=100)
+    object_id = models.PositiveBigIntegerField()
+    gram = models.CharField(max_length=3)
+
+    class Meta:
+        unique_together = [('model_label', 'gram', 'object_id')]
+        indexes = [
+            models.Index(fields=['model_label', 'object_id'], name='master_searchgram_object_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.model_label}:{self.object_id} {self.gram!r}'
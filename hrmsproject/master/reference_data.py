@@ -0,0 +1,124 @@
+"""
+Cached master (reference) data for dropdowns.
+
+Sites, companies, shifts, salary/asset/expense types and the like change
+rarely but are listed on almost every create, edit and list page. The
+registry below serves them as tuples of lightweight named tuples (id/pk plus
+the display fields templates use) held in process memory, so rendering a
+page costs no reference-table queries.
+
+Each table has a version counter in the shared cache. post_save/post_delete
+on a registered model bumps its version (see master.signals) and every
+worker reloads that table on its next read. Bulk queryset.update()/delete()
+calls bypass signals and must call invalidate_reference_data() themselves.
+A worker's copy of a table is also reloaded once it is older than
+REFERENCE_DATA_MAX_AGE seconds, so workers that do not share a cache
+backend (LocMemCache) still pick up changes.
+"""
+import time
+from collections import namedtuple
+from threading import Lock
+
+from django.core.cache import cache
+
+REFERENCE_VERSION_KEY = 'master:reference:{name}:version'
+REFERENCE_DATA_MAX_AGE = 300
+
+_registry = {}
+_local = {}
+_lock = Lock()
+
+
+class _ReferenceTable:
+    def __init__(self, name, model, fields, queryset, depends_on=()):
+        self.name = name
+        self.model = model
+        self.models = {model, *depends_on}
+        self.fields = fields
+        self.queryset = queryset
+        base = namedtuple(f'{model.__name__}Choice', ('id',) + fields)
+        # pk alias and str() keep templates written against model instances working
+        self.row_class = type(base.__name__, (base,), {
+            '__slots__': (),
+            'pk': property(lambda row: row.id),
+            '__str__': lambda row: str(row[1]),
+        })
+
+    def load(self):
+        rows = self.queryset().values_list('id', *self.fields)
+        return tuple(self.row_class(*row) for row in rows)
+
+
+def register(name, model, fields, queryset=None, depends_on=()):
+    """
+    Register a reference table; queryset defaults to model.objects.order_by(fields[0]).
+
+    depends_on lists other models whose changes also invalidate the table
+    (e.g. a parent table used for ordering).
+    """
+    if queryset is None:
+        queryset = lambda: model.objects.order_by(fields[0])  # noqa: E731
+    _registry[name] = _ReferenceTable(name, model, tuple(fields), queryset, depends_on)
+
+
+def registered_models():
+    return set().union(*(table.models for table in _registry.values()))
+
+
+def _version_key(name):
+    return REFERENCE_VERSION_KEY.format(name=name)
+
+
+def _get_version(name) -> int:
+    key = _version_key(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, None)
+        version = cache.get(key, 1)
+    return version
+
+
+def get_reference_data(name) -> tuple:
+    """Return the cached rows of a registered reference table."""
+    table = _registry[name]
+    version = _get_version(name)
+    cached = _local.get(name)
+    if cached is not None and cached[0] == version and time.monotonic() - cached[1] < REFERENCE_DATA_MAX_AGE:
+        return cached[2]
+    rows = table.load()
+    with _lock:
+        _local[name] = (version, time.monotonic(), rows)
+    return rows
+
+
+def invalidate_reference_data(model):
+    """Bump the version of every reference table built from model."""
+    for name, table in _registry.items():
+        if model not in table.models:
+            continue
+        try:
+            cache.incr(_version_key(name))
+        except ValueError:
+            cache.set(_version_key(name), 1, None)
+        _local.pop(name, None)
+
+
+def _register_defaults():
+    from .models import AssetType, Company, ExpenseType, LeaveType, SalaryType, Shift, Site, SubExpense
+
+    register('sites', Site, ('name',))
+    register('companies', Company, ('billing_name', 'company_group'))
+    register('shifts', Shift, ('name', 'start_time', 'end_time'))
+    register('salary_types', SalaryType, ('name',),
+             lambda: SalaryType.objects.filter(is_active=True).order_by('name'))
+    register('asset_types', AssetType, ('name',),
+             lambda: AssetType.objects.filter(is_active=True).order_by('name'))
+    register('expense_types', ExpenseType, ('name',),
+             lambda: ExpenseType.objects.filter(is_active=True).order_by('name'))
+    register('sub_expense_types', SubExpense, ('name', 'expense_type_id'),
+             lambda: SubExpense.objects.filter(status=SubExpense.STATUS_ACTIVE).order_by('expense_type__name', 'name'),
+             depends_on=(ExpenseType,))
+    register('leave_types', LeaveType, ('leave_type', 'short_name', 'monthly_accrual'))
+
+
+_register_defaults()
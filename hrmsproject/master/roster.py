@@ -0,0 +1,446 @@
+"""
+Bulk persistence for week and month shift rosters.
+
+The roster grid (one row per employee, one cell per day) is turned into a
+{(employee_id, date): RosterCell | None} mapping, where None means the cell
+is empty. apply_roster_cells() diffs that mapping against the roster's
+existing assignments and writes the difference with one bulk_create, one
+bulk_update and one DELETE inside a single transaction. Only the cells that
+were posted are touched, so employees that were not shown on the form keep
+their assignments.
+
+The grid editor loads its rows lazily, one window of employees at a time
+(roster_grid_page), and posts only its changed cells as one JSON field
+(roster_changes, see parse_roster_changes), which keeps large rosters well
+under DATA_UPLOAD_MAX_NUMBER_FIELDS. The older one-field-per-cell form
+format is still accepted by parse_roster_grid.
+
+copy_month_roster() replicates a month roster to several months and sites:
+the source assignments are read once and every target roster's rows are
+written with bulk_create.
+
+Sites and shifts are resolved from the cached reference data, so parsing a
+grid costs no per-cell queries.
+"""
+import json
+import calendar
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Employee, ShiftRoster, ShiftRosterAssignment
+from .reference_data import get_reference_data
+
+ROSTER_BATCH_SIZE = 1000
+ROSTER_CHANGES_FIELD = 'roster_changes'
+ROSTER_MAX_CHANGED_CELLS = 50000
+ROSTER_COPY_MAX_MONTHS = 12
+ROSTER_GRID_PAGE_SIZE = 50
+ROSTER_GRID_MAX_PAGE_SIZE = 200
+
+
+# Sent (sender=ShiftRoster, roster, employee_ids, from_date, to_date) after a
+# roster's assignments are written in bulk; bulk writes skip model signals.
+roster_assignments_changed = Signal()
+
+
+@dataclass(frozen=True)
+class RosterCell:
+    shift_name: str
+    is_day_off: bool
+    site_id: int
+    shift_id: int | None = None
+
+
+@dataclass
+class RosterSaveResult:
+    created: int = 0
+    updated: int = 0
+    removed: int = 0
+
+    def summary(self) -> str:
+        return f'{self.created} created, {self.updated} updated, {self.removed} removed'
+
+
+def roster_dates(from_date: date, to_date: date) -> list[date]:
+    """Every date from from_date to to_date inclusive."""
+    return [from_date + timedelta(days=offset) for offset in range((to_date - from_date).days + 1)]
+
+
+def site_ids() -> set[int]:
+    return {site.id for site in get_reference_data('sites')}
+
+
+def shift_ids_by_name() -> dict[str, int]:
+    """Map upper-cased shift names to Shift ids so typed shift names link to the master."""
+    return {shift.name.strip().upper(): shift.id for shift in get_reference_data('shifts')}
+
+
+def make_cell(shift_name, is_day_off, site_id, shift_lookup=None) -> RosterCell | None:
+    """Build a RosterCell, or None for an empty cell (no shift and not a day off)."""
+    shift_name = (shift_name or '').strip()
+    if not shift_name and not is_day_off:
+        return None
+    shift_id = (shift_lookup or {}).get(shift_name.upper()) if shift_name else None
+    return RosterCell(shift_name=shift_name, is_day_off=bool(is_day_off), site_id=site_id, shift_id=shift_id)
+
+
+def roster_grid_employees(roster, default_site_id, site_id=None, term=''):
+    """
+    Employees shown on the roster grid, ordered by name.
+
+    With site_id only the rows on that site are returned: employees with an
+    assignment at that site in the roster, plus (for the roster's own site)
+    employees who have no assignments yet. term prefix-matches staff name or
+    staff ID.
+    """
+    employees = Employee.objects.order_by('staff_name', 'id')
+    term = (term or '').strip()
+    if term:
+        employees = employees.filter(Q(staff_name__istartswith=term) | Q(staff_id__istartswith=term))
+    if site_id:
+        on_default_site = str(site_id) == str(default_site_id)
+        if roster is None or not roster.pk:
+            return employees if on_default_site else employees.none()
+        at_site = Q(pk__in=ShiftRosterAssignment.objects.filter(roster=roster, site_id=site_id).values('employee_id'))
+        if on_default_site:
+            at_site |= ~Q(pk__in=ShiftRosterAssignment.objects.filter(roster=roster).values('employee_id'))
+        employees = employees.filter(at_site)
+    return employees
+
+
+def roster_grid_page(roster, from_date: date, to_date: date, default_site_id, site_id=None, term='',
+                     offset: int = 0, limit: int = ROSTER_GRID_PAGE_SIZE) -> dict:
+    """
+    One window of grid rows for the lazy roster editor.
+
+    Returns {'total', 'offset', 'employees'}, where each employee is a dict
+    with id, name, designation, site (row site: the site of their first saved
+    assignment, else default_site_id) and cells ({'YYYY-MM-DD': {'shift',
+    'day_off'}} for the saved assignments between from_date and to_date).
+    """
+    offset = max(0, offset)
+    limit = max(1, min(limit, ROSTER_GRID_MAX_PAGE_SIZE))
+    employees = roster_grid_employees(roster, default_site_id, site_id, term)
+    total = employees.count()
+    rows = list(employees.values_list('id', 'staff_name', 'designation')[offset:offset + limit])
+
+    saved_cells = {}
+    employee_sites = {}
+    if rows and roster is not None and roster.pk:
+        assignments = ShiftRosterAssignment.objects.filter(
+            roster=roster, employee_id__in=[row[0] for row in rows],
+        ).order_by('date').values_list('employee_id', 'date', 'shift_name', 'is_day_off', 'site_id')
+        for employee_id, day, shift_name, is_day_off, row_site_id in assignments:
+            employee_sites.setdefault(employee_id, str(row_site_id))
+            if from_date <= day <= to_date:
+                saved_cells.setdefault(employee_id, {})[day.isoformat()] = {
+                    'shift': shift_name,
+                    'day_off': is_day_off,
+                }
+
+    return {
+        'total': total,
+        'offset': offset,
+        'employees': [
+            {
+                'id': employee_id,
+                'name': staff_name,
+                'designation': designation or '',
+                'site': employee_sites.get(employee_id, str(default_site_id or '')),
+                'cells': saved_cells.get(employee_id, {}),
+            }
+            for employee_id, staff_name, designation in rows
+        ],
+    }
+
+
+def parse_roster_grid(data, dates, default_site_id) -> dict:
+    """
+    Read the posted roster grid (assignment_{emp}_site, schedule_{emp}_{yyyymmdd},
+    dayoff_{emp}_{yyyymmdd}) into {(employee_id, date): RosterCell | None}.
+
+    Employee rows are taken from the assignment_{emp}_site keys, i.e. the rows
+    rendered on the form; unknown sites fall back to default_site_id.
+    """
+    valid_sites = site_ids()
+    shift_lookup = shift_ids_by_name()
+
+    posted_ids = set()
+    for key in data.keys():
+        if key.startswith('assignment_') and key.endswith('_site'):
+            employee_id = key[len('assignment_'):-len('_site')]
+            if employee_id.isdigit():
+                posted_ids.add(int(employee_id))
+    employee_ids = set(Employee.objects.filter(pk__in=posted_ids).values_list('id', flat=True))
+
+    cells = {}
+    for employee_id in employee_ids:
+        site_id = data.get(f'assignment_{employee_id}_site', '').strip()
+        site_id = int(site_id) if site_id.isdigit() and int(site_id) in valid_sites else default_site_id
+        for day in dates:
+            date_key = day.strftime('%Y%m%d')
+            cells[(employee_id, day)] = make_cell(
+                data.get(f'schedule_{employee_id}_{date_key}', ''),
+                data.get(f'dayoff_{employee_id}_{date_key}') == 'on',
+                site_id,
+                shift_lookup,
+            )
+    return cells
+
+
+def parse_roster_changes(raw: str, roster, from_date: date, to_date: date, default_site_id) -> dict:
+    """
+    Read the JSON delta posted by the roster grid editor into
+    {(employee_id, date): RosterCell | None}.
+
+    The payload is {"sites": {employee_id: site_id}, "cells": [{"employee",
+    "date" (YYYY-MM-DD), "shift", "day_off"}]}; each cell carries the new
+    state of that day and an empty shift without day_off clears it. A site
+    in "sites" applies to the employee's new cells and is also written to
+    their existing assignments in this roster. Only posted employees are
+    read and written; the editor sends a default-shift prefill as explicit
+    cells of the rows it loaded. Raises ValueError with a user-facing
+    message when the payload is invalid.
+    """
+    try:
+        payload = json.loads(raw or '{}')
+    except ValueError:
+        raise ValueError('Roster changes could not be read. Please reload the page and try again.')
+    if not isinstance(payload, dict):
+        raise ValueError('Roster changes could not be read. Please reload the page and try again.')
+    posted_sites = payload.get('sites') or {}
+    posted_cells = payload.get('cells') or []
+    if not isinstance(posted_sites, dict) or not isinstance(posted_cells, list):
+        raise ValueError('Roster changes could not be read. Please reload the page and try again.')
+    if len(posted_cells) > ROSTER_MAX_CHANGED_CELLS:
+        raise ValueError('Too many roster changes in one save.')
+
+    valid_sites = site_ids()
+    employee_sites = {}
+    for employee_id, site_id in posted_sites.items():
+        employee_id, site_id = str(employee_id), str(site_id)
+        if not employee_id.isdigit() or not site_id.isdigit() or int(site_id) not in valid_sites:
+            raise ValueError(f'Invalid site selected for employee {employee_id}.')
+        employee_sites[int(employee_id)] = int(site_id)
+
+    changes = {}
+    for item in posted_cells:
+        if not isinstance(item, dict) or not str(item.get('employee', '')).isdigit():
+            raise ValueError('Roster changes could not be read. Please reload the page and try again.')
+        try:
+            day = date.fromisoformat(str(item.get('date', '')))
+        except ValueError:
+            raise ValueError(f"Invalid roster date: {item.get('date')}.")
+        if not from_date <= day <= to_date:
+            raise ValueError(f'{day:%d-%m-%Y} is outside the roster period.')
+        shift_name = str(item.get('shift') or '').strip()
+        if len(shift_name) > ShiftRosterAssignment._meta.get_field('shift_name').max_length:
+            raise ValueError(f'Shift name is too long: {shift_name[:20]}...')
+        changes[(int(item['employee']), day)] = (shift_name, bool(item.get('day_off')))
+
+    employee_ids = {employee_id for employee_id, _ in changes} | set(employee_sites)
+    known_ids = set(Employee.objects.filter(pk__in=employee_ids).values_list('id', flat=True))
+    if employee_ids - known_ids:
+        raise ValueError('The roster refers to an employee that no longer exists.')
+
+    existing = {}
+    if roster is not None and roster.pk and employee_ids:
+        assignments = ShiftRosterAssignment.objects.filter(roster=roster, employee_id__in=employee_ids)
+        existing = {
+            (row['employee_id'], row['date']): row
+            for row in assignments.values('employee_id', 'date', 'shift_id', 'shift_name', 'is_day_off', 'site_id')
+        }
+    current_sites = {}
+    for (employee_id, _), row in existing.items():
+        current_sites.setdefault(employee_id, row['site_id'])
+
+    shift_lookup = shift_ids_by_name()
+    cells = {}
+    for (employee_id, day), (shift_name, is_day_off) in changes.items():
+        site_id = employee_sites.get(employee_id) or current_sites.get(employee_id) or default_site_id
+        cells[(employee_id, day)] = make_cell(shift_name, is_day_off, site_id, shift_lookup)
+
+    # A changed row site moves the employee's other saved days to that site as well
+    for key, row in existing.items():
+        new_site = employee_sites.get(key[0])
+        if key not in cells and new_site and new_site != row['site_id']:
+            cells[key] = RosterCell(row['shift_name'], row['is_day_off'], new_site, row['shift_id'])
+    return cells
+
+
+def parse_roster_request(data, roster, from_date: date, to_date: date, default_site_id) -> dict:
+    """Cells from either the JSON delta (roster_changes) or the legacy per-cell fields."""
+    if ROSTER_CHANGES_FIELD in data:
+        return parse_roster_changes(data[ROSTER_CHANGES_FIELD], roster, from_date, to_date, default_site_id)
+    return parse_roster_grid(data, roster_dates(from_date, to_date), default_site_id)
+
+
+def apply_roster_cells(roster, cells: dict, prune_outside_range: bool = True) -> RosterSaveResult:
+    """
+    Write cells to the roster as a diff against its existing assignments.
+
+    With prune_outside_range, assignments dated outside the roster's
+    from_date..to_date (e.g. after its dates were changed) are removed too.
+    """
+    result = RosterSaveResult()
+    employee_ids = {employee_id for employee_id, _ in cells}
+
+    with transaction.atomic():
+        existing = {
+            (assignment.employee_id, assignment.date): assignment
+            for assignment in ShiftRosterAssignment.objects.filter(roster=roster, employee_id__in=employee_ids)
+        }
+
+        to_create = []
+        to_update = []
+        stale_ids = []
+        now = timezone.now()
+        for (employee_id, day), cell in cells.items():
+            current = existing.get((employee_id, day))
+            if cell is None:
+                if current is not None:
+                    stale_ids.append(current.pk)
+                continue
+            if current is None:
+                to_create.append(ShiftRosterAssignment(
+                    roster=roster,
+                    employee_id=employee_id,
+                    date=day,
+                    shift_id=cell.shift_id,
+                    shift_name=cell.shift_name,
+                    site_id=cell.site_id,
+                    is_day_off=cell.is_day_off,
+                ))
+            elif (current.shift_name, current.is_day_off, current.site_id, current.shift_id) != (
+                    cell.shift_name, cell.is_day_off, cell.site_id, cell.shift_id):
+                current.shift_name = cell.shift_name
+                current.is_day_off = cell.is_day_off
+                current.site_id = cell.site_id
+                current.shift_id = cell.shift_id
+                current.updated_at = now
+                to_update.append(current)
+
+        touched = {(a.employee_id, a.date) for a in to_create + to_update}
+        touched.update((employee_id, day) for (employee_id, day), cell in cells.items() if cell is None)
+        stale = ShiftRosterAssignment.objects.filter(pk__in=stale_ids)
+        if prune_outside_range and roster.from_date:
+            outside = ShiftRosterAssignment.objects.filter(roster=roster).exclude(
+                date__range=(roster.from_date, roster.to_date or roster.from_date)
+            )
+            touched.update(outside.values_list('employee_id', 'date'))
+            stale = stale | outside
+        if stale_ids or prune_outside_range:
+            result.removed = stale.delete()[0]
+
+        if to_create:
+            ShiftRosterAssignment.objects.bulk_create(to_create, batch_size=ROSTER_BATCH_SIZE)
+        if to_update:
+            ShiftRosterAssignment.objects.bulk_update(
+                to_update, ['shift_name', 'is_day_off', 'site', 'shift', 'updated_at'], batch_size=ROSTER_BATCH_SIZE,
+            )
+        result.created = len(to_create)
+        result.updated = len(to_update)
+        if result.created or result.updated or result.removed:
+            _send_assignments_changed(roster, touched)
+    return result
+
+
+def _send_assignments_changed(roster, keys) -> None:
+    """Notify listeners (e.g. the effective schedule) about the (employee_id, date) keys that changed."""
+    if not keys:
+        return
+    days = [day for _, day in keys]
+    roster_assignments_changed.send(
+        sender=ShiftRoster,
+        roster=roster,
+        employee_ids={employee_id for employee_id, _ in keys},
+        from_date=min(days),
+        to_date=max(days),
+    )
+
+
+def month_bounds(month_start: date) -> tuple[date, date]:
+    """First and last day of the month containing month_start."""
+    first = month_start.replace(day=1)
+    return first, first.replace(day=calendar.monthrange(first.year, first.month)[1])
+
+
+def month_range(first_month: date, last_month: date) -> list[date]:
+    """First day of every month from first_month to last_month inclusive."""
+    months = []
+    year, month = first_month.year, first_month.month
+    while (year, month) <= (last_month.year, last_month.month):
+        months.append(date(year, month, 1))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def existing_month_rosters(site_ids, salary_type: str, months: list[date]) -> list:
+    """Month rosters that already exist for any of the given sites and months."""
+    if not months:
+        return []
+    first, _ = month_bounds(months[0])
+    _, last = month_bounds(months[-1])
+    targets = {(month.year, month.month) for month in months}
+    return [
+        roster for roster in ShiftRoster.objects.select_related('site').filter(
+            site_id__in=site_ids,
+            salary_type=salary_type,
+            roster_type=ShiftRoster.ROSTER_TYPE_MONTH,
+            from_date__range=(first, last),
+        ).order_by('from_date', 'site__name')
+        if (roster.from_date.year, roster.from_date.month) in targets
+    ]
+
+
+def copy_month_roster(source_roster, months: list[date], target_site_ids) -> list[tuple]:
+    """
+    Copy source_roster's assignments into a new draft month roster for every
+    (site, month) pair and return [(new_roster, assignments_copied)].
+
+    Day-of-month is preserved; days missing from a shorter month fall on its
+    last day, where the genuine last day (or the first clamped one) wins so
+    (roster, employee, date) stays unique. When copying to another site the
+    assignments are moved to that site; same-site copies keep each row's site.
+    """
+    source_rows = list(
+        ShiftRosterAssignment.objects.filter(roster=source_roster).order_by('date', 'employee_id').values_list(
+            'employee_id', 'date', 'shift_id', 'shift_name', 'site_id', 'is_day_off',
+        )
+    )
+    description = f'Copied from {source_roster.from_date:%B %Y}'
+    copied = []
+    with transaction.atomic():
+        for site_id in target_site_ids:
+            for month in months:
+                from_date, to_date = month_bounds(month)
+                new_roster = ShiftRoster.objects.create(
+                    site_id=site_id,
+                    salary_type=source_roster.salary_type,
+                    from_date=from_date,
+                    to_date=to_date,
+                    roster_type=ShiftRoster.ROSTER_TYPE_MONTH,
+                    status=ShiftRoster.STATUS_DRAFT,
+                    description=description,
+                )
+                rows = {}
+                for employee_id, day, shift_id, shift_name, row_site_id, is_day_off in source_rows:
+                    target_day = to_date.replace(day=min(day.day, to_date.day))
+                    rows.setdefault((employee_id, target_day), ShiftRosterAssignment(
+                        roster=new_roster,
+                        employee_id=employee_id,
+                        date=target_day,
+                        shift_id=shift_id,
+                        shift_name=shift_name,
+                        site_id=row_site_id if site_id == source_roster.site_id else site_id,
+                        is_day_off=is_day_off,
+                    ))
+                ShiftRosterAssignment.objects.bulk_create(rows.values(), batch_size=ROSTER_BATCH_SIZE)
+                _send_assignments_changed(new_roster, rows.keys())
+                copied.append((new_roster, len(rows)))
+    return copied
@@ -0,0 +1,205 @@
+"""
+Rotation-pattern roster generation.
+
+A rotation is written as slash- or comma-separated segments of
+"<days> <shift>", e.g. "4 DAY SHIFT / 2 NIGHT SHIFT / 2 OFF" or, for a
+weekly A/B/C rotation, "7 A / 7 B / 7 C". OFF marks days off.
+
+The pattern is expanded once into a cycle of cells and the site's holidays
+are resolved once into a per-date position in that cycle (holidays are days
+off and do not advance the rotation). Each employee's row is then a single
+list lookup per date at their staggered offset, so generating a large
+roster costs one pass over employees x dates with no per-cell queries. The
+result is written into month rosters (created as drafts when missing) with
+apply_roster_cells, one bulk diff per month.
+"""
+import re
+from dataclasses import dataclass, field
+from datetime import date
+
+from django.db import transaction
+
+from .holidays import site_holiday_dates
+from .models import Employee, ShiftRoster, ShiftRosterAssignment
+from .roster import (
+    RosterCell,
+    RosterSaveResult,
+    apply_roster_cells,
+    make_cell,
+    month_bounds,
+    month_range,
+    roster_dates,
+    shift_ids_by_name,
+)
+
+PATTERN_OFF = 'OFF'
+PATTERN_MAX_CYCLE_DAYS = 366
+PATTERN_MAX_PERIOD_DAYS = 366
+PATTERN_MAX_CELLS = 200000
+PATTERN_PREVIEW_EMPLOYEES = 25
+PATTERN_PREVIEW_DAYS = 31
+
+_SEGMENT_RE = re.compile(r'^(\d+)\s*[xX*]?\s+(.+)$')
+
+
+@dataclass
+class RosterPlan:
+    """An employee x date matrix of generated cells ({(employee_id, date): RosterCell})."""
+    dates: list
+    employee_ids: list
+    cells: dict = field(default_factory=dict)
+    holidays: set = field(default_factory=set)
+
+    def shift_totals(self) -> dict:
+        totals = {}
+        for cell in self.cells.values():
+            name = PATTERN_OFF if cell.is_day_off else cell.shift_name
+            totals[name] = totals.get(name, 0) + 1
+        return totals
+
+
+def parse_pattern(text: str) -> list[tuple[str, int]]:
+    """
+    Parse a rotation such as "4 DAY SHIFT / 2 NIGHT SHIFT / 2 OFF" into
+    [(shift_name, days)]. Raises ValueError with a user-facing message.
+    """
+    segments = []
+    for part in re.split(r'[/,\n]', text or ''):
+        part = part.strip()
+        if not part:
+            continue
+        match = _SEGMENT_RE.match(part)
+        if not match or int(match.group(1)) < 1:
+            raise ValueError(f'"{part}" is not a valid rotation step. Use "<days> <shift>", e.g. "4 DAY SHIFT".')
+        shift_name = ' '.join(match.group(2).split()).upper()
+        if len(shift_name) > ShiftRosterAssignment._meta.get_field('shift_name').max_length:
+            raise ValueError(f'Shift name is too long: {shift_name[:20]}...')
+        segments.append((shift_name, int(match.group(1))))
+    if not segments:
+        raise ValueError('Enter a rotation pattern, e.g. "4 DAY SHIFT / 2 NIGHT SHIFT / 2 OFF".')
+    if sum(days for _, days in segments) > PATTERN_MAX_CYCLE_DAYS:
+        raise ValueError(f'A rotation cycle cannot be longer than {PATTERN_MAX_CYCLE_DAYS} days.')
+    return segments
+
+
+def pattern_employee_ids(department='', designation='', staff_ids=()) -> list[int]:
+    """Ids of the employees a rotation applies to, in staff name order (the stagger order)."""
+    employees = Employee.objects.order_by('staff_name', 'id')
+    if department:
+        employees = employees.filter(department__iexact=department)
+    if designation:
+        employees = employees.filter(designation__iexact=designation)
+    if staff_ids:
+        employees = employees.filter(staff_id__in=staff_ids)
+    return list(employees.values_list('id', flat=True))
+
+
+def expand_pattern(segments, site_id, shift_lookup=None) -> list[RosterCell]:
+    """One RosterCell per day of the rotation cycle."""
+    cycle = []
+    for shift_name, days in segments:
+        if shift_name == PATTERN_OFF:
+            cell = RosterCell(shift_name='', is_day_off=True, site_id=site_id)
+        else:
+            cell = make_cell(shift_name, False, site_id, shift_lookup)
+        cycle.extend([cell] * days)
+    return cycle
+
+
+def build_roster_plan(segments, employee_ids, from_date: date, to_date: date, site,
+                      stagger_days: int = 0, skip_holidays: bool = True) -> RosterPlan:
+    """
+    Apply the rotation to employee_ids from from_date to to_date.
+
+    Day 0 of the cycle falls on from_date for the first employee; each next
+    employee starts stagger_days further into the cycle. With skip_holidays
+    the site's holidays are days off and the rotation resumes after them.
+    """
+    dates = roster_dates(from_date, to_date)
+    cycle = expand_pattern(segments, site.id, shift_ids_by_name())
+    holidays = site_holiday_dates(site.name, from_date, to_date) if skip_holidays else set()
+    holiday_cell = RosterCell(shift_name='', is_day_off=True, site_id=site.id)
+
+    # Position of each date in the cycle, shared by every employee
+    positions = []
+    position = 0
+    for day in dates:
+        if day in holidays:
+            positions.append(None)
+        else:
+            positions.append(position)
+            position += 1
+
+    plan = RosterPlan(dates=dates, employee_ids=list(employee_ids), holidays=holidays)
+    length = len(cycle)
+    for index, employee_id in enumerate(plan.employee_ids):
+        offset = index * stagger_days
+        row = [holiday_cell if pos is None else cycle[(pos + offset) % length] for pos in positions]
+        plan.cells.update(zip(((employee_id, day) for day in dates), row))
+    return plan
+
+
+def save_roster_plan(plan: RosterPlan, site, salary_type: str) -> tuple[list, RosterSaveResult]:
+    """
+    Write the plan into the site's month rosters, creating draft rosters for
+    months that have none. A month's only roster is extended to cover the
+    planned dates it misses (e.g. a roster starting mid-month); when a month
+    has several rosters and none covers some planned dates, ValueError lists
+    those dates and nothing is written. Only the planned employees' cells in
+    the period are replaced; returns (rosters, combined RosterSaveResult).
+    """
+    total = RosterSaveResult()
+    rosters = []
+    with transaction.atomic():
+        for month in month_range(plan.dates[0], plan.dates[-1]):
+            month_start, month_end = month_bounds(month)
+            month_dates = [day for day in plan.dates if month_start <= day <= month_end]
+            month_rosters = list(ShiftRoster.objects.filter(
+                site_id=site.id,
+                salary_type=salary_type,
+                roster_type=ShiftRoster.ROSTER_TYPE_MONTH,
+                from_date__range=(month_start, month_end),
+            ).order_by('from_date'))
+            if not month_rosters:
+                month_rosters = [ShiftRoster.objects.create(
+                    site_id=site.id,
+                    salary_type=salary_type,
+                    from_date=month_start,
+                    to_date=month_end,
+                    roster_type=ShiftRoster.ROSTER_TYPE_MONTH,
+                    status=ShiftRoster.STATUS_DRAFT,
+                    description='Generated from rotation pattern',
+                )]
+            elif len(month_rosters) == 1:
+                roster = month_rosters[0]
+                roster_end = roster.to_date or month_end
+                if roster.from_date > month_dates[0] or roster_end < month_dates[-1]:
+                    roster.from_date = min(roster.from_date, month_dates[0])
+                    roster.to_date = max(roster_end, month_dates[-1])
+                    roster.save(update_fields=['from_date', 'to_date', 'updated_at'])
+
+            uncovered = [
+                day for day in month_dates
+                if not any(roster.from_date <= day <= (roster.to_date or month_end) for roster in month_rosters)
+            ]
+            if uncovered:
+                raise ValueError(
+                    'No month roster of this site covers '
+                    f'{", ".join(day.strftime("%d-%m-%Y") for day in uncovered)}; '
+                    'adjust the existing rosters or the period and generate again.'
+                )
+
+            written = set()
+            for roster in month_rosters:
+                # Dates covered by two rosters go to the earlier one only
+                days = {
+                    day for day in month_dates
+                    if day not in written and roster.from_date <= day <= (roster.to_date or month_end)
+                }
+                written |= days
+                cells = {key: cell for key, cell in plan.cells.items() if key[1] in days}
+                result = apply_roster_cells(roster, cells, prune_outside_range=False)
+                total.created += result.created
+                total.updated += result.updated
+                rosters.append(roster)
+    return rosters, total
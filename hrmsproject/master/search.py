@@ -0,0 +1,209 @@
+"""
+Free-text search index.
+
+List searches used to be OR-ed icontains over several columns, many of
+them across joins (employee__staff_name, site__name, ...). A LIKE '%x%'
+cannot use an index, so every search scanned the entry table and its
+joins.
+
+Registered models now keep their searchable text in SearchGram as a set
+of lower-cased substrings per row:
+
+* Free-text columns (reasons, places, names) store their trigrams only,
+  about one row per character of text.
+* Short identifier columns (staff_id, entry_no) also store their 1- and
+  2-character substrings, so a term of any length can be looked up.
+
+A term of 3 or more characters is split into its trigrams. The rows
+holding all of them are the candidates: every row that contains the term
+has them, and the term's own icontains is then checked on those rows
+only, so results match the old search exactly. A shorter term is one
+equality lookup when every searched column is an identifier; otherwise
+it matches most rows anyway and goes to the plain icontains path.
+
+search_q() turns a ListSpec's search_fields into that form. Fields of
+the model itself become pk IN (candidates) AND icontains. Fields behind
+a relation become employee IN (...), site IN (...), a lookup on the
+foreign key index; the related table is searched through its own index
+when it has one, else with icontains (fine for small reference tables
+such as Site).
+
+master.signals re-indexes a row on post_save and drops it on
+post_delete. Bulk writers that change indexed text call index_objects()
+themselves; manage.py rebuild_search_index rebuilds everything.
+"""
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import Employee, SearchGram
+
+SEARCH_GRAM_SIZE = 3
+SEARCH_INDEX_BATCH_SIZE = 500
+
+_registry = {}
+
+
+def register(model, fields, identifier_fields=()) -> None:
+    """
+    Index fields (free-text columns of model) and identifier_fields (short
+    code columns, indexed for terms of any length) for search_q().
+    """
+    _registry[model] = (tuple(fields), tuple(identifier_fields))
+
+
+def is_indexed(model) -> bool:
+    return model in _registry
+
+
+def indexed_fields(model) -> tuple:
+    fields, identifier_fields = _registry.get(model, ((), ()))
+    return fields + identifier_fields
+
+
+def identifier_fields(model) -> tuple:
+    return _registry.get(model, ((), ()))[1]
+
+
+def registered_models() -> list:
+    return list(_registry)
+
+
+def text_grams(text, shortest: int = SEARCH_GRAM_SIZE) -> set:
+    """Every substring of shortest to SEARCH_GRAM_SIZE characters of text, lower-cased."""
+    text = str(text or '').lower()
+    return {
+        text[start:start + size]
+        for size in range(shortest, SEARCH_GRAM_SIZE + 1)
+        for start in range(len(text) - size + 1)
+    }
+
+
+def object_grams(model, obj) -> set:
+    """The grams indexed for obj: trigrams of its text fields, 1-3 grams of its identifiers."""
+    fields, identifiers = _registry[model]
+    return set().union(
+        *(text_grams(getattr(obj, name)) for name in fields),
+        *(text_grams(getattr(obj, name), 1) for name in identifiers),
+    )
+
+
+def term_grams(term: str) -> set:
+    """The grams every text containing term also has (term itself when it is short)."""
+    term = term.lower()
+    if len(term) <= SEARCH_GRAM_SIZE:
+        return {term}
+    return {term[start:start + SEARCH_GRAM_SIZE] for start in range(len(term) - SEARCH_GRAM_SIZE + 1)}
+
+
+def _label(model) -> str:
+    return model._meta.label_lower
+
+
+def index_objects(model, objects) -> None:
+    """
+    Bring the index rows of objects up to date: one read, then one DELETE
+    and one INSERT for the grams that changed, per batch of objects.
+    """
+    label = _label(model)
+    objects = list(objects)
+    for start in range(0, len(objects), SEARCH_INDEX_BATCH_SIZE):
+        wanted = {obj.pk: object_grams(model, obj) for obj in objects[start:start + SEARCH_INDEX_BATCH_SIZE]}
+        stale, present = [], defaultdict(set)
+        rows = SearchGram.objects.filter(model_label=label, object_id__in=wanted)
+        for pk, object_id, gram in rows.values_list('id', 'object_id', 'gram'):
+            if gram in wanted[object_id]:
+                present[object_id].add(gram)
+            else:
+                stale.append(pk)
+        missing = [
+            SearchGram(model_label=label, object_id=object_id, gram=gram)
+            for object_id, grams in wanted.items()
+            for gram in grams - present[object_id]
+        ]
+        if not (stale or missing):
+            continue
+        with transaction.atomic():
+            if stale:
+                SearchGram.objects.filter(pk__in=stale).delete()
+            # ignore_conflicts: case/accent-insensitive collations can treat two grams as one
+            SearchGram.objects.bulk_create(missing, ignore_conflicts=True)
+
+
+def remove_objects(model, pks) -> None:
+    SearchGram.objects.filter(model_label=_label(model), object_id__in=list(pks)).delete()
+
+
+def rebuild_index(model) -> int:
+    """Re-index every row of model; returns the number of rows."""
+    SearchGram.objects.filter(model_label=_label(model)).delete()
+    total = 0
+    rows = model.objects.only(*indexed_fields(model)).order_by('pk')
+    batch = []
+    for obj in rows.iterator(chunk_size=SEARCH_INDEX_BATCH_SIZE):
+        batch.append(obj)
+        if len(batch) == SEARCH_INDEX_BATCH_SIZE:
+            index_objects(model, batch)
+            total += len(batch)
+            batch = []
+    index_objects(model, batch)
+    return total + len(batch)
+
+
+def candidate_ids(model, term: str):
+    """Subquery of the pks whose indexed text may contain term (a superset of the matches)."""
+    grams = term_grams(term)
+    return (
+        SearchGram.objects.filter(model_label=_label(model), gram__in=grams)
+        .values('object_id')
+        .annotate(hits=Count('gram'))
+        .filter(hits=len(grams))
+        .values('object_id')
+    )
+
+
+def _contains(fields, term: str) -> Q:
+    return reduce(or_, (Q(**{f'{name}__icontains': term}) for name in fields))
+
+
+def _uses_index(model, fields, term: str) -> bool:
+    """Whether the index narrows the search for term in fields (see the module docstring)."""
+    if len(term) < SEARCH_GRAM_SIZE:
+        return set(fields) <= set(identifier_fields(model))
+    return set(fields) <= set(indexed_fields(model))
+
+
+def _matches(model, fields, term: str) -> Q:
+    """fields (plain columns of model) containing term, through the index when it can narrow the rows."""
+    condition = _contains(fields, term)
+    if _uses_index(model, fields, term):
+        condition &= Q(pk__in=candidate_ids(model, term))
+    return condition
+
+
+def search_q(model, search_fields, term: str) -> Q:
+    """
+    The condition "any of search_fields contains term", built so each part
+    can use an index (see the module docstring).
+    """
+    by_relation = defaultdict(list)
+    for path in search_fields:
+        relation, _, name = path.rpartition('__')
+        by_relation[relation].append(name)
+
+    conditions = []
+    for relation, fields in by_relation.items():
+        if not relation:
+            conditions.append(_matches(model, fields, term))
+            continue
+        related = model
+        for name in relation.split('__'):
+            related = related._meta.get_field(name).related_model
+        conditions.append(Q(**{f'{relation}__in': related.objects.filter(_matches(related, fields, term))}))
+    return reduce(or_, conditions)
+
+
+register(Employee, ('staff_name',), identifier_fields=('staff_id',))
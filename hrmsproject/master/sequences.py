@@ -0,0 +1,132 @@
+"""
+Gap-free, concurrency-safe numbering (TADA entry numbers, staff IDs, asset
+IDs).
+
+Each numbering scope (e.g. 'TADA-20260317' or 'staff_id:EMP') is one
+Sequence row holding the last number issued. allocate() locks the row with
+SELECT ... FOR UPDATE, bumps it by the number of values needed and returns
+the block, so concurrent workers never receive the same number and a bulk
+insert reserves all its numbers with one locked update. The lock is held
+until the caller's transaction ends; if that transaction rolls back the
+increment rolls back with it, so no number is lost to a failed save.
+
+A scope is created on first use, with an INSERT that ignores a duplicate
+and only then the locking read. Locking a missing row first would take a
+gap lock on InnoDB, and two workers that both did so and then inserted
+would deadlock (daily scopes such as TADA numbers would hit this on the
+first claims of every day). The scope's starting point is seeded from
+the numbers already stored (seed_from), so switching an existing table
+over to a sequence continues after the highest legacy number.
+"""
+import re
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Employee, EmployeeAssetAssignment, Sequence
+
+
+@dataclass(frozen=True)
+class NumberFormat:
+    """How numbers of a scope are written: prefix + separator + zero-padded value."""
+    prefix: str
+    digits: int = 3
+    separator: str = '-'
+
+    @property
+    def scope(self) -> str:
+        return f'{self.prefix}{self.separator}'
+
+    def format(self, value: int) -> str:
+        return f'{self.prefix}{self.separator}{value:0{self.digits}d}'
+
+    def parse(self, text) -> int | None:
+        """The value of a number in this format, or None (e.g. a hand-typed ID)."""
+        match = re.fullmatch(rf'{re.escape(self.scope)}(\d+)', (text or '').strip())
+        return int(match.group(1)) if match else None
+
+
+def _seed_value(number_format: NumberFormat, seed_from) -> int:
+    """Highest number of this format among seed_from = (queryset, field)."""
+    if seed_from is None:
+        return 0
+    queryset, field = seed_from
+    values = queryset.filter(**{f'{field}__startswith': number_format.scope}).values_list(field, flat=True)
+    return max((number_format.parse(value) or 0 for value in values.iterator()), default=0)
+
+
+def _locked_sequence(number_format: NumberFormat, seed_from) -> Sequence:
+    name = number_format.scope
+    if not Sequence.objects.filter(name=name).exists():
+        # A worker creating the scope at the same time makes this a no-op
+        Sequence.objects.bulk_create(
+            [Sequence(name=name, last_value=_seed_value(number_format, seed_from))], ignore_conflicts=True,
+        )
+    return Sequence.objects.select_for_update().get(name=name)
+
+
+def allocate(number_format: NumberFormat, count: int = 1, seed_from=None) -> list[str]:
+    """Reserve the next count numbers of number_format, in order."""
+    if count < 1:
+        return []
+    with transaction.atomic():
+        sequence = _locked_sequence(number_format, seed_from)
+        first = sequence.last_value + 1
+        sequence.last_value += count
+        sequence.save(update_fields=['last_value', 'updated_at'])
+    return [number_format.format(value) for value in range(first, first + count)]
+
+
+def peek(number_format: NumberFormat, seed_from=None) -> str:
+    """The number allocate() would issue next, without reserving it."""
+    last_value = Sequence.objects.filter(name=number_format.scope).values_list('last_value', flat=True).first()
+    if last_value is None:
+        last_value = _seed_value(number_format, seed_from)
+    return number_format.format(last_value + 1)
+
+
+def advance(number_format: NumberFormat, numbers, seed_from=None) -> None:
+    """
+    Move the scope past numbers that were assigned by hand (e.g. a typed
+    staff ID in the sequence's format), so allocate() never issues them.
+    """
+    highest = max((number_format.parse(number) or 0 for number in numbers), default=0)
+    if not highest or Sequence.objects.filter(name=number_format.scope, last_value__gte=highest).exists():
+        return
+    with transaction.atomic():
+        sequence = _locked_sequence(number_format, seed_from)
+        if sequence.last_value < highest:
+            sequence.last_value = highest
+            sequence.save(update_fields=['last_value', 'updated_at'])
+
+
+STAFF_ID_FORMAT = NumberFormat(settings.STAFF_ID_PREFIX, settings.STAFF_ID_DIGITS, separator='')
+ASSET_ID_FORMAT = NumberFormat('AST', 7)
+
+
+def _staff_ids():
+    return Employee.objects.all(), 'staff_id'
+
+
+def allocate_staff_ids(count: int = 1) -> list[str]:
+    return allocate(STAFF_ID_FORMAT, count, seed_from=_staff_ids())
+
+
+def next_staff_id() -> str:
+    return peek(STAFF_ID_FORMAT, seed_from=_staff_ids())
+
+
+def claim_staff_ids(staff_ids) -> None:
+    """Keep the staff ID sequence ahead of IDs typed in its format."""
+    advance(STAFF_ID_FORMAT, staff_ids, seed_from=_staff_ids())
+
+
+def assign_asset_ids(assignments) -> None:
+    """Give every EmployeeAssetAssignment without an asset_id the next AST- number (one block)."""
+    pending = [assignment for assignment in assignments if not assignment.asset_id]
+    numbers = allocate(
+        ASSET_ID_FORMAT, len(pending), seed_from=(EmployeeAssetAssignment.objects.all(), 'asset_id'),
+    )
+    for assignment, number in zip(pending, numbers):
+        assignment.asset_id = number
@@ -0,0 +1,53 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .holidays import invalidate_holiday_calendars, sync_holiday_sites
+from . import search
+from .list_query import invalidate_list_counts, is_list_counted
+from .models import Holiday
+from .reference_data import invalidate_reference_data, registered_models
+
+
+def invalidate_reference_table(sender, **kwargs):
+    """Reload cached dropdown data for a master table after it changes."""
+    invalidate_reference_data(sender)
+
+
+for _model in registered_models():
+    post_save.connect(invalidate_reference_table, sender=_model, dispatch_uid=f'reference_data_save_{_model.__name__}')
+    post_delete.connect(invalidate_reference_table, sender=_model, dispatch_uid=f'reference_data_delete_{_model.__name__}')
+
+
+@receiver(post_save, dispatch_uid='list_counts_save')
+@receiver(post_delete, dispatch_uid='list_counts_delete')
+def invalidate_list_totals(sender, **kwargs):
+    """Drop cached list-page totals of a model shown in a ListSpec after a row changes."""
+    if is_list_counted(sender):
+        invalidate_list_counts(sender)
+
+
+@receiver(post_save, dispatch_uid='search_index_save')
+def index_search_row(sender, instance, update_fields=None, **kwargs):
+    """Re-index the searchable text of a registered model (see master.search)."""
+    if search.is_indexed(sender) and (
+        update_fields is None or set(update_fields) & set(search.indexed_fields(sender))
+    ):
+        search.index_objects(sender, [instance])
+
+
+@receiver(post_delete, dispatch_uid='search_index_delete')
+def drop_search_row(sender, instance, **kwargs):
+    if search.is_indexed(sender):
+        search.remove_objects(sender, [instance.pk])
+
+
+@receiver(post_save, sender=Holiday)
+def index_holiday_sites(sender, instance, **kwargs):
+    """Keep the (site, date) holiday index and working-day calendars in step with Holiday."""
+    sync_holiday_sites(instance)
+    invalidate_holiday_calendars()
+
+
+@receiver(post_delete, sender=Holiday)
+def drop_holiday_calendars(sender, instance, **kwargs):
+    invalidate_holiday_calendars()
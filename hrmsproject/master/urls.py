@@ -75,11 +75,16 @@ urlpatterns = [
     path('shift-roster/month/', views.shift_roster_month, name='shift_roster_month'),
     path('shift-roster/month-update/', views.shift_roster_month_update, name='shift_roster_month_update'),
     path('shift-roster/month-copy/', views.shift_roster_month_copy, name='shift_roster_month_copy'),
+    path('shift-roster/grid/', views.shift_roster_grid, name='shift_roster_grid'),
+    path('shift-roster/generate/', views.shift_roster_generate, name='shift_roster_generate'),
     path('employee/list/', views.employee_list, name='employee_list'),
     path('employee/create/', views.employee_create, name='employee_create'),
     path('employee/edit/<int:pk>/', views.employee_edit, name='employee_edit'),
     path('employee/delete/<int:pk>/', views.employee_delete, name='employee_delete'),
     path('employee/export-excel/', views.employee_export_excel, name='employee_export_excel'),
+    path('employee/export-csv/', views.employee_export_csv, name='employee_export_csv'),
+    path('employee/import/', views.employee_import, name='employee_import'),
+    path('employee/autocomplete/', views.employee_autocomplete, name='employee_autocomplete'),
     path('employee/staff-save/', views.employee_staff_save, name='employee_staff_save'),
     # Separate form save endpoints (individual save workflow)
     path('employee/staff-details-save/', views.employee_staff_details_save, name='employee_staff_details_save'),
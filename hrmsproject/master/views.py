@@ -1,14 +1,15 @@
 from datetime import datetime, date, timedelta
+from decimal import Decimal, InvalidOperation
 import json
+import re
 import uuid
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, permission_required
 from django.core.exceptions import ValidationError
-from django.core.paginator import Paginator
 from django.core.validators import validate_email
 from django.core.mail import send_mail
-from django.db.models import Q
+from django.db import transaction
 from django.db.models.deletion import ProtectedError
 from django.db.utils import ProgrammingError, OperationalError
 from django.http import JsonResponse, HttpResponse
@@ -40,11 +41,35 @@ from .models import (
     Plant,
     Shift,
     ShiftRoster,
-    ShiftRosterAssignment,
     SalaryType,
     Site,
     SubExpense,
 )
+from .employee_lookup import EMPLOYEE_AUTOCOMPLETE_LIMIT, employee_choices, search_employees
+from .employee_sync import sync_child_rows
+from .list_query import FILTER_ID, ListFilter, ListSpec, date_range
+from .reference_data import get_reference_data
+from .sequences import allocate_staff_ids, assign_asset_ids, claim_staff_ids, next_staff_id
+from .roster_patterns import (
+    PATTERN_MAX_CELLS,
+    PATTERN_MAX_PERIOD_DAYS,
+    PATTERN_PREVIEW_DAYS,
+    PATTERN_PREVIEW_EMPLOYEES,
+    build_roster_plan,
+    parse_pattern,
+    pattern_employee_ids,
+    save_roster_plan,
+)
+from .roster import (
+    ROSTER_COPY_MAX_MONTHS,
+    ROSTER_GRID_PAGE_SIZE,
+    apply_roster_cells,
+    copy_month_roster,
+    existing_month_rosters,
+    month_range,
+    parse_roster_request,
+    roster_grid_page,
+)
 
 
 ROSTER_SITES = [
@@ -440,43 +465,16 @@ def company_list1(request):
 
 # ==================== Legacy Master Templates ====================
 
-@permission_required('master.view_additiondeduction', raise_exception=True)
-def addition_list(request):
-    per_page = request.GET.get('per_page', '').strip() or '10'
-    search_query = request.GET.get('q', '').strip()
-    page_number = request.GET.get('page')
-
-    try:
-        per_page_value = max(int(per_page), 1)
-    except ValueError:
-        per_page_value = 10
-
-    additions = AdditionDeduction.objects.order_by('type', 'name')
-    if search_query:
-        additions = additions.filter(
-            Q(type__icontains=search_query)
-            | Q(name__icontains=search_query)
-            | Q(description__icontains=search_query)
-        )
-
-    paginator = Paginator(additions, per_page_value)
-    page_obj = paginator.get_page(page_number)
+ADDITION_LIST = ListSpec(
+    queryset=lambda: AdditionDeduction.objects.all(),
+    ordering=('type', 'name'),
+    search_fields=('type', 'name', 'description'),
+)
 
-    query_params = request.GET.copy()
-    query_params.pop('page', None)
-    base_querystring = query_params.urlencode()
-    page_query_base = f'{base_querystring}&' if base_querystring else ''
 
-    context = {
-        'additions': page_obj,
-        'page_obj': page_obj,
-        'search_query': search_query,
-        'per_page': str(per_page_value),
-        'per_page_value': per_page_value,
-        'base_querystring': base_querystring,
-        'page_query_base': page_query_base,
-        'total_additions': paginator.count,
-    }
+@permission_required('master.view_additiondeduction', raise_exception=True)
+def addition_list(request):
+    context = ADDITION_LIST.run(request).context('additions', 'total_additions')
     return render(request, 'master/addition_creation/list.html', context)
 
 
@@ -585,127 +583,50 @@ def addition_delete(request, pk):
     return render(request, 'master/addition_creation/confirm_delete.html', context)
 
 
-@permission_required('master.view_assettype', raise_exception=True)
-def asset_list(request):
-    per_page = request.GET.get('per_page', '').strip() or '10'
-    search_query = request.GET.get('q', '').strip()
-    page_number = request.GET.get('page')
-
-    try:
-        per_page_value = max(int(per_page), 1)
-    except ValueError:
-        per_page_value = 10
+ASSET_TYPE_LIST = ListSpec(
+    queryset=lambda: AssetType.objects.all(),
+    ordering=('name',),
+    search_fields=('name', 'description'),
+)
 
-    assets = AssetType.objects.order_by('name')
-    if search_query:
-        assets = assets.filter(
-            Q(name__icontains=search_query) | Q(description__icontains=search_query)
-        )
 
-    paginator = Paginator(assets, per_page_value)
-    page_obj = paginator.get_page(page_number)
+@permission_required('master.view_assettype', raise_exception=True)
+def asset_list(request):
+    context = ASSET_TYPE_LIST.run(request).context('assets', 'total_assets')
+    return render(request, 'master/asset_creation/list.html', context)
 
-    query_params = request.GET.copy()
-    query_params.pop('page', None)
-    base_querystring = query_params.urlencode()
-    page_query_base = f'{base_querystring}&' if base_querystring else ''
 
-    context = {
-        'assets': page_obj,
-        'page_obj': page_obj,
-        'search_query': search_query,
-        'per_page': str(per_page_value),
-        'per_page_value': per_page_value,
-        'base_querystring': base_querystring,
-        'page_query_base': page_query_base,
-        'total_assets': paginator.count,
-    }
-    return render(request, 'master/asset_creation/list.html', context)
+ASSET_ASSIGNMENT_LIST = ListSpec(
+    queryset=lambda: EmployeeAssetAssignment.objects.select_related('employee', 'employee__company', 'asset_type'),
+    ordering=('-created_at',),
+    search_fields=('asset_name', 'asset_type__name', 'serial_no', 'employee__staff_name', 'employee__staff_id'),
+    search_param='search',
+    # Date range on created_at; the site filter is echoed back only (assignments have no site yet)
+    filters=date_range('created_at'),
+    count_depends_on=(Employee, AssetType),
+)
 
 
 @permission_required('master.view_employeeassetassignment', raise_exception=True)
 def asset_create_list(request):
     """List all asset assignments with filters."""
-    from_date = request.GET.get('from_date', '').strip()
-    to_date = request.GET.get('to_date', '').strip()
-    site_id = request.GET.get('site_id', '').strip()
-    per_page = request.GET.get('per_page', '').strip() or '10'
-    search_query = request.GET.get('search', '').strip()
-    page_number = request.GET.get('page')
-    
-    # Get all asset assignments with related objects
-    asset_assignments = EmployeeAssetAssignment.objects.select_related(
-        'employee', 'employee__company', 'asset_type'
-    ).all()
-    
-    # Filter by date range (using created_at)
-    if from_date:
-        try:
-            from_date_obj = datetime.strptime(from_date, '%Y-%m-%d').date()
-            asset_assignments = asset_assignments.filter(created_at__date__gte=from_date_obj)
-        except ValueError:
-            pass
-    
-    if to_date:
-        try:
-            to_date_obj = datetime.strptime(to_date, '%Y-%m-%d').date()
-            asset_assignments = asset_assignments.filter(created_at__date__lte=to_date_obj)
-        except ValueError:
-            pass
-    
-    # Filter by site (if employee has site relationship - for now skip, can be added later)
-    # if site_id:
-    #     try:
-    #         asset_assignments = asset_assignments.filter(employee__site_id=int(site_id))
-    #     except (ValueError, TypeError):
-    #         pass
-    
-    # Search filter
-    if search_query:
-        asset_assignments = asset_assignments.filter(
-            Q(asset_name__icontains=search_query) |
-            Q(asset_type__name__icontains=search_query) |
-            Q(serial_no__icontains=search_query) |
-            Q(employee__staff_name__icontains=search_query) |
-            Q(employee__staff_id__icontains=search_query)
-        )
-    
-    # Pagination
-    try:
-        per_page_value = max(int(per_page), 1)
-    except ValueError:
-        per_page_value = 10
-    
-    paginator = Paginator(asset_assignments.order_by('-created_at'), per_page_value)
-    page_obj = paginator.get_page(page_number)
-    
-    # Get sites and other data for filters
-    sites = Site.objects.all().order_by('name')
-    
+    listing = ASSET_ASSIGNMENT_LIST.run(request)
+
     # Calculate issued and returned quantities
-    for assignment in page_obj:
+    for assignment in listing.page_obj:
         assignment.issued_qty = assignment.quantity if assignment.status == EmployeeAssetAssignment.STATUS_ISSUED else 0
         assignment.returned_qty = assignment.quantity if assignment.status == EmployeeAssetAssignment.STATUS_RETURNED else 0
-        # Generate asset ID (AST-{id})
-        assignment.asset_id_display = f'AST-{assignment.id:07d}'
-    
-    query_params = request.GET.copy()
-    query_params.pop('page', None)
-    base_querystring = query_params.urlencode()
-    page_query_base = f'{base_querystring}&' if base_querystring else ''
-    
+        # Asset ID issued by master.sequences (AST-nnnnnnn)
+        assignment.asset_id_display = assignment.asset_id or f'AST-{assignment.id:07d}'
+
     context = {
-        'asset_assignments': page_obj,
-        'page_obj': page_obj,
-        'is_paginated': page_obj.has_other_pages(),
-        'sites': sites,
-        'from_date': from_date,
-        'to_date': to_date,
-        'site_id': site_id,
-        'search_query': search_query,
-        'per_page': per_page_value,
-        'base_querystring': base_querystring,
-        'page_query_base': page_query_base,
+        **listing.context('asset_assignments'),
+        'is_paginated': listing.page_obj.has_other_pages(),
+        'per_page': listing.per_page,
+        'sites': get_reference_data('sites'),
+        'from_date': listing.params['from_date'],
+        'to_date': listing.params['to_date'],
+        'site_id': request.GET.get('site_id', '').strip(),
     }
     return render(request, 'master/assetCreate_creation/list.html', context)
 
@@ -713,9 +634,9 @@ def asset_create_list(request):
 @permission_required('master.add_employeeassetassignment', raise_exception=True)
 def asset_create_create(request):
     """Create new asset assignment."""
-    sites = Site.objects.all().order_by('name')
-    employees = Employee.objects.all().order_by('staff_name')
-    asset_types = AssetType.objects.filter(is_active=True).order_by('name')
+    sites = get_reference_data('sites')
+    employees = employee_choices()
+    asset_types = get_reference_data('asset_types')
     
     if request.method == 'POST':
         # Get all items from form data (items[0][field], items[1][field], etc.)
@@ -849,9 +770,9 @@ def asset_create_create(request):
 def asset_create_edit(request, pk):
     """Edit existing asset assignment."""
     assignment = get_object_or_404(EmployeeAssetAssignment, pk=pk)
-    sites = Site.objects.all().order_by('name')
-    employees = Employee.objects.all().order_by('staff_name')
-    asset_types = AssetType.objects.filter(is_active=True).order_by('name')
+    sites = get_reference_data('sites')
+    employees = employee_choices(assignment.employee_id)
+    asset_types = get_reference_data('asset_types')
     
     if request.method == 'POST':
         # Get form data
@@ -949,8 +870,8 @@ def asset_create_print(request, pk):
         pk=pk
     )
     
-    # Generate asset ID
-    assignment.asset_id_display = f'AST-{assignment.id:07d}'
+    # Asset ID issued by master.sequences (AST-nnnnnnn)
+    assignment.asset_id_display = assignment.asset_id or f'AST-{assignment.id:07d}'
     assignment.issued_qty = assignment.quantity if assignment.status == EmployeeAssetAssignment.STATUS_ISSUED else 0
     assignment.returned_qty = assignment.quantity if assignment.status == EmployeeAssetAssignment.STATUS_RETURNED else 0
     
@@ -1049,45 +970,22 @@ def asset_delete(request, pk):
     return render(request, 'master/asset_creation/confirm_delete.html', context)
 
 
-@permission_required('master.view_department', raise_exception=True)
-def department_list(request):
-    departments = Department.objects.order_by('name')
-    status_filter = request.GET.get('status', '').strip()
-    search_query = request.GET.get('q', '').strip()
-    per_page = request.GET.get('per_page', '').strip() or '10'
-    page_number = request.GET.get('page')
-
-    try:
-        per_page_value = max(int(per_page), 1)
-    except ValueError:
-        per_page_value = 10
-
-    if status_filter:
-        departments = departments.filter(status=status_filter)
-    if search_query:
-        departments = departments.filter(
-            Q(name__icontains=search_query)
-            | Q(status__icontains=search_query)
-            | Q(description__icontains=search_query)
-        )
-
-    paginator = Paginator(departments, per_page_value)
-    page_obj = paginator.get_page(page_number)
+DEPARTMENT_LIST = ListSpec(
+    queryset=lambda: Department.objects.all(),
+    ordering=('name',),
+    search_fields=('name', 'status', 'description'),
+    filters=(ListFilter('status', 'status'),),
+)
 
-    query_params = request.GET.copy()
-    query_params.pop('page', None)
-    base_querystring = query_params.urlencode()
-    page_query_base = f'{base_querystring}&' if base_querystring else ''
 
+@permission_required('master.view_department', raise_exception=True)
+def department_list(request):
+    listing = DEPARTMENT_LIST.run(request)
     context = {
-        'departments': page_obj,
-        'page_obj': page_obj,
-        'is_paginated': page_obj.has_other_pages(),
-        'status_filter': status_filter,
-        'search_query': search_query,
-        'per_page': per_page_value,
-        'base_querystring': base_querystring,
-        'page_query_base': page_query_base,
+        **listing.context('departments'),
+        'is_paginated': listing.page_obj.has_other_pages(),
+        'per_page': listing.per_page,
+        'status_filter': listing.params['status'],
     }
     return render(request, 'master/department_creation/list.html', context)
 
@@ -1190,56 +1088,28 @@ def department_delete(request, pk):
     return render(request, 'master/department_creation/confirm_delete.html', context)
 
 
-@permission_required('master.view_designation', raise_exception=True)
-def designation_list(request):
-    designations = (
-        Designation.objects.select_related('department')
-        .order_by('department__name', 'name')
-    )
-
-    status_filter = request.GET.get('status', '').strip()
-    department_filter = request.GET.get('department', '').strip()
-    search_query = request.GET.get('q', '').strip()
-    per_page = request.GET.get('per_page', '').strip() or '10'
-    page_number = request.GET.get('page')
-
-    try:
-        per_page_value = max(int(per_page), 1)
-    except ValueError:
-        per_page_value = 10
-
-    if status_filter:
-        designations = designations.filter(status=status_filter)
-
-    if department_filter:
-        designations = designations.filter(department_id=department_filter)
-
-    if search_query:
-        designations = designations.filter(
-            Q(name__icontains=search_query)
-            | Q(description__icontains=search_query)
-            | Q(department__name__icontains=search_query)
-        )
-
-    paginator = Paginator(designations, per_page_value)
-    page_obj = paginator.get_page(page_number)
+DESIGNATION_LIST = ListSpec(
+    queryset=lambda: Designation.objects.select_related('department'),
+    ordering=('department__name', 'name'),
+    search_fields=('name', 'description', 'department__name'),
+    filters=(
+        ListFilter('status', 'status'),
+        ListFilter('department', 'department_id', FILTER_ID),
+    ),
+    count_depends_on=(Department,),
+)
 
-    query_params = request.GET.copy()
-    query_params.pop('page', None)
-    base_querystring = query_params.urlencode()
-    page_query_base = f'{base_querystring}&' if base_querystring else ''
 
+@permission_required('master.view_designation', raise_exception=True)
+def designation_list(request):
+    listing = DESIGNATION_LIST.run(request)
     context = {
-        'designations': page_obj,
-        'page_obj': page_obj,
-        'is_paginated': page_obj.has_other_pages(),
-        'status_filter': status_filter,
-        'department_filter': department_filter,
-        'search_query': search_query,
-        'per_page': per_page_value,
+        **listing.context('designations'),
+        'is_paginated': listing.page_obj.has_other_pages(),
+        'per_page': listing.per_page,
+        'status_filter': listing.params['status'],
+        'department_filter': listing.params['department'],
         'departments': Department.objects.order_by('name'),
-        'base_querystring': base_querystring,
-        'page_query_base': page_query_base,
     }
     return render(request, 'master/designation_creation/list.html', context)
 
@@ -1371,41 +1241,20 @@ def designation_delete(request, pk):
     return render(request, 'master/designation_creation/confirm_delete.html', context)
 
 
-@permission_required('master.view_degree', raise_exception=True)
-def degree_list(request):
-    degrees = Degree.objects.order_by('education_type', 'name')
-
-    search_query = request.GET.get('q', '').strip()
-    per_page = request.GET.get('per_page', '').strip() or '10'
-    page_number = request.GET.get('page')
-
-    try:
-        per_page_value = max(int(per_page), 1)
-    except ValueError:
-        per_page_value = 10
-
-    if search_query:
-        degrees = degrees.filter(
-            Q(name__icontains=search_query)
-            | Q(education_type__icontains=search_query)
-        )
-
-    paginator = Paginator(degrees, per_page_value)
-    page_obj = paginator.get_page(page_number)
+DEGREE_LIST = ListSpec(
+    queryset=lambda: Degree.objects.all(),
+    ordering=('education_type', 'name'),
+    search_fields=('name', 'education_type'),
+)
 
-    query_params = request.GET.copy()
-    query_params.pop('page', None)
-    base_querystring = query_params.urlencode()
-    page_query_base = f'{base_querystring}&' if base_querystring else ''
 
+@permission_required('master.view_degree', raise_exception=True)
+def degree_list(request):
+    listing = DEGREE_LIST.run(request)
     context = {
-        'degrees': page_obj,
-        'page_obj': page_obj,
-        'is_paginated': page_obj.has_other_pages(),
-        'search_query': search_query,
-        'per_page': per_page_value,
-        'base_querystring': base_querystring,
-        'page_query_base': page_query_base,
+        **listing.context('degrees'),
+        'is_paginated': listing.page_obj.has_other_pages(),
+        'per_page': listing.per_page,
     }
     return render(request, 'master/degree_creation/list.html', context)
 
@@ -1499,42 +1348,17 @@ def degree_delete(request, pk):
     return render(request, 'master/degree_creation/confirm_delete.html', context)
 
 
+EXPENSE_TYPE_LIST = ListSpec(
+    queryset=lambda: ExpenseType.objects.all(),
+    ordering=('name',),
+    search_fields=('name', 'description'),
+)
+
+
 @permission_required('master.view_expensetype', raise_exception=True)
 def expense_list(request):
     """List all expense types with pagination and search."""
-    per_page = request.GET.get('per_page', '').strip() or '10'
-    search_query = request.GET.get('q', '').strip()
-    page_number = request.GET.get('page')
-
-    try:
-        per_page_value = max(int(per_page), 1)
-    except ValueError:
-        per_page_value = 10
-
-    expense_types = ExpenseType.objects.order_by('name')
-    if search_query:
-        expense_types = expense_types.filter(
-            Q(name__icontains=search_query) | Q(description__icontains=search_query)
-        )
-
-    paginator = Paginator(expense_types, per_page_value)
-    page_obj = paginator.get_page(page_number)
-
-    query_params = request.GET.copy()
-    query_params.pop('page', None)
-    base_querystring = query_params.urlencode()
-    page_query_base = f'{base_querystring}&' if base_querystring else ''
-
-    context = {
-        'expense_types': page_obj,
-        'page_obj': page_obj,
-        'search_query': search_query,
-        'per_page': str(per_page_value),
-        'per_page_value': per_page_value,
-        'base_querystring': base_querystring,
-        'page_query_base': page_query_base,
-        'total_expense_types': paginator.count,
-    }
+    context = EXPENSE_TYPE_LIST.run(request).context('expense_types', 'total_expense_types')
     return render(request, 'master/expense_creation/list.html', context)
 
 
@@ -1640,43 +1464,17 @@ def expense_delete(request, pk):
     return render(request, 'master/expense_creation/confirm_delete.html', context)
 
 
-@permission_required('master.view_subexpense', raise_exception=True)
-def sub_expense_list(request):
-    per_page = request.GET.get('per_page', '').strip() or '10'
-    search_query = request.GET.get('q', '').strip()
-    page_number = request.GET.get('page')
-
-    try:
-        per_page_value = max(int(per_page), 1)
-    except ValueError:
-        per_page_value = 10
-
-    sub_expenses = SubExpense.objects.select_related('expense_type').order_by('-entry_date', 'expense_type__name', 'name')
-    if search_query:
-        sub_expenses = sub_expenses.filter(
-            Q(name__icontains=search_query)
-            | Q(expense_type__name__icontains=search_query)
-            | Q(description__icontains=search_query)
-        )
-
-    paginator = Paginator(sub_expenses, per_page_value)
-    page_obj = paginator.get_page(page_number)
+SUB_EXPENSE_LIST = ListSpec(
+    queryset=lambda: SubExpense.objects.select_related('expense_type'),
+    ordering=('-entry_date', 'expense_type__name', 'name'),
+    search_fields=('name', 'expense_type__name', 'description'),
+    count_depends_on=(ExpenseType,),
+)
 
-    query_params = request.GET.copy()
-    query_params.pop('page', None)
-    base_querystring = query_params.urlencode()
-    page_query_base = f'{base_querystring}&' if base_querystring else ''
 
-    context = {
-        'sub_expenses': page_obj,
-        'page_obj': page_obj,
-        'search_query': search_query,
-        'per_page': str(per_page_value),
-        'per_page_value': per_page_value,
-        'base_querystring': base_querystring,
-        'page_query_base': page_query_base,
-        'total_sub_expenses': paginator.count,
-    }
+@permission_required('master.view_subexpense', raise_exception=True)
+def sub_expense_list(request):
+    context = SUB_EXPENSE_LIST.run(request).context('sub_expenses', 'total_sub_expenses')
     return render(request, 'master/subExpense_creation/list.html', context)
 
 
@@ -1859,44 +1657,16 @@ def sub_expense_delete(request, pk):
     return render(request, 'master/subExpense_creation/confirm_delete.html', context)
 
 
-@permission_required('master.view_site', raise_exception=True)
-def site_list(request):
-    per_page = request.GET.get('per_page', '').strip() or '10'
-    search_query = request.GET.get('q', '').strip()
-    page_number = request.GET.get('page')
-
-    try:
-        per_page_value = max(int(per_page), 1)
-    except ValueError:
-        per_page_value = 10
-
-    sites = Site.objects.order_by('name')
-    if search_query:
-        sites = sites.filter(
-            Q(name__icontains=search_query)
-            | Q(address__icontains=search_query)
-            | Q(city__icontains=search_query)
-            | Q(state__icontains=search_query)
-        )
-
-    paginator = Paginator(sites, per_page_value)
-    page_obj = paginator.get_page(page_number)
+SITE_LIST = ListSpec(
+    queryset=lambda: Site.objects.all(),
+    ordering=('name',),
+    search_fields=('name', 'address', 'city', 'state'),
+)
 
-    query_params = request.GET.copy()
-    query_params.pop('page', None)
-    base_querystring = query_params.urlencode()
-    page_query_base = f'{base_querystring}&' if base_querystring else ''
 
-    context = {
-        'sites': page_obj,
-        'page_obj': page_obj,
-        'search_query': search_query,
-        'per_page': str(per_page_value),
-        'per_page_value': per_page_value,
-        'base_querystring': base_querystring,
-        'page_query_base': page_query_base,
-        'total_sites': paginator.count,
-    }
+@permission_required('master.view_site', raise_exception=True)
+def site_list(request):
+    context = SITE_LIST.run(request).context('sites', 'total_sites')
     return render(request, 'master/site_creation/list.html', context)
 
 
@@ -2029,42 +1799,17 @@ def site_delete(request, pk):
     return render(request, 'master/site_creation/confirm_delete.html', context)
 
 
-@permission_required('master.view_plant', raise_exception=True)
-def plant_list(request):
-    per_page = request.GET.get('per_page', '').strip() or '10'
-    search_query = request.GET.get('q', '').strip()
-    page_number = request.GET.get('page')
-
-    try:
-        per_page_value = max(int(per_page), 1)
-    except ValueError:
-        per_page_value = 10
-
-    plants = Plant.objects.select_related('site').order_by('site__name', 'name')
-    if search_query:
-        plants = plants.filter(
-            Q(name__icontains=search_query)
-            | Q(site__name__icontains=search_query)
-        )
-
-    paginator = Paginator(plants, per_page_value)
-    page_obj = paginator.get_page(page_number)
+PLANT_LIST = ListSpec(
+    queryset=lambda: Plant.objects.select_related('site'),
+    ordering=('site__name', 'name'),
+    search_fields=('name', 'site__name'),
+    count_depends_on=(Site,),
+)
 
-    query_params = request.GET.copy()
-    query_params.pop('page', None)
-    base_querystring = query_params.urlencode()
-    page_query_base = f'{base_querystring}&' if base_querystring else ''
 
-    context = {
-        'plants': page_obj,
-        'page_obj': page_obj,
-        'search_query': search_query,
-        'per_page': str(per_page_value),
-        'per_page_value': per_page_value,
-        'base_querystring': base_querystring,
-        'page_query_base': page_query_base,
-        'total_plants': paginator.count,
-    }
+@permission_required('master.view_plant', raise_exception=True)
+def plant_list(request):
+    context = PLANT_LIST.run(request).context('plants', 'total_plants')
     return render(request, 'master/plant_creation/list.html', context)
 
 
@@ -2177,42 +1922,16 @@ def plant_delete(request, pk):
     return render(request, 'master/plant_creation/confirm_delete.html', context)
 
 
-@permission_required('master.view_holiday', raise_exception=True)
-def holidays_list(request):
-    per_page = request.GET.get('per_page', '').strip() or '10'
-    search_query = request.GET.get('q', '').strip()
-    page_number = request.GET.get('page')
-
-    try:
-        per_page_value = max(int(per_page), 1)
-    except ValueError:
-        per_page_value = 10
-
-    holidays = Holiday.objects.order_by('-date', 'site_name')
-    if search_query:
-        holidays = holidays.filter(
-            Q(site_name__icontains=search_query)
-            | Q(holiday_type__icontains=search_query)
-            | Q(description__icontains=search_query)
-        )
-
-    paginator = Paginator(holidays, per_page_value)
-    page_obj = paginator.get_page(page_number)
+HOLIDAY_LIST = ListSpec(
+    queryset=lambda: Holiday.objects.all(),
+    ordering=('-date', 'site_name'),
+    search_fields=('site_name', 'holiday_type', 'description'),
+)
 
-    query_params = request.GET.copy()
-    query_params.pop('page', None)
-    base_querystring = query_params.urlencode()
-    page_query_base = f'{base_querystring}&' if base_querystring else ''
 
-    context = {
-        'holidays': page_obj,
-        'page_obj': page_obj,
-        'search_query': search_query,
-        'per_page': str(per_page_value),
-        'base_querystring': base_querystring,
-        'page_query_base': page_query_base,
-        'total_holidays': paginator.count,
-    }
+@permission_required('master.view_holiday', raise_exception=True)
+def holidays_list(request):
+    context = HOLIDAY_LIST.run(request).context('holidays', 'total_holidays')
     return render(request, 'master/holidays_creation/list.html', context)
 
 
@@ -2312,44 +2031,31 @@ def holidays_delete(request, pk):
     return redirect('master:holidays_list')
 
 
-@permission_required('master.view_leavetype', raise_exception=True)
-def leave_list(request):
-    per_page = request.GET.get('per_page', '').strip() or '10'
-    search_query = request.GET.get('q', '').strip()
-    page_number = request.GET.get('page')
+LEAVE_TYPE_LIST = ListSpec(
+    queryset=lambda: LeaveType.objects.all(),
+    ordering=('leave_type',),
+    search_fields=('leave_type', 'short_name', 'description'),
+)
 
-    try:
-        per_page_value = max(int(per_page), 1)
-    except ValueError:
-        per_page_value = 10
-
-    leave_types = LeaveType.objects.order_by('leave_type')
-    if search_query:
-        leave_types = leave_types.filter(
-            Q(leave_type__icontains=search_query)
-            | Q(short_name__icontains=search_query)
-            | Q(description__icontains=search_query)
-        )
 
-    paginator = Paginator(leave_types, per_page_value)
-    page_obj = paginator.get_page(page_number)
+@permission_required('master.view_leavetype', raise_exception=True)
+def leave_list(request):
+    context = LEAVE_TYPE_LIST.run(request).context('leave_types', 'total_leave_types')
+    return render(request, 'master/leave_creation/list.html', context)
 
-    query_params = request.GET.copy()
-    query_params.pop('page', None)
-    base_querystring = query_params.urlencode()
-    page_query_base = f'{base_querystring}&' if base_querystring else ''
 
-    context = {
-        'leave_types': page_obj,
-        'page_obj': page_obj,
-        'search_query': search_query,
-        'per_page': str(per_page_value),
-        'per_page_value': per_page_value,
-        'base_querystring': base_querystring,
-        'page_query_base': page_query_base,
-        'total_leave_types': paginator.count,
-    }
-    return render(request, 'master/leave_creation/list.html', context)
+def _parse_monthly_accrual(value: str, errors: dict):
+    """Monthly accrual days from the leave type form (None = balance not tracked)."""
+    if not value:
+        return None
+    try:
+        accrual = Decimal(value)
+    except InvalidOperation:
+        errors['monthly_accrual'] = 'Enter a valid number of days.'
+        return None
+    if accrual < 0 or accrual >= 1000:
+        errors['monthly_accrual'] = 'Monthly accrual must be between 0 and 999.99 days.'
+    return accrual
 
 
 @permission_required('master.add_leavetype', raise_exception=True)
@@ -2358,6 +2064,7 @@ def leave_create(request):
         'leave_type': '',
         'short_name': '',
         'description': '',
+        'monthly_accrual': '',
     }
     errors = {}
 
@@ -2365,6 +2072,8 @@ def leave_create(request):
         values['leave_type'] = request.POST.get('leave_type', '').strip()
         values['short_name'] = request.POST.get('short_name', '').strip()
         values['description'] = request.POST.get('description', '').strip()
+        values['monthly_accrual'] = request.POST.get('monthly_accrual', '').strip()
+        monthly_accrual = _parse_monthly_accrual(values['monthly_accrual'], errors)
 
         if not values['leave_type']:
             errors['leave_type'] = 'Leave type is required.'
@@ -2381,6 +2090,7 @@ def leave_create(request):
                 leave_type=values['leave_type'],
                 short_name=values['short_name'],
                 description=values['description'],
+                monthly_accrual=monthly_accrual,
             )
             messages.success(request, 'Leave type created successfully.')
             return redirect('master:leave_list')
@@ -2400,6 +2110,7 @@ def leave_edit(request, pk):
         'leave_type': leave_type.leave_type,
         'short_name': leave_type.short_name,
         'description': leave_type.description or '',
+        'monthly_accrual': '' if leave_type.monthly_accrual is None else str(leave_type.monthly_accrual),
     }
     errors = {}
 
@@ -2407,6 +2118,8 @@ def leave_edit(request, pk):
         values['leave_type'] = request.POST.get('leave_type', '').strip()
         values['short_name'] = request.POST.get('short_name', '').strip()
         values['description'] = request.POST.get('description', '').strip()
+        values['monthly_accrual'] = request.POST.get('monthly_accrual', '').strip()
+        monthly_accrual = _parse_monthly_accrual(values['monthly_accrual'], errors)
 
         if not values['leave_type']:
             errors['leave_type'] = 'Leave type is required.'
@@ -2430,6 +2143,7 @@ def leave_edit(request, pk):
             leave_type.leave_type = values['leave_type']
             leave_type.short_name = values['short_name']
             leave_type.description = values['description']
+            leave_type.monthly_accrual = monthly_accrual
             leave_type.save()
             messages.success(request, 'Leave type updated successfully.')
             return redirect('master:leave_list')
@@ -2457,38 +2171,16 @@ def leave_delete(request, pk):
     return render(request, 'master/leave_creation/confirm_delete.html', context)
 
 
-@permission_required('master.view_salarytype', raise_exception=True)
-def salary_list(request):
-    query = request.GET.get('q', '').strip()
-    per_page = request.GET.get('per_page', '').strip() or '10'
-    page_number = request.GET.get('page')
-
-    try:
-        per_page_value = max(int(per_page), 1)
-    except ValueError:
-        per_page_value = 10
-
-    salary_types = SalaryType.objects.order_by('name')
-    if query:
-        salary_types = salary_types.filter(name__icontains=query)
-
-    paginator = Paginator(salary_types, per_page_value)
-    page_obj = paginator.get_page(page_number)
+SALARY_TYPE_LIST = ListSpec(
+    queryset=lambda: SalaryType.objects.all(),
+    ordering=('name',),
+    search_fields=('name',),
+)
 
-    query_params = request.GET.copy()
-    query_params.pop('page', None)
-    base_querystring = query_params.urlencode()
-    page_query_base = f'{base_querystring}&' if base_querystring else ''
 
-    context = {
-        'salary_types': page_obj,
-        'page_obj': page_obj,
-        'search_query': query,
-        'per_page': str(per_page_value),
-        'base_querystring': base_querystring,
-        'page_query_base': page_query_base,
-        'total_salaries': paginator.count,
-    }
+@permission_required('master.view_salarytype', raise_exception=True)
+def salary_list(request):
+    context = SALARY_TYPE_LIST.run(request).context('salary_types', 'total_salaries')
     return render(request, 'master/salary_creation/list.html', context)
 
 
@@ -2578,40 +2270,20 @@ def salary_delete(request, pk):
     return render(request, 'master/salary_creation/confirm_delete.html', context)
 
 
-@permission_required('master.view_shift', raise_exception=True)
-def shift_list(request):
-    shifts = Shift.objects.order_by('created_at', 'name')
-    search_query = request.GET.get('q', '').strip()
-    per_page = request.GET.get('per_page', '').strip() or '10'
-    page_number = request.GET.get('page')
-
-    try:
-        per_page_value = max(int(per_page), 1)
-    except ValueError:
-        per_page_value = 10
-
-    if search_query:
-        shifts = shifts.filter(
-            Q(name__icontains=search_query)
-            | Q(description__icontains=search_query)
-        )
-
-    paginator = Paginator(shifts, per_page_value)
-    page_obj = paginator.get_page(page_number)
+SHIFT_LIST = ListSpec(
+    queryset=lambda: Shift.objects.all(),
+    ordering=('created_at', 'name'),
+    search_fields=('name', 'description'),
+)
 
-    query_params = request.GET.copy()
-    query_params.pop('page', None)
-    base_querystring = query_params.urlencode()
-    page_query_base = f'{base_querystring}&' if base_querystring else ''
 
+@permission_required('master.view_shift', raise_exception=True)
+def shift_list(request):
+    listing = SHIFT_LIST.run(request)
     context = {
-        'shifts': page_obj,
-        'page_obj': page_obj,
-        'is_paginated': page_obj.has_other_pages(),
-        'search_query': search_query,
-        'per_page': per_page_value,
-        'base_querystring': base_querystring,
-        'page_query_base': page_query_base,
+        **listing.context('shifts'),
+        'is_paginated': listing.page_obj.has_other_pages(),
+        'per_page': listing.per_page,
     }
     return render(request, 'master/shift_creation/list.html', context)
 
@@ -2709,7 +2381,7 @@ def shift_roster_week(request):
         })
 
     # Get sites and salary types from database/models
-    sites = Site.objects.all().order_by('name')
+    sites = get_reference_data('sites')
     sites_list = [{'value': str(site.id), 'label': site.name} for site in sites]
     
     salary_types_list = [
@@ -2736,7 +2408,7 @@ def shift_roster_create(request):
     
     if roster_id:
         try:
-            roster = ShiftRoster.objects.select_related('site').prefetch_related('assignments').get(
+            roster = ShiftRoster.objects.select_related('site').get(
                 pk=int(roster_id),
                 roster_type=ShiftRoster.ROSTER_TYPE_WEEK
             )
@@ -2763,7 +2435,7 @@ def shift_roster_create(request):
     errors = {}
 
     # Get sites and salary types from database
-    sites = Site.objects.all().order_by('name')
+    sites = get_reference_data('sites')
     sites_list = [{'value': str(site.id), 'label': site.name} for site in sites]
     
     salary_types_list = [
@@ -2811,143 +2483,51 @@ def shift_roster_create(request):
         # Save to database
         if not errors and site_instance and from_date_obj:
             try:
-                # Update existing roster or create new one
-                if roster:
-                    # Update existing roster
-                    roster.site = site_instance
-                    roster.salary_type = values['salary_type']
-                    roster.from_date = from_date_obj
-                    roster.to_date = to_date_obj
-                    roster.description = values['description']
-                    roster.save()
-                    action = 'updated'
-                    
-                    # Delete existing assignments
-                    ShiftRosterAssignment.objects.filter(roster=roster).delete()
-                else:
-                    # Create new ShiftRoster
-                    roster = ShiftRoster.objects.create(
-                        site=site_instance,
-                        salary_type=values['salary_type'],
-                        from_date=from_date_obj,
-                        to_date=to_date_obj,
-                        roster_type=ShiftRoster.ROSTER_TYPE_WEEK,
-                        status=ShiftRoster.STATUS_DRAFT,
-                        description=values['description'],
-                    )
-                    action = 'created'
-
-                # Get employees (filter by salary category if needed)
-                employees = Employee.objects.all().order_by('staff_name')
-                # You can filter by salary_category if Employee model has that field
-                
-                # Parse and save assignments
-                assignments_created = 0
-                for employee in employees:
-                    employee_id = str(employee.id)
-                    
-                    # Get site assignment for this employee
-                    employee_site_id = request.POST.get(f'assignment_{employee_id}_site', '').strip()
-                    if employee_site_id:
-                        try:
-                            employee_site = Site.objects.get(id=int(employee_site_id))
-                        except (Site.DoesNotExist, ValueError, TypeError):
-                            employee_site = site_instance
+                with transaction.atomic():
+                    # Update existing roster or create new one
+                    if roster:
+                        # Update existing roster
+                        roster.site = site_instance
+                        roster.salary_type = values['salary_type']
+                        roster.from_date = from_date_obj
+                        roster.to_date = to_date_obj
+                        roster.description = values['description']
+                        roster.save()
+                        saved_roster = roster
+                        action = 'updated'
                     else:
-                        employee_site = site_instance
+                        # Create new ShiftRoster
+                        saved_roster = ShiftRoster.objects.create(
+                            site=site_instance,
+                            salary_type=values['salary_type'],
+                            from_date=from_date_obj,
+                            to_date=to_date_obj,
+                            roster_type=ShiftRoster.ROSTER_TYPE_WEEK,
+                            status=ShiftRoster.STATUS_DRAFT,
+                            description=values['description'],
+                        )
+                        action = 'created'
 
-                    # Process each day of the week (7 days)
-                    for day_offset in range(7):
-                        current_date = from_date_obj + timedelta(days=day_offset)
-                        date_key = current_date.strftime('%Y%m%d')
-                        
-                        # Get shift name for this day
-                        shift_name = request.POST.get(f'schedule_{employee_id}_{date_key}', '').strip()
-                        
-                        # Check if day off
-                        is_day_off = request.POST.get(f'dayoff_{employee_id}_{date_key}') == 'on'
-                        
-                        # Only create assignment if shift is specified or day off is checked
-                        if shift_name or is_day_off:
-                            ShiftRosterAssignment.objects.create(
-                                roster=roster,
-                                employee=employee,
-                                date=current_date,
-                                shift_name=shift_name if shift_name else '',
-                                site=employee_site,
-                                is_day_off=is_day_off,
-                            )
-                            assignments_created += 1
-
-                messages.success(request, f'Week wise roster {action} successfully with {assignments_created} assignments.')
+                    # Diff the posted changes against the saved assignments. A new roster
+                    # stays out of `roster` so a rollback does not leave its id in the form.
+                    cells = parse_roster_request(
+                        request.POST, saved_roster, from_date_obj, to_date_obj, site_instance.id,
+                    )
+                    result = apply_roster_cells(saved_roster, cells)
+
+                messages.success(request, f'Week wise roster {action} successfully ({result.summary()} assignments).')
                 return redirect('master:shift_roster_week')
                 
+            except ValueError as e:
+                errors['general'] = str(e)
             except Exception as e:
                 errors['general'] = f'Error saving roster: {str(e)}'
 
-    # Calculate week days based on from_date
-    week_days = []
-    if values.get('from_date'):
-        start_date = _parse_date(values['from_date'])
-        if start_date:
-            for day_offset in range(7):
-                current_date = start_date + timedelta(days=day_offset)
-                week_days.append({
-                    'date': current_date,
-                    'label': current_date.strftime('%A'),
-                })
-    else:
-        # Default week (current week)
-        today = date.today()
-        week_start = today - timedelta(days=today.weekday())
-        for day_offset in range(7):
-            current_date = week_start + timedelta(days=day_offset)
-            week_days.append({
-                'date': current_date,
-                'label': current_date.strftime('%A'),
-            })
-
-    # Get employees from database
-    employees = Employee.objects.all().order_by('staff_name')
-    employees_list = []
-    existing_assignments = {}
-    
-    # Load existing assignments if editing - create flat dict for template access
-    if roster:
-        assignments = ShiftRosterAssignment.objects.filter(roster=roster).select_related('employee', 'site')
-        for assignment in assignments:
-            key = f"{assignment.employee.id}_{assignment.date.strftime('%Y%m%d')}"
-            existing_assignments[key] = {
-                'shift_name': assignment.shift_name,
-                'is_day_off': assignment.is_day_off,
-                'site_id': str(assignment.site.id),
-            }
-    
-    for emp in employees:
-        # Get default site from first assignment if editing, otherwise use roster site
-        default_site_id = str(roster.site.id) if roster else ''
-        if roster:
-            # Find first assignment for this employee
-            for key, assignment in existing_assignments.items():
-                if key.startswith(f"{emp.id}_"):
-                    default_site_id = assignment['site_id']
-                    break
-        
-        employees_list.append({
-            'id': emp.id,
-            'name': emp.staff_name,
-            'designation': str(emp.designation) if emp.designation else '',
-            'default_site': default_site_id,
-        })
-
     context = {
         'sites': sites_list,
         'salary_types': salary_types_list,
         'values': values,
         'errors': errors,
-        'week_days': week_days,
-        'employees': employees_list,
-        'existing_assignments': existing_assignments,
         'is_edit_mode': is_edit_mode,
         'roster_id': roster.id if roster else None,
     }
@@ -2999,7 +2579,7 @@ def shift_roster_month(request):
         })
 
     # Get sites and salary types from database/models
-    sites = Site.objects.all().order_by('name')
+    sites = get_reference_data('sites')
     sites_list = [{'value': str(site.id), 'label': site.name} for site in sites]
     
     salary_types_list = [
@@ -3042,9 +2622,8 @@ def shift_roster_month_update(request):
     }
     errors = {}
 
-    # Get sites and employees from database
-    sites = Site.objects.all().order_by('name')
-    employees = Employee.objects.all().order_by('staff_name')
+    # Get sites from database
+    sites = get_reference_data('sites')
 
     if request.method == 'POST':
         values.update({
@@ -3089,81 +2668,45 @@ def shift_roster_month_update(request):
         # Save to database
         if not errors and site_instance and from_date_obj:
             try:
-                if roster:
-                    # Update existing roster
-                    roster.site = site_instance
-                    roster.salary_type = values['salary_type']
-                    roster.from_date = from_date_obj
-                    roster.to_date = to_date_obj
-                    roster.description = values['description']
-                    roster.save()
-                    action = 'updated'
-                else:
-                    # Create new roster
-                    roster = ShiftRoster.objects.create(
-                        site=site_instance,
-                        salary_type=values['salary_type'],
-                        from_date=from_date_obj,
-                        to_date=to_date_obj,
-                        roster_type=ShiftRoster.ROSTER_TYPE_MONTH,
-                        status=ShiftRoster.STATUS_DRAFT,
-                        description=values['description'],
-                    )
-                    action = 'created'
+                with transaction.atomic():
+                    if roster:
+                        # Update existing roster
+                        roster.site = site_instance
+                        roster.salary_type = values['salary_type']
+                        roster.from_date = from_date_obj
+                        roster.to_date = to_date_obj
+                        roster.description = values['description']
+                        roster.save()
+                        saved_roster = roster
+                        action = 'updated'
+                    else:
+                        # Create new roster
+                        saved_roster = ShiftRoster.objects.create(
+                            site=site_instance,
+                            salary_type=values['salary_type'],
+                            from_date=from_date_obj,
+                            to_date=to_date_obj,
+                            roster_type=ShiftRoster.ROSTER_TYPE_MONTH,
+                            status=ShiftRoster.STATUS_DRAFT,
+                            description=values['description'],
+                        )
+                        action = 'created'
 
-                # Parse and save employee assignments for the month
-                assignments_created = 0
-                assignments_updated = 0
-                
-                # Delete existing assignments if updating
-                if action == 'updated':
-                    ShiftRosterAssignment.objects.filter(roster=roster).delete()
-                
-                # Get all days in the month
-                current_date = from_date_obj
-                while current_date <= to_date_obj:
-                    # Process each employee for this date
-                    for employee in employees:
-                        employee_id = str(employee.id)
-                        date_key = current_date.strftime('%Y%m%d')
-                        
-                        # Get shift name for this day
-                        shift_name = request.POST.get(f'schedule_{employee_id}_{date_key}', '').strip()
-                        
-                        # Check if day off
-                        is_day_off = request.POST.get(f'dayoff_{employee_id}_{date_key}') == 'on'
-                        
-                        # Get site assignment for this employee
-                        employee_site_id = request.POST.get(f'assignment_{employee_id}_site', '').strip()
-                        if employee_site_id:
-                            try:
-                                employee_site = Site.objects.get(id=int(employee_site_id))
-                            except (Site.DoesNotExist, ValueError, TypeError):
-                                employee_site = site_instance
-                        else:
-                            employee_site = site_instance
-                        
-                        # Only create assignment if shift is specified or day off is checked
-                        if shift_name or is_day_off:
-                            ShiftRosterAssignment.objects.create(
-                                roster=roster,
-                                employee=employee,
-                                date=current_date,
-                                shift_name=shift_name if shift_name else '',
-                                site=employee_site,
-                                is_day_off=is_day_off,
-                            )
-                            assignments_created += 1
-                    
-                    # Move to next day
-                    current_date += timedelta(days=1)
+                    # Diff the posted changes against the saved assignments. A new roster
+                    # stays out of `roster` so a rollback does not leave its id in the form.
+                    cells = parse_roster_request(
+                        request.POST, saved_roster, from_date_obj, to_date_obj, site_instance.id,
+                    )
+                    result = apply_roster_cells(saved_roster, cells)
 
                 messages.success(
                     request,
-                    f'Month wise roster {action} successfully with {assignments_created} assignments.'
+                    f'Month wise roster {action} successfully ({result.summary()} assignments).'
                 )
                 return redirect('master:shift_roster_month')
                 
+            except ValueError as e:
+                messages.error(request, str(e))
             except Exception as e:
                 messages.error(request, f'Error saving roster: {str(e)}')
 
@@ -3174,158 +2717,262 @@ def shift_roster_month_update(request):
         {'value': ShiftRoster.SALARY_TYPE_WAGES, 'label': 'Wages'},
         {'value': ShiftRoster.SALARY_TYPE_OTHERS, 'label': 'Others'},
     ]
-    employees_list = [
-        {'id': emp.id, 'name': emp.staff_name, 'designation': str(emp.designation) if emp.designation else ''}
-        for emp in employees[:50]  # Limit to 50 for performance
-    ]
 
     context = {
         'sites': sites_list,
         'salary_types': salary_types_list,
         'values': values,
         'errors': errors,
-        'employees': employees_list,
         'roster': roster,
     }
     return render(request, 'master/shift_roster/monthUpdate.html', context)
 
 
+@permission_required('master.view_shift', raise_exception=True)
+@require_http_methods(["GET"])
+def shift_roster_grid(request):
+    """API endpoint for the roster grid editor: one window of employee rows with their saved cells."""
+    roster = None
+    roster_id = request.GET.get('roster', '').strip()
+    if roster_id:
+        try:
+            roster = ShiftRoster.objects.get(pk=int(roster_id))
+        except (ShiftRoster.DoesNotExist, ValueError):
+            return JsonResponse({'status': 0, 'msg': 'Roster not found.'}, status=404)
+
+    from_date = _parse_date(request.GET.get('from_date', '').strip())
+    to_date = _parse_date(request.GET.get('to_date', '').strip())
+    if not from_date or not to_date or not from_date <= to_date <= from_date + timedelta(days=31):
+        return JsonResponse({'status': 0, 'msg': 'Select a valid roster period.'}, status=400)
+
+    try:
+        offset = int(request.GET.get('offset', 0))
+        limit = int(request.GET.get('limit', ROSTER_GRID_PAGE_SIZE))
+    except (TypeError, ValueError):
+        offset, limit = 0, ROSTER_GRID_PAGE_SIZE
+
+    page = roster_grid_page(
+        roster,
+        from_date,
+        to_date,
+        default_site_id=request.GET.get('default_site', '').strip(),
+        site_id=request.GET.get('site', '').strip(),
+        term=request.GET.get('q', ''),
+        offset=offset,
+        limit=limit,
+    )
+    return JsonResponse({'status': 1, **page})
+
+
 @permission_required('master.add_shift', raise_exception=True)
 def shift_roster_month_copy(request):
-    """Copy existing month roster to a new month - Approach 3: Copy & Modify."""
+    """Copy an existing month roster to one or more months and sites."""
     source_roster_id = request.GET.get('id') or request.POST.get('source_roster_id')
     source_roster = None
     errors = {}
     values = {
         'new_month_date': request.POST.get('new_month_date', '').strip(),
+        'to_month_date': request.POST.get('to_month_date', '').strip(),
+        'target_sites': request.POST.getlist('target_sites'),
     }
-    
+
     # Get source roster from database
     if source_roster_id:
         try:
-            source_roster = ShiftRoster.objects.select_related('site').prefetch_related('assignments').get(
+            source_roster = ShiftRoster.objects.select_related('site').get(
                 pk=int(source_roster_id),
                 roster_type=ShiftRoster.ROSTER_TYPE_MONTH
             )
         except (ShiftRoster.DoesNotExist, ValueError, TypeError):
             messages.error(request, 'Source roster not found.')
             return redirect('master:shift_roster_month')
-    
+
     if not source_roster:
         messages.error(request, 'Please select a roster to copy.')
         return redirect('master:shift_roster_month')
-    
+
+    sites = get_reference_data('sites')
+    if not values['target_sites']:
+        values['target_sites'] = [str(source_roster.site_id)]
+
     if request.method == 'POST':
-        # Parse month input (format: YYYY-MM)
-        new_month_date = None
-        if values['new_month_date']:
+        # Parse month inputs (format: YYYY-MM); the end month is optional
+        months = []
+        try:
+            year, month = map(int, values['new_month_date'].split('-'))
+            first_month = date(year, month, 1)
+            last_month = first_month
+            if values['to_month_date']:
+                year, month = map(int, values['to_month_date'].split('-'))
+                last_month = date(year, month, 1)
+            months = month_range(first_month, last_month)
+        except ValueError:
+            errors['new_month_date'] = 'Please select a valid month.'
+
+        if not months and 'new_month_date' not in errors:
+            errors['to_month_date'] = 'End month cannot be before the start month.'
+        elif len(months) > ROSTER_COPY_MAX_MONTHS:
+            errors['to_month_date'] = f'You can copy to at most {ROSTER_COPY_MAX_MONTHS} months at a time.'
+
+        valid_site_ids = {str(site.id) for site in sites}
+        target_site_ids = [int(site_id) for site_id in dict.fromkeys(values['target_sites']) if site_id in valid_site_ids]
+        if not target_site_ids or len(target_site_ids) != len(set(values['target_sites'])):
+            errors['target_sites'] = 'Please select valid sites.'
+
+        if not errors:
+            # Check if a roster already exists for any target month and site
+            conflicts = existing_month_rosters(target_site_ids, source_roster.salary_type, months)
+            if conflicts:
+                errors['new_month_date'] = 'A roster already exists for {}. Please edit it instead.'.format(
+                    ', '.join(f'{roster.site.name} {roster.from_date:%B %Y}' for roster in conflicts)
+                )
+
+        if not errors:
             try:
-                # Parse YYYY-MM format from month input
-                year, month = map(int, values['new_month_date'].split('-'))
-                new_month_date = date(year, month, 1)
-            except (ValueError, AttributeError):
-                errors['new_month_date'] = 'Please select a valid month.'
-        
-        if not new_month_date:
-            if 'new_month_date' not in errors:
-                errors['new_month_date'] = 'Please select a month for the new roster.'
-        else:
-            # Check if roster already exists for this month and site
-            existing_roster = ShiftRoster.objects.filter(
-                site=source_roster.site,
-                salary_type=source_roster.salary_type,
-                roster_type=ShiftRoster.ROSTER_TYPE_MONTH,
-                from_date__year=new_month_date.year,
-                from_date__month=new_month_date.month
-            ).first()
-            
-            if existing_roster:
-                errors['new_month_date'] = f'A roster already exists for {new_month_date.strftime("%B %Y")}. Please edit it instead.'
-        
-        # Calculate new month end date
-        new_to_date = None
-        if new_month_date:
-            if new_month_date.month == 12:
-                new_to_date = date(new_month_date.year + 1, 1, 1) - timedelta(days=1)
+                copied = copy_month_roster(source_roster, months, target_site_ids)
+            except Exception as e:
+                messages.error(request, f'Error copying roster: {str(e)}')
             else:
-                new_to_date = date(new_month_date.year, new_month_date.month + 1, 1) - timedelta(days=1)
-        
-        # Create new roster and copy assignments
-        if not errors and new_month_date:
-            try:
-                # Create new ShiftRoster
-                new_roster = ShiftRoster.objects.create(
-                    site=source_roster.site,
-                    salary_type=source_roster.salary_type,
-                    from_date=new_month_date,
-                    to_date=new_to_date,
-                    roster_type=ShiftRoster.ROSTER_TYPE_MONTH,
-                    status=ShiftRoster.STATUS_DRAFT,
-                    description=f'Copied from {source_roster.from_date.strftime("%B %Y")}',
-                )
-                
-                # Copy all assignments with adjusted dates
-                # Strategy: Preserve day-of-month pattern (e.g., 15th Jan -> 15th Feb)
-                source_assignments = ShiftRosterAssignment.objects.filter(roster=source_roster).select_related('employee', 'site', 'shift')
-                assignments_copied = 0
-                
-                for source_assignment in source_assignments:
-                    # Calculate new date preserving day of month
-                    source_day = source_assignment.date.day
-                    source_month = source_assignment.date.month
-                    source_year = source_assignment.date.year
-                    
-                    # Calculate how many months to shift
-                    months_diff = (new_month_date.year - source_year) * 12 + (new_month_date.month - source_month)
-                    
-                    # Calculate target year and month
-                    target_year = new_month_date.year
-                    target_month = new_month_date.month
-                    
-                    # Handle day-of-month: if source day doesn't exist in target month (e.g., Feb 30), use last day
-                    try:
-                        new_assignment_date = date(target_year, target_month, source_day)
-                    except ValueError:
-                        # Day doesn't exist in target month (e.g., Jan 31 -> Feb 31)
-                        # Use last day of target month
-                        if target_month == 12:
-                            last_day = date(target_year + 1, 1, 1) - timedelta(days=1)
-                        else:
-                            last_day = date(target_year, target_month + 1, 1) - timedelta(days=1)
-                        new_assignment_date = last_day
-                    
-                    # Only copy if new date is within the new month range
-                    if new_assignment_date >= new_month_date and new_assignment_date <= new_to_date:
-                        ShiftRosterAssignment.objects.create(
-                            roster=new_roster,
-                            employee=source_assignment.employee,
-                            date=new_assignment_date,
-                            shift=source_assignment.shift,
-                            shift_name=source_assignment.shift_name,
-                            site=source_assignment.site,
-                            is_day_off=source_assignment.is_day_off,
-                        )
-                        assignments_copied += 1
-                
+                assignments_copied = sum(count for _, count in copied)
+                if len(copied) == 1:
+                    new_roster = copied[0][0]
+                    messages.success(
+                        request,
+                        f'Roster copied successfully! {assignments_copied} assignments copied to {new_roster.from_date.strftime("%B %Y")}.'
+                    )
+                    # Redirect to edit page for the new roster
+                    return redirect(f'{reverse("master:shift_roster_month_update")}?id={new_roster.id}')
                 messages.success(
                     request,
-                    f'Roster copied successfully! {assignments_copied} assignments copied to {new_month_date.strftime("%B %Y")}.'
+                    f'Roster copied successfully! {assignments_copied} assignments copied into {len(copied)} new rosters.'
                 )
-                # Redirect to edit page for the new roster
-                return redirect(f'{reverse("master:shift_roster_month_update")}?id={new_roster.id}')
-                
-            except Exception as e:
-                messages.error(request, f'Error copying roster: {str(e)}')
-    
+                return redirect('master:shift_roster_month')
+
     # Prepare context for copy form
     context = {
         'source_roster': source_roster,
+        'sites': sites,
+        'max_months': ROSTER_COPY_MAX_MONTHS,
         'values': values,
         'errors': errors,
     }
     return render(request, 'master/shift_roster/month_copy.html', context)
 
 
+@permission_required('master.add_shift', raise_exception=True)
+def shift_roster_generate(request):
+    """Generate month rosters for a group of employees from a rotation pattern, with a preview."""
+    values = {
+        'site_name': request.POST.get('site_name', '').strip(),
+        'salary_type': request.POST.get('salary_type', '').strip(),
+        'from_date': request.POST.get('from_date', '').strip(),
+        'to_date': request.POST.get('to_date', '').strip(),
+        'pattern': request.POST.get('pattern', '').strip(),
+        'stagger_days': request.POST.get('stagger_days', '').strip() or '0',
+        'skip_holidays': request.POST.get('skip_holidays') == 'on' if request.method == 'POST' else True,
+        'department': request.POST.get('department', '').strip(),
+        'designation': request.POST.get('designation', '').strip(),
+        'staff_ids': request.POST.get('staff_ids', '').strip(),
+    }
+    errors = {}
+    preview = None
+
+    sites = get_reference_data('sites')
+    sites_list = [{'value': str(site.id), 'label': site.name} for site in sites]
+
+    if request.method == 'POST':
+        site_instance = None
+        if not values['site_name']:
+            errors['site_name'] = 'Select a site to continue.'
+        else:
+            site_instance = next((site for site in sites if str(site.id) == values['site_name']), None)
+            if site_instance is None:
+                errors['site_name'] = 'Invalid site selected.'
+
+        if values['salary_type'] not in dict(ShiftRoster.SALARY_TYPE_CHOICES):
+            errors['salary_type'] = 'Choose a salary type.'
+
+        from_date_obj = _parse_date(values['from_date'])
+        to_date_obj = _parse_date(values['to_date'])
+        if not from_date_obj:
+            errors['from_date'] = 'Enter a valid start date.'
+        if not to_date_obj:
+            errors['to_date'] = 'Enter a valid end date.'
+        elif from_date_obj and to_date_obj < from_date_obj:
+            errors['to_date'] = 'End date cannot be before the start date.'
+        elif from_date_obj and (to_date_obj - from_date_obj).days >= PATTERN_MAX_PERIOD_DAYS:
+            errors['to_date'] = f'The period cannot be longer than {PATTERN_MAX_PERIOD_DAYS} days.'
+
+        segments = []
+        try:
+            segments = parse_pattern(values['pattern'])
+        except ValueError as e:
+            errors['pattern'] = str(e)
+
+        try:
+            stagger_days = int(values['stagger_days'])
+            if stagger_days < 0:
+                raise ValueError
+        except ValueError:
+            errors['stagger_days'] = 'Stagger must be zero or a positive number of days.'
+
+        staff_ids = [staff_id.strip() for staff_id in re.split(r'[,\s]+', values['staff_ids']) if staff_id.strip()]
+        employee_ids = []
+        if not errors:
+            employee_ids = pattern_employee_ids(values['department'], values['designation'], staff_ids)
+            if not employee_ids:
+                errors['employees'] = 'No employees match the selection.'
+            elif len(employee_ids) * ((to_date_obj - from_date_obj).days + 1) > PATTERN_MAX_CELLS:
+                errors['employees'] = 'Too many employees for this period. Generate it in smaller parts.'
+
+        if not errors:
+            plan = build_roster_plan(
+                segments, employee_ids, from_date_obj, to_date_obj, site_instance,
+                stagger_days=stagger_days, skip_holidays=values['skip_holidays'],
+            )
+            if request.POST.get('action') == 'generate':
+                try:
+                    rosters, result = save_roster_plan(plan, site_instance, values['salary_type'])
+                except Exception as e:
+                    messages.error(request, f'Error generating roster: {str(e)}')
+                else:
+                    messages.success(
+                        request,
+                        f'Roster generated for {len(employee_ids)} employees across {len(rosters)} month(s) '
+                        f'({result.summary()} assignments).'
+                    )
+                    return redirect('master:shift_roster_month')
+            else:
+                preview_ids = plan.employee_ids[:PATTERN_PREVIEW_EMPLOYEES]
+                preview_dates = plan.dates[:PATTERN_PREVIEW_DAYS]
+                names = dict(Employee.objects.filter(pk__in=preview_ids).values_list('id', 'staff_name'))
+                preview = {
+                    'dates': [{'date': day, 'is_holiday': day in plan.holidays} for day in preview_dates],
+                    'rows': [
+                        {'name': names.get(employee_id, ''), 'cells': [plan.cells[(employee_id, day)] for day in preview_dates]}
+                        for employee_id in preview_ids
+                    ],
+                    'employee_count': len(plan.employee_ids),
+                    'day_count': len(plan.dates),
+                    'cell_count': len(plan.cells),
+                    'holiday_count': len(plan.holidays),
+                    'shift_totals': sorted(plan.shift_totals().items()),
+                    'truncated': len(plan.employee_ids) > len(preview_ids) or len(plan.dates) > len(preview_dates),
+                }
+
+    employee_groups = Employee.objects.order_by()
+    context = {
+        'sites': sites_list,
+        'salary_types': ROSTER_SALARY_TYPES,
+        'departments': sorted(set(employee_groups.values_list('department', flat=True)) - {''}),
+        'designations': sorted(set(employee_groups.values_list('designation', flat=True)) - {''}),
+        'values': values,
+        'errors': errors,
+        'preview': preview,
+    }
+    return render(request, 'master/shift_roster/generate.html', context)
+
+
 @permission_required('master.add_shift', raise_exception=True)
 def shift_edit_form(request):
     shift_id = request.GET.get('id')
@@ -3429,7 +3076,7 @@ def employee_list(request):
     # For now, we'll show all employees
     
     # Get all companies, ordered by billing_name
-    companies = Company.objects.all().order_by('billing_name')
+    companies = get_reference_data('companies')
     
     context = {
         'employees': employees,
@@ -3442,21 +3089,20 @@ def employee_list(request):
 
 @permission_required('master.add_employee', raise_exception=True)
 def employee_create(request):
-    companies = Company.objects.all().order_by('billing_name')
-    last_employee = Employee.objects.order_by('-id').first()
-    last_staff_id = getattr(last_employee, 'staff_id', '') if last_employee else ''
+    companies = get_reference_data('companies')
+    # Shown as a hint only; the ID is allocated when the employee is saved with the field blank
+    next_id = next_staff_id()
     
     # Get active asset types for dropdown
-    from master.models import AssetType
-    asset_types = AssetType.objects.filter(is_active=True).order_by('name')
+    asset_types = get_reference_data('asset_types')
     
     # Get sites for branch dropdown
-    sites = Site.objects.all().order_by('name')
+    sites = get_reference_data('sites')
     
     context = {
         'companies': companies,
         'staff': None,
-        'last_staff_id': last_staff_id,
+        'next_staff_id': next_id,
         'asset_types': asset_types,
         'sites': sites,
     }
@@ -3470,7 +3116,7 @@ def employee_edit(request, pk):
         Employee.objects.select_related('company', 'account_info', 'vehicle_detail'),
         pk=pk
     )
-    companies = Company.objects.all().order_by('billing_name')
+    companies = get_reference_data('companies')
     
     # Get related data
     dependents = employee.dependents.all()
@@ -3479,11 +3125,10 @@ def employee_edit(request, pk):
     assets = employee.asset_assignments.all()
     
     # Get active asset types for dropdown
-    from master.models import AssetType
-    asset_types = AssetType.objects.filter(is_active=True).order_by('name')
+    asset_types = get_reference_data('asset_types')
     
     # Get sites for branch dropdown
-    sites = Site.objects.all().order_by('name')
+    sites = get_reference_data('sites')
     
     context = {
         'employee': employee,
@@ -3631,101 +3276,225 @@ def employee_delete(request, pk):
         return redirect('master:employee_list')
 
 
-@permission_required('master.view_employee', raise_exception=True)
-def employee_export_excel(request):
-    """Export employee list to Excel with filters."""
+# Employee export columns: (header, value fields, kind). Contact/email fall back to the office value.
+EMPLOYEE_EXPORT_COLUMNS = [
+    ('Staff ID', ('staff_id',), 'text'),
+    ('Staff Name', ('staff_name',), 'text'),
+    ('DOB', ('date_of_birth',), 'date'),
+    ('Gender', ('gender',), 'text'),
+    ('Designation', ('designation',), 'text'),
+    ('Department', ('department',), 'text'),
+    ('Work Location', ('work_location',), 'text'),
+    ('Company', ('company__billing_name',), 'text'),
+    ('Date of Join', ('date_of_join',), 'date'),
+    ('Contact', ('personal_contact', 'office_contact'), 'text'),
+    ('Email', ('personal_email', 'office_email'), 'text'),
+]
+EMPLOYEE_EXPORT_CHUNK_SIZE = 2000
+EXPORT_MAX_COLUMN_WIDTH = 50
+
+
+def _employee_export_queryset(request):
+    """Employees matching the list filters, as plain value dicts."""
     staff_status = request.GET.get('staff_status', '').strip()
     company_name = request.GET.get('company_name', '').strip()
-    
-    # Get all employees from Employee model
-    employees = Employee.objects.select_related('company').all()
-    
+
+    employees = Employee.objects.all()
+
     # Filter by company
     if company_name:
         try:
             employees = employees.filter(company_id=int(company_name))
         except (ValueError, TypeError):
             pass
-    
+
     # Filter by status (if implemented in future)
     # if staff_status and staff_status != '0':
     #     employees = employees.filter(...)
-    
-    # Create workbook and worksheet
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Employee List"
-    
+
+    value_fields = [field for _, fields, _ in EMPLOYEE_EXPORT_COLUMNS for field in fields]
+    return employees.order_by('staff_name', 'id').values(*value_fields)
+
+
+def _employee_export_rows(employees):
+    """Yield one list of cell values per employee (S.No first), streaming from the database."""
+    for serial_no, employee in enumerate(employees.iterator(chunk_size=EMPLOYEE_EXPORT_CHUNK_SIZE), 1):
+        row = [serial_no]
+        for _, fields, kind in EMPLOYEE_EXPORT_COLUMNS:
+            value = next((employee[field] for field in fields if employee[field]), None)
+            if kind == 'date':
+                value = value.strftime('%d-%m-%Y') if value else ''
+            row.append(value or '')
+        yield row
+
+
+def _employee_export_widths(employees):
+    """
+    Column widths for the export, computed by the database in a single aggregate
+    (write-only sheets need widths before the first row is written).
+    """
+    from django.db.models import Count, Max
+    from django.db.models.functions import Length
+
+    aggregates = {'row_count': Count('id')}
+    for _, fields, kind in EMPLOYEE_EXPORT_COLUMNS:
+        if kind == 'text':
+            for field in fields:
+                aggregates[f'{field}_len'] = Max(Length(field))
+    stats = employees.order_by().aggregate(**aggregates)
+
+    widths = [max(len('S.No'), len(str(stats['row_count'])))]
+    for header, fields, kind in EMPLOYEE_EXPORT_COLUMNS:
+        if kind == 'date':
+            data_width = len('dd-mm-yyyy')
+        else:
+            data_width = max(stats[f'{field}_len'] or 0 for field in fields)
+        widths.append(max(len(header), data_width))
+    return [min(width + 2, EXPORT_MAX_COLUMN_WIDTH) for width in widths]
+
+
+@permission_required('master.view_employee', raise_exception=True)
+def employee_export_excel(request):
+    """Export employee list to Excel with filters (streamed, constant memory)."""
+    import tempfile
+
+    from django.http import FileResponse
+    from openpyxl.cell import WriteOnlyCell
+
+    employees = _employee_export_queryset(request)
+
+    # Write-only workbook: rows are flushed to disk as they are appended
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Employee List")
+
+    for col_num, width in enumerate(_employee_export_widths(employees), 1):
+        ws.column_dimensions[get_column_letter(col_num)].width = width
+    # Set row height for header
+    ws.row_dimensions[1].height = 25
+
     # Header row styling
     header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
     header_font = Font(bold=True, color="FFFFFF", size=12)
     header_alignment = Alignment(horizontal="center", vertical="center")
-    
-    # Define headers
-    headers = [
-        'S.No', 'Staff ID', 'Staff Name', 'DOB', 'Gender', 
-        'Designation', 'Department', 'Work Location', 
-        'Company', 'Date of Join', 'Contact', 'Email'
-    ]
-    
-    # Write headers
-    for col_num, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col_num, value=header)
+
+    headers = ['S.No'] + [header for header, _, _ in EMPLOYEE_EXPORT_COLUMNS]
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
         cell.fill = header_fill
         cell.font = header_font
         cell.alignment = header_alignment
-    
-    # Write data rows
-    for row_num, employee in enumerate(employees, 2):
-        ws.cell(row=row_num, column=1, value=row_num - 1)  # S.No
-        ws.cell(row=row_num, column=2, value=employee.staff_id or '')
-        ws.cell(row=row_num, column=3, value=employee.staff_name or '')
-        ws.cell(row=row_num, column=4, value=employee.date_of_birth.strftime('%d-%m-%Y') if employee.date_of_birth else '')
-        ws.cell(row=row_num, column=5, value=employee.gender or '')
-        ws.cell(row=row_num, column=6, value=employee.designation or '')
-        ws.cell(row=row_num, column=7, value=employee.department or '')
-        ws.cell(row=row_num, column=8, value=employee.work_location or '')
-        ws.cell(row=row_num, column=9, value=employee.company.billing_name if employee.company else '')
-        ws.cell(row=row_num, column=10, value=employee.date_of_join.strftime('%d-%m-%Y') if employee.date_of_join else '')
-        ws.cell(row=row_num, column=11, value=employee.personal_contact or employee.office_contact or '')
-        ws.cell(row=row_num, column=12, value=employee.personal_email or employee.office_email or '')
-    
-    # Auto-adjust column widths
-    for col_num, header in enumerate(headers, 1):
-        column_letter = get_column_letter(col_num)
-        max_length = 0
-        # Check header length
-        max_length = max(max_length, len(str(header)))
-        # Check data length
-        for row in ws.iter_rows(min_row=2, max_row=ws.max_row, min_col=col_num, max_col=col_num):
-            for cell in row:
-                try:
-                    if cell.value:
-                        max_length = max(max_length, len(str(cell.value)))
-                except:
-                    pass
-        # Set column width with some padding
-        adjusted_width = min(max_length + 2, 50)
-        ws.column_dimensions[column_letter].width = adjusted_width
-    
-    # Set row height for header
-    ws.row_dimensions[1].height = 25
-    
-    # Create HTTP response with Excel content
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    
+        header_cells.append(cell)
+    ws.append(header_cells)
+
+    for row in _employee_export_rows(employees):
+        ws.append(row)
+
+    # Spool the finished file to disk and stream it back in chunks
+    output = tempfile.TemporaryFile()
+    wb.save(output)
+    output.seek(0)
+
     # Generate filename with timestamp
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename = f'employee_list_{timestamp}.xlsx'
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    # Save workbook to response
-    wb.save(response)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=f'employee_list_{timestamp}.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+
+
+class _Echo:
+    """File-like object whose write() returns the value, for streaming csv.writer output."""
+
+    def write(self, value):
+        return value
+
+
+@permission_required('master.view_employee', raise_exception=True)
+def employee_export_csv(request):
+    """Export employee list to CSV with filters, streamed row by row."""
+    import csv
+
+    from django.http import StreamingHttpResponse
+
+    employees = _employee_export_queryset(request)
+    writer = csv.writer(_Echo())
+    headers = ['S.No'] + [header for header, _, _ in EMPLOYEE_EXPORT_COLUMNS]
+
+    def stream():
+        yield writer.writerow(headers)
+        for row in _employee_export_rows(employees):
+            yield writer.writerow(row)
+
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    response = StreamingHttpResponse(stream(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="employee_list_{timestamp}.csv"'
     return response
 
 
+@permission_required('master.add_employee', raise_exception=True)
+def employee_import(request):
+    """Bulk import employees from an Excel/CSV file, with an optional dry run."""
+    from .employee_import import EMPLOYEE_IMPORT_COLUMNS, import_employees
+
+    if request.GET.get('template'):
+        # Blank CSV with the expected column headers
+        response = HttpResponse(','.join(EMPLOYEE_IMPORT_COLUMNS) + '\r\n', content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="employee_import_template.csv"'
+        return response
+
+    result = None
+    dry_run = True
+    skip_invalid = False
+
+    if request.method == 'POST':
+        upload = request.FILES.get('import_file')
+        dry_run = request.POST.get('dry_run') == 'on'
+        skip_invalid = request.POST.get('skip_invalid') == 'on'
+
+        if not upload:
+            messages.error(request, 'Please choose an .xlsx or .csv file to import.')
+        else:
+            try:
+                result = import_employees(upload, upload.name, dry_run=dry_run, skip_invalid=skip_invalid)
+            except ValueError as e:
+                messages.error(request, str(e))
+            except Exception as e:
+                messages.error(request, f'Could not read the file: {e}')
+            else:
+                if result.dry_run:
+                    messages.info(
+                        request,
+                        f'Dry run: {result.valid_rows} of {result.total_rows} row(s) are valid. Nothing was saved.'
+                    )
+                elif result.created:
+                    messages.success(request, f'{result.created} employee(s) imported successfully.')
+                else:
+                    messages.error(request, 'No employees were imported. Please fix the errors below.')
+
+    context = {
+        'result': result,
+        'dry_run': dry_run,
+        'skip_invalid': skip_invalid,
+        'import_columns': EMPLOYEE_IMPORT_COLUMNS,
+    }
+    return render(request, 'master/employee_creation/import.html', context)
+
+
+@login_required
+@require_http_methods(["GET"])
+def employee_autocomplete(request):
+    """API endpoint for employee dropdowns: prefix search on staff name / staff ID."""
+    try:
+        limit = int(request.GET.get('limit', EMPLOYEE_AUTOCOMPLETE_LIMIT))
+    except (TypeError, ValueError):
+        limit = EMPLOYEE_AUTOCOMPLETE_LIMIT
+    results = search_employees(request.GET.get('q', ''), limit)
+    return JsonResponse({'status': 1, 'results': results})
+
+
 def _clean_required(data, field, label, errors):
     value = data.get(field, '').strip()
     if not value:
@@ -4112,9 +3881,11 @@ def _clean_date(data, field, label, errors):
     return parsed
 
 
-def _validate_staff_details(data, unique_id):
+def _validate_staff_details(data, unique_id, existing_staff_ids=None, companies=None):
     """
     Validate Staff Details tab - all fields from Staff Details navigation page.
+    Bulk callers can pass preloaded existing_staff_ids (set) and companies
+    ({pk: Company}) to avoid per-row queries.
     Returns (errors dict, validated_data dict).
     """
     errors = {}
@@ -4122,15 +3893,20 @@ def _validate_staff_details(data, unique_id):
     
     # Personal Details
     staff_name = _clean_text_only(data, 'staff_name', 'Staff Name', errors)
-    staff_id = _clean_required(data, 'staff_id', 'Staff ID', errors)
+    # Optional: a blank Staff ID is issued from the staff ID sequence on save (see _issue_staff_id)
+    staff_id = data.get('staff_id', '').strip()
     
     if staff_id:
         # Check if staff_id already exists (excluding current employee if editing)
-        existing = Employee.objects.filter(staff_id=staff_id)
-        if unique_id:
-            existing = existing.exclude(unique_id=unique_id)
-        if existing.exists():
-            errors['staff_id'] = 'Staff ID already exists.'
+        if existing_staff_ids is not None:
+            if staff_id in existing_staff_ids:
+                errors['staff_id'] = 'Staff ID already exists.'
+        else:
+            existing = Employee.objects.filter(staff_id=staff_id)
+            if unique_id:
+                existing = existing.exclude(unique_id=unique_id)
+            if existing.exists():
+                errors['staff_id'] = 'Staff ID already exists.'
     
     gender = _clean_required(data, 'gender', 'Gender', errors)
     if gender and gender not in [choice[0] for choice in Employee.GENDER_CHOICES]:
@@ -4233,8 +4009,11 @@ def _validate_staff_details(data, unique_id):
         errors['company_name'] = 'Company selection is required.'
     else:
         try:
-            company = Company.objects.get(pk=int(company_id))
-        except (Company.DoesNotExist, ValueError, TypeError):
+            if companies is not None:
+                company = companies[int(company_id)]
+            else:
+                company = Company.objects.get(pk=int(company_id))
+        except (Company.DoesNotExist, KeyError, ValueError, TypeError):
             errors['company_name'] = 'Invalid company selected.'
     
     salary_category = _clean_required(data, 'salary_category', 'Salary Category', errors)
@@ -4588,6 +4367,18 @@ def _validate_asset_vehicle_details(data):
     return errors, validated_data
 
 
+def _issue_staff_id(staff_id: str, unique_id: str) -> str:
+    """
+    The posted Staff ID. When it was left blank, an existing employee keeps
+    theirs and a new one gets the next ID from the staff ID sequence.
+    """
+    if not staff_id:
+        current = Employee.objects.filter(unique_id=unique_id).values_list('staff_id', flat=True).first()
+        return current or allocate_staff_ids()[0]
+    claim_staff_ids([staff_id])
+    return staff_id
+
+
 @permission_required('master.add_employee', raise_exception=True)
 @require_POST
 def employee_staff_save(request):
@@ -4879,227 +4670,217 @@ def employee_staff_save(request):
     if all_errors:
         return JsonResponse({'status': 0, 'errors': all_errors, 'msg': 'Validation failed. Please check all fields.'}, status=400)
     
-    # Create or update Employee
+    # Create or update Employee and its child collections in one transaction
     try:
-        employee, created = Employee.objects.update_or_create(
-            unique_id=unique_id,
-            defaults={
-                'staff_name': validated_data['staff_name'],
-                'staff_id': validated_data['staff_id'],
-                'gender': validated_data['gender'],
-                'father_name': validated_data['father_name'],
-                'date_of_birth': validated_data['date_of_birth'],
-                'document_date_of_birth': validated_data['document_date_of_birth'],
-                'age': validated_data['age'],
-                'marital_status': validated_data['marital_status'],
-                'personal_contact': validated_data['personal_contact'],
-                'office_contact': validated_data['office_contact'],
-                'personal_email': validated_data['personal_email'],
-                'office_email': validated_data['office_email'],
-                'aadhar_no': validated_data['aadhar_no'],
-                'pan_no': validated_data['pan_no'],
-                'medical_claim': validated_data['medical_claim'],
-                'blood_group': validated_data['blood_group'],
-                'qualification': validated_data['qualification'],
-                'present_country': validated_data['present_country'],
-                'present_state': validated_data['present_state'],
-                'present_city': validated_data['present_city'],
-                'present_building': validated_data['present_building'],
-                'present_street': validated_data['present_street'],
-                'present_area': validated_data['present_area'],
-                'present_pincode': validated_data['present_pincode'],
-                'permanent_country': validated_data['permanent_country'],
-                'permanent_state': validated_data['permanent_state'],
-                'permanent_city': validated_data['permanent_city'],
-                'permanent_building': validated_data['permanent_building'],
-                'permanent_street': validated_data['permanent_street'],
-                'permanent_area': validated_data['permanent_area'],
-                'permanent_pincode': validated_data['permanent_pincode'],
-                'date_of_join': validated_data['date_of_join'],
-                'designation': validated_data['designation'],
-                'department': validated_data['department'],
-                'work_location': validated_data['work_location'],
-                'esi_no': validated_data['esi_no'],
-                'pf_no': validated_data['pf_no'],
-                'biometric_id': validated_data['biometric_id'],
-                'company': validated_data['company'],
-                'salary_category': validated_data['salary_category'],
-                'premises_type': validated_data['premises_type'],
-                'branch': validated_data['branch'],
-                'attendance_setting': validated_data['attendance_setting'],
-                'reporting_officer': validated_data['reporting_officer'],
-            }
-        )
-        
-        # Profile image is required, so it should always be present after validation
-        profile_image = request.FILES.get('profile_image')
-        if profile_image:
-            employee.profile_image = profile_image
-            employee.save()
-        
-        # ========== DEPENDENT DETAILS ==========
-        # Delete existing dependents for this employee (if editing)
-        EmployeeDependent.objects.filter(employee=employee).delete()
-        
-        # Save multiple dependents
-        index = 0
-        while f'dependents[{index}][relationship]' in data:
-            dep_data = {
-                'relationship': data.get(f'dependents[{index}][relationship]', '').strip(),
-                'name': data.get(f'dependents[{index}][rel_name]', '').strip(),
-                'gender': data.get(f'dependents[{index}][rel_gender]', '').strip(),
-                'date_of_birth': _parse_date(data.get(f'dependents[{index}][rel_date_of_birth]', '').strip()),
-                'aadhar_no': data.get(f'dependents[{index}][rel_aadhar_no]', '').strip().replace(' ', ''),
-                'occupation': data.get(f'dependents[{index}][occupation]', '').strip(),
-                'standard': data.get(f'dependents[{index}][standard]', '').strip(),
-                'school': data.get(f'dependents[{index}][school]', '').strip(),
-                'existing_illness': data.get(f'dependents[{index}][existing_illness]', '').strip(),
-                'description': data.get(f'dependents[{index}][description]', '').strip(),
-                'existing_insurance': data.get(f'dependents[{index}][existing_insurance]', '').strip(),
-                'insurance_no': data.get(f'dependents[{index}][insurance_no]', '').strip(),
-                'physically_challenged': data.get(f'dependents[{index}][physically_challenged]', '').strip(),
-                'remarks': data.get(f'dependents[{index}][remarks]', '').strip(),
-            }
-            if dep_data['relationship']:  # Only save if relationship is provided
-                EmployeeDependent.objects.create(employee=employee, **dep_data)
-            index += 1
-        
-        # ========== ACCOUNT DETAILS ==========
-        # Delete existing accounts for this employee (if editing)
-        EmployeeAccountInfo.objects.filter(employee=employee).delete()
-        
-        # Save multiple accounts (though typically one per employee)
-        index = 0
-        while f'accounts[{index}][bank_status]' in data:
-            acc_data = {
-                'bank_status': data.get(f'accounts[{index}][bank_status]', '').strip(),
-                'salary_type': data.get(f'accounts[{index}][salary_type]', '').strip(),
-                'accountant_name': data.get(f'accounts[{index}][accountant_name]', '').strip(),
-                'account_no': data.get(f'accounts[{index}][account_no]', '').strip(),
-                'bank_name': data.get(f'accounts[{index}][bank_name]', '').strip(),
-                'ifsc_code': data.get(f'accounts[{index}][ifsc_code]', '').strip().upper(),
-                'contact_no': data.get(f'accounts[{index}][bank_contact_no]', '').strip(),
-                'bank_address': data.get(f'accounts[{index}][bank_address]', '').strip(),
-            }
-            if acc_data['bank_status']:  # Only save if bank_status is provided
-                EmployeeAccountInfo.objects.create(employee=employee, **acc_data)
-            index += 1
-        
-        # ========== QUALIFICATION DETAILS ==========
-        # Delete existing qualifications for this employee (if editing)
-        EmployeeQualification.objects.filter(employee=employee).delete()
-        
-        # Save multiple qualifications
-        index = 0
-        while f'qualifications[{index}][education_type]' in data:
-            qual_data = {
-                'education_type': data.get(f'qualifications[{index}][education_type]', '').strip(),
-                'degree': data.get(f'qualifications[{index}][degree]', '').strip(),
-                'college_name': data.get(f'qualifications[{index}][college_name]', '').strip(),
-                'year_of_passing': data.get(f'qualifications[{index}][year_passing]', '').strip(),
-                'percentage': data.get(f'qualifications[{index}][percentage]', '').strip(),
-                'university': data.get(f'qualifications[{index}][university]', '').strip(),
-            }
-            # Handle file upload
-            qual_file = request.FILES.get(f'qualifications[{index}][qualification_docs]')
-            if qual_data['education_type']:  # Only save if education_type is provided
-                EmployeeQualification.objects.create(
-                    employee=employee,
-                    documents=qual_file,
-                    **qual_data
-                )
-            index += 1
-        
-        # ========== EXPERIENCE DETAILS ==========
-        # Delete existing experiences for this employee (if editing)
-        EmployeeExperience.objects.filter(employee=employee).delete()
-        
-        # Save multiple experiences
-        index = 0
-        while f'experiences[{index}][exp_company_name]' in data:
-            exp_data = {
-                'company_name': data.get(f'experiences[{index}][exp_company_name]', '').strip(),
-                'designation': data.get(f'experiences[{index}][designation_name]', '').strip(),
-                'salary': data.get(f'experiences[{index}][salary_amt]', '').strip(),
-                'joining_month': data.get(f'experiences[{index}][join_month]', '').strip(),
-                'relieving_month': data.get(f'experiences[{index}][relieve_month]', '').strip(),
-                'experience_years': data.get(f'experiences[{index}][exp]', '').strip(),
-            }
-            # Handle file upload
-            exp_file = request.FILES.get(f'experiences[{index}][experience_docs]')
-            if exp_data['company_name']:  # Only save if company_name is provided
-                EmployeeExperience.objects.create(
-                    employee=employee,
-                    documents=exp_file,
-                    **exp_data
-                )
-            index += 1
+        with transaction.atomic():
+            validated_data['staff_id'] = _issue_staff_id(validated_data['staff_id'], unique_id)
+            employee, created = Employee.objects.update_or_create(
+                unique_id=unique_id,
+                defaults={
+                    'staff_name': validated_data['staff_name'],
+                    'staff_id': validated_data['staff_id'],
+                    'gender': validated_data['gender'],
+                    'father_name': validated_data['father_name'],
+                    'date_of_birth': validated_data['date_of_birth'],
+                    'document_date_of_birth': validated_data['document_date_of_birth'],
+                    'age': validated_data['age'],
+                    'marital_status': validated_data['marital_status'],
+                    'personal_contact': validated_data['personal_contact'],
+                    'office_contact': validated_data['office_contact'],
+                    'personal_email': validated_data['personal_email'],
+                    'office_email': validated_data['office_email'],
+                    'aadhar_no': validated_data['aadhar_no'],
+                    'pan_no': validated_data['pan_no'],
+                    'medical_claim': validated_data['medical_claim'],
+                    'blood_group': validated_data['blood_group'],
+                    'qualification': validated_data['qualification'],
+                    'present_country': validated_data['present_country'],
+                    'present_state': validated_data['present_state'],
+                    'present_city': validated_data['present_city'],
+                    'present_building': validated_data['present_building'],
+                    'present_street': validated_data['present_street'],
+                    'present_area': validated_data['present_area'],
+                    'present_pincode': validated_data['present_pincode'],
+                    'permanent_country': validated_data['permanent_country'],
+                    'permanent_state': validated_data['permanent_state'],
+                    'permanent_city': validated_data['permanent_city'],
+                    'permanent_building': validated_data['permanent_building'],
+                    'permanent_street': validated_data['permanent_street'],
+                    'permanent_area': validated_data['permanent_area'],
+                    'permanent_pincode': validated_data['permanent_pincode'],
+                    'date_of_join': validated_data['date_of_join'],
+                    'designation': validated_data['designation'],
+                    'department': validated_data['department'],
+                    'work_location': validated_data['work_location'],
+                    'esi_no': validated_data['esi_no'],
+                    'pf_no': validated_data['pf_no'],
+                    'biometric_id': validated_data['biometric_id'],
+                    'company': validated_data['company'],
+                    'salary_category': validated_data['salary_category'],
+                    'premises_type': validated_data['premises_type'],
+                    'branch': validated_data['branch'],
+                    'attendance_setting': validated_data['attendance_setting'],
+                    'reporting_officer': validated_data['reporting_officer'],
+                }
+            )
         
-        # ========== ASSET/VEHICLE DETAILS ==========
-        # Delete existing assets for this employee (if editing)
-        EmployeeAssetAssignment.objects.filter(employee=employee).delete()
+            # Profile image is required, so it should always be present after validation
+            profile_image = request.FILES.get('profile_image')
+            if profile_image:
+                employee.profile_image = profile_image
+                employee.save()
         
-        # Save multiple assets
-        index = 0
-        while f'assets[{index}][asset_name]' in data:
-            asset_data = {
-                'asset_name': data.get(f'assets[{index}][asset_name]', '').strip(),
-                'serial_no': data.get(f'assets[{index}][item_no]', '').strip(),
-                'quantity': int(data.get(f'assets[{index}][qty]', '1').strip() or '1'),
-                'status': data.get(f'assets[{index}][status]', EmployeeAssetAssignment.STATUS_ISSUED).strip(),
-                'vehicle_reg_no': data.get(f'assets[{index}][veh_reg_no]', '').strip(),
-                'license_mode': data.get(f'assets[{index}][license_mode]', '').strip(),
-                'license_no': data.get(f'assets[{index}][dri_license_no]', '').strip(),
-                'license_valid_from': _parse_date(data.get(f'assets[{index}][valid_from]', '').strip()),
-                'license_valid_to': _parse_date(data.get(f'assets[{index}][valid_to]', '').strip()),
-            }
-            if asset_data['asset_name']:  # Only save if asset_name is provided
-                EmployeeAssetAssignment.objects.create(employee=employee, **asset_data)
-            index += 1
-        
-        # Vehicle Details (OneToOne relationship) - Get from last asset or validated_data
-        vehicle_data = {}
-        if has_assets_array:
-            # Get vehicle details from last asset in array
+            # ========== CHILD COLLECTIONS ==========
+            # Rows are matched to existing records by their posted id (or a natural key)
+            # and diffed, so unchanged rows keep their primary keys and uploaded documents.
+            dependent_rows = []
+            index = 0
+            while f'dependents[{index}][relationship]' in data:
+                dep_data = {
+                    'id': data.get(f'dependents[{index}][dependent_id]'),
+                    'relationship': data.get(f'dependents[{index}][relationship]', '').strip(),
+                    'name': data.get(f'dependents[{index}][rel_name]', '').strip(),
+                    'gender': data.get(f'dependents[{index}][rel_gender]', '').strip(),
+                    'date_of_birth': _parse_date(data.get(f'dependents[{index}][rel_date_of_birth]', '').strip()),
+                    'aadhar_no': data.get(f'dependents[{index}][rel_aadhar_no]', '').strip().replace(' ', ''),
+                    'occupation': data.get(f'dependents[{index}][occupation]', '').strip(),
+                    'standard': data.get(f'dependents[{index}][standard]', '').strip(),
+                    'school': data.get(f'dependents[{index}][school]', '').strip(),
+                    'existing_illness': data.get(f'dependents[{index}][existing_illness]', '').strip(),
+                    'description': data.get(f'dependents[{index}][description]', '').strip(),
+                    'existing_insurance': data.get(f'dependents[{index}][existing_insurance]', '').strip(),
+                    'insurance_no': data.get(f'dependents[{index}][insurance_no]', '').strip(),
+                    'physically_challenged': data.get(f'dependents[{index}][physically_challenged]', '').strip(),
+                    'remarks': data.get(f'dependents[{index}][remarks]', '').strip(),
+                }
+                if dep_data['relationship']:  # Only save if relationship is provided
+                    dependent_rows.append(dep_data)
+                index += 1
+
+            # One account per employee (OneToOne) - the first filled row wins
+            account_rows = []
+            index = 0
+            while f'accounts[{index}][bank_status]' in data:
+                acc_data = {
+                    'id': data.get(f'accounts[{index}][account_id]'),
+                    'bank_status': data.get(f'accounts[{index}][bank_status]', '').strip(),
+                    'salary_type': data.get(f'accounts[{index}][salary_type]', '').strip(),
+                    'accountant_name': data.get(f'accounts[{index}][accountant_name]', '').strip(),
+                    'account_no': data.get(f'accounts[{index}][account_no]', '').strip(),
+                    'bank_name': data.get(f'accounts[{index}][bank_name]', '').strip(),
+                    'ifsc_code': data.get(f'accounts[{index}][ifsc_code]', '').strip().upper(),
+                    'contact_no': data.get(f'accounts[{index}][bank_contact_no]', '').strip(),
+                    'bank_address': data.get(f'accounts[{index}][bank_address]', '').strip(),
+                }
+                if acc_data['bank_status'] and not account_rows:  # Only save if bank_status is provided
+                    account_rows.append(acc_data)
+                index += 1
+
+            qualification_rows = []
+            index = 0
+            while f'qualifications[{index}][education_type]' in data:
+                qual_data = {
+                    'id': data.get(f'qualifications[{index}][qualification_id]'),
+                    'education_type': data.get(f'qualifications[{index}][education_type]', '').strip(),
+                    'degree': data.get(f'qualifications[{index}][degree]', '').strip(),
+                    'college_name': data.get(f'qualifications[{index}][college_name]', '').strip(),
+                    'year_of_passing': data.get(f'qualifications[{index}][year_passing]', '').strip(),
+                    'percentage': data.get(f'qualifications[{index}][percentage]', '').strip(),
+                    'university': data.get(f'qualifications[{index}][university]', '').strip(),
+                    'documents': request.FILES.get(f'qualifications[{index}][qualification_docs]'),
+                }
+                if qual_data['education_type']:  # Only save if education_type is provided
+                    qualification_rows.append(qual_data)
+                index += 1
+
+            experience_rows = []
+            index = 0
+            while f'experiences[{index}][exp_company_name]' in data:
+                exp_data = {
+                    'id': data.get(f'experiences[{index}][experience_id]'),
+                    'company_name': data.get(f'experiences[{index}][exp_company_name]', '').strip(),
+                    'designation': data.get(f'experiences[{index}][designation_name]', '').strip(),
+                    'salary': data.get(f'experiences[{index}][salary_amt]', '').strip(),
+                    'joining_month': data.get(f'experiences[{index}][join_month]', '').strip(),
+                    'relieving_month': data.get(f'experiences[{index}][relieve_month]', '').strip(),
+                    'experience_years': data.get(f'experiences[{index}][exp]', '').strip(),
+                    'documents': request.FILES.get(f'experiences[{index}][experience_docs]'),
+                }
+                if exp_data['company_name']:  # Only save if company_name is provided
+                    experience_rows.append(exp_data)
+                index += 1
+
+            asset_rows = []
             index = 0
-            last_index = -1
             while f'assets[{index}][asset_name]' in data:
-                last_index = index
+                asset_data = {
+                    'id': data.get(f'assets[{index}][asset_id]'),
+                    'asset_name': data.get(f'assets[{index}][asset_name]', '').strip(),
+                    'serial_no': data.get(f'assets[{index}][item_no]', '').strip(),
+                    'quantity': int(data.get(f'assets[{index}][qty]', '1').strip() or '1'),
+                    'status': data.get(f'assets[{index}][status]', EmployeeAssetAssignment.STATUS_ISSUED).strip(),
+                    'vehicle_reg_no': data.get(f'assets[{index}][veh_reg_no]', '').strip(),
+                    'license_mode': data.get(f'assets[{index}][license_mode]', '').strip(),
+                    'license_no': data.get(f'assets[{index}][dri_license_no]', '').strip(),
+                    'license_valid_from': _parse_date(data.get(f'assets[{index}][valid_from]', '').strip()),
+                    'license_valid_to': _parse_date(data.get(f'assets[{index}][valid_to]', '').strip()),
+                }
+                if asset_data['asset_name']:  # Only save if asset_name is provided
+                    asset_rows.append(asset_data)
                 index += 1
-            if last_index >= 0:
+
+            sync_child_rows(EmployeeDependent, employee, dependent_rows, key_fields=('relationship', 'name'))
+            sync_child_rows(EmployeeAccountInfo, employee, account_rows)
+            sync_child_rows(EmployeeQualification, employee, qualification_rows,
+                            key_fields=('education_type', 'degree'), file_fields=('documents',))
+            sync_child_rows(EmployeeExperience, employee, experience_rows,
+                            key_fields=('company_name', 'joining_month'), file_fields=('documents',))
+            sync_child_rows(EmployeeAssetAssignment, employee, asset_rows, key_fields=('asset_name', 'serial_no'),
+                            before_create=assign_asset_ids)
+
+            # Vehicle Details (OneToOne relationship) - Get from last asset or validated_data
+            vehicle_data = {}
+            if has_assets_array:
+                # Get vehicle details from last asset in array
+                index = 0
+                last_index = -1
+                while f'assets[{index}][asset_name]' in data:
+                    last_index = index
+                    index += 1
+                if last_index >= 0:
+                    vehicle_data = {
+                        'vehicle_type': data.get(f'assets[{last_index}][vehicle_type]', '').strip(),
+                        'vehicle_company': data.get(f'assets[{last_index}][vehicle_company]', '').strip(),
+                        'vehicle_owner': data.get(f'assets[{last_index}][vehicle_owner]', '').strip(),
+                        'registration_year': _parse_date(data.get(f'assets[{last_index}][registration_year]', '').strip()),
+                        'rc_no': data.get(f'assets[{last_index}][rc_no]', '').strip(),
+                        'rc_validity_from': _parse_date(data.get(f'assets[{last_index}][rc_validity_from]', '').strip()),
+                        'rc_validity_to': _parse_date(data.get(f'assets[{last_index}][rc_validity_to]', '').strip()),
+                        'insurance_no': data.get(f'assets[{last_index}][ins_no]', '').strip(),
+                        'insurance_validity_from': _parse_date(data.get(f'assets[{last_index}][ins_validity_from]', '').strip()),
+                        'insurance_validity_to': _parse_date(data.get(f'assets[{last_index}][ins_validity_to]', '').strip()),
+                    }
+            else:
+                # Get from validated_data (single record)
                 vehicle_data = {
-                    'vehicle_type': data.get(f'assets[{last_index}][vehicle_type]', '').strip(),
-                    'vehicle_company': data.get(f'assets[{last_index}][vehicle_company]', '').strip(),
-                    'vehicle_owner': data.get(f'assets[{last_index}][vehicle_owner]', '').strip(),
-                    'registration_year': _parse_date(data.get(f'assets[{last_index}][registration_year]', '').strip()),
-                    'rc_no': data.get(f'assets[{last_index}][rc_no]', '').strip(),
-                    'rc_validity_from': _parse_date(data.get(f'assets[{last_index}][rc_validity_from]', '').strip()),
-                    'rc_validity_to': _parse_date(data.get(f'assets[{last_index}][rc_validity_to]', '').strip()),
-                    'insurance_no': data.get(f'assets[{last_index}][ins_no]', '').strip(),
-                    'insurance_validity_from': _parse_date(data.get(f'assets[{last_index}][ins_validity_from]', '').strip()),
-                    'insurance_validity_to': _parse_date(data.get(f'assets[{last_index}][ins_validity_to]', '').strip()),
+                    'vehicle_type': validated_data.get('vehicle_type', ''),
+                    'vehicle_company': validated_data.get('vehicle_company', ''),
+                    'vehicle_owner': validated_data.get('vehicle_owner', ''),
+                    'registration_year': validated_data.get('registration_year'),
+                    'rc_no': validated_data.get('rc_no', ''),
+                    'rc_validity_from': validated_data.get('rc_validity_from'),
+                    'rc_validity_to': validated_data.get('rc_validity_to'),
+                    'insurance_no': validated_data.get('ins_no', ''),
+                    'insurance_validity_from': validated_data.get('ins_validity_from'),
+                    'insurance_validity_to': validated_data.get('ins_validity_to'),
                 }
-        else:
-            # Get from validated_data (single record)
-            vehicle_data = {
-                'vehicle_type': validated_data.get('vehicle_type', ''),
-                'vehicle_company': validated_data.get('vehicle_company', ''),
-                'vehicle_owner': validated_data.get('vehicle_owner', ''),
-                'registration_year': validated_data.get('registration_year'),
-                'rc_no': validated_data.get('rc_no', ''),
-                'rc_validity_from': validated_data.get('rc_validity_from'),
-                'rc_validity_to': validated_data.get('rc_validity_to'),
-                'insurance_no': validated_data.get('ins_no', ''),
-                'insurance_validity_from': validated_data.get('ins_validity_from'),
-                'insurance_validity_to': validated_data.get('ins_validity_to'),
-            }
         
-        # Only save vehicle details if at least vehicle_type is provided
-        if vehicle_data.get('vehicle_type'):
-            EmployeeVehicleDetail.objects.update_or_create(
-                employee=employee,
-                defaults=vehicle_data
-            )
+            # Only save vehicle details if at least vehicle_type is provided
+            if vehicle_data.get('vehicle_type'):
+                EmployeeVehicleDetail.objects.update_or_create(
+                    employee=employee,
+                    defaults=vehicle_data
+                )
         
         action = 'created' if created else 'updated'
         return JsonResponse({
@@ -5107,6 +4888,7 @@ def employee_staff_save(request):
             'msg': f'Employee {action} successfully.',
             'unique_id': employee.unique_id,
             'employee_id': employee.id,
+            'staff_id': employee.staff_id,
         })
         
     except Exception as e:
@@ -5149,55 +4931,57 @@ def employee_staff_details_save(request):
     
     # Create or update Employee
     try:
-        employee, created = Employee.objects.update_or_create(
-            unique_id=unique_id,
-            defaults={
-                'staff_name': staff_data['staff_name'],
-                'staff_id': staff_data['staff_id'],
-                'gender': staff_data['gender'],
-                'father_name': staff_data['father_name'],
-                'date_of_birth': staff_data['date_of_birth'],
-                'document_date_of_birth': staff_data['document_date_of_birth'],
-                'age': staff_data['age'],
-                'marital_status': staff_data['marital_status'],
-                'personal_contact': staff_data['personal_contact'],
-                'office_contact': staff_data['office_contact'],
-                'personal_email': staff_data['personal_email'],
-                'office_email': staff_data['office_email'],
-                'aadhar_no': staff_data['aadhar_no'],
-                'pan_no': staff_data['pan_no'],
-                'medical_claim': staff_data['medical_claim'],
-                'blood_group': staff_data['blood_group'],
-                'qualification': staff_data['qualification'],
-                'present_country': staff_data['present_country'],
-                'present_state': staff_data['present_state'],
-                'present_city': staff_data['present_city'],
-                'present_building': staff_data['present_building'],
-                'present_street': staff_data['present_street'],
-                'present_area': staff_data['present_area'],
-                'present_pincode': staff_data['present_pincode'],
-                'permanent_country': staff_data['permanent_country'],
-                'permanent_state': staff_data['permanent_state'],
-                'permanent_city': staff_data['permanent_city'],
-                'permanent_building': staff_data['permanent_building'],
-                'permanent_street': staff_data['permanent_street'],
-                'permanent_area': staff_data['permanent_area'],
-                'permanent_pincode': staff_data['permanent_pincode'],
-                'date_of_join': staff_data['date_of_join'],
-                'designation': staff_data['designation'],
-                'department': staff_data['department'],
-                'work_location': staff_data['work_location'],
-                'esi_no': staff_data['esi_no'],
-                'pf_no': staff_data['pf_no'],
-                'biometric_id': staff_data['biometric_id'],
-                'company': staff_data['company'],
-                'salary_category': staff_data['salary_category'],
-                'premises_type': staff_data['premises_type'],
-                'branch': staff_data['branch'],
-                'attendance_setting': staff_data['attendance_setting'],
-                'reporting_officer': staff_data['reporting_officer'],
-            }
-        )
+        with transaction.atomic():
+            staff_data['staff_id'] = _issue_staff_id(staff_data['staff_id'], unique_id)
+            employee, created = Employee.objects.update_or_create(
+                unique_id=unique_id,
+                defaults={
+                    'staff_name': staff_data['staff_name'],
+                    'staff_id': staff_data['staff_id'],
+                    'gender': staff_data['gender'],
+                    'father_name': staff_data['father_name'],
+                    'date_of_birth': staff_data['date_of_birth'],
+                    'document_date_of_birth': staff_data['document_date_of_birth'],
+                    'age': staff_data['age'],
+                    'marital_status': staff_data['marital_status'],
+                    'personal_contact': staff_data['personal_contact'],
+                    'office_contact': staff_data['office_contact'],
+                    'personal_email': staff_data['personal_email'],
+                    'office_email': staff_data['office_email'],
+                    'aadhar_no': staff_data['aadhar_no'],
+                    'pan_no': staff_data['pan_no'],
+                    'medical_claim': staff_data['medical_claim'],
+                    'blood_group': staff_data['blood_group'],
+                    'qualification': staff_data['qualification'],
+                    'present_country': staff_data['present_country'],
+                    'present_state': staff_data['present_state'],
+                    'present_city': staff_data['present_city'],
+                    'present_building': staff_data['present_building'],
+                    'present_street': staff_data['present_street'],
+                    'present_area': staff_data['present_area'],
+                    'present_pincode': staff_data['present_pincode'],
+                    'permanent_country': staff_data['permanent_country'],
+                    'permanent_state': staff_data['permanent_state'],
+                    'permanent_city': staff_data['permanent_city'],
+                    'permanent_building': staff_data['permanent_building'],
+                    'permanent_street': staff_data['permanent_street'],
+                    'permanent_area': staff_data['permanent_area'],
+                    'permanent_pincode': staff_data['permanent_pincode'],
+                    'date_of_join': staff_data['date_of_join'],
+                    'designation': staff_data['designation'],
+                    'department': staff_data['department'],
+                    'work_location': staff_data['work_location'],
+                    'esi_no': staff_data['esi_no'],
+                    'pf_no': staff_data['pf_no'],
+                    'biometric_id': staff_data['biometric_id'],
+                    'company': staff_data['company'],
+                    'salary_category': staff_data['salary_category'],
+                    'premises_type': staff_data['premises_type'],
+                    'branch': staff_data['branch'],
+                    'attendance_setting': staff_data['attendance_setting'],
+                    'reporting_officer': staff_data['reporting_officer'],
+                }
+            )
         
         # Handle profile image
         profile_image = request.FILES.get('profile_image')
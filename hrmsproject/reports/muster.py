@@ -0,0 +1,227 @@
+"""
+Monthly attendance muster: an employee x day status matrix for one site.
+
+The matrix is a single bytearray (one status byte per employee-day, row
+per employee) built from one bulk query per source and painted in order of
+precedence, each layer overriding the ones before it:
+
+1. Every day is absent once it has passed (not yet due before that), and
+   weekly off days (settings.WEEKLY_OFF_DAYS) are week offs.
+2. Roster: a rostered day off is a week off, a rostered shift is a working
+   day. When rosters overlap, a week roster beats a month roster, then the
+   latest update wins (as in entry.schedule).
+3. HR-approved leave, except on week offs. A forenoon/afternoon leave is
+   a half day on its first day.
+4. Site holidays (a whole column at once).
+5. Manual attendance (typed or imported from biometric punches).
+
+Per-employee totals are reductions over the employee's row
+(bytearray.count), so a 2,000-employee month costs a few hundred thousand
+byte operations on top of the queries. Approved permission hours are summed
+in the database.
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db.models import Sum
+
+from entry.models import LeaveEntry, ManualEntry, PermissionEntry
+from master.holidays import site_holiday_dates
+from master.models import Employee, ShiftRoster, ShiftRosterAssignment
+
+MUSTER_PRESENT = ord('P')
+MUSTER_ABSENT = ord('A')
+MUSTER_LEAVE = ord('L')
+MUSTER_HOLIDAY = ord('H')
+MUSTER_WEEK_OFF = ord('W')
+MUSTER_HALF_DAY = ord('D')        # half present, half loss of pay
+MUSTER_HALF_DAY_LEAVE = ord('E')  # half present, half leave
+MUSTER_HALF_LEAVE = ord('F')      # half leave, half loss of pay
+MUSTER_NOT_DUE = ord('-')
+
+MUSTER_LABELS = {
+    MUSTER_PRESENT: 'P',
+    MUSTER_ABSENT: 'A',
+    MUSTER_LEAVE: 'L',
+    MUSTER_HOLIDAY: 'H',
+    MUSTER_WEEK_OFF: 'WO',
+    MUSTER_HALF_DAY: 'HD',
+    MUSTER_HALF_DAY_LEAVE: 'HD/L',
+    MUSTER_HALF_LEAVE: 'HL',
+    MUSTER_NOT_DUE: '',
+}
+
+MUSTER_ATTENDANCE_CODES = {
+    ManualEntry.ATTENDANCE_TYPE_PRESENT: MUSTER_PRESENT,
+    ManualEntry.ATTENDANCE_TYPE_ABSENT: MUSTER_ABSENT,
+    ManualEntry.ATTENDANCE_TYPE_LEAVE: MUSTER_LEAVE,
+    ManualEntry.ATTENDANCE_TYPE_HALF_DAY: MUSTER_HALF_DAY,
+}
+
+MUSTER_TOTAL_HEADERS = [
+    'Monthly Days', 'Working Days', 'Present', 'Week Off', 'Holiday', 'Leave', 'LOP Days', 'Permission Hrs', 'Total',
+]
+
+
+@dataclass
+class MusterTotals:
+    month_days: int
+    working_days: int
+    present: float
+    week_off: int
+    holiday: int
+    leave: float
+    lop: float
+    permission_hours: float
+    total: float
+
+    def as_list(self) -> list:
+        return [
+            self.month_days, self.working_days, self.present, self.week_off, self.holiday,
+            self.leave, self.lop, self.permission_hours, self.total,
+        ]
+
+
+@dataclass
+class MusterRow:
+    employee: dict
+    cells: list
+    totals: MusterTotals
+
+
+class Muster:
+    """The status matrix of one site and month (see build_muster)."""
+
+    def __init__(self, site, dates, employees, statuses, permission_hours):
+        self.site = site
+        self.dates = dates
+        self.employees = employees
+        self.statuses = statuses
+        self.permission_hours = permission_hours
+
+    def __len__(self):
+        return len(self.employees)
+
+    def status_row(self, index: int) -> bytearray:
+        days = len(self.dates)
+        return self.statuses[index * days:(index + 1) * days]
+
+    def totals(self, index: int) -> MusterTotals:
+        row = self.status_row(index)
+        count = row.count
+        half_day, half_day_leave, half_leave = count(MUSTER_HALF_DAY), count(MUSTER_HALF_DAY_LEAVE), count(MUSTER_HALF_LEAVE)
+        week_off, holiday = count(MUSTER_WEEK_OFF), count(MUSTER_HOLIDAY)
+        present = count(MUSTER_PRESENT) + (half_day + half_day_leave) / 2
+        leave = count(MUSTER_LEAVE) + (half_day_leave + half_leave) / 2
+        return MusterTotals(
+            month_days=len(row),
+            working_days=len(row) - week_off - holiday,
+            present=present,
+            week_off=week_off,
+            holiday=holiday,
+            leave=leave,
+            lop=count(MUSTER_ABSENT) + (half_day + half_leave) / 2,
+            permission_hours=float(self.permission_hours.get(self.employees[index]['id'], 0)),
+            total=present + leave + week_off + holiday,
+        )
+
+    def rows(self, start: int = 0, stop: int = None):
+        """Yield a MusterRow (employee, status labels, totals) for employees[start:stop]."""
+        for index in range(start, len(self.employees) if stop is None else min(stop, len(self.employees))):
+            yield MusterRow(
+                employee=self.employees[index],
+                cells=[MUSTER_LABELS[code] for code in self.status_row(index)],
+                totals=self.totals(index),
+            )
+
+
+def month_dates(month_start: date) -> list[date]:
+    first = month_start.replace(day=1)
+    following = (first + timedelta(days=32)).replace(day=1)
+    return [first + timedelta(days=offset) for offset in range((following - first).days)]
+
+
+def _roster_days(site_id, employee_filter, first: date, last: date) -> dict:
+    """{(employee_id, date): is_day_off} for the winning roster assignment at the site."""
+    best = {}
+    assignments = ShiftRosterAssignment.objects.filter(site_id=site_id, date__range=(first, last), **employee_filter)
+    for row in assignments.values_list('id', 'employee_id', 'date', 'is_day_off', 'updated_at', 'roster__roster_type'):
+        rank = (row[5] == ShiftRoster.ROSTER_TYPE_WEEK, row[4], row[0])
+        key = (row[1], row[2])
+        if key not in best or rank > best[key][0]:
+            best[key] = (rank, row[3])
+    return {key: day_off for key, (_, day_off) in best.items()}
+
+
+def build_muster(site, month_start: date, employee_id=None, today: date = None) -> Muster:
+    """
+    Build the muster of site (a reference-data site) for the month of
+    month_start. Employees are everyone with attendance, a roster
+    assignment or approved leave at the site that month (or only
+    employee_id), in staff name order.
+    """
+    today = today or date.today()
+    dates = month_dates(month_start)
+    first, last = dates[0], dates[-1]
+    days = len(dates)
+    employee_filter = {'employee_id': employee_id} if employee_id else {}
+
+    attendance = list(ManualEntry.objects.filter(
+        site_id=site.id, attendance_date__range=(first, last), **employee_filter,
+    ).values_list('employee_id', 'attendance_date', 'attendance_type'))
+    roster = _roster_days(site.id, employee_filter, first, last)
+    leaves = list(LeaveEntry.objects.filter(
+        site_id=site.id, approval_status=LeaveEntry.APPROVAL_HR_APPROVED,
+        from_date__lte=last, to_date__gte=first, **employee_filter,
+    ).values_list('employee_id', 'from_date', 'to_date', 'leave_duration_type'))
+    permission_hours = dict(PermissionEntry.objects.filter(
+        site_id=site.id, status=PermissionEntry.STATUS_APPROVED,
+        permission_date__range=(first, last), **employee_filter,
+    ).values('employee_id').annotate(hours=Sum('per_hr_count')).values_list('employee_id', 'hours'))
+    holidays = site_holiday_dates(site.name, first, last)
+
+    employee_ids = {row[0] for row in attendance} | {key[0] for key in roster} | {row[0] for row in leaves}
+    employees = list(Employee.objects.filter(pk__in=employee_ids).order_by('staff_name', 'id').values(
+        'id', 'staff_id', 'staff_name', 'designation',
+    ))
+    index = {employee['id']: position for position, employee in enumerate(employees)}
+
+    # Layer 1: absent / not yet due, weekly offs
+    weekly_off_days = set(settings.WEEKLY_OFF_DAYS)
+    working = [MUSTER_ABSENT if day <= today else MUSTER_NOT_DUE for day in dates]
+    base = bytes(
+        MUSTER_WEEK_OFF if day.weekday() in weekly_off_days else working[offset]
+        for offset, day in enumerate(dates)
+    )
+    statuses = bytearray(base * len(employees))
+
+    # Layer 2: roster
+    for (employee, day), is_day_off in roster.items():
+        offset = (day - first).days
+        statuses[index[employee] * days + offset] = MUSTER_WEEK_OFF if is_day_off else working[offset]
+
+    # Layer 3: approved leave
+    for employee, from_date, to_date, duration in leaves:
+        row_start = index[employee] * days
+        half_day = duration != LeaveEntry.DURATION_FULL_DAY
+        for offset in range((max(from_date, first) - first).days, (min(to_date, last) - first).days + 1):
+            position = row_start + offset
+            if statuses[position] != MUSTER_WEEK_OFF:
+                statuses[position] = MUSTER_HALF_LEAVE if half_day and dates[offset] == from_date else MUSTER_LEAVE
+
+    # Layer 4: site holidays, one strided column write each
+    if employees:
+        holiday_column = bytes([MUSTER_HOLIDAY]) * len(employees)
+        for day in holidays:
+            statuses[(day - first).days::days] = holiday_column
+
+    # Layer 5: attendance
+    for employee, day, attendance_type in attendance:
+        position = index[employee] * days + (day - first).days
+        code = MUSTER_ATTENDANCE_CODES.get(attendance_type, MUSTER_PRESENT)
+        if code == MUSTER_HALF_DAY and statuses[position] == MUSTER_HALF_LEAVE:
+            code = MUSTER_HALF_DAY_LEAVE
+        statuses[position] = code
+
+    return Muster(site, dates, employees, statuses, permission_hours)
@@ -9,5 +9,6 @@ urlpatterns = [
     path('attendance/', views.attendance_report_list, name='attendance_report_list'),
     path('attendance/view/', views.attendance_report_view, name='attendance_report_view'),
     path('monthly/', views.monthly_report_list, name='monthly_report_list'),
+    path('monthly/export/', views.monthly_report_export, name='monthly_report_export'),
     path('tada/', views.tada_report_list, name='tada_report_list'),
 ]
@@ -1,6 +1,20 @@
 # reports/views.py
-from django.shortcuts import render
+import tempfile
+from datetime import date, datetime
+
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from django.http import FileResponse
+from django.shortcuts import redirect, render
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+from master.employee_lookup import employee_choices
+from master.reference_data import get_reference_data
+from .muster import MUSTER_TOTAL_HEADERS, build_muster
 
 
 # ==================== Reports ====================
@@ -28,10 +42,102 @@ def attendance_report_view(request):
     return render(request, 'reports/attendance_report/view.html')
 
 
+def _muster_filters(request):
+    """Parse the monthly report filters: (filters dict, site or None, month start or None, employee id or None)."""
+    filters = {
+        'month': request.GET.get('month', '').strip() or date.today().strftime('%Y-%m'),
+        'site': request.GET.get('site', '').strip(),
+        'employee': request.GET.get('employee', '').strip(),
+    }
+    try:
+        month_start = datetime.strptime(filters['month'], '%Y-%m').date()
+    except ValueError:
+        month_start = None
+    site = next((site for site in get_reference_data('sites') if str(site.id) == filters['site']), None)
+    employee_id = int(filters['employee']) if filters['employee'].isdigit() else None
+    return filters, site, month_start, employee_id
+
+
 @login_required
 def monthly_report_list(request):
-    """Reports -> Monthly Report list."""
-    return render(request, 'reports/monthly_report/list.html')
+    """Reports -> Monthly Report list: attendance muster of one site and month."""
+    filters, site, month_start, employee_id = _muster_filters(request)
+    per_page = request.GET.get('per_page', '').strip() or '50'
+    try:
+        per_page_value = max(int(per_page), 1)
+    except ValueError:
+        per_page_value = 50
+
+    muster = None
+    page_obj = None
+    rows = []
+    if filters['site'] and site is None:
+        messages.error(request, 'Selected site does not exist.')
+    elif site and month_start is None:
+        messages.error(request, 'Invalid month.')
+    elif site:
+        muster = build_muster(site, month_start, employee_id)
+        page_obj = Paginator(range(len(muster)), per_page_value).get_page(request.GET.get('page'))
+        rows = list(muster.rows(page_obj.start_index() - 1, page_obj.end_index()))
+
+    context = {
+        'sites': get_reference_data('sites'),
+        'employees': employee_choices(filters['employee']),
+        'filters': filters,
+        'muster': muster,
+        'rows': rows,
+        'page_obj': page_obj,
+        'per_page': per_page,
+        'total_headers': MUSTER_TOTAL_HEADERS,
+    }
+    return render(request, 'reports/monthly_report/list.html', context)
+
+
+@login_required
+def monthly_report_export(request):
+    """Reports -> Monthly Report: export the whole muster to Excel."""
+    filters, site, month_start, employee_id = _muster_filters(request)
+    if site is None or month_start is None:
+        messages.error(request, 'Select a site and month to export.')
+        return redirect('reports:monthly_report_list')
+    muster = build_muster(site, month_start, employee_id)
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Muster')
+    widths = [6, 14, 28, 20] + [6] * len(muster.dates) + [len(header) + 2 for header in MUSTER_TOTAL_HEADERS]
+    for col_num, width in enumerate(widths, 1):
+        ws.column_dimensions[get_column_letter(col_num)].width = width
+
+    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+    header_font = Font(bold=True, color="FFFFFF")
+    header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+    headers = ['S.No', 'EMP ID', 'Employee Name', 'Designation']
+    headers += [day.strftime('%d %a') for day in muster.dates] + MUSTER_TOTAL_HEADERS
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = header_alignment
+        header_cells.append(cell)
+    ws.append(header_cells)
+
+    for number, row in enumerate(muster.rows(), 1):
+        employee = row.employee
+        ws.append(
+            [number, employee['staff_id'], employee['staff_name'], employee['designation']]
+            + row.cells + row.totals.as_list()
+        )
+
+    output = tempfile.TemporaryFile()
+    wb.save(output)
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=f"muster_{site.name.replace(' ', '_')}_{month_start.strftime('%Y_%m')}.xlsx",
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
 
 
 @login_required
@@ -0,0 +1,88 @@
+// Employee dropdowns that load their options on demand.
+//
+// Mark a <select> with data-employee-autocomplete="<autocomplete url>". The
+// server renders only the selected employee as an option; this script hides
+// the select behind a text box, searches the endpoint as the user types and
+// writes the chosen employee back into the select (firing "change"), so forms
+// and page scripts keep reading the select as before.
+(function ($) {
+  'use strict';
+
+  function enhance(select) {
+    if (select.dataset.employeeAutocompleteReady) return;
+    select.dataset.employeeAutocompleteReady = '1';
+
+    const url = select.dataset.employeeAutocomplete;
+    const selected = select.options[select.selectedIndex];
+    const blank = select.querySelector('option[value=""]');
+
+    const input = document.createElement('input');
+    input.type = 'text';
+    input.className = 'form-control';
+    input.autocomplete = 'off';
+    input.placeholder = blank ? blank.textContent.trim() : 'Type name or staff ID';
+    input.value = selected && selected.value ? selected.textContent.trim() : '';
+    if (select.required) {
+      input.required = true;
+      select.required = false;
+    }
+    select.style.display = 'none';
+    select.insertAdjacentElement('afterend', input);
+
+    function choose(id, text) {
+      let option = select.querySelector('option[value="' + id + '"]');
+      if (!option) {
+        option = new Option(text, id);
+        select.appendChild(option);
+      }
+      if (select.value !== String(id)) {
+        select.value = String(id);
+        select.dispatchEvent(new Event('change', { bubbles: true }));
+      }
+    }
+
+    select.addEventListener('change', function () {
+      const current = select.options[select.selectedIndex];
+      input.value = current && current.value ? current.textContent.trim() : '';
+    });
+
+    $(input).autocomplete({
+      minLength: 0,
+      delay: 200,
+      source: function (request, response) {
+        $.getJSON(url, { q: request.term })
+          .done(function (data) {
+            response((data.results || []).map(function (emp) {
+              return { label: emp.text, value: emp.text, id: emp.id };
+            }));
+          })
+          .fail(function () { response([]); });
+      },
+      select: function (event, ui) {
+        choose(ui.item.id, ui.item.label);
+      },
+    }).on('focus', function () {
+      if (!input.value) $(input).autocomplete('search', '');
+    }).on('input', function () {
+      if (!input.value && select.value) {
+        select.value = '';
+        select.dispatchEvent(new Event('change', { bubbles: true }));
+      }
+    });
+  }
+
+  // Set an enhanced select from page scripts (e.g. when editing a row that was
+  // added client-side), adding the option first if it was never loaded.
+  window.setEmployeeSelect = function (select, id, text) {
+    id = id ? String(id) : '';
+    if (id && !select.querySelector('option[value="' + id + '"]')) {
+      select.appendChild(new Option(text || id, id));
+    }
+    select.value = id;
+    select.dispatchEvent(new Event('change', { bubbles: true }));
+  };
+
+  $(function () {
+    document.querySelectorAll('select[data-employee-autocomplete]').forEach(enhance);
+  });
+})(jQuery);
@@ -0,0 +1,285 @@
+// Roster grid editor: loads rows lazily and posts only the cells that changed.
+//
+// The table (data-roster-grid) starts empty. Employee rows are fetched from
+// the master:shift_roster_grid endpoint one window at a time, and only the
+// rows scrolled into view are rendered, so a site with thousands of staff
+// opens as fast as a small one. Edits are kept in memory (rows leave the
+// DOM as they scroll out) and on submit are serialised into the hidden
+// roster_changes field as
+//   {"sites": {"<employee>": "<site>"}, "cells": [{"employee", "date", "shift", "day_off"}]}
+// and applied server-side by master.roster.parse_roster_changes. A default
+// shift prefill is posted as explicit cells of the rows that were loaded,
+// so rows the user never saw are not written.
+//
+// Table attributes: data-url (grid endpoint), data-roster (roster id, blank
+// when new), data-period ("week" = 7 days from the start date, "month" = to
+// the end of its month), data-from-input / data-site-input (ids of the
+// period start and roster site fields).
+(function () {
+  'use strict';
+
+  const PAGE_SIZE = 50;
+  const BUFFER_ROWS = 10;
+  const DEFAULT_ROW_HEIGHT = 92;
+
+  function parseDate(value) {
+    const parts = (value || '').split('-').map(Number);
+    return parts.length === 3 && parts.every(Boolean) ? new Date(parts[0], parts[1] - 1, parts[2]) : null;
+  }
+
+  function isoDate(day) {
+    const pad = function (n) { return String(n).padStart(2, '0'); };
+    return day.getFullYear() + '-' + pad(day.getMonth() + 1) + '-' + pad(day.getDate());
+  }
+
+  function escapeHtml(value) {
+    return String(value).replace(/[&<>"']/g, function (c) {
+      return { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' }[c];
+    });
+  }
+
+  function RosterGrid(table) {
+    this.table = table;
+    this.container = table.closest('[data-roster-editor]');
+    this.viewport = this.container.querySelector('[data-roster-viewport]');
+    this.field = this.container.querySelector('input[name="roster_changes"]');
+    this.siteFilter = this.container.querySelector('[data-roster-filter="site"]');
+    this.searchFilter = this.container.querySelector('[data-roster-filter="q"]');
+    this.counter = this.container.querySelector('[data-roster-count]');
+    this.siteOptions = this.container.querySelector('template[data-roster-site-options]').innerHTML;
+    this.fromInput = document.getElementById(table.dataset.fromInput);
+    this.siteInput = document.getElementById(table.dataset.siteInput);
+
+    this.days = [];
+    this.rows = [];           // loaded employee rows by position; undefined until fetched
+    this.pages = {};          // page index -> true once requested
+    this.total = 0;
+    this.generation = 0;      // bumped on reload so late responses are dropped
+    this.rowHeight = DEFAULT_ROW_HEIGHT;
+    this.rendered = null;     // [start, end) of the rows in the DOM
+    this.edits = new Map();   // "employee|date" -> {shift, day_off}
+    this.siteEdits = new Map(); // employee -> site
+    this.defaultShift = '';
+
+    this.bind();
+  }
+
+  RosterGrid.prototype.bind = function () {
+    const grid = this;
+    let scheduled = false;
+    this.viewport.addEventListener('scroll', function () {
+      if (scheduled) return;
+      scheduled = true;
+      window.requestAnimationFrame(function () {
+        scheduled = false;
+        grid.render();
+      });
+    });
+
+    const tbody = this.table.tBodies[0];
+    tbody.addEventListener('input', function (event) { grid.recordEdit(event.target); });
+    tbody.addEventListener('change', function (event) { grid.recordEdit(event.target); });
+
+    let searchTimer = null;
+    this.siteFilter.addEventListener('change', function () { grid.reload(); });
+    this.searchFilter.addEventListener('input', function () {
+      clearTimeout(searchTimer);
+      searchTimer = setTimeout(function () { grid.reload(); }, 250);
+    });
+    this.searchFilter.addEventListener('keydown', function (event) {
+      if (event.key === 'Enter') event.preventDefault();
+    });
+
+    this.table.closest('form').addEventListener('submit', function () {
+      grid.field.value = JSON.stringify(grid.changes());
+    });
+  };
+
+  RosterGrid.prototype.period = function () {
+    const start = parseDate(this.fromInput.value);
+    if (!start) return [];
+    const end = this.table.dataset.period === 'month'
+      ? new Date(start.getFullYear(), start.getMonth() + 1, 0)
+      : new Date(start.getFullYear(), start.getMonth(), start.getDate() + 6);
+    const weekday = this.table.dataset.period === 'month' ? 'short' : 'long';
+    const days = [];
+    for (let day = new Date(start); day <= end; day.setDate(day.getDate() + 1)) {
+      days.push({ key: isoDate(day), label: day.toLocaleDateString('en-US', { weekday: weekday }) });
+    }
+    return days;
+  };
+
+  // Reset the loaded rows (after a filter, period or site change) and fetch
+  // the first window. Pass {defaultShift: name} to prefill empty working days.
+  RosterGrid.prototype.reload = function (options) {
+    if (options && 'defaultShift' in options) this.defaultShift = options.defaultShift || '';
+    this.days = this.period();
+    const inPeriod = new Set(this.days.map(function (day) { return day.key; }));
+    this.edits.forEach(function (_, key) {
+      if (!inPeriod.has(key.split('|')[1])) this.edits.delete(key);
+    }, this);
+
+    this.generation += 1;
+    this.rows = [];
+    this.pages = {};
+    this.total = 0;
+    this.rendered = null;
+    this.viewport.scrollTop = 0;
+    this.renderHeader();
+    this.table.tBodies[0].innerHTML = '';
+    if (this.days.length) this.fetchPage(0);
+  };
+
+  RosterGrid.prototype.fetchPage = function (page) {
+    if (this.pages[page]) return;
+    this.pages[page] = true;
+    const grid = this;
+    const generation = this.generation;
+    const params = new URLSearchParams({
+      roster: this.table.dataset.roster || '',
+      from_date: this.days[0].key,
+      to_date: this.days[this.days.length - 1].key,
+      default_site: this.siteInput.value || '',
+      site: this.siteFilter.value,
+      q: this.searchFilter.value.trim(),
+      offset: page * PAGE_SIZE,
+      limit: PAGE_SIZE,
+    });
+    fetch(this.table.dataset.url + '?' + params.toString(), { credentials: 'same-origin' })
+      .then(function (response) { return response.json(); })
+      .then(function (data) {
+        if (generation !== grid.generation) return;
+        if (data.status !== 1) {
+          grid.counter.textContent = data.msg || 'Could not load the roster.';
+          return;
+        }
+        grid.total = data.total;
+        data.employees.forEach(function (employee, index) { grid.rows[data.offset + index] = employee; });
+        grid.counter.textContent = data.total + ' employee' + (data.total === 1 ? '' : 's');
+        grid.rendered = null;
+        grid.render();
+      })
+      .catch(function () {
+        if (generation !== grid.generation) return;
+        delete grid.pages[page];
+        grid.counter.textContent = 'Could not load the roster.';
+      });
+  };
+
+  RosterGrid.prototype.renderHeader = function () {
+    const cells = ['<th>Name</th>', '<th>Site</th>'].concat(this.days.map(function (day) {
+      return '<th>' + day.key + '<br>' + day.label + '</th>';
+    }));
+    this.table.tHead.innerHTML = '<tr>' + cells.join('') + '</tr>';
+  };
+
+  RosterGrid.prototype.render = function () {
+    if (!this.days.length) return;
+    const visible = Math.ceil(this.viewport.clientHeight / this.rowHeight) || 10;
+    const start = Math.max(0, Math.floor(this.viewport.scrollTop / this.rowHeight) - BUFFER_ROWS);
+    const end = Math.min(this.total, start + visible + 2 * BUFFER_ROWS);
+    for (let page = Math.floor(start / PAGE_SIZE); page * PAGE_SIZE < end; page++) this.fetchPage(page);
+    if (this.rendered && this.rendered[0] === start && this.rendered[1] === end) return;
+
+    const columns = this.days.length + 2;
+    const html = [this.spacer(start * this.rowHeight, columns)];
+    for (let index = start; index < end; index++) {
+      html.push(this.rows[index] ? this.rowHtml(this.rows[index]) : '<tr style="height:' + this.rowHeight +
+        'px"><td colspan="' + columns + '" class="text-muted">Loading...</td></tr>');
+    }
+    html.push(this.spacer((this.total - end) * this.rowHeight, columns));
+    this.table.tBodies[0].innerHTML = html.join('');
+    this.rendered = [start, end];
+
+    const row = this.table.tBodies[0].querySelector('tr[data-employee]');
+    if (row && row.offsetHeight && Math.abs(row.offsetHeight - this.rowHeight) > 1) {
+      this.rowHeight = row.offsetHeight;
+      this.rendered = null;
+      this.render();
+    }
+  };
+
+  RosterGrid.prototype.spacer = function (height, columns) {
+    return height > 0 ? '<tr aria-hidden="true"><td colspan="' + columns + '" style="height:' + height +
+      'px;padding:0;border:0;"></td></tr>' : '';
+  };
+
+  // Value a cell had when loaded: its saved assignment, else the default shift.
+  RosterGrid.prototype.baseline = function (employee, key) {
+    const saved = employee.cells[key];
+    if (saved) return { shift: saved.shift, day_off: saved.day_off };
+    return { shift: this.defaultShift, day_off: false };
+  };
+
+  RosterGrid.prototype.rowHtml = function (employee) {
+    const grid = this;
+    const site = this.siteEdits.get(String(employee.id)) || employee.site;
+    const siteSelect = '<select class="form-select roster-site" data-employee="' + employee.id + '">' +
+      this.siteOptions.replace('value="' + site + '"', 'value="' + site + '" selected') + '</select>';
+    const cells = this.days.map(function (day) {
+      const value = grid.edits.get(employee.id + '|' + day.key) || grid.baseline(employee, day.key);
+      return '<td class="roster-cell" data-employee="' + employee.id + '" data-date="' + day.key + '">' +
+        '<input type="text" class="form-control roster-shift" value="' + escapeHtml(value.shift) + '">' +
+        '<input type="checkbox" class="mt-1 roster-dayoff"' + (value.day_off ? ' checked' : '') + '></td>';
+    });
+    return '<tr data-employee="' + employee.id + '" style="background-color:#f2f2f2; color:#146c43; font-weight:500;">' +
+      '<td>' + escapeHtml(employee.name) + '<br><small style="color:#146c43;font-weight:500;">- ' +
+      escapeHtml(employee.designation) + '</small></td><td>' + siteSelect + '</td>' + cells.join('') + '</tr>';
+  };
+
+  RosterGrid.prototype.employeeRow = function (employeeId) {
+    return this.rows.find(function (row) { return row && String(row.id) === String(employeeId); });
+  };
+
+  RosterGrid.prototype.recordEdit = function (target) {
+    if (target.classList.contains('roster-site')) {
+      const employee = this.employeeRow(target.dataset.employee);
+      if (employee && target.value !== employee.site) this.siteEdits.set(target.dataset.employee, target.value);
+      else this.siteEdits.delete(target.dataset.employee);
+      return;
+    }
+    const cell = target.closest('td.roster-cell');
+    if (!cell) return;
+    const employee = this.employeeRow(cell.dataset.employee);
+    const key = cell.dataset.employee + '|' + cell.dataset.date;
+    const value = {
+      shift: cell.querySelector('.roster-shift').value.trim(),
+      day_off: cell.querySelector('.roster-dayoff').checked,
+    };
+    const original = this.baseline(employee, cell.dataset.date);
+    if (value.shift === (original.shift || '').trim() && value.day_off === original.day_off) this.edits.delete(key);
+    else this.edits.set(key, value);
+  };
+
+  RosterGrid.prototype.changes = function () {
+    const cells = [];
+    const sites = {};
+    this.edits.forEach(function (value, key) {
+      const parts = key.split('|');
+      cells.push({ employee: parts[0], date: parts[1], shift: value.shift, day_off: value.day_off });
+      const employee = this.employeeRow(parts[0]);
+      if (employee && employee.site) sites[parts[0]] = employee.site;
+    }, this);
+    // Prefilled days of the loaded rows that were left as shown
+    if (this.defaultShift) {
+      this.rows.forEach(function (employee) {
+        this.days.forEach(function (day) {
+          if (employee.cells[day.key] || this.edits.has(employee.id + '|' + day.key)) return;
+          cells.push({ employee: String(employee.id), date: day.key, shift: this.defaultShift, day_off: false });
+          if (employee.site) sites[employee.id] = sites[employee.id] || employee.site;
+        }, this);
+      }, this);
+    }
+    this.siteEdits.forEach(function (site, employee) { sites[employee] = site; });
+    return { sites: sites, cells: cells };
+  };
+
+  function init() {
+    document.querySelectorAll('table[data-roster-grid]').forEach(function (table) {
+      table.rosterGrid = new RosterGrid(table);
+    });
+  }
+
+  if (document.readyState === 'loading') document.addEventListener('DOMContentLoaded', init);
+  else init();
+})();